@@ -0,0 +1 @@
+"""Benchmarks for intake-sqlite read paths. Run them from the repository root."""
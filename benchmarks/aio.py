@@ -0,0 +1,66 @@
+"""Compare reading many catalog entries one at a time with reading them concurrently.
+
+Every table of a catalog is read from a local database, and from the same database
+read lazily from a local HTTP server with per-request latency, where reads spend most
+of their time waiting for range requests. Run with::
+
+    python -m benchmarks.aio --tables 30 --rows 100000
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from benchmarks.common import http_server, make_parser, make_tables, print_table, timed
+from intake_sqlite import SQLiteCatalog
+from intake_sqlite.aio import set_max_workers
+
+logger = logging.getLogger(__name__)
+
+
+def compare(label: str, urlpath: str, **kwargs: Any) -> None:
+    """Print the time taken to read every table, one at a time and concurrently."""
+    # Find the primary keys of all the tables, and warm any caches.
+    cat = SQLiteCatalog(urlpath, schema_cache=False, **kwargs)
+    asyncio.run(cat.read_many_async())
+
+    def sequential() -> None:
+        cat = SQLiteCatalog(urlpath, schema_cache=False, **kwargs)
+        for name in cat:
+            cat[name].read()
+
+    def concurrent() -> None:
+        cat = SQLiteCatalog(urlpath, schema_cache=False, **kwargs)
+        asyncio.run(cat.read_many_async())
+
+    results = [("sequential", timed(sequential))]
+    for workers in (4, 16):
+        set_max_workers(workers)
+        results.append((f"{workers} threads", timed(concurrent)))
+    print_table(results, label=label)
+
+
+def main() -> None:
+    """Time sequential and concurrent reads of every table in a catalog."""
+    parser = make_parser(__doc__)
+    parser.add_argument("--tables", type=int, default=30)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_tables(Path(tmp) / "many.sqlite", args.tables, args.rows)
+        compare("local", str(path))
+        with http_server(Path(tmp), latency=args.latency_ms / 1e3) as base_url:
+            compare(
+                "remote",
+                f"{base_url}/many.sqlite",
+                storage_options={"lazy": True},
+            )
+
+
+if __name__ == "__main__":
+    main()
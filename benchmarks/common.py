@@ -0,0 +1,247 @@
+"""Shared helpers for benchmarks: synthetic databases, timing and a simulated server."""
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import partial
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from tests.conftest import RangeRequestHandler
+
+logger = logging.getLogger(__name__)
+
+SHAPES: dict[str, dict[str, int]] = {
+    "narrow_numeric": {"ints": 2, "floats": 2, "texts": 0},
+    "narrow_text": {"ints": 1, "texts": 3, "text_bytes": 32},
+    "wide_numeric": {"ints": 20, "floats": 20, "texts": 0},
+    "wide_text": {"ints": 5, "floats": 5, "texts": 20, "text_bytes": 16},
+}
+"""Keyword arguments for :func:`make_db` describing typical shapes of tables."""
+
+
+def make_db(
+    path: Path,
+    rows: int,
+    ints: int = 0,
+    floats: int = 0,
+    texts: int = 1,
+    text_bytes: int = 100,
+) -> Path:
+    """Create a database with one table of random data, if it doesn't exist already.
+
+    The table ``t`` has an ``INTEGER PRIMARY KEY`` named ``id`` running from 1 to
+    ``rows``, followed by the requested numbers of integer, floating point and text
+    columns named ``i0``, ``f0``, ``t0`` etc.
+    """
+    if path.exists():
+        return path
+    columns = (
+        [f"i{n} INTEGER" for n in range(ints)]
+        + [f"f{n} REAL" for n in range(floats)]
+        + [f"t{n} TEXT" for n in range(texts)]
+    )
+    values = (
+        ["abs(random()) % 1000000"] * ints
+        + ["abs(random()) / 9.2e18"] * floats
+        + [f"hex(randomblob({max(text_bytes // 2, 1)}))"] * texts
+    )
+    with sqlite3.connect(path) as con:
+        con.execute(f"CREATE TABLE t (id INTEGER PRIMARY KEY, {', '.join(columns)})")
+        con.execute(
+            "WITH RECURSIVE s(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM s "
+            f"WHERE i < ?) INSERT INTO t SELECT i, {', '.join(values)} FROM s",
+            (rows,),
+        )
+    con.close()
+    return path
+
+
+def make_tables(path: Path, tables: int, rows: int = 0) -> Path:
+    """Create a database with many tables of random data, if it doesn't exist already.
+
+    Each table ``t0``, ``t1`` etc. has an ``INTEGER PRIMARY KEY`` named ``id``, and
+    integer, floating point and text columns named ``x``, ``y`` and ``z``, with an
+    index on ``x``.
+    """
+    if path.exists():
+        return path
+    with sqlite3.connect(path) as con:
+        for n in range(tables):
+            con.execute(
+                f"CREATE TABLE t{n} (id INTEGER PRIMARY KEY, x INTEGER, y REAL, z TEXT)"
+            )
+            con.execute(f"CREATE INDEX t{n}_x ON t{n} (x)")
+            con.execute(
+                "WITH RECURSIVE s(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM s "
+                f"WHERE i < ?) INSERT INTO t{n} SELECT i, abs(random()) % 1000, "
+                "abs(random()) / 9.2e18, hex(randomblob(8)) FROM s",
+                (rows,),
+            )
+    con.close()
+    return path
+
+
+def make_parser(doc: str) -> argparse.ArgumentParser:
+    """An argument parser for a benchmark script, described by its docstring."""
+    return argparse.ArgumentParser(
+        description=doc.splitlines()[0],
+        epilog="\n".join(doc.splitlines()[1:]),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+
+def timed(func: Callable[[], Any], repeats: int = 1) -> float:
+    """The fastest of several calls of a function, in seconds.
+
+    Taking the fastest call discounts one-off costs, like disk cache misses.
+    """
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def print_table(
+    results: list[tuple[str, float]], label: str = "strategy", size: int = 0
+) -> None:
+    """Print the time taken by each alternative, and its speedup over the first.
+
+    Args:
+        results: The name of each alternative, and the seconds it took.
+        label: Heading for the column of names.
+        size: Bytes processed by each alternative. If given, throughput is shown too.
+    """
+    width = max(len(label), *(len(name) for name, _ in results)) + 2
+    print(
+        f"{label:<{width}}{'seconds':>10}"
+        + (f"{'MiB/s':>10}" if size else "")
+        + f"{'speedup':>10}"
+    )
+    baseline = results[0][1]
+    for name, seconds in results:
+        print(
+            f"{name:<{width}}{seconds:>10.3f}"
+            + (f"{size / 2**20 / seconds:>10.1f}" if size else "")
+            + f"{baseline / seconds:>9.2f}x"
+        )
+
+
+def _measure_child(queue: Any, func: Callable[..., Any], args: tuple[Any, ...]) -> None:
+    import resource
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((seconds, baseline, peak, result))
+
+
+def measure(func: Callable[..., Any], *args: Any) -> tuple[float, float, Any]:
+    """Run a function in a fresh process, measuring its wall time and peak memory.
+
+    The function must be importable, and the modules it needs should already be
+    imported by the module it's defined in, so that importing them isn't measured.
+
+    Returns:
+        Elapsed seconds, the increase in peak resident memory in MiB during the call,
+        and the function's return value.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure_child, args=(queue, func, args))
+    proc.start()
+    seconds, baseline, peak, result = queue.get()
+    proc.join()
+    # ru_maxrss is in KiB on Linux, but bytes on macOS.
+    scale = 2**20 if sys.platform == "darwin" else 2**10
+    return seconds, (peak - baseline) / scale, result
+
+
+def record_throughput(benchmark: Any, rows: int | None = None, size: int = 0) -> None:
+    """Add rows and MiB per second to the saved results of a pytest-benchmark run."""
+    seconds = benchmark.stats.stats.mean
+    if rows is not None:
+        benchmark.extra_info["rows_per_second"] = rows / seconds
+    if size:
+        benchmark.extra_info["mib_per_second"] = size / 2**20 / seconds
+
+
+def record_peak_memory(benchmark: Any, func: Callable[..., Any], *args: Any) -> None:
+    """Add the peak memory used by one call of a function to a benchmark's results.
+
+    Peak resident memory is a high-water mark for the whole process, so the call is
+    made once more in a fresh process, using :func:`measure`. Small reads may fit in
+    memory already used by imports, and so show no increase at all.
+    """
+    _, peak, _ = measure(func, *args)
+    benchmark.extra_info["peak_rss_increase_mib"] = peak
+
+
+class _ThrottledWriter:
+    """Limit the rate at which bytes are written to a socket."""
+
+    def __init__(self, raw: Any, bandwidth: float) -> None:
+        self.raw = raw
+        self.bandwidth = bandwidth
+
+    def write(self, data: bytes) -> None:
+        view = memoryview(data)
+        step = 2**16
+        for i in range(0, len(view), step):
+            started = time.perf_counter()
+            self.raw.write(view[i : i + step])
+            elapsed = time.perf_counter() - started
+            time.sleep(max(0.0, len(view[i : i + step]) / self.bandwidth - elapsed))
+
+
+class ThrottledRangeRequestHandler(RangeRequestHandler):
+    """Emulate a remote server, with per-request latency and per-stream bandwidth."""
+
+    latency: float = 0.0
+    bandwidth: float = float("inf")
+
+    def copyfile(self, source: Any, outputfile: Any) -> None:
+        """Delay the start of the response, and throttle its transfer rate."""
+        time.sleep(self.latency)
+        if self.bandwidth != float("inf"):
+            outputfile = _ThrottledWriter(outputfile, self.bandwidth)
+        super().copyfile(source, outputfile)
+
+
+@contextmanager
+def http_server(
+    root: Path, latency: float = 0.0, bandwidth: float = float("inf")
+) -> Iterator[str]:
+    """Serve a directory over HTTP with range support, yielding the base URL.
+
+    Args:
+        root: Directory to serve.
+        latency: Seconds to wait before sending each response body.
+        bandwidth: Maximum bytes per second sent on each connection.
+    """
+    handler_class = type(
+        "Handler",
+        (ThrottledRangeRequestHandler,),
+        {"latency": latency, "bandwidth": bandwidth},
+    )
+    handler = partial(handler_class, directory=str(root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
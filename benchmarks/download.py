@@ -0,0 +1,72 @@
+"""Compare the simplecache download path to parallel multi-range downloads.
+
+The database is served by a local HTTP server that imposes per-request latency and a
+per-connection bandwidth limit, to stand in for a remote object store. Run with::
+
+    python -m benchmarks.download --size-mb 128 --bandwidth-mb 16
+"""
+from __future__ import annotations
+
+import logging
+import tempfile
+from pathlib import Path
+
+import fsspec
+
+from benchmarks.common import http_server, make_db, make_parser, print_table, timed
+from intake_sqlite.download import parallel_download
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    """Time each download strategy and print a summary table."""
+    parser = make_parser(__doc__)
+    parser.add_argument("--size-mb", type=int, default=128)
+    parser.add_argument("--bandwidth-mb", type=float, default=16.0)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--chunk-mb", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "root"
+        root.mkdir()
+        db = make_db(root / "bench.sqlite", rows=args.size_mb * 2**20 // 110)
+        size = db.stat().st_size
+        with http_server(
+            root, latency=args.latency_ms / 1e3, bandwidth=args.bandwidth_mb * 2**20
+        ) as base_url:
+            url = f"{base_url}/bench.sqlite"
+            fs, path = fsspec.core.url_to_fs(url)
+            results = [
+                (
+                    "simplecache",
+                    timed(
+                        lambda: fsspec.open_local(
+                            "simplecache::" + url,
+                            simplecache={
+                                "cache_storage": str(Path(tmp) / "simplecache")
+                            },
+                        )
+                    ),
+                )
+            ]
+            for workers in args.workers:
+                seconds = timed(
+                    lambda: parallel_download(
+                        fs,
+                        path,
+                        Path(tmp) / f"parallel-{workers}.sqlite",
+                        max_workers=workers,
+                        chunk_size=args.chunk_mb * 2**20,
+                    )
+                )
+                results.append((f"parallel x{workers}", seconds))
+
+    print(f"Downloaded {size / 2**20:.1f} MiB per run")
+    print_table(results, size=size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Measure how long importing the package, and using its drivers, takes.
+
+Each statement runs in a fresh interpreter with ``python -X importtime``, which reports
+the time spent importing every module. Importing the package, or listing Intake's
+drivers, shouldn't import any of the package's dependencies. Run with::
+
+    python -m benchmarks.importtime --repeat 5 --fail-above 50
+
+and the run fails if importing the package takes longer than the given number of
+milliseconds, so it can be used to catch regressions.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import subprocess  # nosec: B404
+import sys
+
+from benchmarks.common import make_parser
+
+logger = logging.getLogger(__name__)
+
+STATEMENTS = {
+    "import intake_sqlite": "import intake_sqlite",
+    "list drivers": "import intake; sorted(intake.registry)",
+    "resolve a driver": "import intake; intake.registry['sqlite']",
+    "import SQLiteSource": "from intake_sqlite import SQLiteSource",
+}
+"""Statements to time, by label."""
+
+HEAVY = ("dask", "fsspec", "intake_sql", "pandas", "pkg_resources", "sqlalchemy")
+"""Packages that importing ``intake_sqlite`` alone shouldn't import."""
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def import_times(statement: str) -> dict[str, int]:
+    """Run a statement in a new interpreter, finding the time to import each module.
+
+    Returns:
+        The cumulative time taken to import each top level module, in microseconds,
+        including those imported by the interpreter as it starts, like :mod:`site`.
+    """
+    result = subprocess.run(  # nosec: B603
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match and not match.group(3):
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def main() -> None:
+    """Time each statement, and list the slowest packages imported by the drivers."""
+    parser = make_parser(__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument(
+        "--fail-above",
+        type=float,
+        default=None,
+        help="Exit with an error if importing the package takes more milliseconds.",
+    )
+    args = parser.parse_args()
+
+    # Modules imported by every interpreter as it starts aren't counted.
+    startup = set(import_times("pass"))
+    print(f"{'statement':<24}{'best ms':>10}{'packages':>10}")
+    best: dict[str, dict[str, int]] = {}
+    for label, statement in STATEMENTS.items():
+        runs = [
+            {k: v for k, v in import_times(statement).items() if k not in startup}
+            for _ in range(args.repeat)
+        ]
+        best[label] = min(runs, key=lambda times: sum(times.values()))
+        ms = sum(best[label].values()) / 1000
+        print(f"{label:<24}{ms:>10.1f}{len(best[label]):>10}")
+
+    print(f"\n{'slowest imports of SQLiteSource':<40}{'ms':>10}")
+    source = best["import SQLiteSource"]
+    for module, us in sorted(source.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"{module:<40}{us / 1000:>10.1f}")
+    package = best["import intake_sqlite"]
+    heavy = sorted(set(HEAVY) & set(package))
+    if heavy:
+        print(f"\nimport intake_sqlite imported: {', '.join(heavy)}")
+    ms = sum(package.values()) / 1000
+    if args.fail_above is not None and (heavy or ms > args.fail_above):
+        sys.exit(f"import intake_sqlite took {ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare plain SQLite URLs with read-only, immutable URLs and tuned PRAGMAs.
+
+Times a sequential scan of a whole table, many indexed point lookups, and a
+partitioned dask read, each with a plain ``sqlite:///`` URL and with the URL returned
+by :func:`intake_sqlite.urlpath_to_sqliteurl` for a database that's immutable, like
+a downloaded copy. Run with::
+
+    python -m benchmarks.pragmas --rows 1000000
+"""
+from __future__ import annotations
+
+import logging
+import random
+import tempfile
+from contextlib import closing
+from pathlib import Path
+
+import dask.dataframe as dd
+
+from benchmarks.common import make_db, make_parser, print_table, timed
+from intake_sqlite import urlpath_to_sqliteurl
+from intake_sqlite.connection import connect
+
+logger = logging.getLogger(__name__)
+
+
+def scan(url: str, rows: int) -> None:
+    """Read every row of the table in order."""
+    with closing(connect(url)) as con:
+        for _ in con.execute("SELECT * FROM t"):
+            pass
+
+
+def lookups(url: str, rows: int, count: int = 20_000) -> None:
+    """Look up randomly chosen rows by their primary key, one query at a time."""
+    ids = random.Random(0).choices(range(1, rows + 1), k=count)  # nosec: B311
+    with closing(connect(url)) as con:
+        for i in ids:
+            con.execute("SELECT * FROM t WHERE id = ?", (i,)).fetchone()
+
+
+def reconnects(url: str, rows: int, count: int = 2_000) -> None:
+    """Look up rows by their primary key, opening a new connection for each one."""
+    ids = random.Random(0).choices(range(1, rows + 1), k=count)  # nosec: B311
+    for i in ids:
+        with closing(connect(url)) as con:
+            con.execute("SELECT * FROM t WHERE id = ?", (i,)).fetchone()
+
+
+def partitioned(url: str, rows: int) -> None:
+    """Read the table with dask, in 8 partitions using the threaded scheduler."""
+    dd.read_sql_table("t", url, "id", npartitions=8).compute(scheduler="threads")
+
+
+def main() -> None:
+    """Time each workload with both URLs and print a summary table."""
+    parser = make_parser(__doc__)
+    parser.add_argument("--rows", type=int, default=10**6)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_db(Path(tmp) / "t.sqlite", args.rows, ints=4, floats=4, texts=2)
+        urls = {
+            "plain": f"sqlite:///{path}",
+            "tuned": urlpath_to_sqliteurl(str(path), {"immutable": True}),
+        }
+        for func in (scan, lookups, reconnects, partitioned):
+            results = [
+                (name, timed(lambda: func(url, args.rows), args.repeats))
+                for name, url in urls.items()
+            ]
+            print_table(results, label=func.__name__)
+
+
+if __name__ == "__main__":
+    main()
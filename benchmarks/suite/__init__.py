@@ -0,0 +1 @@
+"""A pytest-benchmark suite covering the main read paths, for tracking regressions."""
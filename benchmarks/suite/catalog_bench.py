@@ -0,0 +1,37 @@
+"""Benchmark opening catalogs of databases with many tables."""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from benchmarks.common import make_tables
+from intake_sqlite import SQLiteCatalog
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture(scope="module", params=[10, 100, 1000])
+def many_tables(request: Any, db_dir: Path) -> Path:
+    """A database with the given number of tables."""
+    return make_tables(db_dir / f"tables-{request.param}.sqlite", request.param)
+
+
+@pytest.mark.parametrize("schema_cache", ["cold", "warm"])
+def test_catalog_open(
+    benchmark: Any, many_tables: Path, tmp_path: Path, schema_cache: str
+) -> None:
+    """Open a catalog and describe one of its entries."""
+    cache_dir = str(tmp_path / "schema")
+    if schema_cache == "warm":
+        SQLiteCatalog(str(many_tables), schema_cache=cache_dir)["t1"].describe()
+
+    def open_catalog() -> int:
+        options: Any = cache_dir if schema_cache == "warm" else False
+        cat = SQLiteCatalog(str(many_tables), schema_cache=options)
+        cat["t1"].describe()
+        return len(list(cat))
+
+    assert benchmark(open_catalog) > 0  # nosec: B101
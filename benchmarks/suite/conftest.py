@@ -0,0 +1,89 @@
+"""Fixtures and command line options for the benchmark suite.
+
+Synthetic databases are generated the first time they're needed, and kept in a
+persistent directory so that later runs, which are compared against earlier ones,
+don't have to generate them again.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from benchmarks.common import SHAPES, http_server, make_db
+from intake_sqlite.cache import default_cache_dir
+from intake_sqlite.pool import dispose
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCALES = "1e4,1e5"
+
+
+def pytest_addoption(parser: Any) -> None:
+    """Choose the sizes and shapes of the tables to benchmark."""
+    group = parser.getgroup("intake-sqlite benchmarks")
+    group.addoption(
+        "--scales",
+        default=DEFAULT_SCALES,
+        help="Comma separated numbers of rows in the benchmark tables, e.g. 1e4,1e6,1e8.",
+    )
+    group.addoption(
+        "--shapes",
+        default=",".join(SHAPES),
+        help=f"Comma separated shapes of the benchmark tables, from {list(SHAPES)}.",
+    )
+    group.addoption(
+        "--db-dir",
+        default=str(default_cache_dir() / "benchmarks"),
+        help="Directory in which generated databases are kept between runs.",
+    )
+
+
+def _option(config: Any, name: str, default: str) -> str:
+    # Options are only registered when the suite's directory is given to pytest.
+    return str(config.getoption(name, default=default))
+
+
+def pytest_generate_tests(metafunc: Any) -> None:
+    """Run benchmarks that use a table once for each selected size and shape."""
+    if "rows" in metafunc.fixturenames:
+        scales = _option(metafunc.config, "scales", DEFAULT_SCALES)
+        rows = [int(float(s)) for s in scales.split(",")]
+        metafunc.parametrize("rows", rows, ids=[f"{r:.0e}" for r in rows])
+    if "shape" in metafunc.fixturenames:
+        shapes = _option(metafunc.config, "shapes", ",".join(SHAPES)).split(",")
+        unknown = set(shapes) - set(SHAPES)
+        if unknown:
+            raise ValueError(f"Unknown benchmark table shapes: {unknown}")
+        metafunc.parametrize("shape", shapes)
+
+
+@pytest.fixture(scope="session")
+def db_dir(pytestconfig: Any) -> Path:
+    """Directory in which generated databases are kept."""
+    path = Path(
+        _option(pytestconfig, "db_dir", str(default_cache_dir() / "benchmarks"))
+    )
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@pytest.fixture()
+def database(db_dir: Path, rows: int, shape: str) -> Iterator[Path]:
+    """A database with a table ``t`` of the selected size and shape."""
+    path = make_db(db_dir / f"{shape}-{rows}.sqlite", rows, **SHAPES[shape])
+    yield path
+    # Don't let idle connections to one database hold its pages while reading others.
+    dispose()
+
+
+@pytest.fixture(scope="session")
+def remote_db(tmp_path_factory: pytest.TempPathFactory) -> Iterator[tuple[str, int]]:
+    """A database of about 64 MiB served over HTTP, and its size in bytes."""
+    root = tmp_path_factory.mktemp("http_root")
+    path = make_db(root / "remote.sqlite", 2**19, texts=1, text_bytes=100)
+    with http_server(root) as base_url:
+        yield f"{base_url}/remote.sqlite", path.stat().st_size
@@ -0,0 +1,64 @@
+"""Benchmark partitioned reads with dask."""
+from __future__ import annotations
+
+import logging
+import math
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from benchmarks.common import record_peak_memory, record_throughput
+from intake_sqlite import SQLiteSourceAutoPartition, SQLiteSourceManualPartition
+
+logger = logging.getLogger(__name__)
+
+ROWS_PER_PARTITION = 100_000
+
+
+def read_auto(path: str, partitioning: str) -> int:
+    """Read table ``t`` in partitions of the primary key, returning the row count."""
+    src = SQLiteSourceAutoPartition(
+        path,
+        "t",
+        index="id",
+        partitioning=partitioning,
+        rows_per_partition=ROWS_PER_PARTITION,
+    )
+    return len(src.to_dask().compute(scheduler="threads"))
+
+
+def read_manual(path: str, rows: int) -> int:
+    """Read table ``t`` in explicitly bounded partitions, returning the row count."""
+    bounds = range(0, rows + ROWS_PER_PARTITION, ROWS_PER_PARTITION)
+    src = SQLiteSourceManualPartition(
+        path,
+        "SELECT * FROM t",
+        where_values=[
+            f"WHERE id > {lower} AND id <= {upper}"
+            for lower, upper in zip(bounds[:-1], bounds[1:])
+        ],
+    )
+    return len(src.to_dask().compute(scheduler="threads"))
+
+
+@pytest.mark.parametrize("partitioning", ["uniform", "balanced"])
+def test_auto_partition(
+    benchmark: Any, database: Path, rows: int, partitioning: str
+) -> None:
+    """Read a whole table with SQLiteSourceAutoPartition."""
+    args = (str(database), partitioning)
+    result = benchmark.pedantic(read_auto, args=args, rounds=3, warmup_rounds=1)
+    assert result == rows  # nosec: B101
+    benchmark.extra_info["npartitions"] = math.ceil(rows / ROWS_PER_PARTITION)
+    record_throughput(benchmark, rows=rows)
+    record_peak_memory(benchmark, read_auto, *args)
+
+
+def test_manual_partition(benchmark: Any, database: Path, rows: int) -> None:
+    """Read a whole table with SQLiteSourceManualPartition."""
+    args = (str(database), rows)
+    result = benchmark.pedantic(read_manual, args=args, rounds=3, warmup_rounds=1)
+    assert result == rows  # nosec: B101
+    record_throughput(benchmark, rows=rows)
+    record_peak_memory(benchmark, read_manual, *args)
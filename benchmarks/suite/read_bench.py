@@ -0,0 +1,84 @@
+"""Benchmark reading whole tables with SQLiteSource.
+
+Each read engine is compared, including the arrow engine returning Arrow-backed
+columns, by the rows read per second and the peak memory used.
+"""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from benchmarks.common import record_peak_memory, record_throughput
+from intake_sqlite import SQLiteSource, urlpath_to_sqliteurl
+
+logger = logging.getLogger(__name__)
+
+
+ENGINES = [
+    pytest.param("pandas", "numpy", id="pandas"),
+    pytest.param("arrow", "numpy", id="arrow"),
+    pytest.param("arrow", "pyarrow", id="arrow-pyarrow"),
+]
+"""Read engines, and the dtype backends they return, to compare."""
+
+
+def read_table(
+    path: str, engine: str, dtype_backend: str = "numpy", chunk_rows: int = 0
+) -> int:
+    """Read table ``t`` with a new source, returning the number of rows."""
+    sql_kwargs: dict[str, Any] = {"index_col": "id"}
+    if engine == "arrow":
+        sql_kwargs["dtype_backend"] = dtype_backend
+    src = SQLiteSource(path, "t", sql_kwargs=sql_kwargs, engine=engine)
+    if chunk_rows:
+        return sum(len(chunk) for chunk in src.read_chunked(chunk_rows=chunk_rows))
+    return len(src.read())
+
+
+@pytest.mark.parametrize("engine,dtype_backend", ENGINES)
+def test_read(
+    benchmark: Any, database: Path, rows: int, engine: str, dtype_backend: str
+) -> None:
+    """Read a whole table into memory."""
+    args = (str(database), engine, dtype_backend)
+    result = benchmark.pedantic(read_table, args=args, rounds=3, warmup_rounds=1)
+    assert result == rows  # nosec: B101
+    record_throughput(benchmark, rows=rows)
+    record_peak_memory(benchmark, read_table, *args)
+
+
+@pytest.mark.parametrize("engine,dtype_backend", ENGINES)
+def test_read_chunked(
+    benchmark: Any, database: Path, rows: int, engine: str, dtype_backend: str
+) -> None:
+    """Stream a whole table in chunks, whose peak memory shouldn't grow with rows."""
+    args = (str(database), engine, dtype_backend, 50_000)
+    result = benchmark.pedantic(read_table, args=args, rounds=3, warmup_rounds=1)
+    assert result == rows  # nosec: B101
+    record_throughput(benchmark, rows=rows)
+    record_peak_memory(benchmark, read_table, *args)
+
+
+def test_lookup(benchmark: Any, database: Path, rows: int) -> None:
+    """Read a handful of rows by primary key, with a new source each time."""
+    path = str(database)
+
+    def lookup() -> int:
+        return len(
+            SQLiteSource(
+                path,
+                "SELECT * FROM t WHERE id BETWEEN ? AND ?",
+                sql_kwargs={"params": (rows // 2, rows // 2 + 9)},
+            ).read()
+        )
+
+    assert benchmark(lookup) == 10  # nosec: B101
+
+
+def test_urlpath(benchmark: Any, database: Path) -> None:
+    """Turn a local path into a SQLite URL, which happens whenever a source is made."""
+    url = benchmark(urlpath_to_sqliteurl, str(database))
+    assert url.startswith("sqlite")  # nosec: B101
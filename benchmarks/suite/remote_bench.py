@@ -0,0 +1,42 @@
+"""Benchmark fetching remote databases from a local HTTP server."""
+from __future__ import annotations
+
+import logging
+import tempfile
+from typing import Any
+
+import pytest
+
+from benchmarks.common import record_throughput
+from intake_sqlite import SQLiteSource, urlpath_to_sqliteurl
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.mark.parametrize("parallel", [False, True], ids=["stream", "parallel"])
+def test_download(benchmark: Any, remote_db: tuple[str, int], parallel: bool) -> None:
+    """Download a whole database into an empty cache."""
+    url, size = remote_db
+
+    def setup() -> tuple[tuple[Any, ...], dict[str, Any]]:
+        cache = {"cache_dir": tempfile.mkdtemp()}
+        return (url,), {"storage_options": {"cache": cache, "parallel": parallel}}
+
+    benchmark.pedantic(urlpath_to_sqliteurl, setup=setup, rounds=3)
+    record_throughput(benchmark, size=size)
+
+
+def test_lazy_lookup(benchmark: Any, remote_db: tuple[str, int]) -> None:
+    """Look up a few rows of a remote database without downloading all of it."""
+    url, size = remote_db
+
+    def lookup() -> int:
+        return len(
+            SQLiteSource(
+                url,
+                "SELECT * FROM t WHERE id BETWEEN 1000 AND 1009",
+                storage_options={"lazy": True},
+            ).read()
+        )
+
+    assert benchmark.pedantic(lookup, rounds=5) == 10  # nosec: B101
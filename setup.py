@@ -16,7 +16,8 @@ setup(
     long_description_content_type="text/x-rst",
     # setuptools_scm lets us automagically get package version from GitHub tags
     setup_requires=["setuptools_scm"],
-    use_scm_version=True,
+    # The version is written to a module, so it can be found without importlib.metadata
+    use_scm_version={"write_to": "src/intake_sqlite/_version.py"},
     author="Catalyst Cooperative",
     author_email="pudl@catalyst.coop",
     maintainer="Zane Selvans",
@@ -38,6 +39,12 @@ setup(
         "fsspec>=2022.5,<2024",
     ],
     extras_require={
+        "arrow": [
+            "pyarrow>=8",  # Faster reads with engine="arrow"
+        ],
+        "bench": [
+            "pytest-benchmark>=4,<5",  # Times benchmarks and keeps their results
+        ],
         "dev": [
             "black>=22,<24",  # A deterministic code formatter
             "isort>=5,<6",  # Standardized import sorting
@@ -72,13 +79,18 @@ setup(
             "pydocstyle>=5.1,<7",  # Style guidelines for Python documentation
             "pytest>=6.2,<8",  # Our testing framework
             "pytest-cov>=2.10,<5.0",  # Pytest plugin for working with coverage
+            "pyarrow>=8",
             "rstcheck[sphinx]>=5,<7",  # ReStructuredText linter
             "sqlalchemy>=1.3,<2",
             "tox>=3.20,<5",  # Python test environment manager
+            "zstandard>=0.18",
         ],
         "types": [
             "types-setuptools",
         ],
+        "zstd": [
+            "zstandard>=0.18",  # Read zstd compressed databases
+        ],
     },
     # A controlled vocabulary of tags used by the Python Package Index.
     # Make sure the license and python versions are consistent with other arguments.
@@ -104,11 +116,18 @@ setup(
     # entry_points defines interfaces to command line scripts we distribute.
     # Can also be used for other resource deployments, like intake catalogs.
     entry_points={
+        "console_scripts": [
+            "intake-sqlite-export = intake_sqlite.export:main",
+        ],
         "intake.drivers": [
             "sqlite = intake_sqlite.sqlite_src:SQLiteSource",
             "sqlite_auto = intake_sqlite.sqlite_src:SQLiteSourceAutoPartition",
             "sqlite_manual = intake_sqlite.sqlite_src:SQLiteSourceManualPartition",
+            "sqlite_sharded = intake_sqlite.sqlite_src:SQLiteSourceSharded",
             "sqlite_cat = intake_sqlite.sqlite_cat:SQLiteCatalog",
-        ]
+        ],
+        "sqlalchemy.dialects": [
+            "sqlite.intake = intake_sqlite.dialect:ReadOnlySQLiteDialect",
+        ],
     },
 )
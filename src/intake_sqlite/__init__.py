@@ -1,12 +1,27 @@
-"""A template repository for a Python package created by Catalyst Cooperative."""
-import logging
+"""An Intake driver to access local or remote SQLite databases by URL.
+
+Importing the package loads none of its dependencies. Intake finds the drivers through
+the package's entry points without importing them, and the source and catalog classes
+are only imported from their modules, along with :mod:`intake_sql`, SQLAlchemy, pandas
+and dask, when they're first used.
+"""
+from __future__ import annotations
 
-import pkg_resources
+import importlib
+import logging
+from typing import TYPE_CHECKING, Any
 
-__version__: str = pkg_resources.get_distribution("intake-sqlite").version
+if TYPE_CHECKING:
+    from intake_sqlite.sqlite_cat import SQLiteCatalog
+    from intake_sqlite.sqlite_src import (
+        SQLiteSource,
+        SQLiteSourceAutoPartition,
+        SQLiteSourceManualPartition,
+        SQLiteSourceSharded,
+        urlpath_to_sqliteurl,
+    )
 
-from intake_sqlite.sqlite_cat import *  # noqa: F403,F401
-from intake_sqlite.sqlite_src import *  # noqa: F403,F401
+    __version__: str
 
 __author__ = "Catalyst Cooperative"
 __contact__ = "pudl@catalyst.coop"
@@ -18,6 +33,52 @@ __description__ = "An Intake driver to access local or remote SQLite databases b
 __projecturl__ = "https://github.com/catalyst-cooperative/intake-sqlite"
 __downloadurl__ = "https://github.com/catalyst-cooperative/intake-sqlite"
 
+_LAZY = {
+    "SQLiteCatalog": "intake_sqlite.sqlite_cat",
+    "SQLiteSource": "intake_sqlite.sqlite_src",
+    "SQLiteSourceAutoPartition": "intake_sqlite.sqlite_src",
+    "SQLiteSourceManualPartition": "intake_sqlite.sqlite_src",
+    "SQLiteSourceSharded": "intake_sqlite.sqlite_src",
+    "urlpath_to_sqliteurl": "intake_sqlite.sqlite_src",
+}
+"""The module defining each of the names exported by the package."""
+
+__all__ = [
+    "SQLiteCatalog",
+    "SQLiteSource",
+    "SQLiteSourceAutoPartition",
+    "SQLiteSourceManualPartition",
+    "SQLiteSourceSharded",
+    "urlpath_to_sqliteurl",
+]
+
 # Create a root logger for use anywhere within the package.
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
+
+
+def _version() -> str:
+    """Find the version of the installed package."""
+    try:
+        # Written by setuptools_scm when the package is built.
+        return str(importlib.import_module("intake_sqlite._version").version)
+    except ImportError:
+        from importlib.metadata import version
+
+        return version("intake-sqlite")
+
+
+def __getattr__(name: str) -> Any:
+    """Import the classes exported by the package when they're first used."""
+    if name == "__version__":
+        value: Any = _version()
+    elif name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY) | {"__version__"})
@@ -0,0 +1,159 @@
+"""Read many SQLite sources concurrently from :mod:`asyncio` code.
+
+SQLite releases the GIL while it executes a query, so several sources can be read at
+the same time by different threads, even in one process. The coroutines here run
+reads on a bounded, process-wide thread pool, so that an application loading dozens
+of tables per request neither waits for each read in turn, nor starts an unbounded
+number of threads.
+
+The number of reads of any one database that run at the same time is also limited,
+by default to :data:`intake_sqlite.pool.DEFAULT_MAX_IDLE`, so that they all reuse warm
+connections from :mod:`intake_sqlite.pool` rather than opening new ones. Reads of
+partitioned sources count as a single read, although dask may use several
+connections to read their partitions.
+
+Remote databases are downloaded when a source or catalog is created, or when its URL
+is resolved by :func:`intake_sqlite.urlpath_to_sqliteurl`. Use
+:func:`resolve_many_async` to download several of them at the same time before
+creating the sources that read them.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from intake_sqlite.pool import DEFAULT_MAX_IDLE, pool_key
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "read_many_async",
+    "resolve_many_async",
+    "run_async",
+    "set_max_per_database",
+    "set_max_workers",
+]
+
+DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+"""Default number of threads used to read sources concurrently."""
+
+T = TypeVar("T")
+
+_max_workers = DEFAULT_MAX_WORKERS
+_max_per_database = DEFAULT_MAX_IDLE
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+# Semaphores belong to the event loop they're used in.
+_limits: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+] = weakref.WeakKeyDictionary()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_max_workers, thread_name_prefix="intake_sqlite"
+            )
+        return _executor
+
+
+def _database_limit(uri: str) -> asyncio.Semaphore:
+    limits = _limits.setdefault(asyncio.get_running_loop(), {})
+    key = pool_key(uri)
+    if key not in limits:
+        limits[key] = asyncio.Semaphore(_max_per_database)
+    return limits[key]
+
+
+def set_max_workers(max_workers: int) -> int:
+    """Set the number of threads used to read sources concurrently.
+
+    Reads that are already running are allowed to finish in the old thread pool.
+
+    Returns:
+        The previous number of threads.
+    """
+    global _executor, _max_workers
+    with _executor_lock:
+        previous, _max_workers = _max_workers, max_workers
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+    return previous
+
+
+def set_max_per_database(max_per_database: int) -> int:
+    """Set the maximum number of concurrent reads of any one database.
+
+    Only affects event loops that haven't read from a database yet.
+
+    Returns:
+        The previous maximum.
+    """
+    global _max_per_database
+    previous, _max_per_database = _max_per_database, max_per_database
+    return previous
+
+
+async def run_async(uri: str | None, func: Callable[..., T], *args: Any) -> T:
+    """Call a function on the shared thread pool, and wait for its result.
+
+    Args:
+        uri: SQLite URL of the database the function reads, whose limit on
+            concurrent reads applies. If None, only the size of the thread pool
+            limits how many functions run at once.
+        func: The function to call.
+        args: Positional arguments for the function.
+    """
+    loop = asyncio.get_running_loop()
+    if uri is None:
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    async with _database_limit(uri):
+        return await loop.run_in_executor(_get_executor(), func, *args)
+
+
+async def resolve_many_async(
+    urlpaths: Iterable[str], storage_options: dict[str, Any] = {}
+) -> list[str]:
+    """Resolve many paths or URLs to SQLite URLs, downloading remote databases at once.
+
+    Args:
+        urlpaths: Local paths or :mod:`fsspec` readable URLs of SQLite databases.
+        storage_options: Options for :func:`intake_sqlite.urlpath_to_sqliteurl`,
+            shared by all of the URLs.
+
+    Returns:
+        SQLite URLs, in the same order as ``urlpaths``, which can be given to sources
+        and catalogs in place of the original paths.
+    """
+    from intake_sqlite.sqlite_src import urlpath_to_sqliteurl
+
+    return list(
+        await asyncio.gather(
+            *(
+                run_async(None, urlpath_to_sqliteurl, urlpath, storage_options)
+                for urlpath in urlpaths
+            )
+        )
+    )
+
+
+async def read_many_async(sources: Iterable[Any]) -> list[Any]:
+    """Read many sources concurrently.
+
+    Args:
+        sources: Sources with a ``read_async`` coroutine method, like
+            :class:`intake_sqlite.SQLiteSource`.
+
+    Returns:
+        The data read from each source, in the same order as ``sources``.
+    """
+    return list(await asyncio.gather(*(source.read_async() for source in sources)))
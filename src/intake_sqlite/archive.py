@@ -0,0 +1,627 @@
+"""Decompress SQLite databases that are published as compressed archives.
+
+SQLite databases usually compress to a fraction of their size, so they're often
+published as ``.sqlite.gz`` or ``.sqlite.zst`` files, or inside a ``.zip`` archive.
+Rather than downloading the whole archive and then decompressing it, the compressed
+bytes are decompressed as they arrive, while the next chunk is fetched in a background
+thread, so that downloading and decompressing overlap and the archive itself is never
+stored.
+
+Files in the `seekable zstd format
+<https://github.com/facebook/zstd/blob/dev/contrib/seekable_format/zstd_seekable_compression_format.md>`__
+are made of many independently compressed frames, followed by a table of their sizes.
+Their frames are fetched and decompressed concurrently, and they can also be read on
+demand a frame at a time, by :class:`intake_sqlite.vfs.SeekableZstdFile`, without
+decompressing the rest of the file. Reading zstd requires the optional
+:mod:`zstandard` package.
+"""
+from __future__ import annotations
+
+import bz2
+import contextlib
+import functools
+import hashlib
+import logging
+import lzma
+import struct
+import zipfile
+import zlib
+from bisect import bisect_right
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, TypeVar
+from urllib.parse import urlparse
+
+import fsspec
+
+from intake_sqlite.download import DEFAULT_CHUNK_SIZE as PARALLEL_CHUNK_SIZE
+from intake_sqlite.download import DEFAULT_MAX_WORKERS, temporary_copy
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "Archive",
+    "SeekTable",
+    "decompress",
+    "open_local",
+    "parse_archive",
+    "read_seek_table",
+    "write_seekable_zstd",
+]
+
+COMPRESSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd",
+    ".zip": "zip",
+}
+"""The compression used by files with each suffix."""
+
+DEFAULT_CHUNK_SIZE = 2**22
+"""Number of compressed bytes fetched at a time while streaming (4 MiB)."""
+
+DEFAULT_FRAME_SIZE = 2**20
+"""Number of bytes of the database in each frame of a seekable zstd file (1 MiB)."""
+
+# Compressed bytes are passed to a decompressor in pieces no larger than this, which
+# bounds the size of the output it produces at once.
+_FEED_SIZE = 2**20
+
+# Magic numbers and structures of the seekable zstd format.
+_SKIPPABLE_MAGIC = 0x184D2A5E
+_SEEKABLE_MAGIC = 0x8F92EAB1
+_SEEK_TABLE_FOOTER = struct.Struct("<IBI")
+_SEEK_TABLE_ENTRY = struct.Struct("<II")
+_SEEK_TABLE_CHECKSUM_FLAG = 0x80
+
+# The fixed-size part of a zip local file header, as in zipfile.structFileHeader.
+_ZIP_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_ZIP_LOCAL_MAGIC = b"PK\x03\x04"
+_ZIP_ZSTANDARD = 93
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class Archive:
+    """A compressed database, identified by :func:`parse_archive`.
+
+    Attributes:
+        urlpath: The URL of the compressed file.
+        compression: The compression used, one of the values of :data:`COMPRESSIONS`.
+        member: The path of the database within a zip archive, if it was given.
+    """
+
+    __slots__ = ("urlpath", "compression", "member")
+
+    def __init__(self, urlpath: str, compression: str, member: str | None = None):
+        """Describe a compressed database."""
+        self.urlpath = urlpath
+        self.compression = compression
+        self.member = member
+
+    @property
+    def name(self) -> str | None:
+        """The file name of the decompressed database, if it's known in advance."""
+        if self.member is not None:
+            return PurePosixPath(self.member).name
+        if self.compression == "zip":
+            return None
+        return PurePosixPath(urlparse(self.urlpath).path).stem
+
+    def __repr__(self) -> str:
+        """Show where the database is."""
+        return f"Archive({self.urlpath!r}, {self.compression!r}, {self.member!r})"
+
+
+def parse_archive(urlpath: str) -> Archive | None:
+    """Find out whether a URL refers to a compressed database, and how it's compressed.
+
+    Compressed files are recognized by the suffix of their names, e.g.
+    ``pudl.sqlite.gz`` or ``pudl.sqlite.zst``. A zip archive may contain a single
+    database, or a member of the archive may be chosen using the chained URL syntax
+    of :mod:`fsspec`, e.g. ``zip://pudl.sqlite::https://example.com/pudl.zip``.
+
+    Returns:
+        The archive, or None if the URL doesn't refer to a compressed file.
+    """
+    if urlpath.startswith("zip://") and "::" in urlpath:
+        member, outer = urlpath[len("zip://") :].split("::", 1)
+        return Archive(outer, "zip", member)
+    suffix = PurePosixPath(urlparse(urlpath).path).suffix.lower()
+    if suffix in COMPRESSIONS:
+        return Archive(urlpath, COMPRESSIONS[suffix])
+    return None
+
+
+def _zstandard() -> Any:
+    """Import the optional :mod:`zstandard` package."""
+    try:
+        import zstandard
+    except ImportError as err:
+        raise ImportError(
+            "Reading zstd compressed databases requires the zstandard package. "
+            "Install it with: pip install intake-sqlite[zstd]"
+        ) from err
+    return zstandard
+
+
+def _decompressor(compression: str) -> Callable[[], Any]:
+    """A function making decompressors for one stream of the given compression."""
+    if compression == "gzip":
+        return functools.partial(zlib.decompressobj, zlib.MAX_WBITS | 16)
+    if compression == "bz2":
+        return bz2.BZ2Decompressor
+    if compression == "xz":
+        return lzma.LZMADecompressor
+    if compression == "zstd":
+        decompressobj: Callable[[], Any] = _zstandard().ZstdDecompressor().decompressobj
+        return decompressobj
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+class SeekTable:
+    """Where each frame of a seekable zstd file starts, compressed and decompressed.
+
+    Attributes:
+        compressed_offsets: The offset of each frame in the compressed file, followed
+            by the offset of the seek table.
+        offsets: The offset of each frame's contents in the decompressed file, followed
+            by the size of the decompressed file.
+    """
+
+    __slots__ = ("compressed_offsets", "offsets")
+
+    def __init__(self, compressed_offsets: list[int], offsets: list[int]):
+        """Record the offsets of the frames."""
+        self.compressed_offsets = compressed_offsets
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        """The number of frames."""
+        return len(self.offsets) - 1
+
+    @property
+    def size(self) -> int:
+        """The size of the decompressed file."""
+        return self.offsets[-1]
+
+    def frame_of(self, offset: int) -> int:
+        """The index of the frame containing a decompressed ``offset``."""
+        return bisect_right(self.offsets, offset) - 1
+
+    def decompress(self, first: int, last: int, data: bytes) -> list[bytes]:
+        """Decompress an inclusive run of frames, given their compressed bytes."""
+        decompressor = _zstandard().ZstdDecompressor()
+        base = self.compressed_offsets[first]
+        frames = []
+        for i in range(first, last + 1):
+            start = self.compressed_offsets[i] - base
+            end = self.compressed_offsets[i + 1] - base
+            size = self.offsets[i + 1] - self.offsets[i]
+            frame = decompressor.decompress(data[start:end], max_output_size=size)
+            if len(frame) != size:
+                raise OSError(
+                    f"Frame {i} decompressed to {len(frame)} bytes but the seek "
+                    f"table says it holds {size}."
+                )
+            frames.append(frame)
+        return frames
+
+
+def _read_range(fs: Any, path: str, start: int, end: int) -> bytes:
+    """Fetch a byte range of a file, checking that all of it was returned."""
+    data: bytes = fs.cat_file(path, start=start, end=end)
+    if len(data) != end - start:
+        raise OSError(
+            f"Expected {end - start} bytes from {path} at offset {start} but got "
+            f"{len(data)}. Does the server support range requests?"
+        )
+    return data
+
+
+def read_seek_table(fs: Any, path: str, size: int | None = None) -> SeekTable | None:
+    """Read the seek table at the end of a seekable zstd file.
+
+    Args:
+        fs: The :mod:`fsspec` filesystem containing the file.
+        path: Path to the file within ``fs``.
+        size: Size of the file in bytes, if it's already known.
+
+    Returns:
+        The seek table, or None if the file doesn't end with one.
+
+    Raises:
+        ValueError: If the seek table is corrupt.
+    """
+    size = int(fs.size(path)) if size is None else size
+    if size < _SEEK_TABLE_FOOTER.size + 8:
+        return None
+    footer = _read_range(fs, path, size - _SEEK_TABLE_FOOTER.size, size)
+    nframes, descriptor, magic = _SEEK_TABLE_FOOTER.unpack(footer)
+    if magic != _SEEKABLE_MAGIC:
+        return None
+    entry_size = _SEEK_TABLE_ENTRY.size + 4 * bool(
+        descriptor & _SEEK_TABLE_CHECKSUM_FLAG
+    )
+    frame_size = nframes * entry_size + _SEEK_TABLE_FOOTER.size
+    table_start = size - frame_size - 8
+    if table_start < 0:
+        raise ValueError(f"The seek table of {path} is larger than the file.")
+    table = _read_range(fs, path, table_start, size - _SEEK_TABLE_FOOTER.size)
+    if struct.unpack_from("<II", table) != (_SKIPPABLE_MAGIC, frame_size):
+        raise ValueError(f"The seek table of {path} is corrupt.")
+    compressed_offsets = [0]
+    offsets = [0]
+    for i in range(nframes):
+        compressed, decompressed = _SEEK_TABLE_ENTRY.unpack_from(
+            table, 8 + i * entry_size
+        )
+        compressed_offsets.append(compressed_offsets[-1] + compressed)
+        offsets.append(offsets[-1] + decompressed)
+    if compressed_offsets[-1] != table_start:
+        raise ValueError(
+            f"The frames in the seek table of {path} end at byte "
+            f"{compressed_offsets[-1]}, but the table starts at {table_start}."
+        )
+    return SeekTable(compressed_offsets, offsets)
+
+
+def write_seekable_zstd(
+    src: str | Path,
+    dst: str | Path,
+    frame_size: int = DEFAULT_FRAME_SIZE,
+    level: int = 3,
+) -> int:
+    """Compress a database into the seekable zstd format, for publishing it.
+
+    Smaller frames let a database be read on demand with less wasted decompression,
+    at the cost of a slightly worse compression ratio. A multiple of the database's
+    page size is best.
+
+    Args:
+        src: Path to the database to compress.
+        dst: Where to write the compressed file, usually ``src`` + ``".zst"``.
+        frame_size: Number of bytes of the database in each frame.
+        level: The zstd compression level.
+
+    Returns:
+        The size of the compressed file.
+    """
+    zstandard = _zstandard()
+    compressor = zstandard.ZstdCompressor(level=level)
+    entries = []
+    with open(src, "rb") as f, open(dst, "wb") as out:
+        for block in iter(lambda: f.read(frame_size), b""):
+            frame = compressor.compress(block)
+            out.write(frame)
+            entries.append(_SEEK_TABLE_ENTRY.pack(len(frame), len(block)))
+        footer = _SEEK_TABLE_FOOTER.pack(len(entries), 0, _SEEKABLE_MAGIC)
+        table = b"".join(entries) + footer
+        out.write(struct.pack("<II", _SKIPPABLE_MAGIC, len(table)) + table)
+        return out.tell()
+
+
+def _prefetch(
+    func: Callable[[T], R], items: Iterable[T], max_workers: int
+) -> Iterator[R]:
+    """Call a function on each item in a pool of threads, yielding results in order.
+
+    No more than ``max_workers`` results are computed ahead of the one being consumed,
+    so memory use stays bounded however many items there are.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: deque[Future[R]] = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) > max_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _fetch_chunks(
+    fs: Any, path: str, start: int, end: int, max_workers: int, chunk_size: int
+) -> Iterator[bytes]:
+    """Yield a byte range of a file in chunks, fetching ahead in other threads.
+
+    With a single worker the range is read as one stream. Otherwise each chunk is
+    fetched with its own range request.
+    """
+    with contextlib.ExitStack() as stack:
+        if max_workers == 1:
+            f = stack.enter_context(fs.open(path, "rb", cache_type="none"))
+            f.seek(start)
+
+        def fetch(offset: int) -> bytes:
+            if max_workers > 1:
+                return _read_range(fs, path, offset, min(offset + chunk_size, end))
+            # Chunks are read in order, since there's only one worker.
+            data: bytes = f.read(min(chunk_size, end - offset))
+            return data
+
+        read = 0
+        for chunk in _prefetch(fetch, range(start, end, chunk_size), max_workers):
+            read += len(chunk)
+            yield chunk
+    if read != end - start:
+        raise OSError(f"Expected {end - start} bytes from {path} but got {read}.")
+
+
+def _decompress_stream(
+    chunks: Iterable[bytes],
+    new_decompressor: Callable[[], Any] | None,
+    write: Callable[[bytes], Any],
+    digest: Any = None,
+) -> int:
+    """Decompress chunks of a file, writing the output as it's produced.
+
+    The file may hold several concatenated compressed streams, as written by tools
+    like ``pigz`` and ``pzstd``. A ``new_decompressor`` of None copies the chunks as
+    they are.
+
+    Returns:
+        The number of compressed bytes read.
+    """
+    read = 0
+    decompressor = None if new_decompressor is None else new_decompressor()
+    unfinished = False
+    for chunk in chunks:
+        read += len(chunk)
+        if digest is not None:
+            digest.update(chunk)
+        if new_decompressor is None or decompressor is None:
+            write(chunk)
+            continue
+        view = memoryview(chunk)
+        for offset in range(0, len(view), _FEED_SIZE):
+            data: Any = view[offset : offset + _FEED_SIZE]
+            while data:
+                write(decompressor.decompress(data))
+                unfinished = not decompressor.eof
+                if unfinished:
+                    break
+                # Start decompressing the next concatenated stream, if any.
+                data = decompressor.unused_data
+                decompressor = new_decompressor()
+    if unfinished:
+        raise OSError("The compressed data ends part way through a stream.")
+    return read
+
+
+def _zip_member(fs: Any, path: str, member: str | None) -> zipfile.ZipInfo:
+    """Find a member of a zip archive, or its only member if none is named."""
+    with fs.open(path, "rb") as f, zipfile.ZipFile(f) as zf:
+        infos = [info for info in zf.infolist() if not info.is_dir()]
+    if member is not None:
+        matches = [info for info in infos if info.filename == member.lstrip("/")]
+        if not matches:
+            raise ValueError(f"{path} has no member named {member}.")
+        return matches[0]
+    if len(infos) != 1:
+        names = [info.filename for info in infos]
+        raise ValueError(
+            f"{path} has {len(infos)} members: {names}. Choose the database with a "
+            f"URL like zip://<member>::<url>"
+        )
+    return infos[0]
+
+
+def _decompress_zip(
+    fs: Any,
+    path: str,
+    member: str | None,
+    out: BinaryIO,
+    max_workers: int,
+    chunk_size: int,
+) -> int:
+    """Decompress a member of a zip archive, reading only the bytes it occupies."""
+    info = _zip_member(fs, path, member)
+    if info.flag_bits & 0x1:
+        raise ValueError(f"{info.filename} in {path} is encrypted.")
+    new_decompressor: Callable[[], Any] | None
+    if info.compress_type == zipfile.ZIP_STORED:
+        new_decompressor = None
+    elif info.compress_type == zipfile.ZIP_DEFLATED:
+        new_decompressor = functools.partial(zlib.decompressobj, -zlib.MAX_WBITS)
+    elif info.compress_type == zipfile.ZIP_BZIP2:
+        new_decompressor = bz2.BZ2Decompressor
+    elif info.compress_type == _ZIP_ZSTANDARD:
+        new_decompressor = _decompressor("zstd")
+    else:
+        raise ValueError(
+            f"{info.filename} in {path} uses zip compression method "
+            f"{info.compress_type}, which isn't supported."
+        )
+    header_end = info.header_offset + _ZIP_LOCAL_HEADER.size
+    header = _ZIP_LOCAL_HEADER.unpack(
+        _read_range(fs, path, info.header_offset, header_end)
+    )
+    if header[0] != _ZIP_LOCAL_MAGIC:
+        raise ValueError(f"The local header of {info.filename} in {path} is corrupt.")
+    # The name and extra fields of the local header follow its fixed-size part.
+    start = header_end + header[-2] + header[-1]
+    crc = 0
+    size = 0
+
+    def write(data: bytes) -> None:
+        nonlocal crc, size
+        crc = zlib.crc32(data, crc)
+        size += len(data)
+        out.write(data)
+
+    chunks = _fetch_chunks(
+        fs, path, start, start + info.compress_size, max_workers, chunk_size
+    )
+    read = _decompress_stream(chunks, new_decompressor, write)
+    if size != info.file_size or crc != info.CRC:
+        raise OSError(f"{info.filename} in {path} failed its CRC check.")
+    return read
+
+
+def _decompress_frames(
+    fs: Any,
+    path: str,
+    table: SeekTable,
+    local_path: str | Path,
+    max_workers: int,
+    chunk_size: int,
+    digest: Any = None,
+) -> int:
+    """Decompress the frames of a seekable zstd file concurrently.
+
+    Runs of consecutive frames holding about ``chunk_size`` compressed bytes are
+    fetched with one range request each, and decompressed into their place in the
+    local file.
+    """
+    with open(local_path, "wb") as f:
+        f.truncate(table.size)
+    runs = []
+    first = 0
+    for i in range(len(table)):
+        end = table.compressed_offsets[i + 1]
+        if end - table.compressed_offsets[first] >= chunk_size or i == len(table) - 1:
+            runs.append((first, i))
+            first = i + 1
+
+    def fetch(run: tuple[int, int]) -> bytes:
+        first, last = run
+        data = _read_range(
+            fs,
+            path,
+            table.compressed_offsets[first],
+            table.compressed_offsets[last + 1],
+        )
+        with open(local_path, "r+b") as f:
+            f.seek(table.offsets[first])
+            for frame in table.decompress(first, last, data):
+                f.write(frame)
+        return data
+
+    read = 0
+    for data in _prefetch(fetch, runs, max_workers):
+        read += len(data)
+        if digest is not None:
+            digest.update(data)
+    if digest is not None:
+        size = int(fs.size(path))
+        digest.update(_read_range(fs, path, table.compressed_offsets[-1], size))
+    return read
+
+
+def decompress(
+    fs: Any,
+    path: str,
+    local_path: str | Path,
+    compression: str,
+    member: str | None = None,
+    parallel: dict[str, Any] | None = None,
+) -> int:
+    """Decompress a remote archive into a local file as it's downloaded.
+
+    Compressed chunks are fetched ahead in a background thread while the previous
+    chunk is decompressed. The frames of a seekable zstd file are fetched and
+    decompressed by a pool of threads, since it takes range requests to find them.
+    The file is overwritten if it exists.
+
+    Args:
+        fs: The :mod:`fsspec` filesystem containing the archive.
+        path: Path to the archive within ``fs``.
+        local_path: Where to write the decompressed database.
+        compression: One of the values of :data:`COMPRESSIONS`.
+        member: The path of the database within a zip archive. If None, the archive
+            must contain a single file.
+        parallel: If not None, fetch this many chunks concurrently with range
+            requests, rather than reading the archive as a single stream. May contain
+            the keys ``max_workers``, ``chunk_size`` and ``checksum``, as for
+            :func:`intake_sqlite.download.parallel_download`. The checksum is of the
+            compressed file, and can't be checked for a member of a zip archive.
+
+    Returns:
+        The number of compressed bytes read.
+
+    Raises:
+        OSError: If the archive is truncated, or doesn't match its checksum.
+        ValueError: If the archive can't be decompressed.
+    """
+    options = dict(parallel or {})
+    max_workers = int(options.pop("max_workers", DEFAULT_MAX_WORKERS))
+    chunk_size = int(options.pop("chunk_size", PARALLEL_CHUNK_SIZE))
+    checksum = options.pop("checksum", None)
+    if options:
+        raise TypeError(f"Unexpected options for a parallel download: {options}")
+    if parallel is None:
+        chunk_size = DEFAULT_CHUNK_SIZE
+    if max_workers <= 0 or chunk_size <= 0:
+        raise ValueError("max_workers and chunk_size must both be positive.")
+    digest = None
+    if checksum is not None:
+        if compression == "zip":
+            raise ValueError(f"Can't check the checksum of a member of {path}.")
+        algorithm, _, expected = checksum.partition(":")
+        digest = hashlib.new(algorithm)
+    size = int(fs.size(path))
+    table = read_seek_table(fs, path, size) if compression == "zstd" else None
+    if table is not None:
+        logger.info(f"Decompressing {len(table)} frames of {path} concurrently.")
+        read = _decompress_frames(
+            fs, path, table, local_path, max_workers, chunk_size, digest
+        )
+    else:
+        # Streams are decompressed in order, so only the fetching is parallel.
+        if parallel is None:
+            max_workers = 1
+        with open(local_path, "wb") as out:
+            if compression == "zip":
+                read = _decompress_zip(fs, path, member, out, max_workers, chunk_size)
+            else:
+                chunks = _fetch_chunks(fs, path, 0, size, max_workers, chunk_size)
+                read = _decompress_stream(
+                    chunks, _decompressor(compression), out.write, digest
+                )
+    if digest is not None and digest.hexdigest() != expected.lower():
+        raise OSError(
+            f"{algorithm} checksum of {path} is {digest.hexdigest()} but expected "
+            f"{expected}."
+        )
+    return read
+
+
+def open_local(
+    urlpath: str,
+    storage_options: dict[str, Any] = {},
+    parallel: dict[str, Any] | None = None,
+) -> str:
+    """Decompress a remote archive into a temporary, per-process cache.
+
+    Like ``fsspec.open_local("simplecache::" + urlpath)``, each archive is
+    decompressed at most once per process, and the copy is deleted when the
+    interpreter exits (see :func:`intake_sqlite.download.temporary_copy`).
+
+    Args:
+        urlpath: The URL of a compressed database. See :func:`parse_archive`.
+        storage_options: Keyword arguments used to instantiate the filesystem.
+        parallel: Options for :func:`decompress`.
+
+    Returns:
+        The path to the decompressed database.
+    """
+    archive = parse_archive(urlpath)
+    if archive is None:
+        raise ValueError(f"{urlpath} isn't a compressed file.")
+
+    def fetch(local_path: Path) -> int:
+        assert archive is not None  # nosec: B101
+        fs, path = fsspec.core.url_to_fs(archive.urlpath, **storage_options)
+        return decompress(
+            fs, path, local_path, archive.compression, archive.member, parallel
+        )
+
+    return temporary_copy(urlpath, ".sqlite", fetch)
@@ -0,0 +1,384 @@
+"""Read SQLite query results into typed Apache Arrow columns.
+
+:func:`pandas.read_sql` goes through SQLAlchemy, which wraps every row in a Python
+object, and then infers the type of every column by inspecting each cell. This module
+instead fetches batches of rows directly from a :mod:`sqlite3` cursor, transposes them
+into columns, and converts each column into a :mod:`pyarrow` array in a single pass,
+using the column types declared in the database schema where they are available.
+Only one batch of Python row objects exists at any time.
+"""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from intake_sqlite.connection import table_exists
+from intake_sqlite.instrument import span, traced
+from intake_sqlite.partition import quote_identifier
+from intake_sqlite.pool import pooled_connection
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "affinity_type",
+    "arrow_type",
+    "concat_tables",
+    "declared_types",
+    "iter_record_batches",
+    "iter_sql_arrow",
+    "iter_sql_batches",
+    "read_sql_arrow",
+    "read_sql_table_arrow",
+    "to_dataframe",
+]
+
+DEFAULT_BATCH_ROWS = 2**16
+"""Number of rows fetched from the cursor and converted at a time."""
+
+
+def affinity_type(declared: str) -> pa.DataType | None:
+    """Arrow type corresponding to a declared SQLite column type.
+
+    Follows the SQLite column affinity rules described at
+    https://www.sqlite.org/datatype3.html#determination_of_column_affinity
+
+    Returns:
+        The Arrow type, or None if the type should be inferred from the data, as it is
+        for columns with BLOB or NUMERIC affinity.
+    """
+    declared = declared.upper()
+    if "INT" in declared:
+        return pa.int64()
+    if "CHAR" in declared or "CLOB" in declared or "TEXT" in declared:
+        return pa.string()
+    if "BLOB" in declared or not declared:
+        return None
+    if "REAL" in declared or "FLOA" in declared or "DOUB" in declared:
+        return pa.float64()
+    return None
+
+
+def declared_types(con: sqlite3.Connection, table: str) -> dict[str, pa.DataType]:
+    """Arrow types of the columns in a table, based on their declared SQLite types.
+
+    Columns whose type can't be determined from the declaration are omitted.
+    """
+    types = {}
+    for _, name, declared, *_ in con.execute(
+        "SELECT * FROM pragma_table_info(?)", (table,)
+    ):
+        arrow_type = affinity_type(declared or "")
+        if arrow_type is not None:
+            types[name] = arrow_type
+    return types
+
+
+def arrow_type(dtype: Any) -> pa.DataType | None:
+    """Arrow type in which to build a column that will be converted to a dtype.
+
+    Returns:
+        The Arrow type, or None if the column's type should be inferred as usual.
+    """
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pa.dictionary(pa.int32(), pa.string())
+    # Masked dtypes like Int8 are backed by a NumPy dtype.
+    numpy_dtype = getattr(dtype, "numpy_dtype", dtype)
+    if isinstance(numpy_dtype, np.dtype) and numpy_dtype.kind in "biuf":
+        return pa.from_numpy_dtype(numpy_dtype)
+    return None
+
+
+def _to_array(values: Sequence[Any], arrow_type: pa.DataType | None) -> pa.Array:
+    """Convert one column of a batch to Arrow, falling back to type inference."""
+    if arrow_type is not None:
+        try:
+            return pa.array(values, type=arrow_type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # SQLite is dynamically typed, so values needn't match their declaration.
+            pass
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as err:
+        raise TypeError(
+            f"Column contains values of incompatible types, which can't be read with "
+            f"the arrow engine. Use engine='pandas' instead. ({err})"
+        ) from err
+
+
+def iter_record_batches(
+    con: sqlite3.Connection,
+    sql: str,
+    params: Sequence[Any] | dict[str, Any] = (),
+    types: dict[str, pa.DataType] = {},
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> Iterator[pa.RecordBatch]:
+    """Execute a query and yield its results as Arrow record batches.
+
+    Each batch is converted independently, so the types of columns without declared
+    types may vary from batch to batch, e.g. a column that is entirely NULL in one
+    batch will have the Arrow null type. If the query returns no rows, a single empty
+    batch is yielded, so that the names of the columns are always available.
+
+    Args:
+        con: Connection to the database.
+        sql: The query to execute.
+        params: Parameters to bind to the query.
+        types: Arrow types of any columns whose types are known in advance.
+        batch_rows: Maximum number of rows in each batch.
+    """
+    cursor = traced(con).execute(sql, params)
+    try:
+        names = [d[0] for d in cursor.description]
+        column_types = [types.get(name) for name in names]
+        empty = True
+        while True:
+            with span("fetch_rows") as attributes:
+                rows = cursor.fetchmany(batch_rows)
+                attributes["fetched"] = len(rows)
+            if not rows:
+                break
+            empty = False
+            with span("convert"):
+                columns = zip(*rows)
+                arrays = [_to_array(c, t) for c, t in zip(columns, column_types)]
+                batch = pa.RecordBatch.from_arrays(arrays, names=names)
+            yield batch
+        if empty:
+            arrays = [pa.array([], t or pa.null()) for t in column_types]
+            yield pa.RecordBatch.from_arrays(arrays, names=names)
+    finally:
+        cursor.close()
+
+
+def _unify(chunks: list[pa.Array]) -> pa.ChunkedArray:
+    """Combine the chunks of a column, which may have been given different types."""
+    types = {c.type for c in chunks if c.type != pa.null()}
+    if len(types) <= 1:
+        common = types.pop() if types else pa.null()
+    elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+        common = pa.float64()
+    else:
+        raise TypeError(
+            f"Column contains values of incompatible types {types}, which can't be "
+            "read with the arrow engine. Use engine='pandas' instead."
+        )
+    return pa.chunked_array(
+        [
+            pa.nulls(len(c), common) if c.type == pa.null() else c.cast(common)
+            for c in chunks
+        ],
+        type=common,
+    )
+
+
+def iter_sql_batches(
+    sql: str,
+    uri: str,
+    params: Sequence[Any] | dict[str, Any] = (),
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    types: dict[str, pa.DataType] = {},
+) -> Iterator[pa.RecordBatch]:
+    """Stream the results of a query, or a whole table, as Arrow record batches.
+
+    A connection is borrowed from the shared pool until the iterator is exhausted or
+    closed, and at most ``batch_rows`` rows are held in memory at a time.
+
+    Args:
+        sql: A query, or the name of a table or view to read in its entirety.
+        uri: SQLite URL of the database.
+        params: Parameters to bind to the query.
+        batch_rows: Maximum number of rows in each batch.
+        types: Arrow types of any columns whose types are known in advance, which
+            override the types declared in the table.
+    """
+    with pooled_connection(uri) as con:
+        if table_exists(con, sql):
+            types = {**declared_types(con, sql), **types}
+            sql = f"SELECT * FROM {quote_identifier(sql)}"  # nosec: B608
+        yield from iter_record_batches(
+            con, sql, params=params, types=types, batch_rows=batch_rows
+        )
+
+
+def concat_tables(tables: list[pa.Table]) -> pa.Table:
+    """Concatenate tables with the same columns, which may have different types.
+
+    Columns that are entirely NULL in some of the tables, or are integers in some and
+    floats in others, are given a common type, as they are between the batches of a
+    single query.
+    """
+    names = tables[0].schema.names
+    columns = [
+        _unify([chunk for t in tables for chunk in t.column(i).chunks])
+        for i in range(len(names))
+    ]
+    return pa.Table.from_arrays(columns, names=names)
+
+
+def read_sql_table_arrow(
+    sql: str,
+    uri: str,
+    params: Sequence[Any] | dict[str, Any] = (),
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    types: dict[str, pa.DataType] = {},
+) -> pa.Table:
+    """Read the results of a query, or a whole table, into an Arrow table.
+
+    Args:
+        sql: A query, or the name of a table or view to read in its entirety.
+        uri: SQLite URL of the database.
+        params: Parameters to bind to the query.
+        batch_rows: Number of rows to fetch and convert at a time.
+        types: Arrow types of any columns whose types are known in advance.
+    """
+    batches = list(
+        iter_sql_batches(sql, uri, params=params, batch_rows=batch_rows, types=types)
+    )
+    names = batches[0].schema.names
+    columns = [_unify([b.column(i) for b in batches]) for i in range(len(names))]
+    return pa.Table.from_arrays(columns, names=names)
+
+
+def _arrow_types(dtype: dict[str, Any] | None) -> dict[str, pa.DataType]:
+    """Arrow types in which to build columns that will be converted to dtypes."""
+    types = {name: arrow_type(d) for name, d in (dtype or {}).items()}
+    return {name: t for name, t in types.items() if t is not None}
+
+
+def _to_pandas(table: pa.Table | pa.RecordBatch, dtype: dict[str, Any]) -> pd.DataFrame:
+    """Convert Arrow data to a dataframe with NumPy and any requested dtypes.
+
+    Columns with extension dtypes, like masked integers, are converted to them
+    directly, rather than to NumPy floats and then to the extension dtype.
+    """
+    extension = {
+        name: d
+        for name, d in dtype.items()
+        if isinstance(d, pd.api.extensions.ExtensionDtype)
+        and not isinstance(d, pd.CategoricalDtype)
+    }
+    df = table.drop_columns(list(extension)).to_pandas()
+    for i, name in enumerate(table.schema.names):
+        if name in extension:
+            column = table.column(i).to_pandas(types_mapper=lambda _: extension[name])
+            df.insert(i, name, column)
+    for name, d in dtype.items():
+        if isinstance(d, pd.CategoricalDtype) and d.categories is None:
+            # Categories come from dictionaries in order of appearance, while
+            # astype("category") sorts them.
+            found = df[name].astype(d).cat.categories
+            if not found.is_monotonic_increasing:
+                df[name] = df[name].cat.reorder_categories(found.sort_values())
+        elif isinstance(d, pd.CategoricalDtype) and df[name].dtype == d:
+            # Unordered categories are equal in any order, but should be in d's.
+            if not df[name].cat.categories.equals(d.categories):
+                df[name] = df[name].cat.reorder_categories(d.categories)
+        elif df[name].dtype != d:
+            df[name] = df[name].astype(d)
+    return df
+
+
+def to_dataframe(
+    table: pa.Table | pa.RecordBatch,
+    index_col: str | list[str] | None = None,
+    parse_dates: list[str] | dict[str, Any] | None = None,
+    dtype_backend: str = "numpy",
+    dtype: dict[str, Any] | None = None,
+) -> pd.DataFrame:
+    """Convert Arrow data to a dataframe, as :func:`pandas.read_sql` would.
+
+    With ``dtype_backend="pyarrow"``, columns keep the Arrow types they were built
+    with, and ``dtype`` is ignored.
+    """
+    if dtype_backend == "pyarrow":
+        df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    elif dtype_backend == "numpy":
+        names = set(table.schema.names)
+        df = _to_pandas(
+            table,
+            {
+                name: pd.api.types.pandas_dtype(d)
+                for name, d in (dtype or {}).items()
+                if name in names
+            },
+        )
+    else:
+        raise ValueError(f"Unknown dtype_backend: {dtype_backend}")
+    for col in parse_dates or []:
+        # Dates are only planned if they can all be parsed, so only values of the
+        # columns given explicitly can become NaT, as they do with pandas.read_sql.
+        df[col] = pd.to_datetime(df[col], errors="coerce")
+    if index_col is not None:
+        df = df.set_index(index_col)
+    return df
+
+
+def read_sql_arrow(
+    sql: str,
+    uri: str,
+    index_col: str | list[str] | None = None,
+    params: Sequence[Any] | dict[str, Any] | None = None,
+    parse_dates: list[str] | dict[str, Any] | None = None,
+    dtype_backend: str = "numpy",
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    dtype: dict[str, Any] | None = None,
+) -> pd.DataFrame:
+    """Read a query or table into a dataframe by way of Arrow rather than SQLAlchemy.
+
+    Supports the most commonly used arguments of :func:`pandas.read_sql`.
+
+    Args:
+        sql: A query, or the name of a table or view to read in its entirety.
+        uri: SQLite URL of the database.
+        index_col: Column or columns to use as the index of the dataframe.
+        params: Parameters to bind to the query.
+        parse_dates: Columns to convert to datetimes.
+        dtype_backend: ``"numpy"`` to return columns with the same NumPy
+            dtypes :func:`pandas.read_sql` would, or ``"pyarrow"`` to return
+            Arrow-backed columns, avoiding a copy.
+        batch_rows: Number of rows to fetch and convert at a time.
+        dtype: Dtypes of any columns, e.g. as planned by
+            :func:`intake_sqlite.dtypes.plan_dtypes`. Columns are built as Arrow
+            arrays of the corresponding types in the first place where possible,
+            e.g. ``int8`` arrays, or dictionary arrays for categories.
+    """
+    table = read_sql_table_arrow(
+        sql,
+        uri,
+        params=params or (),
+        batch_rows=batch_rows,
+        types=_arrow_types(dtype),
+    )
+    return to_dataframe(table, index_col, parse_dates, dtype_backend, dtype)
+
+
+def iter_sql_arrow(
+    sql: str,
+    uri: str,
+    index_col: str | list[str] | None = None,
+    params: Sequence[Any] | dict[str, Any] | None = None,
+    parse_dates: list[str] | dict[str, Any] | None = None,
+    dtype_backend: str = "numpy",
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    dtype: dict[str, Any] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Stream a query or table as dataframes of at most ``batch_rows`` rows each.
+
+    Takes the same arguments as :func:`read_sql_arrow`. Note that the dtypes of
+    columns without declared types may differ between chunks.
+    """
+    for batch in iter_sql_batches(
+        sql,
+        uri,
+        params=params or (),
+        batch_rows=batch_rows,
+        types=_arrow_types(dtype),
+    ):
+        yield to_dataframe(batch, index_col, parse_dates, dtype_backend, dtype)
@@ -0,0 +1,283 @@
+"""A persistent, size-bounded on-disk cache for remote SQLite databases.
+
+Unlike the ``simplecache::`` filesystem from :mod:`fsspec`, which stores files in a
+temporary directory that lives only as long as the process does, this cache keeps
+downloaded databases in a fixed directory, so that every process on a host can share
+a single copy.
+
+Each cached database is identified by its URL together with whatever version
+information the remote filesystem provides (ETag, modification time, size). The
+mapping from a URL to the most recently seen version is stored in a small JSON index
+file, so a cache hit doesn't need to touch the network at all. Downloads are written
+to a temporary file and atomically renamed into place while holding a lock, so
+concurrent processes never see a partially downloaded database, and never download
+the same file twice. When the cache grows beyond its byte budget, the least recently
+used databases are deleted.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import fsspec
+
+from intake_sqlite.archive import Archive, decompress, parse_archive
+from intake_sqlite.download import parallel_download
+from intake_sqlite.instrument import span
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["DatabaseCache", "default_cache_dir"]
+
+# Keys in fsspec file info that identify a particular version of a remote file. They
+# vary between filesystem implementations.
+VERSION_KEYS = (
+    "etag",
+    "last_modified",
+    "lastmodified",
+    "last-modified",
+    "mtime",
+    "updated",
+    "generation",
+    "size",
+)
+
+
+def default_cache_dir() -> Path:
+    """Directory used to cache databases if no other location is given."""
+    base = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+    return Path(base) / "intake-sqlite"
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha256("\n".join(str(p) for p in parts).encode()).hexdigest()
+
+
+@contextlib.contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive, cross-process lock on ``path`` for the duration."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+b") as f:
+        if sys.platform == "win32":
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _write_json_atomic(path: Path, data: dict[str, Any]) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+class DatabaseCache:
+    """A directory of downloaded databases, shared by all processes on a host.
+
+    Args:
+        cache_dir: Directory in which to store the cached databases. Defaults to
+            ``$XDG_CACHE_HOME/intake-sqlite`` or ``~/.cache/intake-sqlite``.
+        max_bytes: Maximum total size of the cached databases. The least recently used
+            databases are removed once this budget is exceeded. If None, the cache
+            may grow without bound.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        max_bytes: int | None = None,
+    ):
+        """Create the cache directory if it doesn't exist yet."""
+        self.cache_dir = Path(cache_dir or default_cache_dir()).expanduser()
+        self.max_bytes = max_bytes
+        (self.cache_dir / "index").mkdir(parents=True, exist_ok=True)
+
+    def get(
+        self,
+        urlpath: str,
+        storage_options: dict[str, Any] = {},
+        revalidate: bool = False,
+        parallel: dict[str, Any] | None = None,
+    ) -> Path:
+        """Return the path to a local copy of ``urlpath``, downloading it if needed.
+
+        Args:
+            urlpath: An :mod:`fsspec` readable URL pointing to a SQLite database, which
+                may be compressed. See :func:`intake_sqlite.archive.parse_archive`.
+            storage_options: Keyword arguments used to instantiate the filesystem.
+            revalidate: If True, check the version of the remote file (typically with a
+                single HEAD request) and download it again if it has changed. If
+                False, any cached copy of the URL is used without contacting the
+                remote filesystem.
+            parallel: If not None, download the database using
+                :func:`intake_sqlite.download.parallel_download`, with these keyword
+                arguments.
+        """
+        index_path = self.cache_dir / "index" / f"{_digest(urlpath)}.json"
+        if not revalidate:
+            db_path = self._lookup(index_path)
+            if db_path is not None:
+                logger.info(f"Using cached copy of {urlpath} at {db_path}")
+                return db_path
+
+        archive = parse_archive(urlpath)
+        fs, path = fsspec.core.url_to_fs(
+            urlpath if archive is None else archive.urlpath, **storage_options
+        )
+        info = fs.info(path)
+        version = {k: info[k] for k in info if k.lower() in VERSION_KEYS}
+        db_path = self.cache_dir / f"{_digest(urlpath, sorted(version.items()))}.sqlite"
+        with file_lock(db_path.with_suffix(".lock")):
+            if db_path.is_file():
+                logger.info(f"Using cached copy of {urlpath} at {db_path}")
+                os.utime(db_path)
+            else:
+                self._download(fs, path, db_path, info.get("size"), parallel, archive)
+            _write_json_atomic(
+                index_path,
+                {"urlpath": urlpath, "version": version, "path": db_path.name},
+            )
+        self.evict(keep=db_path)
+        return db_path
+
+    def _lookup(self, index_path: Path) -> Path | None:
+        """Find the most recently cached version of a URL, if there is one."""
+        try:
+            with index_path.open() as f:
+                db_path: Path = self.cache_dir / str(json.load(f)["path"])
+            os.utime(db_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return db_path
+
+    def _download(
+        self,
+        fs: Any,
+        path: str,
+        db_path: Path,
+        size: int | None,
+        parallel: dict[str, Any] | None = None,
+        archive: Archive | None = None,
+    ) -> None:
+        """Download a remote file, and atomically move it into the cache.
+
+        Compressed databases are decompressed as they're downloaded. See
+        :func:`intake_sqlite.archive.decompress`.
+        """
+        logger.info(f"Downloading {path} to {db_path}")
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        os.close(fd)
+        try:
+            with span("download", urlpath=path) as attributes:
+                if archive is not None:
+                    attributes["bytes"] = decompress(
+                        fs, path, tmp, archive.compression, archive.member, parallel
+                    )
+                    # The archive is smaller than the database it holds.
+                    size = None
+                elif parallel is None:
+                    fs.get_file(path, tmp)
+                else:
+                    parallel_download(fs, path, tmp, size=size, **parallel)
+                actual = os.path.getsize(tmp)
+                attributes.setdefault("bytes", actual)
+            if size is not None and actual != size:
+                raise OSError(
+                    f"Downloaded {actual} bytes from {path} but expected {size}."
+                )
+            os.replace(tmp, db_path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def evict(self, keep: Path | None = None) -> list[Path]:
+        """Remove least recently used databases until the cache fits in its budget.
+
+        Args:
+            keep: A database that should not be removed, even if it's the oldest.
+
+        Returns:
+            The paths of the databases that were removed.
+        """
+        if self.max_bytes is None:
+            return []
+        removed = []
+        with file_lock(self.cache_dir / "evict.lock"):
+            entries = []
+            for db_path in self.cache_dir.glob("*.sqlite"):
+                with contextlib.suppress(OSError):
+                    stat = db_path.stat()
+                    entries.append((stat.st_mtime, stat.st_size, db_path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, db_path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if db_path == keep:
+                    continue
+                try:
+                    self._remove(db_path)
+                except OSError:
+                    # e.g. on Windows, where files that are open can't be removed.
+                    logger.warning(f"Unable to evict {db_path} from the cache.")
+                    continue
+                logger.info(f"Evicted {db_path} from the cache.")
+                total -= size
+                removed.append(db_path)
+        return removed
+
+    def _remove(self, db_path: Path) -> None:
+        """Remove a database and the index entries that refer to it.
+
+        The database's lock is held throughout, so that no other process can be
+        downloading it or recording it in the index at the same time.
+        """
+        with file_lock(db_path.with_suffix(".lock")):
+            db_path.unlink()
+            for index_path in (self.cache_dir / "index").glob("*.json"):
+                try:
+                    with index_path.open() as f:
+                        name = json.load(f)["path"]
+                except (OSError, ValueError, KeyError):
+                    continue
+                if name == db_path.name:
+                    index_path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Remove all cached databases and index entries."""
+        for db_path in self.cache_dir.glob("*.sqlite"):
+            self._remove(db_path)
+        # Entries whose databases have already gone.
+        for index_path in (self.cache_dir / "index").glob("*.json"):
+            index_path.unlink(missing_ok=True)
+
+    def size(self) -> int:
+        """Total number of bytes used by cached databases."""
+        return sum(p.stat().st_size for p in self.cache_dir.glob("*.sqlite"))
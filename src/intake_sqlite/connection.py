@@ -0,0 +1,48 @@
+"""Open DB-API connections to SQLite databases identified by SQLAlchemy URLs.
+
+Most reads go through SQLAlchemy, but some faster read paths work directly with
+:mod:`sqlite3` cursors. These helpers translate the SQLite URLs produced by
+:func:`intake_sqlite.urlpath_to_sqliteurl` into :func:`sqlite3.connect` arguments in
+exactly the same way SQLAlchemy does, so both paths open the same database with the
+same options, including any PRAGMAs.
+"""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from typing import Any
+
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["connect", "table_exists"]
+
+
+def connect(uri: str, **kwargs: Any) -> sqlite3.Connection:
+    """Open a :mod:`sqlite3` connection to the database at a SQLAlchemy URL.
+
+    Args:
+        uri: A SQLite URL, as returned by
+            :func:`intake_sqlite.urlpath_to_sqliteurl`.
+        kwargs: Additional keyword arguments for :func:`sqlite3.connect`, which
+            override any options found in the URL.
+    """
+    url = sa.engine.make_url(uri)
+    dialect = url.get_dialect()()
+    args, connect_kwargs = dialect.create_connect_args(url)
+    connect_kwargs.update(kwargs)
+    con: sqlite3.Connection = sqlite3.connect(*args, **connect_kwargs)
+    on_connect = dialect.on_connect_url(url)
+    if on_connect is not None:
+        on_connect(con)
+    return con
+
+
+def table_exists(con: sqlite3.Connection, name: str) -> bool:
+    """Check whether a table or view with the given name exists in the database."""
+    row = con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?",
+        (name,),
+    ).fetchone()
+    return row is not None
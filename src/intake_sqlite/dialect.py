@@ -0,0 +1,170 @@
+"""A SQLAlchemy dialect that opens SQLite databases read-only, tuned for reading.
+
+Databases are opened as ``file:`` URIs with ``mode=ro``, and a handful of PRAGMAs let
+SQLite use memory mapped I/O and a larger page cache. Copies of remote databases that
+this package downloads into a cache aren't changed by anything else while they're
+being read, so they're also opened with ``immutable=1``, which tells SQLite it needn't
+take any locks or check for changes made by other connections. Local databases may be
+written to or rebuilt at any time, so they aren't.
+
+SQLite has no way to set PRAGMAs from a URI, so they are carried in the SQLAlchemy URL
+instead, e.g. ``sqlite+intake:///file:/data/pudl.sqlite?mode=ro&immutable=1&uri=true&
+mmap_size=268435456``. The ``sqlite+intake`` dialect removes them from the filename it
+passes to :func:`sqlite3.connect`, and executes them on every new connection. Because
+the settings travel with the URL, they apply to every engine created from it, whether
+by :mod:`pandas`, :mod:`dask` or :mod:`intake_sql`, and in any process where this
+package is installed.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from urllib.parse import unquote, urlencode, urlparse
+
+from sqlalchemy.dialects import registry
+from sqlalchemy.dialects.sqlite.pysqlite import SQLiteDialect_pysqlite
+from sqlalchemy.engine import make_url
+
+from intake_sqlite.pool import SharedPool, pool_key
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "DEFAULT_PRAGMAS",
+    "ReadOnlySQLiteDialect",
+    "apply_pragmas",
+    "database_path",
+    "sqlite_url",
+]
+
+DEFAULT_PRAGMAS: dict[str, int | str] = {
+    "cache_size": -65536,
+    "mmap_size": 2**28,
+    "query_only": 1,
+    "temp_store": "memory",
+}
+"""PRAGMAs applied to every connection unless overridden.
+
+A 64 MiB page cache (negative sizes are in KiB), up to 256 MiB of memory mapped I/O,
+temporary tables and indices kept in memory, and no writes.
+"""
+
+_PRAGMA_VALUE = re.compile(r"-?\d+|[A-Za-z]+")
+
+
+def _check_pragmas(pragmas: dict[str, Any]) -> dict[str, str]:
+    """Make sure only known PRAGMAs with simple values are used."""
+    unknown = set(pragmas) - set(DEFAULT_PRAGMAS)
+    if unknown:
+        raise ValueError(
+            f"Unsupported PRAGMAs {sorted(unknown)}. Expected any of "
+            f"{sorted(DEFAULT_PRAGMAS)}."
+        )
+    checked = {}
+    for name, value in pragmas.items():
+        value = str(int(value) if isinstance(value, bool) else value)
+        if not _PRAGMA_VALUE.fullmatch(value):
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value}")
+        checked[name] = value
+    return checked
+
+
+def apply_pragmas(con: sqlite3.Connection, pragmas: dict[str, Any]) -> None:
+    """Execute PRAGMA statements on a :mod:`sqlite3` connection."""
+    for name, value in _check_pragmas(pragmas).items():
+        con.execute(f"PRAGMA {name} = {value}")
+
+
+def sqlite_url(
+    database: str | Path,
+    immutable: bool = False,
+    pragmas: dict[str, Any] | None = None,
+    **params: str,
+) -> str:
+    """Build a URL that opens a SQLite database read-only with tuned PRAGMAs.
+
+    Args:
+        database: Path to a local database, or a SQLite ``file:`` URI.
+        immutable: Whether SQLite may assume the database can't be changed by anyone
+            while it's open, and skip locking. Only set this for copies of databases
+            that nothing else writes to, like those downloaded into a cache. SQLite
+            reports an immutable database that is changed anyway as corrupt.
+        pragmas: PRAGMAs to apply to each connection, which are merged with
+            :data:`DEFAULT_PRAGMAS`. Setting one to None disables it.
+        params: Additional SQLite URI parameters, e.g. ``vfs``.
+
+    Returns:
+        A ``sqlite+intake`` SQLAlchemy URL.
+    """
+    if isinstance(database, Path):
+        database = database.as_uri()
+    merged = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+    query = {"mode": "ro", **params}
+    if immutable:
+        query["immutable"] = "1"
+    query["uri"] = "true"
+    query.update(_check_pragmas({k: v for k, v in merged.items() if v is not None}))
+    return f"sqlite+intake:///{database}?{urlencode(query)}"
+
+
+def database_path(uri: str) -> Path | None:
+    """Find the local database file that a SQLite URL refers to.
+
+    Returns:
+        The path to the database file, or None if the URL doesn't refer to a file
+        that exists on the local filesystem, e.g. if it's a remote database read with
+        :mod:`intake_sqlite.vfs`.
+    """
+    database = make_url(uri).database or ""
+    if database.startswith("file:"):
+        database = unquote(urlparse(database).path)
+    path = Path(database)
+    return path if database and path.is_file() else None
+
+
+class ReadOnlySQLiteDialect(SQLiteDialect_pysqlite):  # type: ignore
+    """The ``pysqlite`` dialect, with PRAGMAs taken from the URL.
+
+    Connections are shared between all engines created from the same URL by
+    :class:`intake_sqlite.pool.SharedPool`, and may be used by any thread.
+    """
+
+    driver = "intake"
+    supports_statement_cache = True
+
+    @classmethod
+    def get_pool_class(cls, url: Any) -> type[SharedPool]:
+        """Share connections between engines, whatever the URL."""
+        return SharedPool
+
+    @staticmethod
+    def _pragmas(url: Any) -> dict[str, str]:
+        return {k: v for k, v in url.query.items() if k in DEFAULT_PRAGMAS}
+
+    def create_connect_args(self, url: Any) -> tuple[list[Any], dict[str, Any]]:
+        """Build :func:`sqlite3.connect` arguments, leaving out the PRAGMAs."""
+        self.pool_key = pool_key(url)
+        self.pool_path = database_path(url)
+        url = url.difference_update_query(self._pragmas(url))
+        args, kwargs = super().create_connect_args(url)
+        kwargs.setdefault("check_same_thread", False)
+        return args, kwargs
+
+    def on_connect_url(self, url: Any) -> Callable[[Any], None] | None:
+        """Return a function that applies the PRAGMAs in the URL to new connections."""
+        pragmas = self._pragmas(url)
+        super_connect = super().on_connect_url(url)
+
+        def connect(con: Any) -> None:
+            if super_connect is not None:
+                super_connect(con)
+            apply_pragmas(getattr(con, "dbapi_connection", con), pragmas)
+
+        return connect
+
+
+registry.register("sqlite.intake", __name__, "ReadOnlySQLiteDialect")
@@ -0,0 +1,191 @@
+"""Download remote databases quickly by fetching many byte ranges concurrently.
+
+A single HTTP or object storage stream is often limited to a small fraction of the
+available bandwidth. Splitting a large file into chunks and requesting them in parallel
+lets a download make use of the whole link. Each chunk is written directly into its
+place in a preallocated file, so memory use is bounded by ``max_workers * chunk_size``
+no matter how large the database is.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import fsspec
+
+from intake_sqlite.instrument import span
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "parallel_download",
+    "parallel_open_local",
+    "temporary_copy",
+    "verify_checksum",
+]
+
+DEFAULT_MAX_WORKERS = 8
+"""Number of byte ranges fetched concurrently."""
+
+DEFAULT_CHUNK_SIZE = 2**25
+"""Number of bytes fetched by each range request (32 MiB)."""
+
+_tempdir: str | None = None
+_locks: dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+def parallel_download(
+    fs: Any,
+    path: str,
+    local_path: str | Path,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    size: int | None = None,
+    checksum: str | None = None,
+) -> int:
+    """Download a file by fetching byte ranges concurrently.
+
+    Args:
+        fs: The :mod:`fsspec` filesystem containing the file.
+        path: Path to the file within ``fs``.
+        local_path: Where to write the downloaded file. It's overwritten if it exists.
+        max_workers: Number of byte ranges to fetch concurrently.
+        chunk_size: Number of bytes to fetch in each range request.
+        size: Size of the remote file in bytes, if it's already known.
+        checksum: An optional ``algorithm:hexdigest`` string, e.g. ``"sha256:ab12..."``
+            that the downloaded file must match. Any algorithm known to
+            :mod:`hashlib` may be used.
+
+    Returns:
+        The number of bytes downloaded.
+
+    Raises:
+        OSError: If the downloaded file doesn't have the expected size or checksum.
+    """
+    if max_workers <= 0 or chunk_size <= 0:
+        raise ValueError("max_workers and chunk_size must both be positive.")
+    total: int = int(fs.size(path)) if size is None else size
+    starts = range(0, total, chunk_size)
+    logger.info(
+        f"Downloading {total} bytes from {path} in {len(starts)} chunks using "
+        f"{max_workers} workers."
+    )
+    with open(local_path, "wb") as f:
+        f.truncate(total)
+
+    def fetch(start: int) -> int:
+        end = min(start + chunk_size, total)
+        data = fs.cat_file(path, start=start, end=end)
+        if len(data) != end - start:
+            raise OSError(
+                f"Expected {end - start} bytes from {path} at offset {start} but got "
+                f"{len(data)}. Does the server support range requests?"
+            )
+        with open(local_path, "r+b") as f:
+            f.seek(start)
+            f.write(data)
+        return len(data)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        downloaded = sum(executor.map(fetch, starts))
+
+    actual = os.path.getsize(local_path)
+    if actual != total:
+        raise OSError(f"Downloaded {actual} bytes from {path} but expected {total}.")
+    if checksum is not None:
+        verify_checksum(local_path, checksum)
+    return downloaded
+
+
+def verify_checksum(local_path: str | Path, checksum: str) -> None:
+    """Check that a file matches an ``algorithm:hexdigest`` checksum."""
+    algorithm, _, expected = checksum.partition(":")
+    digest = hashlib.new(algorithm)
+    with open(local_path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            digest.update(block)
+    if digest.hexdigest() != expected.lower():
+        raise OSError(
+            f"{algorithm} checksum of {local_path} is {digest.hexdigest()} but "
+            f"expected {expected}."
+        )
+
+
+def parallel_open_local(
+    urlpath: str,
+    storage_options: dict[str, Any] = {},
+    **kwargs: Any,
+) -> str:
+    """Download a remote file in parallel to a temporary, per-process cache.
+
+    This mirrors the behavior of ``fsspec.open_local("simplecache::" + urlpath)``:
+    each URL is downloaded at most once per process, and the copy lives in a
+    temporary directory that is deleted when the interpreter exits.
+
+    Args:
+        urlpath: An :mod:`fsspec` readable URL.
+        storage_options: Keyword arguments used to instantiate the filesystem.
+        kwargs: Keyword arguments passed to :func:`parallel_download`.
+
+    Returns:
+        The path to the local copy of the file.
+    """
+
+    def fetch(local_path: Path) -> int:
+        fs, path = fsspec.core.url_to_fs(urlpath, **storage_options)
+        return parallel_download(fs, path, local_path, **kwargs)
+
+    return temporary_copy(urlpath, Path(urlpath).suffix, fetch)
+
+
+def _remove_tempdir(path: str, pid: int) -> None:
+    """Delete the temporary copies, unless this is a child forked from their owner."""
+    if os.getpid() == pid:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def temporary_copy(urlpath: str, suffix: str, fetch: Callable[[Path], int]) -> str:
+    """Make a local copy of a remote file in a temporary, per-process cache.
+
+    The copy is made at most once per process, and moved into place only once it's
+    complete. The temporary directory holding the copies is deleted when the
+    interpreter exits, by the process that created it.
+
+    Args:
+        urlpath: The URL of the remote file, which identifies the copy.
+        suffix: The suffix of the copy's file name.
+        fetch: Writes the copy to the path it's given, returning the number of bytes
+            downloaded.
+
+    Returns:
+        The path to the local copy of the file.
+    """
+    global _tempdir
+    name = hashlib.sha256(urlpath.encode()).hexdigest() + suffix
+    with _locks_lock:
+        if _tempdir is None:
+            _tempdir = tempfile.mkdtemp(prefix="intake-sqlite-")
+            atexit.register(_remove_tempdir, _tempdir, os.getpid())
+        lock = _locks.setdefault(name, threading.Lock())
+    local_path = Path(_tempdir) / name
+    with lock:
+        if not local_path.is_file():
+            partial = local_path.with_suffix(".part")
+            try:
+                with span("download", urlpath=urlpath) as attributes:
+                    attributes["bytes"] = fetch(partial)
+                os.replace(partial, local_path)
+            finally:
+                if partial.exists():
+                    partial.unlink()
+    return str(local_path)
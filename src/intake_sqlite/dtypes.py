@@ -0,0 +1,280 @@
+"""Choose compact dataframe dtypes for the columns of SQLite tables.
+
+:func:`pandas.read_sql` returns every text column with the ``object`` dtype, holding a
+separate Python string for each cell, and every integer column as ``int64``, or as
+``float64`` if it contains any NULLs. Tables with many repeated strings and small
+integers therefore take several times more memory than they need to.
+
+:func:`plan_dtypes` instead chooses a dtype for each column from its declared SQLite
+type and a few cheap statistics, gathered with a single aggregate query over the
+numeric and date columns of the table, and another over a sample of its rows:
+
+* Integers use the narrowest width that holds their minimum and maximum values, and
+  the masked ``Int8`` to ``Int64`` dtypes if they contain NULLs.
+* Booleans, stored by SQLite as 0 and 1, use ``bool``, or ``boolean`` if they
+  contain NULLs.
+* Text with few distinct values in a sample of rows becomes ``category``. When a
+  table is read in pieces, all of the values found in the table become its
+  categories, so that every chunk and every partition gets exactly the same dtype.
+* Dates and times, stored as text, are parsed in a single vectorized pass, but only
+  if they are all written in the same ISO 8601 format, with no UTC offset, and are
+  within the range of ``datetime64[ns]``. Otherwise they are left as text, so that
+  no values are lost.
+
+Floating point columns are left as they are, since narrowing them would lose
+precision. The plan is applied by the readers themselves, using the ``dtype`` and
+``parse_dates`` arguments of :func:`pandas.read_sql`, or by building Arrow arrays of
+the planned types directly (see :mod:`intake_sqlite.arrow`).
+"""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from collections.abc import Sequence
+from typing import Any
+
+import pandas as pd
+
+from intake_sqlite.partition import quote_identifier
+from intake_sqlite.pushdown import Filters, select_sql
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["integer_dtype", "plan_dtypes", "with_plan"]
+
+DEFAULT_MAX_CATEGORIES = 1000
+"""Maximum number of distinct values in a text column stored as a category."""
+
+DEFAULT_SAMPLE_ROWS = 10_000
+"""Number of rows sampled to find text columns that may have few distinct values."""
+
+DATETIME = "datetime64[ns]"
+
+_DATETIME_FORMATS = (
+    "date({c})",
+    "datetime({c})",
+    "strftime('%Y-%m-%d %H:%M:%f', {c})",
+)
+"""SQLite expressions that rewrite a date or time as text in each format that's parsed.
+
+Values that are unchanged by one of them are written in that format.
+"""
+
+_DATETIME_RANGE = ("1677-09-22", "2262-04-11")
+"""Dates and times within the range of ``datetime64[ns]``, compared as text."""
+
+_INTEGER_WIDTHS = (8, 16, 32, 64)
+
+
+def integer_dtype(lo: int, hi: int, nullable: bool = False) -> str:
+    """Narrowest signed integer dtype that can hold all values from lo to hi."""
+    for bits in _INTEGER_WIDTHS:
+        if -(2 ** (bits - 1)) <= lo and hi < 2 ** (bits - 1):
+            break
+    return f"Int{bits}" if nullable else f"int{bits}"
+
+
+def _kind(declared: str) -> str | None:
+    """Which kind of compact dtype a declared SQLite column type might use."""
+    declared = declared.upper()
+    if "INT" in declared:
+        return "integer"
+    if "BOOL" in declared:
+        return "boolean"
+    if "DATE" in declared or "TIME" in declared:
+        return "datetime"
+    if "CHAR" in declared or "CLOB" in declared or "TEXT" in declared:
+        return "text"
+    return None
+
+
+def plan_dtypes(
+    con: sqlite3.Connection,
+    table: str,
+    columns: list[str] | None = None,
+    max_categories: int = DEFAULT_MAX_CATEGORIES,
+    sample_rows: int = DEFAULT_SAMPLE_ROWS,
+    categories: bool = True,
+    filters: Filters | None = None,
+) -> dict[str, Any]:
+    """Choose compact dtypes for the columns of a table.
+
+    SQLite is dynamically typed, so the types of the stored values are checked, and
+    columns containing values that don't match their declared type are left alone.
+
+    Args:
+        con: Connection to the database.
+        table: Name of the table.
+        columns: Names of the columns to plan dtypes for. Defaults to all of them.
+        max_categories: Maximum number of distinct values in a text column stored
+            as a category.
+        sample_rows: Number of rows sampled to find text columns with few distinct
+            values.
+        categories: Whether to find all of the distinct values of the text columns
+            that will be stored as categories, which takes another pass over the
+            table for each of them. This is only needed when the table is read in
+            several pieces that must have the same dtypes. Otherwise, the dtype of
+            those columns is just ``"category"``.
+        filters: Only plan for the rows selected by these filters, e.g. only the
+            rows that are about to be read. Defaults to the whole table.
+
+    Returns:
+        A mapping of column names to dtypes, for the columns that can be stored more
+        compactly than :func:`pandas.read_sql` would store them.
+    """
+    kinds = {}
+    for _, name, declared, *_ in con.execute(
+        "SELECT * FROM pragma_table_info(?)", (table,)
+    ):
+        kind = _kind(declared or "")
+        if kind is not None and (columns is None or name in columns):
+            kinds[name] = kind
+    text = [name for name, kind in kinds.items() if kind == "text"]
+    scalars = {name: kind for name, kind in kinds.items() if kind != "text"}
+    params: Sequence[Any] = ()
+    if filters:
+        # Positional parameters, since no parameters are already bound.
+        select, bound = select_sql(table, True, filters=filters)
+        source, params = f"({select})", tuple(bound)
+    else:
+        source = quote_identifier(table)
+    plan: dict[str, Any] = {}
+    if scalars:
+        plan.update(_plan_scalars(con, source, params, scalars))
+    if text:
+        plan.update(
+            _plan_categories(
+                con, source, params, text, max_categories, sample_rows, categories
+            )
+        )
+    logger.debug(f"Planned dtypes for {table}: {plan}")
+    return plan
+
+
+def _plan_scalars(
+    con: sqlite3.Connection, source: str, params: Sequence[Any], kinds: dict[str, str]
+) -> dict[str, str]:
+    """Choose dtypes using the range, NULLs and storage classes of each column.
+
+    All of them are found with a single pass over the quoted table or subquery
+    ``source``, to which ``params`` are bound. Dates and times are only parsed if
+    every value is written in the same one of :data:`_DATETIME_FORMATS`, within the
+    range of ``datetime64[ns]``, so that none of them are lost when parsing.
+    """
+    expected = {
+        "integer": "typeof({c}) = 'integer'",
+        "boolean": "{c} IN (0, 1)",
+        "datetime": "typeof({c}) = 'text'",
+    }
+    extra = {
+        "integer": ["min({c})", "max({c})"],
+        "datetime": [
+            "min({c})",
+            "max({c})",
+            *(f"sum({{c}} = {f})" for f in _DATETIME_FORMATS),
+        ],
+    }
+    aggregates = ["count(*)"]
+    for name, kind in kinds.items():
+        c = quote_identifier(name)
+        aggregates += [f"count({c})", f"sum({expected[kind].format(c=c)})"]
+        aggregates += [e.format(c=c) for e in extra.get(kind, [])]
+    query = f"SELECT {', '.join(aggregates)} FROM {source}"  # nosec: B608
+    row = iter(con.execute(query, params).fetchone())
+    nrows = next(row)
+    plan = {}
+    for name, kind in kinds.items():
+        count, matching = next(row), next(row) or 0
+        lo, hi, *formatted = [next(row) for _ in extra.get(kind, [])] or [None, None]
+        nullable = count < nrows
+        if count == 0 or matching != count:
+            continue
+        if kind == "integer":
+            plan[name] = integer_dtype(lo, hi, nullable)
+        elif kind == "boolean":
+            plan[name] = "boolean" if nullable else "bool"
+        elif (
+            count in formatted and _DATETIME_RANGE[0] <= lo and hi < _DATETIME_RANGE[1]
+        ):
+            plan[name] = DATETIME
+    return plan
+
+
+def _plan_categories(
+    con: sqlite3.Connection,
+    source: str,
+    params: Sequence[Any],
+    columns: list[str],
+    max_categories: int,
+    sample_rows: int,
+    categories: bool,
+) -> dict[str, Any]:
+    """Find the text columns with few enough distinct values to be categories."""
+    quoted = [quote_identifier(c) for c in columns]
+    # Counting distinct values needs a temporary index, so only a sample is counted.
+    aggregates = [
+        f"count(DISTINCT {c}), count({c}), sum(typeof({c}) = 'text')" for c in quoted
+    ]
+    sampled, *counts = con.execute(
+        f"SELECT count(*), {', '.join(aggregates)} FROM "  # nosec: B608
+        f"(SELECT {', '.join(quoted)} FROM {source} LIMIT ?)",
+        (*params, sample_rows),
+    ).fetchone()
+    plan: dict[str, Any] = {}
+    for i, (name, c) in enumerate(zip(columns, quoted)):
+        distinct, count, text = counts[3 * i : 3 * i + 3]
+        if count == 0 or text != count:
+            continue
+        if distinct > max_categories or 2 * distinct > sampled:
+            continue
+        if not categories:
+            plan[name] = "category"
+            continue
+        values = [
+            value
+            for value, in con.execute(
+                f"SELECT DISTINCT {c} FROM {source} "  # nosec: B608
+                f"WHERE {c} IS NOT NULL LIMIT ?",
+                (*params, max_categories + 1),
+            )
+        ]
+        if len(values) <= max_categories:
+            plan[name] = pd.CategoricalDtype(sorted(values))
+    return plan
+
+
+def with_plan(kwargs: dict[str, Any], plan: dict[str, Any]) -> dict[str, Any]:
+    """Add a dtype plan to the keyword arguments of a reader like pandas.read_sql.
+
+    Dtypes and dates passed explicitly in ``dtype`` and ``parse_dates`` take
+    precedence over the plan.
+
+    Returns:
+        A copy of ``kwargs`` with the planned ``dtype`` and ``parse_dates``.
+    """
+    if not plan:
+        return kwargs
+    kwargs = dict(kwargs)
+    dtype = dict(kwargs.get("dtype") or {})
+    parse_dates = kwargs.get("parse_dates") or []
+    if isinstance(parse_dates, str):
+        parse_dates = [parse_dates]
+    dates = [
+        name
+        for name, planned in plan.items()
+        if planned == DATETIME and name not in dtype and name not in parse_dates
+    ]
+    if dates:
+        if isinstance(parse_dates, dict):
+            kwargs["parse_dates"] = {**parse_dates, **dict.fromkeys(dates)}
+        else:
+            kwargs["parse_dates"] = [*parse_dates, *dates]
+    kwargs["dtype"] = {
+        **{
+            name: planned
+            for name, planned in plan.items()
+            if planned != DATETIME and name not in parse_dates
+        },
+        **dtype,
+    }
+    return kwargs
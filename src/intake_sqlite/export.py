@@ -0,0 +1,477 @@
+"""Export the tables of a SQLite database to a directory of Parquet files.
+
+Reading every entry of a :class:`intake_sqlite.SQLiteCatalog` into memory and writing
+it out again takes as much memory as the largest table, and uses a single core. The
+functions here instead stream each table from a :mod:`sqlite3` cursor as Arrow record
+batches, conform them to a fixed schema, and write them straight to Parquet, so that
+at most one row group of each table is held in memory at a time. Tables are exported
+in parallel by a pool of worker processes, largest first.
+
+Each table becomes a directory of files named ``part-00000.parquet``,
+``part-00001.parquet``, and so on, each holding at most ``rows_per_file`` rows in row
+groups of ``row_group_rows`` rows, which :func:`dask.dataframe.read_parquet` reads as
+one partition per file. By default, columns get the same compact types that
+:class:`intake_sqlite.SQLiteSource` gives them with ``compact_dtypes=True`` (see
+:mod:`intake_sqlite.dtypes`): narrow integers, dictionary encoded categories, booleans
+and timestamps. Dates are only stored as timestamps if every one of them can be
+parsed, so no values are lost.
+
+Alongside the tables, a ``catalog.yml`` manifest describes every table exported so
+far, as an Intake catalog of ``parquet`` sources (see :mod:`intake_parquet`) with the
+number of rows, files, bytes and the schema of each table in its metadata. Exports can
+be run from the command line::
+
+    intake-sqlite-export pudl.sqlite pudl-parquet/ --tables plants_eia860 --workers 4
+
+Requires :mod:`pyarrow`.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yaml
+
+import intake_sqlite
+from intake_sqlite.arrow import (
+    DEFAULT_BATCH_ROWS,
+    arrow_type,
+    declared_types,
+    iter_sql_batches,
+)
+from intake_sqlite.dialect import database_path
+from intake_sqlite.dtypes import DATETIME, plan_dtypes
+from intake_sqlite.partition import quote_identifier
+from intake_sqlite.pool import pooled_connection
+from intake_sqlite.schema import list_relations
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "DEFAULT_ROWS_PER_FILE",
+    "DEFAULT_ROW_GROUP_ROWS",
+    "MANIFEST_NAME",
+    "export_parquet",
+    "export_table",
+    "main",
+    "table_schema",
+]
+
+DEFAULT_ROW_GROUP_ROWS = 2**20
+"""Number of rows in each Parquet row group, and the most buffered per table."""
+
+DEFAULT_ROWS_PER_FILE = 2**24
+"""Maximum number of rows in each Parquet file."""
+
+MANIFEST_NAME = "catalog.yml"
+"""Name of the Intake catalog describing the exported tables."""
+
+# Arrow types of columns without a declared type, from the type of a stored value.
+_STORAGE_TYPES = {
+    "integer": pa.int64(),
+    "real": pa.float64(),
+    "text": pa.string(),
+    "blob": pa.binary(),
+}
+
+
+def table_schema(
+    con: sqlite3.Connection, table: str, compact_dtypes: bool | dict[str, Any] = True
+) -> pa.Schema:
+    """Choose the Arrow schema in which to store a table.
+
+    Columns with compact dtypes get the corresponding Arrow types, and the others get
+    the types their declarations imply. Columns without a declared type get the type
+    of the first non-NULL value stored in them.
+
+    Args:
+        con: Connection to the database.
+        table: Name of the table or view.
+        compact_dtypes: Whether to plan compact types for the columns, or a
+            dictionary of options for :func:`intake_sqlite.dtypes.plan_dtypes`.
+    """
+    names = [
+        name
+        for _, name, *_ in con.execute("SELECT * FROM pragma_table_info(?)", (table,))
+    ]
+    types = declared_types(con, table)
+    if compact_dtypes:
+        options = compact_dtypes if isinstance(compact_dtypes, dict) else {}
+        for name, dtype in plan_dtypes(con, table, categories=False, **options).items():
+            planned = pa.timestamp("ns") if dtype == DATETIME else arrow_type(dtype)
+            if planned is not None:
+                types[name] = planned
+    fields = []
+    for name in names:
+        if name not in types:
+            c = quote_identifier(name)
+            row = con.execute(
+                f"SELECT typeof({c}) FROM {quote_identifier(table)} "  # nosec: B608
+                f"WHERE {c} IS NOT NULL LIMIT 1"
+            ).fetchone()
+            types[name] = pa.null() if row is None else _STORAGE_TYPES[row[0]]
+        fields.append(pa.field(name, types[name]))
+    return pa.schema(fields)
+
+
+def _conform(batch: pa.RecordBatch, schema: pa.Schema, table: str) -> pa.RecordBatch:
+    """Convert the columns of a batch to the types of the schema."""
+    arrays = []
+    for field, column in zip(schema, batch.columns):
+        if column.type != field.type:
+            try:
+                if pa.types.is_timestamp(field.type):
+                    # Dates that can't be parsed are an error, rather than lost.
+                    dates = pd.to_datetime(column.to_pandas(), errors="raise")
+                    column = pa.Array.from_pandas(dates, type=field.type)
+                else:
+                    column = column.cast(field.type)
+            except (ValueError, pa.ArrowNotImplementedError) as err:
+                raise TypeError(
+                    f"Column {field.name} of {table} contains values that can't "
+                    f"be stored as {field.type}: {err}"
+                ) from err
+        arrays.append(column)
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _PartWriter:
+    """Write a stream of tables to numbered Parquet files with fixed size row groups."""
+
+    def __init__(
+        self,
+        directory: Path,
+        schema: pa.Schema,
+        row_group_rows: int,
+        rows_per_file: int,
+        **options: Any,
+    ):
+        self.directory = directory
+        self.schema = schema
+        self.row_group_rows = row_group_rows
+        self.rows_per_file = rows_per_file
+        self.options = options
+        self.files: list[str] = []
+        self.rows = 0
+        self._writer: pq.ParquetWriter | None = None
+        self._file_rows = 0
+        self._pending: list[pa.RecordBatch] = []
+        self._pending_rows = 0
+
+    def write(self, batch: pa.RecordBatch) -> None:
+        """Buffer a batch, writing out every complete row group."""
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        if self._pending_rows >= self.row_group_rows:
+            self._flush(final=False)
+
+    def close(self) -> None:
+        """Write any remaining rows, and close the last file."""
+        self._flush(final=True)
+        if not self.files:
+            # An empty table still gets a file, so that its schema is recorded.
+            self._open()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _open(self) -> None:
+        name = f"part-{len(self.files):05d}.parquet"
+        self._writer = pq.ParquetWriter(
+            self.directory / name, self.schema, **self.options
+        )
+        self._file_rows = 0
+        self.files.append(name)
+
+    def _flush(self, final: bool) -> None:
+        table = pa.Table.from_batches(self._pending, schema=self.schema)
+        while table.num_rows >= self.row_group_rows or (final and table.num_rows):
+            if self._writer is None:
+                self._open()
+            assert self._writer is not None  # nosec: B101
+            rows = min(
+                self.row_group_rows,
+                self.rows_per_file - self._file_rows,
+                table.num_rows,
+            )
+            self._writer.write_table(table.slice(0, rows), row_group_size=rows)
+            table = table.slice(rows)
+            self._file_rows += rows
+            self.rows += rows
+            if self._file_rows >= self.rows_per_file:
+                self._writer.close()
+                self._writer = None
+        self._pending = table.to_batches()
+        self._pending_rows = table.num_rows
+
+
+def export_table(
+    urlpath: str,
+    table: str,
+    out_dir: str | Path,
+    storage_options: dict[str, Any] = {},
+    compression: str | None = "zstd",
+    compression_level: int | None = None,
+    row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+    rows_per_file: int = DEFAULT_ROWS_PER_FILE,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    compact_dtypes: bool | dict[str, Any] = True,
+) -> dict[str, Any]:
+    """Stream one table or view into a directory of Parquet files.
+
+    The files are written to a temporary directory, which then replaces the table's
+    directory in ``out_dir``, so a table is never seen half exported.
+
+    Args:
+        urlpath: A local path or :mod:`fsspec` readable URL pointing to a SQLite
+            database, or a SQLite URL.
+        table: Name of the table or view.
+        out_dir: Directory in which to create the table's directory.
+        storage_options: Options for :func:`intake_sqlite.urlpath_to_sqliteurl`.
+        compression: Parquet compression codec, like ``"zstd"``, ``"snappy"`` or
+            None.
+        compression_level: Level of compression, for codecs that have one.
+        row_group_rows: Number of rows in each row group.
+        rows_per_file: Maximum number of rows in each file.
+        batch_rows: Number of rows fetched from the database at a time.
+        compact_dtypes: Whether to store columns with compact types. See
+            :func:`table_schema`.
+
+    Returns:
+        A description of the exported table: its ``files``, and its number of
+        ``rows``, ``bytes`` and ``columns``, with the Arrow type of each column.
+    """
+    started = time.perf_counter()
+    uri = intake_sqlite.urlpath_to_sqliteurl(urlpath, storage_options=storage_options)
+    with pooled_connection(uri) as con:
+        schema = table_schema(con, table, compact_dtypes)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=out_dir, prefix=f".{table}-"))
+    try:
+        writer = _PartWriter(
+            tmp_dir,
+            schema,
+            row_group_rows=row_group_rows,
+            rows_per_file=rows_per_file,
+            compression=compression,
+            compression_level=compression_level,
+        )
+        types = {f.name: f.type for f in schema if not pa.types.is_timestamp(f.type)}
+        for batch in iter_sql_batches(table, uri, batch_rows=batch_rows, types=types):
+            writer.write(_conform(batch, schema, table))
+        writer.close()
+        table_dir = out_dir / table
+        shutil.rmtree(table_dir, ignore_errors=True)
+        os.replace(tmp_dir, table_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    exported = {
+        "files": writer.files,
+        "rows": writer.rows,
+        "bytes": sum((table_dir / name).stat().st_size for name in writer.files),
+        "columns": {f.name: str(f.type) for f in schema},
+    }
+    logger.info(
+        f"Exported {writer.rows} rows of {table} to {len(writer.files)} files in "
+        f"{time.perf_counter() - started:.2f}s."
+    )
+    return exported
+
+
+def _table_sizes(uri: str, tables: list[str]) -> dict[str, int]:
+    """Estimate the number of rows in each table from its largest rowid.
+
+    Views, and tables without a rowid, are assumed to be small.
+    """
+    sizes = {}
+    with pooled_connection(uri) as con:
+        for table in tables:
+            try:
+                row = con.execute(
+                    f"SELECT max(rowid) FROM {quote_identifier(table)}"  # nosec: B608
+                ).fetchone()
+            except sqlite3.OperationalError:
+                row = None
+            sizes[table] = (row and row[0]) or 0
+    return sizes
+
+
+def _source_entry(
+    urlpath: str, table: str, exported: dict[str, Any], compression: str | None
+) -> dict[str, Any]:
+    """The manifest's Intake catalog entry for an exported table."""
+    return {
+        "driver": "parquet",
+        "description": f"The {table} table of {urlpath}, exported to Parquet.",
+        "args": {"urlpath": f"{{{{ CATALOG_DIR }}}}/{table}"},
+        "metadata": {**exported, "table": table, "compression": compression},
+    }
+
+
+def _load_manifest(path: Path) -> dict[str, Any] | None:
+    try:
+        with path.open() as f:
+            manifest: dict[str, Any] = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+
+def export_parquet(
+    urlpath: str,
+    out_dir: str | Path,
+    tables: list[str] | None = None,
+    views: bool = False,
+    storage_options: dict[str, Any] = {},
+    max_workers: int | None = None,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """Export many tables of a database to Parquet in parallel, and write a manifest.
+
+    Each table is exported by :func:`export_table` in one of a pool of worker
+    processes, starting with the tables with the most rows. Remote databases are
+    downloaded once, before any workers start, unless they're read lazily, in which
+    case each worker reads them on demand itself.
+
+    The manifest, ``catalog.yml`` in ``out_dir``, is an Intake catalog with an entry
+    for each table exported, now or by earlier exports to the same directory. If any
+    table can't be exported, the error is raised and the manifest is left as it was.
+
+    Args:
+        urlpath: A local path or :mod:`fsspec` readable URL pointing to a SQLite
+            database, or a SQLite URL.
+        out_dir: Directory in which to write the tables and the manifest.
+        tables: Names of the tables and views to export. Defaults to all the tables.
+        views: Whether to also export all the views, if ``tables`` isn't given.
+        storage_options: Options for :func:`intake_sqlite.urlpath_to_sqliteurl`.
+        max_workers: Maximum number of worker processes. Defaults to the number of
+            CPUs. With one worker, tables are exported in this process.
+        kwargs: Arguments for :func:`export_table`, like ``compression`` and
+            ``row_group_rows``.
+
+    Returns:
+        The manifest.
+    """
+    started = time.perf_counter()
+    uri = intake_sqlite.urlpath_to_sqliteurl(urlpath, storage_options=storage_options)
+    if tables is None:
+        with pooled_connection(uri) as con:
+            tables = [
+                name
+                for name, kind in list_relations(con, views=views).items()
+                if kind == "table" or views
+            ]
+    sizes = _table_sizes(uri, tables)
+    order = sorted(tables, key=lambda t: sizes[t], reverse=True)
+    max_workers = min(max_workers or os.cpu_count() or 1, len(order) or 1)
+    if database_path(uri) is not None:
+        # Workers open the downloaded database file directly.
+        location = uri
+    else:
+        # Lazily read remote databases are only registered in this process, so
+        # workers register their own, unless they were given an already registered
+        # URL, which only this process can use.
+        location = urlpath
+        if urlpath.startswith("sqlite"):
+            max_workers = 1
+    exported: dict[str, dict[str, Any]] = {}
+    if max_workers == 1:
+        for table in order:
+            exported[table] = export_table(
+                location, table, out_dir, storage_options, **kwargs
+            )
+    else:
+        # Forked workers would inherit the threads of pyarrow and the pool, so each
+        # worker starts afresh instead.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers, mp_context=context) as executor:
+            futures = {
+                table: executor.submit(
+                    export_table,
+                    location,
+                    table,
+                    out_dir,
+                    storage_options,
+                    **kwargs,
+                )
+                for table in order
+            }
+            exported = {table: future.result() for table, future in futures.items()}
+    manifest_path = Path(out_dir) / MANIFEST_NAME
+    manifest = _load_manifest(manifest_path) or {}
+    manifest.setdefault("metadata", {}).update({"version": 1, "exported_from": urlpath})
+    sources = manifest.setdefault("sources", {})
+    compression = kwargs.get("compression", "zstd")
+    for table in tables:
+        sources[table] = _source_entry(urlpath, table, exported[table], compression)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        yaml.safe_dump(manifest, f, sort_keys=False)
+    os.replace(tmp, manifest_path)
+    logger.info(
+        f"Exported {len(tables)} tables of {urlpath} with {max_workers} workers in "
+        f"{time.perf_counter() - started:.2f}s."
+    )
+    return manifest
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Export the tables of a SQLite database to Parquet from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="intake-sqlite-export", description=main.__doc__
+    )
+    parser.add_argument("urlpath", help="Path or URL of the SQLite database.")
+    parser.add_argument("out_dir", help="Directory in which to write Parquet files.")
+    parser.add_argument(
+        "--tables", nargs="+", help="Tables and views to export. Default: all tables."
+    )
+    parser.add_argument("--views", action="store_true", help="Also export all views.")
+    parser.add_argument("--workers", type=int, help="Number of worker processes.")
+    parser.add_argument("--compression", default="zstd", help="Parquet codec.")
+    parser.add_argument("--compression-level", type=int)
+    parser.add_argument("--row-group-rows", type=int, default=DEFAULT_ROW_GROUP_ROWS)
+    parser.add_argument("--rows-per-file", type=int, default=DEFAULT_ROWS_PER_FILE)
+    parser.add_argument(
+        "--no-compact-dtypes",
+        dest="compact_dtypes",
+        action="store_false",
+        help="Store columns with the types of their declarations.",
+    )
+    args = parser.parse_args(argv)
+    manifest = export_parquet(
+        args.urlpath,
+        args.out_dir,
+        tables=args.tables,
+        views=args.views,
+        max_workers=args.workers,
+        compression=None if args.compression == "none" else args.compression,
+        compression_level=args.compression_level,
+        row_group_rows=args.row_group_rows,
+        rows_per_file=args.rows_per_file,
+        compact_dtypes=args.compact_dtypes,
+    )
+    for table in args.tables or manifest["sources"]:
+        metadata = manifest["sources"][table]["metadata"]
+        print(
+            f"{table:<40}{metadata['rows']:>14,} rows{len(metadata['files']):>6} files"
+            f"{metadata['bytes'] / 2**20:>10.1f} MiB"
+        )
+    print(Path(args.out_dir) / MANIFEST_NAME)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,202 @@
+"""Read only the rows added to append-only tables since they were last read.
+
+Some tables are logs that are republished with new rows appended, and otherwise left
+alone. Rather than reading the whole table again after each update, a source can track
+a high-water mark: the largest value of an increasing column, like ``rowid``, that it
+has already read. Each refresh finds the largest value now in the table, with a
+single query that uses the column's index, and reads only the rows in between, so the
+cost of a refresh depends on the number of new rows rather than the size of the table.
+
+The high-water mark of each source is stored in a small JSON file, keyed by the
+source's URL, query and read options rather than by the contents of the database,
+which change with every update. Optionally, each batch of new rows is also written to
+a local Parquet file alongside it, so that a complete copy of every row read so far
+can be returned without querying the database for the old rows again.
+
+If the largest value in the table ever falls below the stored mark, the table has been
+rewritten rather than appended to, so the mark and any stored rows are discarded and
+the whole table is read again.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from intake_sqlite.cache import _write_json_atomic, default_cache_dir, file_lock
+from intake_sqlite.partition import quote_identifier
+from intake_sqlite.pushdown import Filters, and_filters
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["WatermarkStore", "concat_frames", "max_value", "new_rows_filters"]
+
+
+def max_value(
+    con: sqlite3.Connection,
+    sql_expr: str,
+    column: str,
+    is_table: bool,
+    params: Any = (),
+) -> Any:
+    """Find the largest value of a column in a table or the results of a query.
+
+    ``rowid`` is only available for tables. ``params`` are bound to ``sql_expr`` if
+    it's a query.
+    """
+    source = quote_identifier(sql_expr) if is_table else f"({sql_expr})"
+    query = f"SELECT max({quote_identifier(column)}) FROM {source}"  # nosec: B608
+    return con.execute(query, params).fetchone()[0]
+
+
+def new_rows_filters(
+    filters: Filters | None, column: str, after: Any, through: Any
+) -> Filters:
+    """Add predicates selecting only values of a column in a range to some filters.
+
+    Args:
+        filters: Filters selecting the rows to read.
+        column: The increasing column.
+        after: Only values greater than this are selected, unless it's None.
+        through: Only values less than or equal to this are selected, unless it's
+            None.
+    """
+    bounds: list[tuple[str, str, Any]] = []
+    if after is not None:
+        bounds.append((column, ">", after))
+    if through is not None:
+        bounds.append((column, "<=", through))
+    return and_filters(filters, bounds)
+
+
+def concat_frames(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate dataframes, keeping categorical columns whose categories differ.
+
+    :func:`pandas.concat` turns categorical columns into ``object`` columns unless
+    every dataframe has exactly the same categories.
+    """
+    frames = [df for df in frames if len(df)] or frames[:1]
+    df = pd.concat(frames)
+    for name, dtype in frames[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and df[name].dtype == object:
+            categories = sorted(
+                set().union(*(f[name].cat.categories for f in frames)), key=str
+            )
+            df[name] = df[name].astype(pd.CategoricalDtype(categories))
+    return df
+
+
+class WatermarkStore:
+    """A directory holding the high-water marks, and optionally rows, of sources.
+
+    Each source has a JSON file recording its column, mark, and how many batches of
+    rows have been stored, and if rows are stored, a directory of numbered Parquet
+    files, one per batch. Requires :mod:`pyarrow` to store rows.
+
+    Args:
+        state_dir: Directory in which to store the marks and rows. Defaults to a
+            ``watermarks`` subdirectory of
+            :func:`intake_sqlite.cache.default_cache_dir`.
+    """
+
+    def __init__(self, state_dir: str | Path | None = None):
+        """Create the directory if it doesn't exist yet."""
+        self.state_dir = Path(
+            state_dir or default_cache_dir() / "watermarks"
+        ).expanduser()
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, urlpath: str, sql_expr: str, **kwargs: Any) -> str:
+        """Derive the key under which a source's mark and rows are stored.
+
+        Args:
+            urlpath: Where the database is published, rather than where it happens
+                to be cached locally.
+            sql_expr: The query, or the name of a table.
+            kwargs: Anything else that affects the rows read, like the column, the
+                filters and the arguments passed to :func:`pandas.read_sql`. Must be
+                serializable as JSON, or have a stable ``repr``.
+        """
+        arguments = json.dumps(kwargs, sort_keys=True, default=repr)
+        key = f"{urlpath}\n{sql_expr}\n{arguments}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _state_path(self, key: str) -> Path:
+        return self.state_dir / f"{key}.json"
+
+    def _rows_dir(self, key: str) -> Path:
+        return self.state_dir / key
+
+    @contextlib.contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Prevent other processes from refreshing the same source at the same time."""
+        with file_lock(self.state_dir / f"{key}.lock"):
+            yield
+
+    def load(self, key: str) -> dict[str, Any] | None:
+        """Read a source's state: its ``column``, ``watermark`` and ``batches``."""
+        try:
+            with self._state_path(key).open() as f:
+                state: dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state
+
+    def advance(
+        self,
+        key: str,
+        column: str,
+        watermark: Any,
+        rows: pd.DataFrame | None = None,
+    ) -> None:
+        """Record a new high-water mark, and optionally store the new rows.
+
+        The rows are written before the mark, so if writing either of them fails,
+        the rows are read again by the next refresh rather than lost.
+        """
+        state = self.load(key) or {"batches": 0}
+        batches = state["batches"]
+        if rows is not None and len(rows):
+            rows_dir = self._rows_dir(key)
+            rows_dir.mkdir(exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=rows_dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                rows.to_parquet(tmp)
+                os.replace(tmp, rows_dir / f"{batches:06d}.parquet")
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            batches += 1
+        _write_json_atomic(
+            self._state_path(key),
+            {"column": column, "watermark": watermark, "batches": batches},
+        )
+
+    def rows(self, key: str) -> pd.DataFrame | None:
+        """Read every row stored for a source, or None if none have been stored."""
+        state = self.load(key)
+        if not state or not state["batches"]:
+            return None
+        rows_dir = self._rows_dir(key)
+        return concat_frames(
+            [
+                pd.read_parquet(rows_dir / f"{i:06d}.parquet")
+                for i in range(state["batches"])
+            ]
+        )
+
+    def clear(self, key: str) -> None:
+        """Forget a source's mark and stored rows, so it's read from the start."""
+        self._state_path(key).unlink(missing_ok=True)
+        shutil.rmtree(self._rows_dir(key), ignore_errors=True)
@@ -0,0 +1,328 @@
+"""Record where the time goes when data is read, and how much of it is read.
+
+While a :func:`record` context is active, every read made through this package, in
+any thread, is broken down into spans, each with a name, a duration, and attributes
+like the number of bytes fetched or rows returned:
+
+* ``resolve``: turning a URL into a local database, by :func:`urlpath_to_sqliteurl`.
+* ``download``: downloading a remote database, with the number of ``bytes``.
+* ``fetch``: range requests made while reading a remote database lazily, with the
+  number of ``bytes``.
+* ``connect``: opening a new connection to a database. Reused connections are free.
+* ``execute``: SQLite starting to execute a query, with its ``statement``, whether
+  it's made through SQLAlchemy or directly on a connection borrowed with
+  :func:`intake_sqlite.pool.pooled_connection`, like the queries that plan dtypes and
+  partitions, sample rows and profile columns. Queries that return rows in order of an
+  index start returning them almost at once, so for those, most of the work happens
+  while rows are fetched.
+* ``fetch_rows`` and ``convert``: fetching rows from the cursor and converting them
+  into Arrow arrays, when reading with ``engine="arrow"``. With the pandas engine,
+  both happen inside :func:`pandas.read_sql`, and are only included in ``read``.
+* ``read``, ``read_partition`` and ``to_dask``: the whole of each call to those
+  methods of a source, with the number of ``rows`` returned and ``partitions`` read.
+* ``partition``: a partition of a dask dataframe returned by ``to_dask`` while
+  recording was active being computed, with the number of ``rows`` in it.
+
+Spans are collected by a :class:`Recorder`, which can summarize them, and passed to
+any listeners added with :func:`add_listener`, e.g. to forward them to a tracing
+system. Reads made in other processes aren't recorded.
+
+If ``explain=True`` is passed to :func:`record`, the plan of every query is captured
+with ``EXPLAIN QUERY PLAN`` before it's executed, and a warning is logged for any
+query that filters rows, like a partition of a table, but has to scan the whole
+table to do so because no index can be used.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, cast
+
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "Recorder",
+    "Span",
+    "add_listener",
+    "explain",
+    "full_scans",
+    "is_active",
+    "record",
+    "remove_listener",
+    "span",
+    "traced",
+]
+
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?([^\s(]+)(?: AS \S+)?$")
+
+_recorders: list[Recorder] = []
+_listeners: list[Callable[[Span], None]] = []
+_lock = threading.Lock()
+
+
+class Span:
+    """A timed phase of reading data.
+
+    Attributes:
+        name: What kind of phase this was, e.g. ``"execute"``.
+        start: When the phase started, according to :func:`time.perf_counter`.
+        seconds: How long the phase took.
+        attributes: Details like the number of ``rows`` or ``bytes`` involved.
+        thread: Name of the thread the phase ran in.
+    """
+
+    __slots__ = ("name", "start", "seconds", "attributes", "thread")
+
+    def __init__(
+        self, name: str, start: float, seconds: float, attributes: dict[str, Any]
+    ):
+        """Record a phase that has finished, in the current thread."""
+        self.name = name
+        self.start = start
+        self.seconds = seconds
+        self.attributes = attributes
+        self.thread = threading.current_thread().name
+
+    def __repr__(self) -> str:
+        """Show the name, duration and attributes of the span."""
+        return f"Span({self.name!r}, {self.seconds:.6f}s, {self.attributes!r})"
+
+
+class Recorder:
+    """Spans recorded while a :func:`record` context was active.
+
+    Args:
+        explain: Whether to capture the plan of every query.
+    """
+
+    def __init__(self, explain: bool = False):
+        """Start with no spans."""
+        self.explain = explain
+        self.spans: list[Span] = []
+        self.plans: list[tuple[str, list[str]]] = []
+        self.full_scans: list[str] = []
+        self._lock = threading.Lock()
+
+    def _add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def _add_plan(self, statement: str, plan: list[str], scanned: list[str]) -> None:
+        with self._lock:
+            self.plans.append((statement, plan))
+            self.full_scans.extend(scanned)
+
+    def phases(self) -> dict[str, float]:
+        """Total seconds spent in each kind of span."""
+        totals: dict[str, float] = defaultdict(float)
+        with self._lock:
+            for s in self.spans:
+                totals[s.name] += s.seconds
+        return dict(totals)
+
+    def totals(self) -> dict[str, int]:
+        """Count what was read.
+
+        Returns:
+            ``bytes_fetched``: bytes downloaded or fetched with range requests.
+            ``rows``: rows returned by reads and computed partitions. ``partitions``:
+            partitions read. ``queries``: queries executed. ``connections``: new
+            connections opened.
+        """
+        counts = dict.fromkeys(
+            ["bytes_fetched", "rows", "partitions", "queries", "connections"], 0
+        )
+        with self._lock:
+            for s in self.spans:
+                counts["bytes_fetched"] += s.attributes.get("bytes", 0)
+                counts["rows"] += s.attributes.get("rows", 0)
+                counts["partitions"] += s.attributes.get("partitions", 0)
+                counts["queries"] += s.name == "execute"
+                counts["connections"] += s.name == "connect"
+        return counts
+
+    def summary(self) -> str:
+        """Describe the time spent in each phase and what was read, for logging."""
+        lines = [
+            f"{name:<16}{seconds:>10.4f}s" for name, seconds in self.phases().items()
+        ]
+        lines += [f"{name:<16}{count:>10}" for name, count in self.totals().items()]
+        return "\n".join(lines)
+
+
+def is_active() -> bool:
+    """Whether anything is recording or listening for spans."""
+    return bool(_recorders or _listeners)
+
+
+def _explaining() -> list[Recorder]:
+    return [r for r in _recorders if r.explain]
+
+
+def _emit(span: Span) -> None:
+    with _lock:
+        recorders = list(_recorders)
+        listeners = list(_listeners)
+    for recorder in recorders:
+        recorder._add(span)
+    for listener in listeners:
+        try:
+            listener(span)
+        except Exception:
+            logger.exception(f"Instrumentation listener {listener} failed.")
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+    """Time a phase of reading data, if anything is recording.
+
+    Yields:
+        The span's attributes, which may be added to before the phase ends.
+    """
+    if not is_active():
+        yield attributes
+        return
+    start = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        _emit(Span(name, start, time.perf_counter() - start, attributes))
+
+
+@contextmanager
+def record(explain: bool = False) -> Iterator[Recorder]:
+    """Record the spans of all reads made in this process while the context is active.
+
+    Args:
+        explain: Whether to capture the plan of every query, and warn about queries
+            that filter rows by scanning a whole table.
+    """
+    recorder = Recorder(explain=explain)
+    with _lock:
+        _recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        with _lock:
+            _recorders.remove(recorder)
+
+
+def add_listener(listener: Callable[[Span], None]) -> None:
+    """Call a function with every span, from whichever thread it ended in."""
+    with _lock:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[Span], None]) -> None:
+    """Stop calling a function added with :func:`add_listener`."""
+    with _lock:
+        _listeners.remove(listener)
+
+
+def full_scans(plan: list[str]) -> list[str]:
+    """Find the tables scanned from start to end by a query, from its plan.
+
+    Args:
+        plan: The details of each step of the plan, from ``EXPLAIN QUERY PLAN``.
+    """
+    scanned = []
+    for detail in plan:
+        match = _FULL_SCAN.match(detail)
+        if match is not None and not match.group(1).startswith("SUBQUERY"):
+            scanned.append(match.group(1))
+    return scanned
+
+
+def explain(con: sqlite3.Connection, statement: str, parameters: Any = ()) -> None:
+    """Capture the plan of a query for any recorders that want it.
+
+    Logs a warning if the query filters rows by scanning a whole table.
+    """
+    recorders = _explaining()
+    if not recorders or not re.match(r"\s*(SELECT|WITH)\b", statement, re.IGNORECASE):
+        return
+    try:
+        rows = con.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    except sqlite3.Error as err:
+        logger.debug(f"Unable to explain query: {err}")
+        return
+    plan = [str(row[-1]) for row in rows]
+    scanned = []
+    if re.search(r"\bWHERE\b", statement, re.IGNORECASE):
+        scanned = full_scans(plan)
+    if scanned:
+        logger.warning(
+            f"Query filters rows but scans all of {', '.join(scanned)}, because no "
+            f"index can be used. Consider indexing the filtered columns: {statement}"
+        )
+    for recorder in recorders:
+        recorder._add_plan(statement, plan, scanned)
+
+
+class _TracedConnection:
+    """A :mod:`sqlite3` connection whose queries are explained and recorded."""
+
+    def __init__(self, con: sqlite3.Connection):
+        self._con = con
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        explain(self._con, sql, parameters)
+        with span("execute", statement=sql):
+            return self._con.execute(sql, parameters)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._con, name)
+
+
+def traced(con: sqlite3.Connection) -> sqlite3.Connection:
+    """Record the queries executed on a connection, if anything is recording.
+
+    Each query run with ``execute`` is recorded as an ``execute`` span, and its plan
+    captured, just like queries made through SQLAlchemy. Otherwise, the connection is
+    returned as it is.
+    """
+    if not is_active() or isinstance(con, _TracedConnection):
+        return con
+    return cast(sqlite3.Connection, _TracedConnection(con))
+
+
+def _before_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    if not is_active() or conn.dialect.name != "sqlite":
+        return
+    if _explaining():
+        explain(cursor.connection, statement, parameters)
+    conn.info.setdefault("intake_sqlite_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    started = conn.info.get("intake_sqlite_started")
+    if not started:
+        return
+    start = started.pop()
+    _emit(Span("execute", start, time.perf_counter() - start, {"statement": statement}))
+
+
+sa.event.listen(sa.engine.Engine, "before_cursor_execute", _before_cursor_execute)
+sa.event.listen(sa.engine.Engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,253 @@
+"""Plan the ``where_values`` of manually partitioned sources from a column's values.
+
+Writing out the clauses that divide a table between the partitions of a
+:class:`intake_sqlite.SQLiteSourceManualPartition` by hand makes it easy to end up
+with partitions of very different sizes, or with partitions that each scan the whole
+table, because no index can be used to find their rows.
+
+Instead, the rows with each distinct value of a column, like ``report_year`` or
+``plant_id``, are counted in a single ordered pass, which reads only the column's
+index if it has one. Consecutive values are then grouped together until each group
+holds about as many rows as the others, and each group becomes one partition: one
+value is selected with ``=``, and several with ``BETWEEN``. Rows with ``NULL`` values
+get a partition of their own. Groups are never split, so a value with more rows than
+a partition should hold gets a partition to itself.
+
+``EXPLAIN QUERY PLAN`` is used to check whether the partitions can find their rows
+with an index, and to suggest one that could be created if they can't.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import sqlite3
+from collections.abc import Iterable
+from typing import Any
+
+from intake_sqlite.instrument import full_scans
+from intake_sqlite.partition import quote_identifier
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "WherePlan",
+    "group_values",
+    "plan_where_values",
+    "scanning_clauses",
+    "sql_literal",
+]
+
+
+class WherePlan:
+    """Partitions of a table chosen by :func:`plan_where_values`.
+
+    Attributes:
+        sql_expr: The query that each of the clauses is appended to.
+        where_values: One ``WHERE`` clause for each partition.
+        rows: The number of rows in each partition.
+        query_plan: The details of the plan SQLite chose for the first partition.
+        uses_index: Whether the partitions find their rows without scanning the table.
+        suggested_index: A ``CREATE INDEX`` statement that would let the partitions
+            find their rows with an index, or read them from the index alone, if
+            they can't already.
+    """
+
+    __slots__ = (
+        "sql_expr",
+        "where_values",
+        "rows",
+        "query_plan",
+        "uses_index",
+        "suggested_index",
+    )
+
+    def __init__(
+        self,
+        sql_expr: str,
+        where_values: list[str],
+        rows: list[int],
+        query_plan: list[str],
+        suggested_index: str | None,
+    ):
+        """Describe planned partitions."""
+        self.sql_expr = sql_expr
+        self.where_values = where_values
+        self.rows = rows
+        self.query_plan = query_plan
+        self.uses_index = not full_scans(query_plan)
+        self.suggested_index = suggested_index
+
+    def __repr__(self) -> str:
+        """Show the number and sizes of the partitions."""
+        sizes = f"{min(self.rows)}-{max(self.rows)}" if self.rows else "0"
+        return (
+            f"WherePlan({len(self.where_values)} partitions of {sizes} rows, "
+            f"uses_index={self.uses_index})"
+        )
+
+
+def sql_literal(value: Any) -> str:
+    """Write a value from a SQLite column as a SQL literal."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, (bool, int)):
+        return str(int(value))
+    if isinstance(value, float):
+        if math.isinf(value):
+            # SQLite reads numbers too large for a double as infinity.
+            return "9e999" if value > 0 else "-9e999"
+        return repr(value)
+    if isinstance(value, bytes):
+        return f"X'{value.hex()}'"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def group_values(
+    counts: Iterable[tuple[Any, int]], nrows: int, npartitions: int
+) -> list[tuple[Any, Any, int]]:
+    """Group consecutive values so that each group holds about as many rows.
+
+    Each value is added to the current group, unless that would take the group
+    further over its share of the rows than it's under already. The share is the
+    number of rows not yet grouped divided by the number of groups still to be made,
+    so that the last groups aren't left too large or too small.
+
+    Args:
+        counts: Each distinct value, in order, with the number of rows that have it.
+        nrows: The total number of rows.
+        npartitions: The number of groups wanted. Fewer are made if there aren't
+            enough distinct values, or some values have too many rows.
+
+    Returns:
+        The first and last value of each group, and the number of rows in it.
+    """
+    groups: list[tuple[Any, Any, int]] = []
+    remaining = nrows
+    lo = hi = None
+    rows = 0
+    for value, count in counts:
+        if rows:
+            share = remaining / max(npartitions - len(groups), 1)
+            if rows + count - share > share - rows:
+                groups.append((lo, hi, rows))
+                remaining -= rows
+                rows = 0
+        if not rows:
+            lo = value
+        hi = value
+        rows += count
+    if rows:
+        groups.append((lo, hi, rows))
+    return groups
+
+
+def _suggest_index(
+    table: str, column: str, columns: list[str] | None, plan: list[str]
+) -> str | None:
+    """Suggest an index that would let the partitions be read without a scan."""
+    if full_scans(plan):
+        indexed = [column]
+    elif columns and not any(
+        "COVERING INDEX" in detail or "PRIMARY KEY" in detail for detail in plan
+    ):
+        indexed = [column, *(c for c in columns if c != column)]
+    else:
+        return None
+    name = quote_identifier(f"{table}_{'_'.join(indexed)}_idx")
+    return (
+        f"CREATE INDEX {name} ON {quote_identifier(table)} "
+        f"({', '.join(quote_identifier(c) for c in indexed)})"
+    )
+
+
+def plan_where_values(
+    con: sqlite3.Connection,
+    table: str,
+    column: str,
+    npartitions: int | None = None,
+    rows_per_partition: int | None = None,
+    columns: list[str] | None = None,
+) -> WherePlan:
+    """Divide a table into partitions of about the same size by the values of a column.
+
+    Exactly one of ``npartitions`` and ``rows_per_partition`` must be given.
+
+    Args:
+        con: Connection to the database.
+        table: Name of the table to be partitioned.
+        column: Column whose values select the rows of each partition.
+        npartitions: Number of partitions to create, not counting one for rows with
+            ``NULL`` values.
+        rows_per_partition: Target number of rows in each partition.
+        columns: Columns to read, or None to read all of them.
+
+    Raises:
+        ValueError: if the column has no values to partition on.
+    """
+    if (npartitions is None) == (rows_per_partition is None):
+        raise ValueError("Specify exactly one of npartitions and rows_per_partition.")
+    qtable, qcolumn = quote_identifier(table), quote_identifier(column)
+    nrows, nulls = con.execute(
+        f"SELECT COUNT({qcolumn}), COUNT(*) - COUNT({qcolumn}) "  # nosec: B608
+        f"FROM {qtable}"
+    ).fetchone()
+    if not nrows:
+        raise ValueError(f"Can't partition {table} on {column}: no non-null values.")
+    if rows_per_partition is not None:
+        npartitions = max(1, math.ceil(nrows / rows_per_partition))
+    assert npartitions is not None  # nosec: B101
+    counts = con.execute(
+        f"SELECT {qcolumn}, COUNT(*) FROM {qtable} "  # nosec: B608
+        f"WHERE {qcolumn} IS NOT NULL GROUP BY 1 ORDER BY 1"
+    )
+    groups = group_values(counts, nrows, npartitions)
+    where_values = [
+        f"WHERE {qcolumn} = {sql_literal(lo)}"
+        if lo == hi
+        else f"WHERE {qcolumn} BETWEEN {sql_literal(lo)} AND {sql_literal(hi)}"
+        for lo, hi, _ in groups
+    ]
+    rows = [n for *_, n in groups]
+    if nulls:
+        where_values.append(f"WHERE {qcolumn} IS NULL")
+        rows.append(nulls)
+
+    selected = "*" if columns is None else ", ".join(map(quote_identifier, columns))
+    sql_expr = f"SELECT {selected} FROM {qtable}"  # nosec: B608
+    query_plan = [
+        str(row[-1])
+        for row in con.execute(f"EXPLAIN QUERY PLAN {sql_expr} {where_values[0]}")
+    ]
+    plan = WherePlan(
+        sql_expr,
+        where_values,
+        rows,
+        query_plan,
+        _suggest_index(table, column, columns, query_plan),
+    )
+    logger.info(
+        f"Partitioning {nrows + nulls} rows of {table} on {column} into "
+        f"{len(where_values)} partitions."
+    )
+    return plan
+
+
+def scanning_clauses(
+    con: sqlite3.Connection, sql_expr: str, where_values: list[str]
+) -> list[str]:
+    """Find the partitions of a query that can only find their rows with a full scan.
+
+    Args:
+        con: Connection to the database.
+        sql_expr: The query that each clause is appended to.
+        where_values: The ``WHERE`` clause of each partition.
+    """
+    scanning = []
+    for clause in where_values:
+        plan = [
+            str(row[-1])
+            for row in con.execute(f"EXPLAIN QUERY PLAN {sql_expr} {clause}")
+        ]
+        if full_scans(plan):
+            scanning.append(clause)
+    return scanning
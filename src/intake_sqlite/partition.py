@@ -0,0 +1,194 @@
+"""Choose partition boundaries that split a table into similarly sized partitions.
+
+:func:`dask.dataframe.read_sql_table` divides the range between the minimum and
+maximum values of the index column into partitions of equal width. When the values
+are unevenly distributed -- sparse IDs, clustered years, large gaps in the rowid --
+some partitions end up with far more rows than others. The functions here instead
+choose boundaries at quantiles of the index column, so that each partition contains
+roughly the same number of rows.
+
+Quantiles are taken from the ``sqlite_stat4`` samples collected by ``ANALYZE`` when
+they're available, which requires no scan of the data. Otherwise they are computed
+exactly in a single ordered pass over the index column using ``NTILE()``, which is
+cheap when the column is indexed.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import sqlite3
+import struct
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "balanced_divisions",
+    "count_rows",
+    "decode_first_value",
+    "quote_identifier",
+]
+
+ROWID = "rowid"
+"""Pseudo-column used for partitioning when no index column is given."""
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table or column name for safe inclusion in SQLite SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def count_rows(con: sqlite3.Connection, table: str, estimate: bool = False) -> int:
+    """Count the rows in a table.
+
+    Args:
+        con: Connection to the database.
+        table: Name of the table.
+        estimate: If True, use the row count recorded in ``sqlite_stat1`` by
+            ``ANALYZE`` when it's available, rather than counting.
+    """
+    if estimate:
+        try:
+            row = con.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        if row is not None:
+            return int(str(row[0]).split()[0])
+    return int(
+        con.execute(f"SELECT COUNT(*) FROM {quote_identifier(table)}").fetchone()[0]
+    )
+
+
+def _varint(data: bytes, pos: int) -> tuple[int, int]:
+    """Decode a SQLite variable-length integer, returning it and the next position."""
+    value = 0
+    for i in range(9):
+        byte = data[pos + i]
+        if i == 8:
+            return (value << 8) | byte, pos + 9
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, pos + i + 1
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+def decode_first_value(record: bytes) -> Any:
+    """Decode the first value in a SQLite record, like those in ``sqlite_stat4``.
+
+    See https://www.sqlite.org/fileformat2.html#record_format
+    """
+    header_size, pos = _varint(record, 0)
+    serial_type, _ = _varint(record, pos)
+    body = record[header_size:]
+    int_sizes = {1: 1, 2: 2, 3: 3, 4: 4, 5: 6, 6: 8}
+    if serial_type == 0:
+        return None
+    if serial_type in int_sizes:
+        return int.from_bytes(body[: int_sizes[serial_type]], "big", signed=True)
+    if serial_type == 7:
+        return struct.unpack(">d", body[:8])[0]
+    if serial_type in (8, 9):
+        return serial_type - 8
+    if serial_type >= 12 and serial_type % 2 == 0:
+        return bytes(body[: (serial_type - 12) // 2])
+    if serial_type >= 13:
+        return bytes(body[: (serial_type - 13) // 2]).decode()
+    raise ValueError(f"Unknown SQLite serial type {serial_type}")
+
+
+def _stat4_quantiles(
+    con: sqlite3.Connection, table: str, index: str, nrows: int, npartitions: int
+) -> list[Any] | None:
+    """Approximate partition boundaries using ``sqlite_stat4`` index samples.
+
+    Returns None if there's no index whose first column is ``index``, or if it doesn't
+    have enough samples to choose ``npartitions`` partitions.
+    """
+    try:
+        indexes = con.execute(
+            "SELECT il.name FROM pragma_index_list(?) AS il "
+            "JOIN pragma_index_info(il.name) AS ii ON ii.seqno = 0 "
+            "WHERE ii.name = ?",
+            (table, index),
+        ).fetchall()
+        if not indexes:
+            return None
+        samples = con.execute(
+            "SELECT nlt, sample FROM sqlite_stat4 WHERE tbl = ? AND idx = ?",
+            (table, indexes[0][0]),
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return None
+    if len(samples) < npartitions:
+        return None
+    # The first number in nlt is how many rows have a smaller value in the first
+    # column of the index than the sample does: i.e. the sample's position.
+    positions = sorted(
+        (int(str(nlt).split()[0]), decode_first_value(sample))
+        for nlt, sample in samples
+    )
+    boundaries = []
+    for i in range(1, npartitions):
+        target = nrows * i // npartitions
+        boundaries.append(min(positions, key=lambda p: abs(p[0] - target))[1])
+    return boundaries
+
+
+def balanced_divisions(
+    con: sqlite3.Connection,
+    table: str,
+    index: str = ROWID,
+    npartitions: int | None = None,
+    rows_per_partition: int | None = None,
+) -> list[Any]:
+    """Choose divisions of the index column that balance the rows per partition.
+
+    Exactly one of ``npartitions`` and ``rows_per_partition`` must be given. The
+    divisions are suitable for passing to :func:`dask.dataframe.read_sql_table`. If
+    many rows share a few distinct values, fewer partitions than requested may result,
+    since rows with the same index value can't be split between partitions.
+
+    Args:
+        con: Connection to the database.
+        table: Name of the table to be partitioned.
+        index: Column to partition on. Defaults to the table's ``rowid``.
+        npartitions: Number of partitions to create.
+        rows_per_partition: Target number of rows in each partition.
+
+    Returns:
+        Sorted, unique partition boundaries, including the minimum and maximum values
+        of the index column.
+    """
+    if (npartitions is None) == (rows_per_partition is None):
+        raise ValueError("Specify exactly one of npartitions and rows_per_partition.")
+    nrows = count_rows(con, table, estimate=True)
+    if rows_per_partition is not None:
+        npartitions = max(1, math.ceil(nrows / rows_per_partition))
+    assert npartitions is not None  # nosec: B101
+    qtable, qindex = quote_identifier(table), quote_identifier(index)
+    lo, hi = con.execute(
+        f"SELECT MIN({qindex}), MAX({qindex}) FROM {qtable}"  # nosec: B608
+    ).fetchone()
+    if nrows == 0 or lo is None:
+        raise ValueError(f"Can't partition {table} on {index}: no non-null values.")
+    if npartitions == 1:
+        return [lo, hi]
+    boundaries = _stat4_quantiles(con, table, index, nrows, npartitions)
+    if boundaries is None:
+        boundaries = [
+            row[0]
+            for row in con.execute(
+                f"SELECT MIN({qindex}) FROM (SELECT {qindex}, "  # nosec: B608
+                f"NTILE(?) OVER (ORDER BY {qindex}) AS tile FROM {qtable} "
+                f"WHERE {qindex} IS NOT NULL) GROUP BY tile ORDER BY 1",
+                (npartitions,),
+            )
+        ][1:]
+    divisions = sorted({lo, hi, *boundaries})
+    logger.info(
+        f"Partitioning {nrows} rows of {table} on {index} into "
+        f"{len(divisions) - 1} partitions."
+    )
+    return divisions
@@ -0,0 +1,216 @@
+"""Remember how tables were partitioned, so that they needn't be queried again.
+
+Before :class:`intake_sqlite.SQLiteSourceAutoPartition` can create a dask dataframe, it
+has to find the boundaries of its partitions, the dtypes of its columns, and an empty
+dataframe with those dtypes, which takes a scan of the index column, a query of the
+first few rows, reflection of the table, and the queries of
+:func:`intake_sqlite.dtypes.plan_dtypes`. On large tables these take seconds, every
+time a process opens the source, although the database never changes.
+
+A partition plan records all of that as a small JSON-serializable dictionary, along
+with the number of rows in each partition:
+
+* ``divisions``: The boundaries of the partitions on the index column.
+* ``rows``: The number of rows in each partition, if the divisions are numbers.
+* ``meta``: The names and dtypes of the columns and the index.
+* ``dtypes``: The compact dtypes planned for the columns, if any.
+* ``settings``: The table, index and partitioning arguments the plan was made with.
+* ``database``: An identifier of the database's contents, from its size and header.
+
+If asked to, sources store plans in a directory of JSON files, keyed by a fingerprint
+of the database file and the settings, so reopening the same source doesn't query the
+database at all. They can also be embedded in a source's metadata in a catalog under the
+``partition_plan`` key, so that no process ever needs to make them, even for remote
+databases.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from intake_sqlite.cache import _write_json_atomic, default_cache_dir
+from intake_sqlite.partition import quote_identifier
+from intake_sqlite.results import fingerprint
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "PLAN_VERSION",
+    "PlanCache",
+    "count_partition_rows",
+    "database_id",
+    "decode_dtypes",
+    "encode_dtypes",
+    "make_plan",
+    "plan_divisions",
+    "plan_meta",
+]
+
+PLAN_VERSION = 1
+"""Version of the plan format. Plans of other versions are ignored."""
+
+
+def database_id(db_path: Path) -> str:
+    """Identify the contents of a database file, wherever it's stored.
+
+    Unlike :func:`intake_sqlite.results.fingerprint`, this doesn't depend on the
+    file's modification time, so a copy of the same database downloaded elsewhere has
+    the same identifier. The SQLite header includes a counter that changes whenever
+    the database is modified, except in WAL mode.
+    """
+    with db_path.open("rb") as f:
+        header = f.read(100)
+    key = f"{db_path.stat().st_size}\n{header.hex()}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _encode_dtype(dtype: Any) -> Any:
+    if isinstance(dtype, pd.CategoricalDtype):
+        return {"categories": list(dtype.categories), "ordered": bool(dtype.ordered)}
+    return str(dtype)
+
+
+def _decode_dtype(value: Any) -> Any:
+    if isinstance(value, dict):
+        return pd.CategoricalDtype(value["categories"], ordered=value["ordered"])
+    return value
+
+
+def encode_dtypes(dtypes: dict[str, Any]) -> dict[str, Any]:
+    """Convert a mapping of column names to dtypes into JSON-serializable values."""
+    return {name: _encode_dtype(dtype) for name, dtype in dtypes.items()}
+
+
+def decode_dtypes(dtypes: dict[str, Any]) -> dict[str, Any]:
+    """Convert the values produced by :func:`encode_dtypes` back into dtypes."""
+    return {name: _decode_dtype(value) for name, value in dtypes.items()}
+
+
+def _encode_division(value: Any) -> Any:
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value.item() if hasattr(value, "item") else value
+
+
+def count_partition_rows(
+    con: sqlite3.Connection, table: str, index: str, divisions: list[Any]
+) -> list[int] | None:
+    """Count the rows in each partition of a table, in a single pass over its index.
+
+    Partitions include their lower boundary, and all but the last exclude their upper
+    boundary, as in :func:`dask.dataframe.read_sql_table`.
+
+    Returns:
+        The number of rows in each partition, or None if the divisions aren't numbers.
+    """
+    if not all(
+        isinstance(d, (int, float)) and not isinstance(d, bool) for d in divisions
+    ):
+        return None
+    qindex = quote_identifier(index)
+    cases = " ".join(f"WHEN {qindex} < ? THEN {i}" for i in range(len(divisions) - 2))
+    partition = f"CASE {cases} ELSE {len(divisions) - 2} END" if cases else "0"
+    counts = dict(
+        con.execute(
+            f"SELECT {partition}, count(*) FROM {quote_identifier(table)} "  # nosec: B608
+            f"WHERE {qindex} >= ? AND {qindex} <= ? GROUP BY 1",
+            (*divisions[1:-1], divisions[0], divisions[-1]),
+        ).fetchall()
+    )
+    return [counts.get(i, 0) for i in range(len(divisions) - 1)]
+
+
+def make_plan(
+    ddf: Any,
+    settings: dict[str, Any],
+    dtypes: dict[str, Any] | None = None,
+    rows: list[int] | None = None,
+    database: str | None = None,
+) -> dict[str, Any]:
+    """Record the partitioning of a dask dataframe read from a table.
+
+    Args:
+        ddf: The dask dataframe, which must have known divisions.
+        settings: Arguments of the source that affect the plan. Must be serializable
+            as JSON.
+        dtypes: The compact dtypes applied when reading the table.
+        rows: The number of rows in each partition, if known.
+        database: Identifier of the database, from :func:`database_id`.
+    """
+    meta = ddf._meta
+    return {
+        "version": PLAN_VERSION,
+        "database": database,
+        "settings": settings,
+        "divisions": [_encode_division(d) for d in ddf.divisions],
+        "rows": rows,
+        "meta": {
+            "columns": encode_dtypes(meta.dtypes.to_dict()),
+            "index": [meta.index.name, _encode_dtype(meta.index.dtype)],
+        },
+        "dtypes": encode_dtypes(dtypes or {}),
+    }
+
+
+def plan_meta(plan: dict[str, Any]) -> pd.DataFrame:
+    """Recreate the empty dataframe describing the partitions of a plan."""
+    name, dtype = plan["meta"]["index"]
+    return pd.DataFrame(
+        {
+            column: pd.Series(dtype=dtype)
+            for column, dtype in decode_dtypes(plan["meta"]["columns"]).items()
+        },
+        index=pd.Index([], dtype=_decode_dtype(dtype), name=name),
+    )
+
+
+def plan_divisions(plan: dict[str, Any]) -> list[Any]:
+    """The divisions of a plan, with the same type as the index."""
+    _, dtype = plan["meta"]["index"]
+    if pd.api.types.is_datetime64_any_dtype(_decode_dtype(dtype)):
+        return [pd.Timestamp(d) for d in plan["divisions"]]
+    return list(plan["divisions"])
+
+
+class PlanCache:
+    """A directory of JSON files holding the partition plans of tables.
+
+    Args:
+        cache_dir: Directory in which to store the plans. Defaults to a ``plans``
+            subdirectory of :func:`intake_sqlite.cache.default_cache_dir`.
+    """
+
+    def __init__(self, cache_dir: str | Path | None = None):
+        """Create the cache directory if it doesn't exist yet."""
+        self.cache_dir = Path(cache_dir or default_cache_dir() / "plans").expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, db_path: Path, settings: dict[str, Any]) -> Path:
+        arguments = json.dumps(settings, sort_keys=True)
+        key = f"{fingerprint(db_path)}\n{arguments}"
+        return self.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def load(self, db_path: Path, settings: dict[str, Any]) -> dict[str, Any] | None:
+        """Read the plan made for a table with the same settings, if there is one."""
+        try:
+            with self._path(db_path, settings).open() as f:
+                plan: dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if plan.get("version") != PLAN_VERSION:
+            return None
+        logger.debug(f"Using cached partition plan of {settings['table']}")
+        return plan
+
+    def save(self, db_path: Path, plan: dict[str, Any]) -> None:
+        """Record the partition plan of a table."""
+        try:
+            _write_json_atomic(self._path(db_path, plan["settings"]), plan)
+        except OSError:
+            logger.warning(f"Unable to cache the partition plan of {db_path}")
@@ -0,0 +1,291 @@
+"""Share warm SQLite connections between every engine that reads the same database.
+
+:mod:`pandas`, :mod:`dask` and :mod:`intake_sql` each create a new SQLAlchemy engine
+from the database URL whenever they read something, and by default each engine opens
+and closes its own connections. Every query then pays the cost of opening the
+database and parsing its schema, and starts with a cold page cache.
+
+Engines created from the URLs returned by :func:`intake_sqlite.urlpath_to_sqliteurl`
+instead use :class:`SharedPool`. When an engine is finished with a connection, it is
+kept open in a process-wide list of idle connections for that URL, rather than
+closed, and the next engine that needs a connection to the same database takes it
+from there. Connections are only ever used by one thread at a time, but may be used
+by different threads over their lifetime. Idle connections to a local database file
+are only reused if the file has the same size, modification time and inode as when
+they were opened. Otherwise they're closed, because a connection to an immutable
+database can't see changes, and one to a file that was replaced still reads the old
+file. After a fork, the child process starts with
+no idle connections, and never touches those inherited from its parent. Idle
+connections are closed when the interpreter exits, while the SQLite VFS serving lazily
+read remote databases still exists.
+
+:func:`get_engine` additionally keeps a single engine per URL, for code that can
+accept an engine rather than a URL.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.pool import NullPool
+
+from intake_sqlite.instrument import span, traced
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "SharedPool",
+    "dispose",
+    "get_engine",
+    "pool_key",
+    "pool_stats",
+    "pooled_connection",
+    "set_max_idle",
+]
+
+DEFAULT_MAX_IDLE = 8
+"""Default maximum number of idle connections kept open for each database."""
+
+_Signature = Tuple[int, int, int]
+"""The inode, size and modification time of a database file."""
+
+
+def _signature(path: Path | None) -> _Signature | None:
+    """Identify the version of a database file that a connection opens."""
+    if path is None:
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class _IdleConnections:
+    """Idle connections to one database, and counts of how they've been used."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.idle: deque[tuple[Any, _Signature | None]] = deque()
+        self.hits = 0
+        self.misses = 0
+        self.closed = 0
+        self.stale = 0
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "idle": len(self.idle),
+                "closed": self.closed,
+                "stale": self.stale,
+            }
+
+
+_max_idle = DEFAULT_MAX_IDLE
+_idle: dict[str, _IdleConnections] = {}
+_engines: dict[str, sa.engine.Engine] = {}
+_registry_lock = threading.Lock()
+# Connections inherited from a parent process are kept referenced, so that they are
+# never closed by garbage collection in the child.
+_inherited: list[Any] = []
+
+
+def pool_key(uri: str | sa.engine.URL) -> str:
+    """Identify the connections that can be shared between engines for a URL."""
+    return str(sa.engine.make_url(uri).render_as_string(hide_password=False))
+
+
+def _idle_connections(key: str) -> _IdleConnections:
+    with _registry_lock:
+        return _idle.setdefault(key, _IdleConnections())
+
+
+def _after_fork_in_child() -> None:
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    for idle in _idle.values():
+        _inherited.extend(connection for connection, _ in idle.idle)
+    _idle.clear()
+    _engines.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class SharedPool(NullPool):  # type: ignore
+    """A connection pool that shares idle connections with other engines.
+
+    Connections are shared between all pools whose dialect has the same ``pool_key``
+    attribute. The ``sqlite+intake`` dialect sets it using :func:`pool_key`, so that
+    connections are only shared between engines created from the same URL, which
+    includes the PRAGMAs applied to them. Its ``pool_path`` attribute is the database
+    file, if it's a local one, whose version is checked before an idle connection to
+    it is reused.
+    """
+
+    def status(self) -> str:
+        """Describe the pool, for logging."""
+        return "SharedPool"
+
+    def _key(self) -> str:
+        return str(getattr(self._dialect, "pool_key", id(self)))
+
+    def __init__(self, creator: Any, **kwargs: Any) -> None:
+        """Take idle connections if there are any, rather than creating new ones."""
+        super().__init__(creator, **kwargs)
+        # The base class sets _invoke_creator on the instance, based on the signature
+        # of the creator function.
+        invoke_creator: Callable[[Any], Any] = getattr(self, "_invoke_creator")
+        # The version of the database file each checked out connection opened, by id.
+        self._opened: dict[int, _Signature | None] = {}
+
+        def take_or_create(record: Any) -> Any:
+            idle = _idle_connections(self._key())
+            signature = _signature(getattr(self._dialect, "pool_path", None))
+            stale = []
+            with idle.lock:
+                while idle.idle:
+                    connection, opened = idle.idle.pop()
+                    if opened == signature:
+                        idle.hits += 1
+                        break
+                    idle.stale += 1
+                    stale.append(connection)
+                else:
+                    connection = None
+                    idle.misses += 1
+            for old in stale:
+                old.close()
+            if connection is None:
+                with span("connect"):
+                    connection = invoke_creator(record)
+            self._opened[id(connection)] = signature
+            return connection
+
+        self._invoke_creator = take_or_create
+
+    def _close_connection(self, connection: Any, terminate: bool = False) -> None:
+        opened = self._opened.pop(id(connection), None)
+        if not terminate:
+            idle = _idle_connections(self._key())
+            with idle.lock:
+                if len(idle.idle) < _max_idle:
+                    idle.idle.append((connection, opened))
+                    return
+                idle.closed += 1
+        super()._close_connection(connection, terminate=terminate)
+
+
+def get_engine(uri: str) -> sa.engine.Engine:
+    """Get the process-wide SQLAlchemy engine for a database URL, creating it if needed.
+
+    Reusing an engine avoids creating a new one and initializing its dialect for every
+    query.
+    """
+    with _registry_lock:
+        engine = _engines.get(uri)
+        if engine is None:
+            engine = _engines[uri] = sa.create_engine(uri)
+        return engine
+
+
+@contextmanager
+def pooled_connection(uri: str) -> Iterator[sqlite3.Connection]:
+    """Borrow a :mod:`sqlite3` connection to a database URL from the shared pool.
+
+    The connection is returned to the pool when the context exits, and must not be
+    closed or used afterwards. While instrumentation is active, its queries are
+    recorded (see :func:`intake_sqlite.instrument.traced`).
+    """
+    fairy = get_engine(uri).raw_connection()
+    try:
+        yield traced(fairy.dbapi_connection)
+    finally:
+        fairy.close()
+
+
+def pool_stats(uri: str | None = None) -> dict[str, int]:
+    """Count how often connections have been reused.
+
+    Args:
+        uri: Count only connections to this database URL. By default, connections to
+            all databases are counted.
+
+    Returns:
+        ``hits``: the number of times an idle connection was reused. ``misses``: the
+        number of new connections opened. ``idle``: the number of connections that
+        are currently idle. ``closed``: the number of connections closed because too
+        many were already idle. ``stale``: the number of idle connections closed
+        because the database file had changed since they were opened.
+    """
+    totals = {"hits": 0, "misses": 0, "idle": 0, "closed": 0, "stale": 0}
+    with _registry_lock:
+        if uri is None:
+            selected = list(_idle.values())
+        else:
+            key = pool_key(uri)
+            selected = [_idle[key]] if key in _idle else []
+    for idle in selected:
+        for name, count in idle.stats().items():
+            totals[name] += count
+    return totals
+
+
+def dispose(uri: str | None = None) -> None:
+    """Close idle connections, and forget engines and usage counts.
+
+    Connections that are in use aren't affected, and are kept for reuse as usual
+    when they're returned.
+
+    Args:
+        uri: Only dispose of connections and engines for this database URL. By
+            default, those for every database are disposed of.
+    """
+    with _registry_lock:
+        if uri is None:
+            engines = list(_engines.values())
+            _engines.clear()
+            idles = list(_idle.values())
+            _idle.clear()
+        else:
+            engine = _engines.pop(uri, None)
+            engines = [] if engine is None else [engine]
+            key = pool_key(uri)
+            idles = [_idle.pop(key)] if key in _idle else []
+    for engine in engines:
+        engine.dispose()
+    for idle in idles:
+        with idle.lock:
+            connections = [connection for connection, _ in idle.idle]
+            idle.idle.clear()
+        for connection in connections:
+            connection.close()
+
+
+def set_max_idle(max_idle: int) -> int:
+    """Set the maximum number of idle connections kept for each database.
+
+    Setting it to 0 stops connections from being kept for reuse. Connections that are
+    already idle are kept until they're reused, or closed by :func:`dispose`.
+
+    Returns:
+        The previous maximum.
+    """
+    global _max_idle
+    previous, _max_idle = _max_idle, max_idle
+    return previous
+
+
+atexit.register(dispose)
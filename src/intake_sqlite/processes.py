@@ -0,0 +1,161 @@
+"""Read the partitions of a source in a pool of worker processes.
+
+Reading partitions with dask's threaded scheduler is limited by the GIL, because
+most of the time goes into turning rows into Python objects and then into columns.
+Dask's multiprocessing scheduler avoids that, but pickles every dataframe it returns,
+and each of its tasks creates a new SQLAlchemy engine and connection.
+
+Here, the partitions are instead read by a pool of worker processes that are started
+once and kept until :func:`shutdown` is called, or the interpreter exits. Each worker
+keeps its connection to the database open between partitions in the connection pool
+of its process (see :mod:`intake_sqlite.pool`), so only the first partition a worker
+reads from a database opens it. Workers read rows directly into Arrow columns (see
+:mod:`intake_sqlite.arrow`) and write them as Arrow IPC files, in shared memory
+where the platform has it. The parent process maps the files into memory, rather than
+unpickling anything, and converts all the partitions into one dataframe at once.
+
+Where the platform allows it, workers are forked from the parent, so they start with
+the modules it has already imported, and never touch the connections they inherit.
+On macOS, where forking a process that uses system frameworks isn't safe, they're
+forked from a server process that has imported this module, and on Windows they're
+spawned. Both of those import the parent's ``__main__`` module again in each worker,
+so a script that reads with worker processes there must do so under an
+``if __name__ == "__main__":`` guard. Workers only ever read databases on the local
+filesystem: remote databases are downloaded once, when the source is created, before
+any worker is started.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+
+from intake_sqlite.arrow import (
+    _arrow_types,
+    concat_tables,
+    read_sql_table_arrow,
+    to_dataframe,
+)
+from intake_sqlite.dialect import database_path
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["default_processes", "read_partitions", "shutdown"]
+
+_executor: ProcessPoolExecutor | None = None
+_executor_processes = 0
+_lock = threading.Lock()
+
+
+def default_processes() -> int:
+    """The number of worker processes used by default: one for each CPU."""
+    return os.cpu_count() or 1
+
+
+def _mp_context() -> multiprocessing.context.BaseContext:
+    """How worker processes are started: forked from this one, where that's safe."""
+    methods = multiprocessing.get_all_start_methods()
+    if "fork" in methods and sys.platform != "darwin":
+        return multiprocessing.get_context("fork")
+    if "forkserver" in methods:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _get_executor(processes: int) -> ProcessPoolExecutor:
+    """The shared pool of worker processes, replaced if it's the wrong size."""
+    global _executor, _executor_processes
+    with _lock:
+        if _executor is None or _executor_processes != processes:
+            if _executor is not None:
+                _executor.shutdown()
+            _executor = ProcessPoolExecutor(processes, mp_context=_mp_context())
+            _executor_processes = processes
+        return _executor
+
+
+def shutdown() -> None:
+    """Stop the worker processes, closing their connections."""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+def _shared_memory_dir() -> str | None:
+    """A directory whose files are kept in memory, if the platform has one."""
+    shm = Path("/dev/shm")  # nosec: B108
+    return str(shm) if shm.is_dir() and os.access(shm, os.W_OK) else None
+
+
+def _read_partition(
+    uri: str,
+    sql: str,
+    params: Sequence[Any] | dict[str, Any],
+    types: dict[str, pa.DataType],
+    path: str,
+) -> str:
+    """Read one partition into an Arrow IPC file, in a worker process."""
+    table = read_sql_table_arrow(sql, uri, params=params, types=types)
+    # Each batch of a category has its own dictionary, but a file can only have one.
+    table = table.unify_dictionaries()
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+
+def read_partitions(
+    uri: str,
+    queries: list[tuple[str, Sequence[Any] | dict[str, Any]]],
+    processes: int | None = None,
+    index_col: str | list[str] | None = None,
+    parse_dates: list[str] | dict[str, Any] | None = None,
+    dtype: dict[str, Any] | None = None,
+) -> pd.DataFrame:
+    """Read the results of several queries in worker processes, as one dataframe.
+
+    Args:
+        uri: SQLite URL of a database on the local filesystem.
+        queries: The query reading each partition, and the parameters to bind to it.
+        processes: Number of worker processes, by default one for each CPU.
+        index_col: Column or columns to use as the index of the dataframe.
+        parse_dates: Columns to convert to datetimes.
+        dtype: Dtypes of any columns, which are built as Arrow arrays of the
+            corresponding types by the workers where possible.
+
+    Raises:
+        ValueError: if the database isn't a file on the local filesystem, like a
+            remote database read lazily with :mod:`intake_sqlite.vfs`.
+    """
+    if database_path(uri) is None:
+        raise ValueError(
+            f"Only local databases can be read in worker processes, not {uri}"
+        )
+    executor = _get_executor(processes or default_processes())
+    types = _arrow_types(dtype)
+    with tempfile.TemporaryDirectory(dir=_shared_memory_dir()) as tmp:
+        futures = [
+            executor.submit(
+                _read_partition, uri, sql, params, types, f"{tmp}/{i}.arrow"
+            )
+            for i, (sql, params) in enumerate(queries)
+        ]
+        tables = []
+        for future in futures:
+            with pa.memory_map(future.result()) as source:
+                tables.append(pa.ipc.open_file(source).read_all())
+        # Converting copies the columns out of the memory mapped files.
+        return to_dataframe(concat_tables(tables), index_col, parse_dates, dtype=dtype)
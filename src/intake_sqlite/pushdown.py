@@ -0,0 +1,321 @@
+"""Push column selections and row filters down into the SQL sent to SQLite.
+
+Filters are given in the disjunctive normal form used by :func:`pandas.read_parquet`
+and :mod:`pyarrow.parquet`: a list of ``(column, op, value)`` tuples that must all be
+true, or a list of such lists, any one of which must be true. For example
+``[[("year", ">=", 2020), ("state", "in", ["CO", "NM"])], [("year", "==", 2010)]]``.
+The supported operators are ``==``, ``=``, ``!=``, ``<``, ``<=``, ``>``, ``>=``,
+``in`` and ``not in``. Comparing with None using ``==`` or ``!=`` tests for NULL.
+
+Filters are compiled into SQLAlchemy expressions with bound parameters, so values are
+never interpolated into the SQL, and column names are always quoted.
+"""
+from __future__ import annotations
+
+import logging
+import operator
+from collections.abc import Callable, Sequence
+from typing import Any, List, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import dialect as sqlite_dialect
+
+from intake_sqlite.partition import quote_identifier
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "Filters",
+    "and_filters",
+    "filters_may_match",
+    "filters_to_clause",
+    "index_bounds",
+    "normalize_filters",
+    "prune_divisions",
+    "select_sql",
+]
+
+Filter = Tuple[str, str, Any]
+"""A single ``(column, op, value)`` predicate."""
+Filters = List[Any]
+"""A list of predicates that must all be true, or a list of such lists."""
+
+_OPERATORS: dict[str, Callable[[Any, Any], Any]] = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda col, value: col.in_(list(value)),
+    "not in": lambda col, value: col.not_in(list(value)),
+}
+
+_ROWID_NAMES = ("rowid", "_rowid_", "oid")
+"""Names by which SQLite refers to the rowid of a table."""
+
+
+def _is_predicate(predicate: Any) -> bool:
+    return (
+        isinstance(predicate, (tuple, list))
+        and len(predicate) == 3
+        and isinstance(predicate[0], str)
+    )
+
+
+def normalize_filters(filters: Filters | None) -> list[list[Filter]]:
+    """Convert filters into a list of conjunctions, checking they're well formed.
+
+    Predicates may be lists rather than tuples, as they are when read from YAML.
+
+    Raises:
+        ValueError: if a predicate is malformed or uses an unsupported operator.
+    """
+    if not filters:
+        return []
+    disjunction: list[Any] = list(filters)
+    if all(_is_predicate(f) for f in disjunction):
+        disjunction = [disjunction]
+    normalized: list[list[Filter]] = []
+    for conjunction in disjunction:
+        predicates: list[Filter] = []
+        for predicate in conjunction:
+            if not _is_predicate(predicate):
+                raise ValueError(f"Expected a (column, op, value) filter: {predicate}")
+            column, op, value = predicate
+            if op not in _OPERATORS:
+                raise ValueError(
+                    f"Unsupported filter operator {op!r}. Expected one of "
+                    f"{list(_OPERATORS)}."
+                )
+            if op in ("in", "not in") and isinstance(value, (str, bytes)):
+                raise ValueError(f"Expected a collection of values for {op}: {value!r}")
+            predicates.append((column, op, value))
+        normalized.append(predicates)
+    return normalized
+
+
+def and_filters(filters: Filters | None, predicates: list[Filter]) -> Filters:
+    """Require some predicates to be true, as well as any filters.
+
+    The predicates are added to every conjunction of the filters.
+    """
+    return [
+        conjunction + list(predicates)
+        for conjunction in normalize_filters(filters) or [[]]
+    ]
+
+
+def filters_to_clause(filters: Filters | None) -> Any:
+    """Compile filters into a SQLAlchemy boolean expression.
+
+    Returns:
+        The expression, or None if there are no filters.
+    """
+    disjunction = normalize_filters(filters)
+    if not disjunction:
+        return None
+    clauses = []
+    for conjunction in disjunction:
+        predicates = []
+        for column, op, value in conjunction:
+            col = sa.column(column)
+            if value is None and op in ("==", "="):
+                predicates.append(col.is_(None))
+            elif value is None and op == "!=":
+                predicates.append(col.is_not(None))
+            else:
+                predicates.append(_OPERATORS[op](col, value))
+        clauses.append(sa.and_(sa.true(), *predicates))
+    return sa.or_(sa.false(), *clauses)
+
+
+def _select_column(name: str) -> str:
+    """Select a column, keeping its name in the results.
+
+    If a table has an ``INTEGER PRIMARY KEY``, SQLite names its ``rowid`` after that
+    column in the results, so the ``rowid`` needs an alias.
+    """
+    quoted = quote_identifier(name)
+    if name.lower() in _ROWID_NAMES:
+        return f"{quoted} AS {quoted}"
+    return quoted
+
+
+def select_sql(
+    sql_expr: str,
+    is_table: bool,
+    columns: list[str] | None = None,
+    filters: Filters | None = None,
+    params: Sequence[Any] | dict[str, Any] | None = None,
+) -> tuple[str, Sequence[Any] | dict[str, Any]]:
+    """Build a query that selects some columns and rows of a table or query.
+
+    Args:
+        sql_expr: The name of a table, or a query.
+        is_table: Whether ``sql_expr`` is the name of a table or view.
+        columns: Names of the columns to select. All columns are selected if None.
+        filters: Filters selecting the rows to read.
+        params: Parameters already bound to ``sql_expr``, if it's a query.
+
+    Returns:
+        The query, and the parameters to bind to it. Positional parameters are used,
+        unless ``params`` is a dict, in which case named parameters are used.
+    """
+    select = ", ".join(map(_select_column, columns)) if columns else "*"
+    source = quote_identifier(sql_expr) if is_table else f"({sql_expr})"
+    sql = f"SELECT {select} FROM {source}"  # nosec: B608
+    clause = filters_to_clause(filters)
+    if clause is None:
+        return sql, params or ()
+    named = isinstance(params, dict)
+    compiled = clause.compile(
+        dialect=sqlite_dialect(paramstyle="named" if named else "qmark"),
+        # Expand the parameters of IN clauses, which are otherwise bound at execution.
+        compile_kwargs={"render_postcompile": True},
+    )
+    sql += f" WHERE {compiled}"
+    if isinstance(params, dict):
+        clashes = set(params) & set(compiled.params)
+        if clashes:
+            raise ValueError(
+                f"Query parameters clash with filter parameters: {clashes}"
+            )
+        return sql, {**params, **compiled.params}
+    # Compiled.params builds a new dictionary every time it's used.
+    bound = compiled.params
+    return sql, (*(params or ()), *(bound[p] for p in compiled.positiontup))
+
+
+def _conjunction_bounds(
+    conjunction: list[Filter], index: str
+) -> tuple[Any, Any] | None:
+    """Inclusive bounds on the index implied by predicates that must all be true."""
+    lo = hi = None
+    for column, op, value in conjunction:
+        if column != index or value is None or op in ("!=", "not in"):
+            continue
+        if op in ("==", "=", "in"):
+            candidates = [value] if op != "in" else list(value)
+            if not candidates:
+                return None
+            low, high = min(candidates), max(candidates)
+        else:
+            low = value if op in (">", ">=") else None
+            high = value if op in ("<", "<=") else None
+        if low is not None:
+            lo = low if lo is None else max(lo, low)
+        if high is not None:
+            hi = high if hi is None else min(hi, high)
+    if lo is not None and hi is not None and lo > hi:
+        return None
+    return (lo, hi)
+
+
+def index_bounds(filters: Filters | None, index: str) -> tuple[Any, Any] | None:
+    """Find the range of index values that could satisfy the filters.
+
+    Bounds are inclusive, even for strict inequalities, so they may be slightly wider
+    than necessary, but never narrower.
+
+    Returns:
+        Lower and upper bounds on the index, either of which may be None if that side
+        is unbounded, or None if the filters can't select any rows at all.
+    """
+    disjunction = normalize_filters(filters)
+    if not disjunction:
+        return (None, None)
+    bounds = [_conjunction_bounds(c, index) for c in disjunction]
+    found = [b for b in bounds if b is not None]
+    if not found:
+        return None
+    lows = [lo for lo, _ in found]
+    highs = [hi for _, hi in found]
+    return (
+        None if None in lows else min(lows),
+        None if None in highs else max(highs),
+    )
+
+
+def _conjunction_may_match(
+    conjunction: list[Filter], ranges: dict[str, tuple[Any, Any]]
+) -> bool:
+    for column, (lo, hi) in ranges.items():
+        bounds = _conjunction_bounds(conjunction, column)
+        if bounds is None:
+            return False
+        low, high = bounds
+        if (low is not None and low > hi) or (high is not None and high < lo):
+            return False
+        if lo != hi:
+            continue
+        for name, op, value in conjunction:
+            if name == column and (
+                (op == "!=" and value == lo) or (op == "not in" and lo in value)
+            ):
+                return False
+    return True
+
+
+def filters_may_match(
+    filters: Filters | None, ranges: dict[str, tuple[Any, Any]]
+) -> bool:
+    """Whether rows whose columns fall within some ranges might satisfy the filters.
+
+    Like :func:`index_bounds`, this errs on the side of caution: it may find that
+    rows could match when none actually do, but never the other way around.
+
+    Args:
+        filters: Filters selecting rows.
+        ranges: Inclusive minimum and maximum values of some columns. Columns without
+            a range may take any value.
+    """
+    for conjunction in normalize_filters(filters) or [[]]:
+        try:
+            if _conjunction_may_match(conjunction, ranges):
+                return True
+        except TypeError:
+            # Values that can't be compared with the ranges might match anything.
+            return True
+    return False
+
+
+def prune_divisions(divisions: list[Any], bounds: tuple[Any, Any] | None) -> list[Any]:
+    """Drop partitions whose index values all fall outside some bounds.
+
+    Partition ``i`` contains index values from ``divisions[i]`` up to but not
+    including ``divisions[i + 1]``, except for the last partition, which also
+    includes its upper division.
+
+    Args:
+        divisions: Sorted partition boundaries, as used by :mod:`dask`.
+        bounds: Inclusive lower and upper bounds, as returned by :func:`index_bounds`.
+
+    Returns:
+        The divisions of the contiguous run of partitions that might contain index
+        values within the bounds. If none can, the first partition is kept, so that
+        the result still has the expected columns.
+    """
+    if bounds is None:
+        return divisions[:2]
+    lo, hi = bounds
+    last = len(divisions) - 2
+    keep = [
+        i
+        for i in range(last + 1)
+        if (
+            lo is None
+            or divisions[i + 1] > lo
+            or (i == last and divisions[i + 1] >= lo)
+        )
+        and (hi is None or divisions[i] <= hi)
+    ]
+    if not keep:
+        return divisions[:2]
+    pruned = divisions[keep[0] : keep[-1] + 2]
+    if len(pruned) < len(divisions):
+        logger.info(
+            f"Pruned {len(divisions) - len(pruned)} of {len(divisions) - 1} partitions."
+        )
+    return pruned
@@ -0,0 +1,249 @@
+"""A persistent, size-bounded cache of query results, stored as Arrow files.
+
+Reading the same query from a database that hasn't changed always gives the same
+results, so they can be kept on disk rather than fetched and converted again. Each
+result is stored in its own file, named by a key derived from a fingerprint of the
+database file and the normalized query and arguments used to read it. When the cache
+grows beyond its byte budget, the least recently used results are deleted, just as
+:class:`intake_sqlite.cache.DatabaseCache` deletes databases.
+
+Results are stored as uncompressed Arrow IPC (Feather V2) files by default, which are
+memory-mapped when they're read, so loading them doesn't copy numeric columns at all.
+They may also be stored as Parquet, which is smaller but must be decoded when read.
+
+The database fingerprint covers the size and modification time of the file, and its
+100-byte SQLite header, which includes counters that change whenever the database is
+modified. Results from databases that can't be fingerprinted, like remote databases
+read with :mod:`intake_sqlite.vfs`, aren't cached.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from intake_sqlite.cache import default_cache_dir, file_lock
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["FORMATS", "ResultCache", "fingerprint", "normalize_sql"]
+
+FORMATS = {"feather": ".arrow", "parquet": ".parquet"}
+"""Supported storage formats, and the suffixes of the files they're stored in."""
+
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])""")
+
+_counts: dict[Path, dict[str, int]] = {}
+_counts_lock = threading.Lock()
+
+
+def fingerprint(db_path: Path) -> str:
+    """Identify the contents of a database file, without reading all of it."""
+    stat = db_path.stat()
+    with db_path.open("rb") as f:
+        header = f.read(100)
+    key = f"{stat.st_size}\n{stat.st_mtime_ns}\n{header.hex()}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse insignificant whitespace and any trailing semicolon in a query.
+
+    Whitespace inside quoted strings and identifiers is left alone.
+    """
+    parts = _QUOTED.split(sql.strip().rstrip(";").strip())
+    # Quoted strings and identifiers are at odd indices.
+    return "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part) for i, part in enumerate(parts)
+    )
+
+
+class ResultCache:
+    """A directory of query results, shared by all processes on a host.
+
+    Args:
+        cache_dir: Directory in which to store the results. Defaults to a ``results``
+            subdirectory of :func:`intake_sqlite.cache.default_cache_dir`.
+        max_bytes: Maximum total size of the cached results. The least recently used
+            results are removed once this budget is exceeded. If None, the cache may
+            grow without bound.
+        format: ``"feather"`` to store results as uncompressed Arrow IPC files, which
+            are memory-mapped when read, or ``"parquet"`` to store them as Parquet.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        max_bytes: int | None = None,
+        format: str = "feather",  # noqa: A002
+    ):
+        """Create the cache directory if it doesn't exist yet."""
+        if format not in FORMATS:
+            raise ValueError(f"Expected format to be one of {list(FORMATS)}: {format}")
+        self.cache_dir = Path(cache_dir or default_cache_dir() / "results").expanduser()
+        self.max_bytes = max_bytes
+        self.format = format
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, db_path: Path, sql: str, **kwargs: Any) -> str:
+        """Derive the key under which the results of a query are stored.
+
+        Args:
+            db_path: The database file the query reads from.
+            sql: The query, or the name of a table.
+            kwargs: Anything else that affects the results, like the arguments passed
+                to :func:`pandas.read_sql`. Must be serializable as JSON, or have a
+                stable ``repr``.
+        """
+        arguments = json.dumps(kwargs, sort_keys=True, default=repr)
+        key = f"{fingerprint(db_path)}\n{normalize_sql(sql)}\n{arguments}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{FORMATS[self.format]}"
+
+    def _count(self, name: str) -> None:
+        with _counts_lock:
+            counts = _counts.setdefault(self.cache_dir.resolve(), {})
+            counts[name] = counts.get(name, 0) + 1
+
+    def get(self, key: str, dtype_backend: str = "numpy") -> pd.DataFrame | None:
+        """Load cached results, if there are any for the key.
+
+        Args:
+            key: The key the results were stored under.
+            dtype_backend: ``"numpy"`` to return columns with NumPy dtypes, or
+                ``"pyarrow"`` to return Arrow-backed columns, which share the
+                memory-mapped buffers rather than converting them.
+        """
+        path = self._path(key)
+        try:
+            if self.format == "feather":
+                with pa.memory_map(str(path)) as source:
+                    table = pa.ipc.open_file(source).read_all()
+            else:
+                table = pq.read_table(path, memory_map=True)
+            os.utime(path)
+        except (OSError, pa.ArrowInvalid):
+            self._count("misses")
+            return None
+        self._count("hits")
+        logger.debug(f"Using cached results from {path}")
+        if dtype_backend == "pyarrow":
+            df: pd.DataFrame = table.to_pandas(types_mapper=pd.ArrowDtype)
+        else:
+            # Numeric columns without nulls can share the memory-mapped buffers.
+            df = table.to_pandas(split_blocks=True)
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> Path | None:
+        """Store the results of a query.
+
+        Returns:
+            The path to the stored results, or None if they couldn't be converted to
+            Arrow, e.g. because a column contains values of different types.
+        """
+        try:
+            table = pa.Table.from_pandas(df)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            logger.warning(
+                "Unable to cache query results that can't be stored as Arrow."
+            )
+            return None
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        os.close(fd)
+        try:
+            if self.format == "feather":
+                with pa.OSFile(tmp, "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+            else:
+                pq.write_table(table, tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.evict(keep=path)
+        return path
+
+    def _entries(self) -> list[Path]:
+        return [
+            p for suffix in FORMATS.values() for p in self.cache_dir.glob(f"*{suffix}")
+        ]
+
+    def evict(self, keep: Path | None = None) -> list[Path]:
+        """Remove least recently used results until the cache fits in its budget.
+
+        Args:
+            keep: Results that should not be removed, even if they're the oldest.
+
+        Returns:
+            The paths of the results that were removed.
+        """
+        if self.max_bytes is None:
+            return []
+        removed = []
+        with file_lock(self.cache_dir / "evict.lock"):
+            entries = []
+            for path in self._entries():
+                with contextlib.suppress(OSError):
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    path.unlink()
+                except OSError:
+                    # e.g. on Windows, where files that are open can't be removed.
+                    logger.warning(f"Unable to evict {path} from the cache.")
+                    continue
+                total -= size
+                removed.append(path)
+                self._count("evictions")
+        return removed
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+        for path in self._entries():
+            path.unlink()
+
+    def size(self) -> int:
+        """Total number of bytes used by cached results."""
+        return sum(p.stat().st_size for p in self._entries())
+
+    def stats(self) -> dict[str, int]:
+        """Count how this cache directory has been used by the current process.
+
+        Returns:
+            ``hits`` and ``misses``: the number of lookups that did and didn't find
+            cached results. ``evictions``: the number of results removed to stay
+            within a byte budget. ``entries`` and ``bytes``: the number and total size
+            of the results currently in the cache, including those added by other
+            processes.
+        """
+        with _counts_lock:
+            counts = dict(_counts.get(self.cache_dir.resolve(), {}))
+        entries = self._entries()
+        return {
+            "hits": counts.get("hits", 0),
+            "misses": counts.get("misses", 0),
+            "evictions": counts.get("evictions", 0),
+            "entries": len(entries),
+            "bytes": sum(p.stat().st_size for p in entries),
+        }
@@ -0,0 +1,148 @@
+"""Preview tables by reading a few of their rows, in time independent of their size.
+
+``ORDER BY random()`` and Bernoulli sampling with ``WHERE random() < ?`` both visit
+every row of a table. Instead, the smallest and largest ``rowid`` of a table are
+looked up in its B-tree, which takes a few page reads, and rows are sampled by
+drawing random ``rowid`` values between them with a seeded random number generator,
+and fetching only the rows with those values, each again with a B-tree lookup.
+
+Where rows have been deleted, or filters exclude some rows, some of the values drawn
+match no rows, so more are drawn until enough rows have been found. Every row that
+exists and matches the filters is equally likely to be chosen, so the sample is
+uniform, as long as not too many of the values drawn are misses.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import sqlite3
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from intake_sqlite.partition import ROWID, quote_identifier
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "MAX_ROUNDS",
+    "SAMPLE_CHUNK_ROWS",
+    "choose_rows",
+    "limit_sql",
+    "random_rowids",
+    "rowid_filter",
+    "rowid_range",
+    "sample_size",
+]
+
+MAX_ROUNDS = 20
+"""Maximum number of times more rowids are drawn to find enough rows."""
+
+SAMPLE_CHUNK_ROWS = 500
+"""Number of rowids looked up by each query, within SQLite's limit on parameters."""
+
+
+def limit_sql(sql: str, n: int) -> str:
+    """Select only the first ``n`` rows of a query."""
+    return f"SELECT * FROM ({sql}) LIMIT {int(n)}"  # nosec: B608
+
+
+def rowid_range(con: sqlite3.Connection, table: str) -> tuple[int, int] | None:
+    """Find the smallest and largest rowid of a table, using only its B-tree.
+
+    Returns:
+        The range of rowids, or None if the table is empty.
+
+    Raises:
+        ValueError: if the table has no rowids, like a view or a ``WITHOUT ROWID``
+            table.
+    """
+    kind = con.execute(
+        "SELECT type FROM sqlite_master WHERE name = ?", (table,)
+    ).fetchone()
+    if kind is not None and kind[0] == "view":
+        # Views have a rowid column, but it's always NULL.
+        raise ValueError(f"Only tables with rowids can be sampled, not views: {table}")
+    try:
+        # SQLite only finds min() or max() with a B-tree lookup when it's alone.
+        source = quote_identifier(table)
+        lo, hi = con.execute(
+            f"SELECT (SELECT min({ROWID}) FROM {source}), "  # nosec: B608
+            f"(SELECT max({ROWID}) FROM {source})"
+        ).fetchone()
+    except sqlite3.OperationalError as err:
+        raise ValueError(f"Only tables with rowids can be sampled: {err}") from err
+    return None if lo is None else (lo, hi)
+
+
+def sample_size(
+    n: int | None, frac: float | None, rowids: tuple[int, int]
+) -> tuple[int, bool]:
+    """Find how many rowids to draw for a sample.
+
+    Args:
+        n: Number of rows wanted.
+        frac: Fraction of the rows wanted, if ``n`` isn't given.
+        rowids: The range of rowids of the table.
+
+    Returns:
+        The number of rowids to draw, and whether more should be drawn if some of them
+        match no rows. Rowids are assumed to be dense, so a fraction of them is also
+        a fraction of the rows, without counting them.
+    """
+    if (n is None) == (frac is None):
+        raise ValueError("Exactly one of n and frac must be given.")
+    span = rowids[1] - rowids[0] + 1
+    if n is not None:
+        if n < 0:
+            raise ValueError(f"Can't sample a negative number of rows: {n}")
+        return min(n, span), True
+    assert frac is not None  # nosec: B101
+    if not 0 <= frac <= 1:
+        raise ValueError(f"Expected frac to be between 0 and 1: {frac}")
+    return round(frac * span), False
+
+
+def random_rowids(
+    rowids: tuple[int, int],
+    size: int,
+    rng: np.random.Generator,
+    drawn: npt.NDArray[np.int64] | None = None,
+) -> npt.NDArray[np.int64]:
+    """Draw distinct rowids uniformly at random from a range, in increasing order.
+
+    Args:
+        rowids: The smallest and largest rowid that may be drawn.
+        size: Number of rowids to draw. Fewer are returned if the range doesn't
+            contain enough rowids that haven't been drawn already.
+        rng: Random number generator to draw them with.
+        drawn: Sorted rowids drawn earlier, which aren't drawn again.
+    """
+    lo, hi = rowids
+    drawn = np.empty(0, dtype=np.int64) if drawn is None else drawn
+    size = min(size, hi - lo + 1 - len(drawn))
+    found = np.empty(0, dtype=np.int64)
+    while len(found) < size:
+        # Draw a few extra, since some will be duplicates or drawn already.
+        wanted = size - len(found)
+        candidates = rng.integers(
+            lo, hi, size=math.ceil(wanted * 1.1) + 8, endpoint=True
+        )
+        candidates = np.setdiff1d(candidates, drawn, assume_unique=False)
+        found = np.union1d(found, candidates)
+    if len(found) > size:
+        found = np.sort(rng.choice(found, size, replace=False))
+    return found
+
+
+def rowid_filter(rowids: Any) -> tuple[str, str, list[int]]:
+    """A predicate selecting rows by rowid, for :mod:`intake_sqlite.pushdown`."""
+    return (ROWID, "in", [int(r) for r in rowids])
+
+
+def choose_rows(df: Any, n: int, rng: np.random.Generator) -> Any:
+    """Keep ``n`` rows of a dataframe chosen at random, in their original order."""
+    if len(df) <= n:
+        return df
+    return df.iloc[np.sort(rng.choice(len(df), n, replace=False))]
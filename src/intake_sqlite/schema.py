@@ -0,0 +1,88 @@
+"""Discover the tables in a SQLite database cheaply, and remember what was found.
+
+Reflecting a whole database through SQLAlchemy issues several queries for every table
+and view, which takes seconds for databases with hundreds of them. The names and
+types of all the tables and views can instead be read with a single query of
+``sqlite_master``, leaving the columns of each table to be looked up only when
+they're needed.
+
+Whatever has been discovered about a database is stored in a small JSON file in the
+cache directory, keyed by the path, size and modification time of the database file,
+so a catalog of the same database can be opened again without querying it at all.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from intake_sqlite.cache import _write_json_atomic, default_cache_dir
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["SchemaCache", "list_relations", "primary_key"]
+
+
+def list_relations(con: sqlite3.Connection, views: bool = False) -> dict[str, str]:
+    """Find the user tables, and optionally views, in a database.
+
+    Returns:
+        A mapping of table and view names to their types, ``"table"`` or ``"view"``,
+        in the order they appear in ``sqlite_master``.
+    """
+    types = ("table", "view") if views else ("table",)
+    rows = con.execute(
+        "SELECT name, type FROM sqlite_master "
+        f"WHERE type IN ({', '.join('?' * len(types))}) "
+        "AND name NOT LIKE 'sqlite_%' ORDER BY rowid",
+        types,
+    ).fetchall()
+    return {name: kind for name, kind in rows}
+
+
+def primary_key(con: sqlite3.Connection, table: str) -> str | None:
+    """Find the first column of a table's primary key, if it has one."""
+    row = con.execute(
+        "SELECT name FROM pragma_table_info(?) WHERE pk > 0 ORDER BY pk LIMIT 1",
+        (table,),
+    ).fetchone()
+    return None if row is None else str(row[0])
+
+
+class SchemaCache:
+    """A directory of JSON files describing the contents of database files.
+
+    Args:
+        cache_dir: Directory in which to store the files. Defaults to a ``schema``
+            subdirectory of :func:`intake_sqlite.cache.default_cache_dir`.
+    """
+
+    def __init__(self, cache_dir: str | Path | None = None):
+        """Create the cache directory if it doesn't exist yet."""
+        self.cache_dir = Path(cache_dir or default_cache_dir() / "schema").expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, db_path: Path) -> Path:
+        stat = db_path.stat()
+        key = f"{db_path.resolve()}\n{stat.st_size}\n{stat.st_mtime_ns}"
+        return self.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def load(self, db_path: Path) -> dict[str, Any] | None:
+        """Read what was previously discovered about a database file, if anything."""
+        try:
+            with self._path(db_path).open() as f:
+                schema: dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return None
+        logger.debug(f"Using cached schema of {db_path}")
+        return schema
+
+    def save(self, db_path: Path, schema: dict[str, Any]) -> None:
+        """Record what has been discovered about a database file."""
+        try:
+            _write_json_atomic(self._path(db_path), schema)
+        except OSError:
+            logger.warning(f"Unable to cache the schema of {db_path}")
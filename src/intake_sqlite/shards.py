@@ -0,0 +1,128 @@
+"""Find the shards of a dataset published as many SQLite files, and what they hold.
+
+Some datasets are published as one database per year or per region, like
+``s3://bucket/epacems-*.sqlite``, all with the same tables. The functions here expand
+globs into the list of shards, and describe the range of values of some columns in
+each shard, either from named groups of a regular expression matched against its URL,
+or from metadata given explicitly. :class:`intake_sqlite.SQLiteSourceSharded` uses
+these ranges to skip shards that can't contain any rows matching its filters, without
+fetching them, and to find the divisions of its partitions.
+"""
+from __future__ import annotations
+
+import glob
+import logging
+import re
+from pathlib import PurePosixPath
+from typing import Any
+from urllib.parse import urlparse
+
+import fsspec
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["expand_shards", "ordered_divisions", "shard_ranges"]
+
+# Keys of storage_options used by intake_sqlite.urlpath_to_sqliteurl, not fsspec.
+_PACKAGE_OPTIONS = ("lazy", "cache", "parallel", "immutable", "pragmas")
+
+
+def _has_magic(urlpath: str) -> bool:
+    return any(c in urlpath for c in "*?[")
+
+
+def expand_shards(
+    urlpath: str | list[str], storage_options: dict[str, Any] = {}
+) -> list[str]:
+    """Expand a glob, or a list of paths and globs, into the URLs of all the shards.
+
+    Args:
+        urlpath: A local path or :mod:`fsspec` readable URL, which may contain glob
+            characters, or a list of them.
+        storage_options: Options for :func:`intake_sqlite.urlpath_to_sqliteurl`. Those
+            meant for :mod:`fsspec` are used to list remote files.
+
+    Returns:
+        The URLs of the shards, in the order they were given, with the matches of
+        each glob sorted.
+    """
+    fs_options = {k: v for k, v in storage_options.items() if k not in _PACKAGE_OPTIONS}
+    urlpaths = [urlpath] if isinstance(urlpath, str) else list(urlpath)
+    shards = []
+    for path in urlpaths:
+        if not _has_magic(path):
+            shards.append(path)
+        elif urlparse(path).scheme == "":
+            shards += sorted(glob.glob(path))
+        else:
+            fs, fs_path = fsspec.core.url_to_fs(path, **fs_options)
+            shards += [fs.unstrip_protocol(p) for p in sorted(fs.glob(fs_path))]
+    return shards
+
+
+def _parse_value(value: str) -> Any:
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+def shard_ranges(
+    shards: list[str],
+    pattern: str | None = None,
+    metadata: dict[str, dict[str, Any]] = {},
+) -> list[dict[str, tuple[Any, Any]]]:
+    """Find the ranges of values that columns take in each shard.
+
+    Args:
+        shards: URLs of the shards.
+        pattern: A regular expression with named groups, searched for in each URL,
+            e.g. ``"epacems-(?P<year>[0-9]{4})"``. Each group gives the single value
+            of the column with the same name in that shard. Numbers are converted to
+            integers or floats.
+        metadata: Values of columns in each shard, keyed by its URL or file name.
+            Each value may be a single value, or a ``[minimum, maximum]`` pair.
+            Takes precedence over values found by ``pattern``.
+
+    Returns:
+        The inclusive minimum and maximum of each known column, for each shard.
+    """
+    regex = None if pattern is None else re.compile(pattern)
+    ranges = []
+    for shard in shards:
+        found: dict[str, tuple[Any, Any]] = {}
+        match = None if regex is None else regex.search(shard)
+        if match is not None:
+            for column, value in match.groupdict().items():
+                if value is not None:
+                    found[column] = (_parse_value(value), _parse_value(value))
+        name = PurePosixPath(urlparse(shard).path).name
+        for column, value in metadata.get(shard, metadata.get(name, {})).items():
+            lo, hi = value if isinstance(value, (list, tuple)) else (value, value)
+            found[column] = (lo, hi)
+        ranges.append(found)
+    return ranges
+
+
+def ordered_divisions(ranges: list[tuple[Any, Any] | None]) -> list[Any] | None:
+    """Divisions of partitions that each hold a range of index values, if ordered.
+
+    Args:
+        ranges: The inclusive minimum and maximum index values in each partition.
+
+    Returns:
+        Divisions suitable for :mod:`dask`, or None if any range is unknown, or the
+        ranges aren't in strictly increasing order without overlapping.
+    """
+    known = [r for r in ranges if r is not None and None not in r]
+    if not known or len(known) < len(ranges):
+        return None
+    try:
+        for (_, hi), (lo, _) in zip(known[:-1], known[1:]):
+            if not hi < lo:
+                return None
+    except TypeError:
+        return None
+    return [lo for lo, _ in known] + [known[-1][1]]
@@ -1,12 +1,24 @@
 """Create an SQLite Intake catalog from all the tables in a SQLite database."""
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-from typing import Any
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
+from intake.catalog.local import LocalCatalogEntry
 from intake_sql.sql_cat import SQLCatalog
 
 import intake_sqlite
+from intake_sqlite.dialect import database_path
+from intake_sqlite.pool import pooled_connection
+from intake_sqlite.schema import SchemaCache, list_relations, primary_key
+from intake_sqlite.sqlite_src import SQLiteSource, SQLiteSourceAutoPartition
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +26,36 @@ __all__ = ["SQLiteCatalog"]
 
 
 class SQLiteCatalog(SQLCatalog):  # type: ignore
-    """Automatically create data sources from known SQLite database tables."""
+    """Automatically create data sources from known SQLite database tables.
+
+    Tables and views are found with a single query of ``sqlite_master`` when the
+    catalog is opened. The columns of each table are only looked up when its entry is
+    used, to find out whether it has a primary key that can be used to partition it.
+    What has been discovered is cached (see :class:`intake_sqlite.schema.SchemaCache`),
+    so that opening a catalog of the same database file again doesn't need to query
+    it at all. The number of rows in each table recorded by ``ANALYZE``, if it has been
+    run, is also found when the catalog is opened, and given in the ``metadata`` of
+    its entry as ``estimated_rows``.
+
+    Entries accept the ``columns``, ``filters`` and ``compact_dtypes`` arguments of
+    :class:`intake_sqlite.SQLiteSource`, e.g.
+    ``cat.plants(columns=["id", "capacity_mw"], filters=[("year", "==", 2020)])``.
+
+    Args:
+        urlpath: A local path or :mod:`fsspec` readable URL pointing to a SQLite
+            database.
+        views: Whether to create entries for views as well as tables.
+        sql_kwargs: Additional arguments to pass to the data sources.
+        storage_options: Keyword arguments passed to :func:`fsspec.open_local`. See
+            :func:`intake_sqlite.urlpath_to_sqliteurl` for options specific to this
+            package.
+        schema_cache: Whether to cache the tables and columns that are discovered, and
+            the partition plans of tables with primary keys. May also be the path to
+            a directory in which to cache them.
+        compact_dtypes: Whether entries read tables with compact dtypes, unless they're
+            told otherwise. See :class:`intake_sqlite.SQLiteSource`.
+        kwargs: Additional arguments to pass to :class:`intake.catalog.Catalog`.
+    """
 
     name = "sqlite_cat"
     version = intake_sqlite.__version__
@@ -25,9 +66,15 @@ class SQLiteCatalog(SQLCatalog):  # type: ignore
         views: bool = False,
         sql_kwargs: str | None = None,
         storage_options: dict[str, Any] = {},
+        schema_cache: bool | str = True,
+        compact_dtypes: bool | dict[str, Any] = False,
         **kwargs: str,
     ):
         """Initialize catalog, transforming urlpath into SQLite URL for SQL Alchemy."""
+        self._schema_cache = schema_cache
+        self._compact_dtypes = compact_dtypes
+        self._schema: dict[str, Any] = {}
+        self._schema_lock = threading.Lock()
         super().__init__(
             uri=intake_sqlite.urlpath_to_sqliteurl(
                 urlpath, storage_options=storage_options
@@ -36,3 +83,187 @@ class SQLiteCatalog(SQLCatalog):  # type: ignore
             sql_kwargs=sql_kwargs,
             **kwargs,
         )
+
+    def _cache(self) -> tuple[SchemaCache, Path] | None:
+        """The schema cache to use and the database file to look up, if any."""
+        db_path = database_path(self.uri)
+        if not self._schema_cache or db_path is None:
+            return None
+        if isinstance(self._schema_cache, str):
+            return SchemaCache(self._schema_cache), db_path
+        return SchemaCache(), db_path
+
+    def _save_schema(self) -> None:
+        cache = self._cache()
+        if cache is not None:
+            cache[0].save(cache[1], self._schema)
+
+    def _load(self) -> None:
+        """Create an entry for each table, without looking at any of their columns."""
+        if self.sql_kwargs.get("schema"):
+            # Tables in attached databases aren't listed in the main sqlite_master.
+            super()._load()
+            return
+        from intake_sqlite.stats import estimated_rows
+
+        cache = self._cache()
+        schema = None if cache is None else cache[0].load(cache[1])
+        if schema is None:
+            with pooled_connection(self.uri) as con:
+                relations = list_relations(con, views=True)
+                estimates = estimated_rows(con)
+            self._schema = {
+                "relations": relations,
+                "primary_keys": {},
+                "estimated_rows": {
+                    name: n for name, n in estimates.items() if name in relations
+                },
+            }
+            self._save_schema()
+        else:
+            self._schema = schema
+        self._entries = {
+            name: _LazyTableEntry(self, name)
+            for name, kind in self._schema["relations"].items()
+            if kind == "table" or self.views
+        }
+
+    def _primary_key(self, table: str) -> str | None:
+        """Find the first primary key column of a table, using the cache if possible."""
+        with self._schema_lock:
+            primary_keys = self._schema["primary_keys"]
+            if table not in primary_keys:
+                with pooled_connection(self.uri) as con:
+                    primary_keys[table] = primary_key(con, table)
+                self._save_schema()
+            pk: str | None = primary_keys[table]
+            return pk
+
+    async def read_many_async(
+        self, names: list[str] | None = None, **kwargs: Any
+    ) -> dict[str, Any]:
+        """Read many entries concurrently, without blocking the event loop.
+
+        Entries are opened, which may query the database to find their primary keys,
+        and then read, on the thread pool shared by all sources, with at most
+        :func:`intake_sqlite.aio.set_max_per_database` reads of this catalog's
+        database at a time.
+
+        Args:
+            names: Names of the entries to read. Defaults to all of them.
+            kwargs: Arguments for every entry, like ``columns`` or ``compact_dtypes``.
+
+        Returns:
+            A mapping of entry names to the dataframes read from them.
+        """
+        from intake_sqlite.aio import read_many_async, run_async
+
+        if names is None:
+            names = list(self)
+        entries = [self._entries[name] for name in names]
+        sources = await asyncio.gather(
+            *(run_async(self.uri, functools.partial(e.get, **kwargs)) for e in entries)
+        )
+        return dict(zip(names, await read_many_async(sources)))
+
+    def profile(
+        self, names: list[str] | None = None, **kwargs: Any
+    ) -> dict[str, pd.DataFrame]:
+        """Profile the columns of entries in SQL, without reading their rows.
+
+        Args:
+            names: Names of the entries to profile. Defaults to all of them.
+            kwargs: Arguments for :meth:`intake_sqlite.SQLiteSource.profile`, like
+                ``distinct``.
+
+        Returns:
+            A mapping of entry names to their profiles.
+        """
+        if names is None:
+            names = list(self)
+        return {name: self._entries[name].get().profile(**kwargs) for name in names}
+
+    def export_parquet(
+        self, out_dir: str, names: list[str] | None = None, **kwargs: Any
+    ) -> dict[str, Any]:
+        """Export entries to Parquet in parallel, with a manifest catalog.
+
+        Args:
+            out_dir: Directory in which to write the tables and the manifest.
+            names: Names of the entries to export. Defaults to all of them.
+            kwargs: Arguments for :func:`intake_sqlite.export.export_parquet`, like
+                ``max_workers``, ``compression`` and ``row_group_rows``.
+
+        Returns:
+            The manifest, an Intake catalog of the exported tables.
+        """
+        from intake_sqlite.export import export_parquet
+
+        return export_parquet(
+            self.uri, out_dir, tables=list(self) if names is None else names, **kwargs
+        )
+
+
+class _LazyTableEntry(LocalCatalogEntry):  # type: ignore
+    """A catalog entry that decides how to read its table only when it's used.
+
+    Tables with a primary key are read with
+    :class:`intake_sqlite.SQLiteSourceAutoPartition`, partitioned on the first column
+    of the key, and other tables and views are read with
+    :class:`intake_sqlite.SQLiteSource`, just as :class:`intake_sql.SQLCatalog` does
+    with the corresponding :mod:`intake_sql` sources.
+    """
+
+    def __init__(self, catalog: SQLiteCatalog, table: str):
+        self._sqlite_catalog = catalog
+        self._resolved = False
+        # Catalogs cached before row counts were estimated don't have any.
+        nrows = catalog._schema.get("estimated_rows", {}).get(table)
+        super().__init__(
+            table,
+            f"SQL table {table} from {catalog.uri}",
+            SQLiteSource,
+            True,
+            {
+                "urlpath": catalog.uri,
+                "sql_expr": table,
+                "sql_kwargs": catalog.sql_kwargs,
+                "compact_dtypes": catalog._compact_dtypes,
+            },
+            {},
+            {},
+            {} if nrows is None else {"estimated_rows": nrows},
+            "",
+            getenv=False,
+            getshell=False,
+        )
+
+    def _resolve(self) -> None:
+        if self._resolved:
+            return
+        catalog = self._sqlite_catalog
+        index = None
+        if catalog._schema["relations"].get(self.name) == "table":
+            index = catalog._primary_key(self.name)
+        if index is not None:
+            self._driver = "sqlite_auto"
+            self._plugin = [SQLiteSourceAutoPartition]
+            self._open_args = {
+                "urlpath": catalog.uri,
+                "table": self.name,
+                "index": index,
+                "sql_kwargs": catalog.sql_kwargs,
+                "compact_dtypes": catalog._compact_dtypes,
+                "plan_cache": catalog._schema_cache,
+            }
+        self._resolved = True
+
+    def describe(self) -> dict[str, Any]:
+        """Basic information about this entry."""
+        self._resolve()
+        description: dict[str, Any] = super().describe()
+        return description
+
+    def _create_open_args(self, user_parameters: dict[str, Any]) -> Any:
+        self._resolve()
+        return super()._create_open_args(user_parameters)
@@ -1,30 +1,226 @@
 """SQLite Intake driver classes."""
+
 from __future__ import annotations
 
+import json
 import logging
+import math
+import time
+from collections.abc import Iterator, Sequence
 from pathlib import Path
-from typing import Any
-from urllib.parse import urlparse
+from typing import TYPE_CHECKING, Any
+from urllib.parse import ParseResult, urlparse
 
 import fsspec
+from intake.source.base import DataSource, Schema
 from intake_sql import SQLSource, SQLSourceAutoPartition, SQLSourceManualPartition
 
 import intake_sqlite
+import intake_sqlite.archive
+import intake_sqlite.cache
+import intake_sqlite.dialect
+import intake_sqlite.download
+import intake_sqlite.instrument
+import intake_sqlite.vfs
+from intake_sqlite.instrument import span
+from intake_sqlite.pool import get_engine, pooled_connection
+from intake_sqlite.pushdown import (
+    Filter,
+    Filters,
+    and_filters,
+    normalize_filters,
+    select_sql,
+)
+
+if TYPE_CHECKING:
+    import sqlite3
+
+    import pandas as pd
+
+    from intake_sqlite.incremental import WatermarkStore
+    from intake_sqlite.manual import WherePlan
+    from intake_sqlite.plans import PlanCache
 
 logger = logging.getLogger(__name__)
 
 SQLITE_SUFFIXES = (".db", ".sqlite")
+READ_ENGINES = ("pandas", "arrow")
+DEFAULT_CHUNK_ROWS = 100_000
+PARTITIONING = ("uniform", "balanced")
 
 
 __all__ = [
     "SQLiteSource",
     "SQLiteSourceAutoPartition",
     "SQLiteSourceManualPartition",
+    "SQLiteSourceSharded",
     "urlpath_to_sqliteurl",
 ]
 
 
-class SQLiteSource(SQLSource):  # type: ignore
+class _Instrumented:
+    """Record spans for reads made through a source while instrumentation is active.
+
+    See :mod:`intake_sqlite.instrument`.
+    """
+
+    def read(self) -> pd.DataFrame:
+        """Read all of the data into a dataframe."""
+        with span("read") as attributes:
+            df: pd.DataFrame = super().read()  # type: ignore[misc]
+            attributes["rows"] = len(df)
+            attributes["partitions"] = getattr(self, "npartitions", 1) or 1
+        return df
+
+    def read_partition(self, i: int) -> pd.DataFrame:
+        """Read a single partition of the data into a dataframe."""
+        with span("read_partition", partition=i) as attributes:
+            df: pd.DataFrame = super().read_partition(i)  # type: ignore[misc]
+            attributes["rows"] = len(df)
+            attributes["partitions"] = 1
+        return df
+
+    def to_dask(self) -> Any:
+        """Return a lazy dask dataframe whose partitions are recorded when computed."""
+        with span("to_dask") as attributes:
+            ddf = super().to_dask()  # type: ignore[misc]
+            attributes["partitions"] = ddf.npartitions
+        if intake_sqlite.instrument.is_active():
+            ddf = ddf.map_partitions(_record_partition, meta=ddf._meta)
+        return ddf
+
+
+def _record_partition(df: pd.DataFrame) -> pd.DataFrame:
+    """Record a span for a partition of a dask dataframe that has been computed."""
+    with span("partition", rows=len(df), partitions=1):
+        return df
+
+
+class _Async:
+    """Read a source without blocking an event loop.
+
+    See :mod:`intake_sqlite.aio`.
+    """
+
+    _uri: str
+
+    def _database(self) -> str | None:
+        """The SQLite URL of the database whose limit on concurrent reads applies."""
+        return self._uri
+
+    async def read_async(self) -> pd.DataFrame:
+        """Read all of the data into a dataframe on the shared thread pool."""
+        from intake_sqlite.aio import run_async
+
+        df: pd.DataFrame = await run_async(
+            self._database(), self.read  # type: ignore[attr-defined]
+        )
+        return df
+
+    async def discover_async(self) -> dict[str, Any]:
+        """Open the source and find its schema on the shared thread pool."""
+        from intake_sqlite.aio import run_async
+
+        schema: dict[str, Any] = await run_async(
+            self._database(), self.discover  # type: ignore[attr-defined]
+        )
+        return schema
+
+
+class _Processes:
+    """Read the partitions of a source in a pool of worker processes, if asked to.
+
+    See :mod:`intake_sqlite.processes`.
+    """
+
+    _processes: bool | int
+    _uri: str
+
+    def _partition_queries(
+        self,
+    ) -> tuple[list[tuple[str, Sequence[Any] | dict[str, Any]]], dict[str, Any]]:
+        """The query reading each partition, and the arguments to convert them with."""
+        raise NotImplementedError
+
+    def read(self) -> pd.DataFrame:
+        """Read all of the data into a dataframe, in worker processes if asked to."""
+        if not self._processes:
+            df: pd.DataFrame = super().read()  # type: ignore[misc]
+            return df
+        from intake_sqlite.processes import read_partitions
+
+        queries, kwargs = self._partition_queries()
+        processes = None if self._processes is True else int(self._processes)
+        return read_partitions(self._uri, queries, processes, **kwargs)
+
+
+class _Profiled:
+    """Profile the columns of a source in SQL, without reading it into a dataframe.
+
+    See :mod:`intake_sqlite.stats`.
+    """
+
+    def _profile_queries(
+        self,
+    ) -> list[tuple[str, str, Sequence[Any] | dict[str, Any]]]:
+        """The database, query and parameters of each part of the source to profile."""
+        raise NotImplementedError
+
+    def profile(self, distinct: bool = True, cache: bool | str = True) -> pd.DataFrame:
+        """Describe the columns of the source, computing their statistics in SQL.
+
+        The number of values and nulls, the mean of the numeric values, the minimum
+        and maximum of each column, and an estimate of its number of distinct values,
+        are computed in one aggregate query of each part of the source, and merged.
+        Memory use doesn't depend on the number of rows.
+
+        Args:
+            distinct: Whether to estimate the number of distinct values in each
+                column, which takes longer than the other statistics.
+            cache: Whether to cache the profile, keyed by fingerprints of the
+                databases, so profiling an unchanged source again doesn't query them.
+                May also be the path to a directory in which to cache profiles.
+
+        Returns:
+            A dataframe with a column for each column of the source, and a row for
+            each statistic, like :meth:`pandas.DataFrame.describe`.
+        """
+        from intake_sqlite.stats import (
+            ProfileCache,
+            merge_profiles,
+            profile_frame,
+            profile_query,
+        )
+
+        queries = self._profile_queries()
+        located = [
+            (path, sql, params)
+            for path, sql, params in (
+                (intake_sqlite.dialect.database_path(uri), sql, params)
+                for uri, sql, params in queries
+            )
+            if path is not None
+        ]
+        store = key = None
+        # Databases read lazily from remote storage can't be fingerprinted.
+        if cache and len(located) == len(queries):
+            store = ProfileCache(cache if isinstance(cache, str) else None)
+            key = store.key(located, distinct)
+            df = store.load(key)
+            if df is not None:
+                return df
+        profiles = []
+        with span("profile", partitions=len(queries)):
+            for uri, sql, params in queries:
+                with pooled_connection(uri) as con:
+                    profiles.append(profile_query(con, sql, params, distinct))
+        df = profile_frame(merge_profiles(profiles))
+        if store is not None and key is not None:
+            store.save(key, df)
+        return df
+
+
+class SQLiteSource(_Instrumented, _Async, _Profiled, SQLSource):  # type: ignore
     """Read the full results of an SQL query into a dataframe.
 
     Args:
@@ -33,8 +229,45 @@ class SQLiteSource(SQLSource):  # type: ignore
         sql_expr: Query expression to pass to the SQLite database backend.
         sql_kwargs: Additional arguments to pass in to :func:`pandas.read_sql`.
         metadata: Arbitrary metadata dictionary associated with the data source.
-        storage_options: Keyword arguments passed to :func:`fsspec.open_local`
-
+        storage_options: Keyword arguments passed to :func:`fsspec.open_local`. See
+            :func:`urlpath_to_sqliteurl` for options specific to this package.
+        engine: How to read the query results. ``"pandas"`` uses
+            :func:`pandas.read_sql` by way of SQLAlchemy. ``"arrow"`` reads rows
+            directly from a :mod:`sqlite3` cursor into typed :mod:`pyarrow` columns,
+            which is faster and uses less memory, but only supports the ``index_col``,
+            ``params``, ``parse_dates`` and ``dtype_backend`` arguments in
+            ``sql_kwargs``. See :func:`intake_sqlite.arrow.read_sql_arrow`.
+        columns: Names of the columns to read. By default all columns are read.
+        filters: Filters selecting the rows to read, in the disjunctive normal form
+            used by :func:`pandas.read_parquet`, e.g. ``[("year", ">=", 2020)]``.
+            Columns and filters are compiled into the SQL sent to the database, so
+            unwanted data is never read. See :mod:`intake_sqlite.pushdown`.
+        result_cache: Whether to cache the results of the query on disk, so that
+            reading the same query from the same unchanged database again just loads
+            them. May also be a dictionary of keyword arguments for
+            :class:`intake_sqlite.results.ResultCache`, like ``max_bytes``. Requires
+            :mod:`pyarrow`.
+        compact_dtypes: Whether to read the columns of a table with compact dtypes,
+            chosen from their declared types and cheap statistics, e.g. categories for
+            text with few distinct values and the narrowest integers that hold their
+            values. May also be a dictionary of keyword arguments for
+            :func:`intake_sqlite.dtypes.plan_dtypes`, like ``max_categories``. Dtypes
+            given in ``sql_kwargs`` take precedence. Queries that aren't simply the
+            name of a table are read as usual. Off by default, since it changes the
+            dtypes of the dataframes read.
+        watermark: Name of a column whose values only increase as rows are appended,
+            like ``rowid``. If given, the largest value returned by each read, or
+            :meth:`refresh`, is remembered, and the next one only returns rows added
+            since then, even in another process. :meth:`discover` doesn't move the
+            mark. The database is never opened as immutable, and can't be read
+            lazily. Remote databases are kept in the persistent cache (see the
+            ``cache`` key of ``storage_options``), which :meth:`refresh` revalidates.
+            See :mod:`intake_sqlite.incremental`.
+        merge: Whether to store the rows read incrementally in a local Parquet copy,
+            and return all the rows read so far, rather than only the new ones.
+            Requires :mod:`pyarrow`.
+        watermark_dir: Directory in which to store high-water marks and rows.
+            Defaults to a ``watermarks`` subdirectory of the cache directory.
     """
 
     name = "sqlite"
@@ -49,17 +282,535 @@ class SQLiteSource(SQLSource):  # type: ignore
         sql_kwargs: dict[str, Any] = {},
         metadata: dict[str, Any] = {},
         storage_options: dict[str, Any] = {},
+        engine: str = "pandas",
+        columns: list[str] | None = None,
+        filters: Filters | None = None,
+        result_cache: bool | dict[str, Any] = False,
+        compact_dtypes: bool | dict[str, Any] = False,
+        watermark: str | None = None,
+        merge: bool = False,
+        watermark_dir: str | None = None,
     ):
         """Initialize the class, transforming remote URL path to a local file path."""
+        if engine not in READ_ENGINES:
+            raise ValueError(f"Expected engine to be one of {READ_ENGINES}: {engine}")
+        if merge and watermark is None:
+            raise ValueError("Only sources with a watermark column can merge rows.")
+        if (columns or filters or watermark) and sql_kwargs.get("schema"):
+            raise ValueError(
+                "Columns, filters and watermarks can't be used with tables in other "
+                "schemas."
+            )
+        # Fail early, rather than when the data is first read:
+        normalize_filters(filters)
+        self._engine = engine
+        self._columns = columns
+        self._filters = filters
+        self._result_cache = result_cache
+        self._compact_dtypes = compact_dtypes
+        self._dtype_plans: dict[bool, dict[str, Any]] = {}
+        self._urlpath = urlpath
+        self._storage_options = storage_options
+        self._watermark = watermark
+        self._merge = merge
+        self._watermark_dir = watermark_dir
+        self._pending_watermark: dict[str, Any] | None = None
         super().__init__(
-            uri=urlpath_to_sqliteurl(urlpath, storage_options=storage_options),
+            uri=(
+                urlpath_to_sqliteurl(urlpath, storage_options=storage_options)
+                if watermark is None
+                else self._appendable_uri()
+            ),
             sql_expr=sql_expr,
             sql_kwargs=sql_kwargs,
             metadata=metadata,
         )
 
+    def _query(self, predicates: list[Filter] = []) -> tuple[str, dict[str, Any]]:
+        """The SQL to execute and the arguments to read it with.
+
+        If columns or filters were given, the query is rewritten to select only those
+        columns and rows, and the parameters of the filters are added to ``params``.
+
+        Args:
+            predicates: Predicates that rows must also match, e.g. to sample them.
+        """
+        if not (self._columns or self._filters or predicates):
+            return self._sql_expr, self._sql_kwargs
+        from intake_sqlite.connection import table_exists
+
+        kwargs = dict(self._sql_kwargs)
+        columns = self._columns
+        index_col = kwargs.get("index_col")
+        if columns and index_col is not None:
+            index_cols = [index_col] if isinstance(index_col, str) else index_col
+            columns = [c for c in index_cols if c not in columns] + list(columns)
+        with pooled_connection(self._uri) as con:
+            is_table = table_exists(con, self._sql_expr)
+        sql, kwargs["params"] = select_sql(
+            self._sql_expr,
+            is_table,
+            columns=columns,
+            filters=and_filters(self._filters, predicates)
+            if predicates
+            else self._filters,
+            params=kwargs.get("params"),
+        )
+        return sql, kwargs
+
+    def _select_query(self) -> tuple[str, Sequence[Any] | dict[str, Any]]:
+        """The complete SELECT statement the source runs, and its parameters."""
+        from intake_sqlite.connection import table_exists
+
+        sql, kwargs = self._query()
+        if sql != self._sql_expr:
+            return sql, kwargs.get("params") or ()
+        with pooled_connection(self._uri) as con:
+            is_table = table_exists(con, sql)
+        return select_sql(sql, is_table, params=kwargs.get("params"))
+
+    def _profile_queries(
+        self,
+    ) -> list[tuple[str, str, Sequence[Any] | dict[str, Any]]]:
+        if self._sql_kwargs.get("schema"):
+            raise ValueError("Tables in other schemas can't be profiled.")
+        return [(self._uri, *self._select_query())]
 
-class SQLiteSourceAutoPartition(SQLSourceAutoPartition):  # type: ignore
+    def _plan(self, categories: bool) -> dict[str, Any]:
+        """Compact dtypes for the columns read from the source's table, if any.
+
+        Args:
+            categories: Whether to find the categories of categorical columns, so
+                that chunks of the results all have the same dtypes.
+        """
+        if categories in self._dtype_plans:
+            return self._dtype_plans[categories]
+        plan = self._dtype_plans[categories] = {}
+        if not _plan_dtypes(self._uri, self._compact_dtypes, self._sql_kwargs):
+            return plan
+        from intake_sqlite.connection import table_exists
+
+        with pooled_connection(self._uri) as con:
+            if table_exists(con, self._sql_expr):
+                plan.update(self._plan_table(con, categories))
+        return plan
+
+    def _plan_table(
+        self,
+        con: sqlite3.Connection,
+        categories: bool,
+        filters: Filters | None = None,
+    ) -> dict[str, Any]:
+        """Plan compact dtypes for the columns read from the source's table.
+
+        Args:
+            con: Connection to the database.
+            categories: Whether to find the categories of categorical columns.
+            filters: Only plan for the rows selected by these filters. Defaults to
+                the whole table, so that every filtered read has the same dtypes.
+        """
+        from intake_sqlite.dtypes import plan_dtypes
+
+        columns = None
+        if self._columns:
+            index_col = self._sql_kwargs.get("index_col") or []
+            index_cols = [index_col] if isinstance(index_col, str) else index_col
+            columns = [*self._columns, *index_cols]
+        options = self._compact_dtypes if isinstance(self._compact_dtypes, dict) else {}
+        return plan_dtypes(
+            con,
+            self._sql_expr,
+            columns=columns,
+            categories=categories,
+            filters=filters,
+            **options,
+        )
+
+    def _compact(
+        self, sql: str, kwargs: dict[str, Any], categories: bool = False
+    ) -> tuple[str, dict[str, Any]]:
+        """Add the planned dtypes of the table's columns to the reader's arguments."""
+        from intake_sqlite.dtypes import with_plan
+
+        plan = self._plan(categories)
+        if not plan:
+            return sql, kwargs
+        if self._engine == "pandas" and sql == self._sql_expr:
+            # pandas.read_sql ignores dtype when it's given the name of a table.
+            sql, _ = select_sql(sql, is_table=True)
+        return sql, with_plan(kwargs, plan)
+
+    def _load(self) -> None:
+        """Read the full results of the query, from the result cache if possible."""
+        if self._watermark is not None:
+            self._dataframe = self._read_new_rows()
+            return
+        sql, kwargs = self._query()
+        db_path = intake_sqlite.dialect.database_path(self._uri)
+        if not self._result_cache or db_path is None:
+            self._dataframe = self._read(sql, kwargs)
+            return
+        from intake_sqlite.results import ResultCache
+
+        options = self._result_cache if isinstance(self._result_cache, dict) else {}
+        cache = ResultCache(**options)
+        key = cache.key(
+            db_path,
+            sql,
+            engine=self._engine,
+            sql_kwargs=kwargs,
+            compact_dtypes=self._compact_dtypes,
+        )
+        self._dataframe = cache.get(key, kwargs.get("dtype_backend", "numpy"))
+        if self._dataframe is None:
+            self._dataframe = self._read(sql, kwargs)
+            cache.put(key, self._dataframe)
+
+    def _watermark_store(self) -> tuple[WatermarkStore, str]:
+        """The store holding the source's high-water mark, and its key there."""
+        from intake_sqlite.incremental import WatermarkStore
+
+        store = WatermarkStore(self._watermark_dir)
+        key = store.key(
+            self._urlpath,
+            self._sql_expr,
+            watermark=self._watermark,
+            merge=self._merge,
+            sql_kwargs=self._sql_kwargs,
+            engine=self._engine,
+            columns=self._columns,
+            filters=self._filters,
+            compact_dtypes=self._compact_dtypes,
+        )
+        return store, key
+
+    def _appendable_uri(self, revalidate: bool = False) -> str:
+        """Resolve the URL of a database that rows are appended to.
+
+        The database isn't opened as immutable, since it may change while it's being
+        read. Remote databases are kept in the persistent cache, so that they can be
+        revalidated, and downloaded again once they've been republished.
+
+        Args:
+            revalidate: Whether to check that a cached copy of a remote database is
+                still current.
+        """
+        import sqlalchemy as sa
+
+        options = dict(self._storage_options)
+        if options.get("lazy"):
+            raise ValueError("Sources with a watermark column can't be read lazily.")
+        scheme = urlparse(self._urlpath).scheme
+        is_copy = scheme != "" or intake_sqlite.archive.parse_archive(self._urlpath)
+        if not scheme.startswith("sqlite") and is_copy:
+            cache = options.get("cache")
+            cache = dict(cache) if isinstance(cache, dict) else {}
+            cache["revalidate"] = revalidate or cache.get("revalidate", False)
+            options["cache"] = cache
+        options["immutable"] = False
+        # URLs that were already resolved, e.g. by a catalog, are used as they are.
+        url = sa.engine.make_url(urlpath_to_sqliteurl(self._urlpath, options))
+        return str(
+            url.difference_update_query(["immutable"]).render_as_string(
+                hide_password=False
+            )
+        )
+
+    def _read_new_rows(self) -> pd.DataFrame:
+        """Read the rows added since the last read, without advancing the mark.
+
+        The new mark is kept pending until the rows are handed to the caller, and
+        only then recorded by :meth:`_commit_watermark`, so that :meth:`discover`
+        doesn't skip over rows that have never been returned.
+        """
+        from intake_sqlite.connection import table_exists
+        from intake_sqlite.dtypes import with_plan
+        from intake_sqlite.incremental import concat_frames, max_value, new_rows_filters
+
+        assert self._watermark is not None  # nosec: B101
+        store, key = self._watermark_store()
+        with store.lock(key):
+            state = store.load(key)
+            stored = store.rows(key) if self._merge else None
+        before = after = None if state is None else state["watermark"]
+        with pooled_connection(self._uri) as con:
+            is_table = table_exists(con, self._sql_expr)
+            params = () if is_table else self._sql_kwargs.get("params") or ()
+            through = max_value(con, self._sql_expr, self._watermark, is_table, params)
+            if after is not None and (through is None or through < after):
+                logger.warning(
+                    f"The largest {self._watermark} in {self._sql_expr} is now "
+                    f"{through}, below the high-water mark {after}, so it has "
+                    "been rewritten. Reading it again from the start."
+                )
+                after = stored = None
+            filters = new_rows_filters(self._filters, self._watermark, after, through)
+            # Plan dtypes for the new rows only, rather than the whole table,
+            # so the cost of a refresh doesn't grow with the size of the table.
+            plan = {}
+            if is_table and _plan_dtypes(
+                self._uri, self._compact_dtypes, self._sql_kwargs
+            ):
+                plan = self._plan_table(con, categories=False, filters=filters)
+        df = SQLiteSource(
+            self._uri,
+            self._sql_expr,
+            sql_kwargs=with_plan(self._sql_kwargs, plan),
+            engine=self._engine,
+            columns=self._columns,
+            filters=filters,
+            compact_dtypes=False,
+        ).read()
+        logger.info(
+            f"Read {len(df)} new rows of {self._sql_expr} with {self._watermark} "
+            f"after {after}, through {through}."
+        )
+        self._pending_watermark = {
+            "before": before,
+            "rewritten": after != before,
+            "watermark": after if through is None else through,
+            "rows": df if self._merge else None,
+        }
+        return df if stored is None else concat_frames([stored, df])
+
+    def _commit_watermark(self) -> None:
+        """Record the high-water mark of rows that have been handed to the caller.
+
+        If another reader has moved the mark since the rows were read, it's left
+        alone, and the rows are read again by the next refresh.
+        """
+        pending, self._pending_watermark = self._pending_watermark, None
+        if pending is None:
+            return
+        assert self._watermark is not None  # nosec: B101
+        store, key = self._watermark_store()
+        with store.lock(key):
+            state = store.load(key)
+            if (None if state is None else state["watermark"]) != pending["before"]:
+                logger.warning(
+                    f"The high-water mark of {self._sql_expr} was moved by another "
+                    "reader, so it hasn't been advanced."
+                )
+                return
+            if pending["rewritten"]:
+                store.clear(key)
+            store.advance(
+                key, self._watermark, pending["watermark"], rows=pending["rows"]
+            )
+
+    def _get_partition(self, i: Any) -> pd.DataFrame:
+        """Return the dataframe, recording the high-water mark of any new rows."""
+        df: pd.DataFrame = super()._get_partition(i)
+        if self._watermark is not None:
+            self._commit_watermark()
+        return df
+
+    def refresh(self) -> pd.DataFrame:
+        """Read the rows added to the table since it was last read.
+
+        Only for sources with a ``watermark`` column. If ``merge`` is True, all of
+        the rows read so far are returned. A remote database is downloaded again if
+        it has been republished since it was cached.
+        """
+        if self._watermark is None:
+            raise ValueError("Only sources with a watermark column can be refreshed.")
+        self._uri = self._appendable_uri(revalidate=True)
+        self._dataframe = self._read_new_rows()
+        self._commit_watermark()
+        # So that discover() describes the rows that were just read.
+        self._schema = None
+        return self._dataframe
+
+    def reset_watermark(self) -> None:
+        """Forget the high-water mark and stored rows, so all rows are read again."""
+        if self._watermark is None:
+            raise ValueError("Only sources with a watermark column have a watermark.")
+        store, key = self._watermark_store()
+        with store.lock(key):
+            store.clear(key)
+
+    def _read(
+        self, sql: str, kwargs: dict[str, Any], compact: bool = True
+    ) -> pd.DataFrame:
+        """Read the full results of the query using the selected engine.
+
+        Compact dtypes are planned and applied, unless ``compact`` is False.
+        """
+        if compact:
+            sql, kwargs = self._compact(sql, kwargs)
+        if self._engine == "arrow":
+            from intake_sqlite.arrow import read_sql_arrow
+
+            return read_sql_arrow(sql, self._uri, **kwargs)
+        import pandas as pd
+
+        loader = pd.read_sql_table if kwargs.get("schema") else pd.read_sql
+        df: pd.DataFrame = loader(sql, get_engine(self._uri), **kwargs)
+        return df
+
+    def _read_preview(self, sql: str, kwargs: dict[str, Any]) -> pd.DataFrame:
+        """Read a few rows, with compact dtypes only if they've been planned already.
+
+        Planning compact dtypes takes a pass over the table, which would take longer
+        than reading the rows themselves.
+        """
+        from intake_sqlite.dtypes import with_plan
+
+        if self._sql_kwargs.get("schema"):
+            raise ValueError("Tables in other schemas can't be previewed.")
+        plan = self._dtype_plans.get(False) or self._dtype_plans.get(True) or {}
+        return self._read(sql, with_plan(kwargs, plan), compact=False)
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        """Read the first ``n`` rows, without reading any of the others.
+
+        Compact dtypes are only applied if they've already been planned, e.g. by
+        reading the source.
+        """
+        from intake_sqlite.connection import table_exists
+        from intake_sqlite.sample import limit_sql
+
+        sql, kwargs = self._query()
+        if sql == self._sql_expr:
+            with pooled_connection(self._uri) as con:
+                is_table = table_exists(con, sql)
+            sql, _ = select_sql(sql, is_table)
+        return self._read_preview(limit_sql(sql, n), kwargs)
+
+    def _rowids(self) -> tuple[int, int] | None:
+        """The smallest and largest rowid of the source's table, if it has any rows.
+
+        Raises:
+            ValueError: if the source doesn't read a table with rowids.
+        """
+        from intake_sqlite.connection import table_exists
+        from intake_sqlite.sample import rowid_range
+
+        with pooled_connection(self._uri) as con:
+            if not table_exists(con, self._sql_expr):
+                raise ValueError(
+                    f"Only tables can be sampled, not queries: {self._sql_expr}"
+                )
+            return rowid_range(con, self._sql_expr)
+
+    def sample(
+        self,
+        n: int | None = None,
+        frac: float | None = None,
+        seed: int | None = None,
+    ) -> pd.DataFrame:
+        """Read rows of the table chosen uniformly at random, without scanning it.
+
+        Random rowids are drawn between the smallest and largest rowid of the table,
+        and only the rows with those rowids that match the filters are read, so the
+        time taken depends on the size of the sample, not of the table. See
+        :mod:`intake_sqlite.sample`. Compact dtypes are only applied if they've
+        already been planned, as for :meth:`head`.
+
+        Args:
+            n: Number of rows to read. Fewer are returned if fewer rows match the
+                filters.
+            frac: Fraction of the rows to read, instead of a number of rows.
+            seed: Seed of the random number generator, for repeatable samples.
+
+        Raises:
+            ValueError: if the source reads a query rather than a table, or a table
+                without rowids.
+        """
+        import numpy as np
+
+        from intake_sqlite.incremental import concat_frames
+        from intake_sqlite.sample import (
+            MAX_ROUNDS,
+            SAMPLE_CHUNK_ROWS,
+            choose_rows,
+            random_rowids,
+            rowid_filter,
+            sample_size,
+        )
+
+        rowids = self._rowids()
+        if rowids is None:
+            return self.head(0)
+        wanted, top_up = sample_size(n, frac, rowids)
+        rng = np.random.default_rng(seed)
+        drawn = np.empty(0, dtype=np.int64)
+        frames = []
+        found = 0
+        size = wanted
+        for _ in range(MAX_ROUNDS):
+            batch = random_rowids(rowids, size, rng, drawn)
+            if not len(batch):
+                break
+            drawn = np.union1d(drawn, batch)
+            for i in range(0, len(batch), SAMPLE_CHUNK_ROWS):
+                chunk = batch[i : i + SAMPLE_CHUNK_ROWS]
+                df = self._read_preview(*self._query([rowid_filter(chunk)]))
+                frames.append(df)
+                found += len(df)
+            if not top_up or found >= wanted:
+                break
+            # Draw more rowids in proportion to the misses so far, but at most 8 times
+            # as many as last time.
+            misses = len(drawn) / max(found, 1)
+            size = min(math.ceil((wanted - found) * misses), 8 * len(batch))
+        else:
+            logger.warning(
+                f"Only found {found} of {wanted} rows of {self._sql_expr} to sample "
+                f"after drawing {len(drawn)} rowids."
+            )
+        if not frames:
+            return self.head(0)
+        df = concat_frames(frames)
+        if top_up:
+            df = choose_rows(df, wanted, rng)
+        if self._sql_kwargs.get("index_col") is None:
+            df = df.reset_index(drop=True)
+        return df
+
+    def read_chunked(
+        self, chunk_rows: int = DEFAULT_CHUNK_ROWS
+    ) -> Iterator[pd.DataFrame]:
+        """Stream the results of the query as dataframes of at most ``chunk_rows`` rows.
+
+        Rows are fetched from the database incrementally, so memory use depends on
+        ``chunk_rows`` rather than on the size of the query results. Unlike
+        :meth:`read`, the results are not kept by the source.
+        """
+        sql, kwargs = self._compact(*self._query(), categories=True)
+        if self._engine == "arrow":
+            from intake_sqlite.arrow import iter_sql_arrow
+
+            yield from iter_sql_arrow(sql, self._uri, batch_rows=chunk_rows, **kwargs)
+        else:
+            import pandas as pd
+
+            yield from pd.read_sql(
+                sql, get_engine(self._uri), chunksize=chunk_rows, **kwargs
+            )
+
+    def iter_batches(self, batch_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Any]:
+        """Stream the results of the query as :class:`pyarrow.RecordBatch` objects.
+
+        Rows are fetched from the database incrementally, so at most ``batch_rows``
+        rows are held in memory at a time. Only the ``params`` argument in
+        ``sql_kwargs`` is used. Requires :mod:`pyarrow`.
+        """
+        from intake_sqlite.arrow import iter_sql_batches
+
+        sql, kwargs = self._query()
+        yield from iter_sql_batches(
+            sql, self._uri, params=kwargs.get("params") or (), batch_rows=batch_rows
+        )
+
+
+# Arguments of dask.dataframe.read_sql_table that pandas.read_sql also accepts.
+_PREVIEW_KWARGS = ("coerce_float", "dtype", "dtype_backend", "parse_dates", "schema")
+
+
+class SQLiteSourceAutoPartition(
+    _Instrumented, _Async, _Processes, _Profiled, SQLSourceAutoPartition  # type: ignore
+):
     """SQLite Table reader with automatic partitioning.
 
     Args:
@@ -67,10 +818,39 @@ class SQLiteSourceAutoPartition(SQLSourceAutoPartition):  # type: ignore
             database.
         table: Name of the table to read from the database.
         index: Name of the column to use for partitioning and as the index of the
-            resulting dataframe.
+            resulting dataframe. If None, the table's ``rowid`` is used.
         sql_kwargs: Additional arguments to pass to :func:`dask.dataframe.read_sql`.
         metadata: Arbitrary metadata dictionary associated with the data source.
-        storage_options: Keyword arguments passed to :func:`fsspec.open_local`
+        storage_options: Keyword arguments passed to :func:`fsspec.open_local`. See
+            :func:`urlpath_to_sqliteurl` for options specific to this package.
+        partitioning: How to choose partition boundaries. ``"uniform"`` splits the
+            range between the minimum and maximum values of the index into partitions
+            of equal width, as :func:`dask.dataframe.read_sql_table` does.
+            ``"balanced"`` chooses boundaries at quantiles of the index, so that
+            partitions contain similar numbers of rows even when the values of the
+            index are unevenly distributed. See
+            :func:`intake_sqlite.partition.balanced_divisions`.
+        rows_per_partition: Target number of rows in each partition, as an alternative
+            to passing ``npartitions`` in ``sql_kwargs``.
+        columns: Names of the columns to read. By default all columns are read.
+        filters: Filters selecting the rows to read, as for :class:`SQLiteSource`.
+            Partitions that can't contain any matching rows, given the filters on the
+            index column, are dropped.
+        compact_dtypes: Whether to read columns with compact dtypes, as for
+            :class:`SQLiteSource`. Every partition gets the same dtypes. The index
+            keeps the dtype dask gives it.
+        plan_cache: Whether to cache the partition plan of the table, so that
+            reopening the source doesn't query the database. May also be the path to
+            a directory in which to cache plans. Off by default, since making the
+            plan takes a pass over the table. A plan may also be given in
+            ``metadata`` under the ``partition_plan`` key. See
+            :mod:`intake_sqlite.plans`.
+        processes: Whether :meth:`read` reads the partitions in a pool of worker
+            processes, rather than with dask, and how many: True for one for each
+            CPU. Workers read rows into Arrow, as ``engine="arrow"`` does for
+            :class:`SQLiteSource`, and every partition gets the dtypes of the dask
+            dataframe. On macOS and Windows, scripts must only read under an
+            ``if __name__ == "__main__":`` guard. See :mod:`intake_sqlite.processes`.
     """
 
     name = "sqlite_auto"
@@ -82,12 +862,35 @@ class SQLiteSourceAutoPartition(SQLSourceAutoPartition):  # type: ignore
         self,
         urlpath: str,
         table: str,
-        index: str,
+        index: str | None,
         sql_kwargs: dict[str, Any] = {},
         metadata: dict[str, Any] = {},
         storage_options: dict[str, Any] = {},
+        partitioning: str = "uniform",
+        rows_per_partition: int | None = None,
+        columns: list[str] | None = None,
+        filters: Filters | None = None,
+        compact_dtypes: bool | dict[str, Any] = False,
+        plan_cache: bool | str = False,
+        processes: bool | int = False,
     ):
         """Initialize the class, transforming remote URL path to a local file path."""
+        if partitioning not in PARTITIONING:
+            raise ValueError(
+                f"Expected partitioning to be one of {PARTITIONING}: {partitioning}"
+            )
+        if columns and "columns" in sql_kwargs:
+            raise ValueError("Columns were given both directly and in sql_kwargs.")
+        normalize_filters(filters)
+        self._columns = columns
+        self._filters = filters
+        self._partitioning = partitioning
+        self._rows_per_partition = rows_per_partition
+        self._compact_dtypes = compact_dtypes
+        self._plan_cache = plan_cache
+        self._partition_plan: dict[str, Any] | None = None
+        self._planned_dtypes: dict[str, Any] | None = None
+        self._processes = processes
         super().__init__(
             uri=urlpath_to_sqliteurl(urlpath, storage_options=storage_options),
             table=table,
@@ -96,8 +899,355 @@ class SQLiteSourceAutoPartition(SQLSourceAutoPartition):  # type: ignore
             metadata=metadata,
         )
 
+    def _settings(self) -> dict[str, Any]:
+        """The arguments that affect the partition plan, as they'd appear in JSON."""
+        settings = {
+            "table": self._sql_expr,
+            "index": self._index,
+            "partitioning": self._partitioning,
+            "rows_per_partition": self._rows_per_partition,
+            "columns": self._columns,
+            "compact_dtypes": self._compact_dtypes,
+            "sql_kwargs": self._sql_kwargs,
+        }
+        normalized: dict[str, Any] = json.loads(
+            json.dumps(settings, sort_keys=True, default=repr)
+        )
+        return normalized
+
+    def _plan_cache_dir(self) -> PlanCache | None:
+        from intake_sqlite.plans import PlanCache
+
+        if not self._plan_cache:
+            return None
+        if isinstance(self._plan_cache, str):
+            return PlanCache(self._plan_cache)
+        return PlanCache()
+
+    def _load_plan(self) -> dict[str, Any] | None:
+        """Find a usable partition plan, in the metadata or the plan cache."""
+        from intake_sqlite.plans import PLAN_VERSION, database_id
+
+        db_path = intake_sqlite.dialect.database_path(self._uri)
+        plan: dict[str, Any] | None = self.metadata.get("partition_plan")
+        if plan is not None:
+            if plan.get("version") != PLAN_VERSION:
+                logger.warning(f"Ignoring partition plan of unknown version: {plan}")
+            elif plan.get("settings") != self._settings():
+                logger.warning(
+                    f"Ignoring partition plan of {self._sql_expr} made with different "
+                    f"settings: {plan.get('settings')}"
+                )
+            elif db_path is not None and plan.get("database") != database_id(db_path):
+                logger.warning(
+                    f"Ignoring partition plan of {self._sql_expr} made from a "
+                    "different database."
+                )
+            else:
+                return plan
+        cache = self._plan_cache_dir()
+        if cache is None or db_path is None:
+            return None
+        return cache.load(db_path, self._settings())
+
+    def _save_plan(self, dtypes: dict[str, Any]) -> None:
+        """Record the dtypes planned for the table, and cache the partition plan.
+
+        Counting the rows in each partition takes a pass over the table, so the plan
+        is only made if it's going to be cached, or when :meth:`partition_plan` asks
+        for it.
+        """
+        self._planned_dtypes = dtypes
+        cache = self._plan_cache_dir()
+        if cache is None:
+            return
+        self._partition_plan = self._make_plan(dtypes)
+        db_path = intake_sqlite.dialect.database_path(self._uri)
+        if self._partition_plan is not None and db_path is not None:
+            cache.save(db_path, self._partition_plan)
+
+    def _make_plan(self, dtypes: dict[str, Any]) -> dict[str, Any] | None:
+        """Describe the partitioning of the dask dataframe just read from the table."""
+        from intake_sqlite.partition import ROWID
+        from intake_sqlite.plans import count_partition_rows, database_id, make_plan
+
+        db_path = intake_sqlite.dialect.database_path(self._uri)
+        if db_path is None or self._filters or not self._dataframe.known_divisions:
+            return None
+        divisions = list(self._dataframe.divisions)
+        with pooled_connection(self._uri) as con:
+            rows = count_partition_rows(
+                con, self._sql_expr, self._index or ROWID, divisions
+            )
+        return make_plan(
+            self._dataframe,
+            self._settings(),
+            dtypes=dtypes,
+            rows=rows,
+            database=database_id(db_path),
+        )
+
+    def partition_plan(self) -> dict[str, Any]:
+        """The partition plan of the table, which may be embedded in a catalog.
+
+        Adding the plan to the source's ``metadata`` under the ``partition_plan`` key
+        lets :meth:`discover` and :meth:`to_dask` run without querying the database.
+
+        Raises:
+            ValueError: If there's no plan, because the source was opened with
+                ``filters``, the divisions of the table are unknown, or the database
+                isn't a local file.
+        """
+        self._get_schema()
+        if self._partition_plan is None and self._planned_dtypes is not None:
+            self._partition_plan = self._make_plan(self._planned_dtypes)
+        if self._partition_plan is None:
+            raise ValueError(f"No partition plan was made for {self._sql_expr}.")
+        return self._partition_plan
+
+    def _preview_source(self) -> SQLiteSource:
+        """A source reading the same rows of the table, but not in partitions.
+
+        Its dtypes come from the partition plan, if there is one already, so that
+        previewing the table doesn't take a pass over it.
+        """
+        from intake_sqlite.dtypes import with_plan
+        from intake_sqlite.partition import ROWID
+        from intake_sqlite.plans import decode_dtypes
+
+        kwargs = {k: v for k, v in self._sql_kwargs.items() if k in _PREVIEW_KWARGS}
+        plan = self._partition_plan or self._load_plan()
+        if plan is not None:
+            kwargs = with_plan(kwargs, decode_dtypes(plan["dtypes"]))
+        columns = self._columns or self._sql_kwargs.get("columns")
+        if columns is None and self._index is None:
+            # The rowid is only selected if it's named.
+            with pooled_connection(self._uri) as con:
+                columns = [
+                    name
+                    for _, name, *_ in con.execute(
+                        "SELECT * FROM pragma_table_info(?)", (self._sql_expr,)
+                    )
+                ]
+        return SQLiteSource(
+            self._uri,
+            self._sql_expr,
+            sql_kwargs={**kwargs, "index_col": self._index or ROWID},
+            columns=columns,
+            filters=self._filters,
+            compact_dtypes=False,
+        )
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        """Read the first ``n`` rows of the table, without reading any of the others.
+
+        See :meth:`SQLiteSource.head`.
+        """
+        return self._preview_source().head(n)
+
+    def sample(
+        self,
+        n: int | None = None,
+        frac: float | None = None,
+        seed: int | None = None,
+    ) -> pd.DataFrame:
+        """Read rows chosen uniformly at random, without scanning the table.
+
+        See :meth:`SQLiteSource.sample`.
+        """
+        return self._preview_source().sample(n, frac, seed)
+
+    def _partition_queries(
+        self,
+    ) -> tuple[list[tuple[str, Sequence[Any] | dict[str, Any]]], dict[str, Any]]:
+        """The query reading each partition, as dask would, with the dataframe's dtypes."""
+        from pandas.api.types import is_datetime64_any_dtype
+
+        from intake_sqlite.partition import ROWID
+
+        self._get_schema()
+        if not self._dataframe.known_divisions:
+            raise ValueError(f"The partitions of {self._sql_expr} aren't known.")
+        index = self._index or ROWID
+        src = self._preview_source()
+        divisions = self._dataframe.divisions
+        queries = []
+        for i, (lo, hi) in enumerate(zip(divisions[:-1], divisions[1:])):
+            # The last partition includes its upper bound.
+            upper = "<=" if i == len(divisions) - 2 else "<"
+            sql, kwargs = src._query([(index, ">=", lo), (index, upper, hi)])
+            queries.append((sql, kwargs.get("params") or ()))
+        dtypes = self._dataframe._meta.dtypes.to_dict()
+        dates = [name for name, d in dtypes.items() if is_datetime64_any_dtype(d)]
+        return queries, {
+            "index_col": index,
+            "parse_dates": dates,
+            "dtype": {n: d for n, d in dtypes.items() if n not in dates},
+        }
+
+    def _profile_queries(
+        self,
+    ) -> list[tuple[str, str, Sequence[Any] | dict[str, Any]]]:
+        # The index is profiled like any other column, but the rowid isn't.
+        columns = self._columns or self._sql_kwargs.get("columns")
+        if columns is not None and self._index is not None:
+            columns = [self._index, *(c for c in columns if c != self._index)]
+        schema = self._sql_kwargs.get("schema")
+        return SQLiteSource(
+            self._uri,
+            self._sql_expr,
+            sql_kwargs={} if schema is None else {"schema": schema},
+            columns=columns,
+            filters=self._filters,
+            compact_dtypes=False,
+        )._profile_queries()
+
+    def _get_schema(self) -> Schema:
+        from intake_sqlite.stats import estimated_rows
+
+        schema: Schema = super()._get_schema()
+        plan = self._partition_plan
+        if plan is not None and plan["rows"] is not None and not self._filters:
+            schema["shape"] = (sum(plan["rows"]), len(self._dataframe.columns))
+        elif not self._filters:
+            # Counting the rows would take a pass over the table.
+            with pooled_connection(self._uri) as con:
+                nrows = estimated_rows(con).get(self._sql_expr)
+            if nrows is not None:
+                schema["extra_metadata"] = {
+                    **schema["extra_metadata"],
+                    "estimated_rows": nrows,
+                }
+        return schema
+
+    def _load(self) -> None:
+        """Create the dask dataframe, from a partition plan if there is one."""
+        self._partition_plan = self._load_plan()
+        if self._partition_plan is None:
+            self._save_plan(self._load_from_database())
+        else:
+            self._load_from_plan(self._partition_plan)
+
+    def _load_from_plan(self, plan: dict[str, Any]) -> None:
+        """Create the dask dataframe without querying the database."""
+        import sqlalchemy as sa
+        from dask.dataframe.io.sql import read_sql_query
+
+        from intake_sqlite.dtypes import with_plan
+        from intake_sqlite.partition import ROWID
+        from intake_sqlite.plans import decode_dtypes, plan_divisions, plan_meta
+        from intake_sqlite.pushdown import (
+            filters_to_clause,
+            index_bounds,
+            prune_divisions,
+        )
+
+        kwargs = with_plan(dict(self._sql_kwargs), decode_dtypes(plan["dtypes"]))
+        for name in ("npartitions", "bytes_per_chunk", "limits", "columns"):
+            kwargs.pop(name, None)
+        index = self._index or ROWID
+        meta = plan_meta(plan)
+        table = sa.table(self._sql_expr, schema=kwargs.pop("schema", None))
+        query = sa.select(
+            *(sa.column(name) for name in meta.columns), sa.column(index)
+        ).select_from(table)
+        clause = filters_to_clause(self._filters)
+        if clause is not None:
+            query = query.where(clause)
+        divisions = plan_divisions(plan)
+        if self._filters:
+            divisions = prune_divisions(divisions, index_bounds(self._filters, index))
+        kwargs.update(divisions=divisions, meta=meta, head_rows=0)
+        self._dataframe = read_sql_query(  # type: ignore[no-untyped-call]
+            query, self._uri, index, **kwargs
+        )
+
+    def _load_from_database(self) -> dict[str, Any]:
+        """Create the dask dataframe, choosing partition boundaries if needed.
+
+        Returns:
+            The compact dtypes planned for the columns of the table.
+        """
+        import sqlalchemy as sa
+        from dask.dataframe.io.sql import read_sql_query, read_sql_table
 
-class SQLiteSourceManualPartition(SQLSourceManualPartition):  # type: ignore
+        from intake_sqlite.dtypes import plan_dtypes, with_plan
+        from intake_sqlite.partition import ROWID, balanced_divisions, count_rows
+        from intake_sqlite.pushdown import (
+            filters_to_clause,
+            index_bounds,
+            prune_divisions,
+        )
+
+        kwargs = dict(self._sql_kwargs)
+        index = self._index or ROWID
+        plan: dict[str, Any] = {}
+        if _plan_dtypes(self._uri, self._compact_dtypes, kwargs):
+            options = (
+                self._compact_dtypes if isinstance(self._compact_dtypes, dict) else {}
+            )
+            columns = self._columns or kwargs.get("columns")
+            with pooled_connection(self._uri) as con:
+                plan = plan_dtypes(con, self._sql_expr, columns=columns, **options)
+            plan.pop(index, None)
+            kwargs = with_plan(kwargs, plan)
+        index_col = self._index or sa.Column(ROWID, sa.Integer())
+        rows_per_partition = self._rows_per_partition
+        if "divisions" in kwargs:
+            pass
+        elif self._partitioning == "balanced":
+            if rows_per_partition is None and "npartitions" not in kwargs:
+                raise ValueError(
+                    "Balanced partitioning requires either npartitions in sql_kwargs, "
+                    "or rows_per_partition."
+                )
+            with pooled_connection(self._uri) as con:
+                kwargs["divisions"] = balanced_divisions(
+                    con,
+                    self._sql_expr,
+                    index,
+                    npartitions=kwargs.pop("npartitions", None),
+                    rows_per_partition=rows_per_partition,
+                )
+        elif rows_per_partition is not None:
+            with pooled_connection(self._uri) as con:
+                nrows = count_rows(con, self._sql_expr, estimate=True)
+            kwargs["npartitions"] = max(1, math.ceil(nrows / rows_per_partition))
+        if not (self._columns or self._filters):
+            self._dataframe = read_sql_table(  # type: ignore[no-untyped-call]
+                self._sql_expr, self._uri, index_col, **kwargs
+            )
+            return plan
+
+        # Build the query read_sql_table would, but with a WHERE clause.
+        table = sa.Table(
+            self._sql_expr,
+            sa.MetaData(),
+            autoload_with=get_engine(self._uri),
+            schema=kwargs.pop("schema", None),
+        )
+        names = self._columns or kwargs.pop("columns", None)
+        if names is None:
+            names = [c.name for c in table.columns if c.name != index]
+        columns = [table.columns[name] for name in names if name != index]
+        index_column = table.columns[index] if self._index else index_col
+        query = sa.select(*columns, index_column).select_from(table)
+        clause = filters_to_clause(self._filters)
+        if clause is not None:
+            query = query.where(clause)
+        if "divisions" in kwargs:
+            bounds = index_bounds(self._filters, index)
+            kwargs["divisions"] = prune_divisions(kwargs["divisions"], bounds)
+        # Without divisions, dask finds the range of the index in the filtered query.
+        self._dataframe = read_sql_query(  # type: ignore[no-untyped-call]
+            query, self._uri, index, **kwargs
+        )
+        return plan
+
+
+class SQLiteSourceManualPartition(
+    _Instrumented, _Async, _Processes, _Profiled, SQLSourceManualPartition  # type: ignore
+):
     """SQLite expression reader with explicit partitioning.
 
     Args:
@@ -114,13 +1264,22 @@ class SQLiteSourceManualPartition(SQLSourceManualPartition):  # type: ignore
             `"WHERE index_col >= {} AND index_col < {}"`
         sql_kwargs: Additional arguments to pass to :func:`dask.dataframe.read_sql`.
         metadata: Arbitrary metadata dictionary associated with the data source.
-        storage_options: Keyword arguments passed to :func:`fsspec.open_local`
+        storage_options: Keyword arguments passed to :func:`fsspec.open_local`. See
+            :func:`urlpath_to_sqliteurl` for options specific to this package.
+        processes: Whether :meth:`read` reads the partitions in a pool of worker
+            processes, rather than with dask, and how many: True for one for each
+            CPU. Workers read rows into Arrow, as ``engine="arrow"`` does for
+            :class:`SQLiteSource`, so only the ``index_col``, ``params``,
+            ``parse_dates`` and ``dtype`` arguments in ``sql_kwargs`` are used. On
+            macOS and Windows, scripts must only read under an
+            ``if __name__ == "__main__":`` guard. See :mod:`intake_sqlite.processes`.
     """
 
     name = "sqlite_manual"
     version = intake_sqlite.__version__
     container = "dataframe"
     partition_access = True
+    where_plan: WherePlan | None = None
 
     def __init__(
         self,
@@ -131,8 +1290,10 @@ class SQLiteSourceManualPartition(SQLSourceManualPartition):  # type: ignore
         sql_kwargs: dict[str, Any] = {},
         metadata: dict[str, Any] = {},
         storage_options: dict[str, Any] = {},
+        processes: bool | int = False,
     ):
         """Initialize the class, transforming remote URL path to a local file path."""
+        self._processes = processes
         super().__init__(
             uri=urlpath_to_sqliteurl(urlpath, storage_options=storage_options),
             sql_expr=sql_expr,
@@ -142,27 +1303,603 @@ class SQLiteSourceManualPartition(SQLSourceManualPartition):  # type: ignore
             metadata=metadata,
         )
 
+    @classmethod
+    def from_column(
+        cls,
+        urlpath: str,
+        table: str,
+        column: str,
+        npartitions: int | None = None,
+        rows_per_partition: int | None = None,
+        columns: list[str] | None = None,
+        require_index: bool = False,
+        sql_kwargs: dict[str, Any] = {},
+        metadata: dict[str, Any] = {},
+        storage_options: dict[str, Any] = {},
+        processes: bool | int = False,
+    ) -> SQLiteSourceManualPartition:
+        """Partition a table by the values of a column, with partitions of similar size.
+
+        The ``where_values`` are planned from the number of rows with each value of the
+        column, grouping values with few rows together. See
+        :func:`intake_sqlite.manual.plan_where_values`, whose plan is kept as the
+        ``where_plan`` attribute of the source. A warning suggesting an index is
+        logged if the partitions can't find their rows without scanning the table.
+
+        Args:
+            urlpath: A local path or :mod:`fsspec` readable URL pointing to a SQLite
+                database.
+            table: Name of the table to read.
+            column: Column to partition on, e.g. ``report_year`` or ``plant_id``.
+            npartitions: Number of partitions to create.
+            rows_per_partition: Target number of rows in each partition, instead of a
+                number of partitions.
+            columns: Columns to read, or None to read all of them.
+            require_index: Whether to raise an error rather than log a warning if the
+                partitions would scan the table.
+            sql_kwargs: Additional arguments to pass to :func:`dask.dataframe.read_sql`.
+            metadata: Arbitrary metadata dictionary associated with the data source.
+            storage_options: Keyword arguments passed to :func:`fsspec.open_local`.
+            processes: Whether to read the partitions in worker processes.
+
+        Raises:
+            ValueError: if ``require_index`` is set and no index can be used.
+        """
+        from intake_sqlite.manual import plan_where_values
+
+        uri = urlpath_to_sqliteurl(urlpath, storage_options=storage_options)
+        with pooled_connection(uri) as con:
+            plan = plan_where_values(
+                con, table, column, npartitions, rows_per_partition, columns
+            )
+        if not plan.uses_index:
+            message = (
+                f"Every partition of {table} on {column} scans the whole table, "
+                f"because no index can be used. Consider: {plan.suggested_index}"
+            )
+            if require_index:
+                raise ValueError(message)
+            logger.warning(message)
+        src = cls(
+            urlpath,
+            plan.sql_expr,
+            where_values=plan.where_values,
+            sql_kwargs=sql_kwargs,
+            metadata=metadata,
+            storage_options=storage_options,
+            processes=processes,
+        )
+        src.where_plan = plan
+        return src
+
+    def _where_clauses(self) -> list[str]:
+        """The WHERE clause of each partition, filled in from the template if any."""
+        if self._where_tmp is None:
+            return list(self._where)
+        return [self._where_tmp.format(values) for values in self._where]
+
+    def _partition_queries(
+        self,
+    ) -> tuple[list[tuple[str, Sequence[Any] | dict[str, Any]]], dict[str, Any]]:
+        """The query reading each partition, and the arguments in ``sql_kwargs``.
+
+        Text columns are given the string dtype if dask would give them one, but the
+        other columns get whatever dtypes their values need, as they do with dask.
+        """
+        import pandas as pd
+
+        self._get_schema()
+        params = self._sql_kwargs.get("params") or ()
+        queries = [
+            (f"{self._sql_expr} {where}", params) for where in self._where_clauses()
+        ]
+        dtypes = self._dataframe._meta.dtypes.to_dict()
+        dtype = {n: d for n, d in dtypes.items() if isinstance(d, pd.StringDtype)}
+        if isinstance(self._sql_kwargs.get("dtype"), dict):
+            dtype.update(self._sql_kwargs["dtype"])
+        return queries, {
+            "index_col": self._sql_kwargs.get("index_col"),
+            "parse_dates": self._sql_kwargs.get("parse_dates"),
+            "dtype": dtype,
+        }
+
+    def scanning_partitions(self) -> list[str]:
+        """Find the partitions that have to scan a whole table to find their rows.
+
+        Returns:
+            The WHERE clauses of those partitions, which would be faster with an index.
+        """
+        from intake_sqlite.manual import scanning_clauses
+
+        with pooled_connection(self._uri) as con:
+            return scanning_clauses(con, self._sql_expr, self._where_clauses())
+
+    def _profile_queries(
+        self,
+    ) -> list[tuple[str, str, Sequence[Any] | dict[str, Any]]]:
+        params = self._sql_kwargs.get("params") or ()
+        return [
+            (self._uri, f"{self._sql_expr} {where}", params)
+            for where in self._where_clauses()
+        ]
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        """Read the first ``n`` rows, from as few of the partitions as needed.
+
+        Only the first partitions are queried, each with a ``LIMIT``. Partitions are
+        defined by queries, which have no rowids, so they can't be sampled.
+        """
+        import pandas as pd
+
+        frames: list[pd.DataFrame] = []
+        found = 0
+        for clause in self._where_clauses():
+            df = SQLiteSource(
+                self._uri,
+                f"{self._sql_expr} {clause}",
+                sql_kwargs=self._sql_kwargs,
+                compact_dtypes=False,
+            ).head(n - found)
+            frames.append(df)
+            found += len(df)
+            if found >= n:
+                break
+        return pd.concat(frames)
+
+
+class _Sharded(DataSource):  # type: ignore
+    """Read the same query from many databases, one partition per database.
+
+    ``_shards`` and ``_ranges`` hold the URLs of the shards that may match the
+    filters, and any ranges of values known for them, and don't change. ``_parts``
+    holds the shards actually read, one per partition, which discovery narrows down
+    to those whose index range may match the filters.
+    """
+
+    _shards: list[str]
+    _ranges: list[dict[str, Any]]
+    _parts: list[str]
+    _sql_expr: str
+    _sql_kwargs: dict[str, Any]
+    _options: dict[str, Any]
+    _meta: pd.DataFrame | None
+    _divisions: list[Any] | None
+
+    def _shard(self, i: int) -> SQLiteSource:
+        """A source reading the query from one of the partitions' shards."""
+        return self._shard_source(self._parts[i])
+
+    def _shard_source(self, urlpath: str) -> SQLiteSource:
+        """A source reading the query from a shard, fetching it if needed."""
+        return SQLiteSource(
+            urlpath,
+            self._sql_expr,
+            sql_kwargs=self._sql_kwargs,
+            compact_dtypes=False,
+            **self._options,
+        )
+
+    def _shard_query(self, src: SQLiteSource) -> tuple[str, Any]:
+        """The complete SELECT statement a shard's source runs, and its parameters."""
+        return src._select_query()
+
+    def _profile_queries(
+        self,
+    ) -> list[tuple[str, str, Sequence[Any] | dict[str, Any]]]:
+        return [
+            query
+            for i in range(len(self._parts))
+            for query in self._shard(i)._profile_queries()
+        ]
+
+    def _index_range(self, urlpath: str, index: str) -> tuple[Any, Any] | None:
+        """The minimum and maximum values of the index in a shard, if it has any."""
+        from intake_sqlite.partition import quote_identifier
+
+        src = self._shard_source(urlpath)
+        sql, params = self._shard_query(src)
+        q = quote_identifier(index)
+        with pooled_connection(src._uri) as con:
+            lo, hi = con.execute(
+                f"SELECT min({q}), max({q}) FROM ({sql})", params  # nosec: B608
+            ).fetchone()
+        return None if lo is None else (lo, hi)
+
+    def _get_schema(self) -> Schema:
+        import pandas as pd
+        from dask.base import compute
+        from dask.delayed import delayed
+
+        from intake_sqlite.pushdown import filters_may_match
+        from intake_sqlite.shards import ordered_divisions
+
+        index = self._sql_kwargs.get("index_col")
+        self._divisions = None
+        if isinstance(index, str):
+            known = [r.get(index) for r in self._ranges]
+            queried = compute(  # type: ignore[no-untyped-call]
+                *(
+                    delayed(self._index_range)(urlpath, index)
+                    for urlpath, r in zip(self._shards, known)
+                    if r is None
+                )
+            )
+            found = iter(queried)
+            ranges = [next(found) if r is None else r for r in known]
+            keep = [
+                i
+                for i, r in enumerate(ranges)
+                if r is not None
+                and filters_may_match(self._options.get("filters"), {index: r})
+            ] or [0]
+            self._parts = [self._shards[i] for i in keep]
+            self._divisions = ordered_divisions([ranges[i] for i in keep])
+        src = self._shard(0)
+        sql, params = self._shard_query(src)
+        head = SQLiteSource(
+            src._uri,
+            f"{sql} LIMIT 5",
+            sql_kwargs={**self._sql_kwargs, "params": params},
+            engine=self._options.get("engine", "pandas"),
+            compact_dtypes=False,
+        ).read()
+        self._meta = head.iloc[:0]
+        if self._divisions is not None and self._meta.index.dtype.kind == "M":
+            self._divisions = [pd.Timestamp(d) for d in self._divisions]
+        return Schema(
+            datashape=None,
+            dtype=self._meta,
+            shape=(None, len(self._meta.columns)),
+            npartitions=len(self._parts),
+            extra_metadata={},
+        )
+
+    def _get_partition(self, i: int) -> pd.DataFrame:
+        # Discovers the source again if it has been closed.
+        self._load_metadata()
+        meta: pd.DataFrame = self.dtype
+        df = self._shard(i).read()
+        if self._divisions is not None and not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        if len(df) == 0:
+            return meta
+        return df.astype(meta.dtypes.to_dict(), copy=False)
+
+    def to_dask(self) -> Any:
+        """Return a lazy dask dataframe with one partition for each shard."""
+        import dask.dataframe as dd
+        from dask.delayed import delayed
+
+        self._load_metadata()
+        parts = [delayed(self._get_partition)(i) for i in range(len(self._parts))]
+        return dd.from_delayed(  # type: ignore[attr-defined]
+            parts, meta=self._meta, divisions=self._divisions, verify_meta=False
+        )
+
+    def read(self) -> pd.DataFrame:
+        """Read every shard, in parallel, into a single dataframe."""
+        import pandas as pd
+        from dask.base import compute
+        from dask.delayed import delayed
+
+        self._load_metadata()
+        parts = compute(  # type: ignore[no-untyped-call]
+            *(delayed(self._get_partition)(i) for i in range(len(self._parts)))
+        )
+        return pd.concat(parts)
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        """Read the first ``n`` rows, from as few of the shards as needed, in order.
+
+        See :meth:`SQLiteSource.head`.
+        """
+        import pandas as pd
+
+        frames: list[pd.DataFrame] = []
+        found = 0
+        for i in range(len(self._parts)):
+            df = self._shard(i).head(n - found)
+            frames.append(df)
+            found += len(df)
+            if found >= n:
+                break
+        return pd.concat(frames)
+
+    def _sample_shard(
+        self, i: int, n: int | None, frac: float | None, seed: int
+    ) -> pd.DataFrame:
+        return self._shard(i).sample(n, frac, seed)
+
+    def _shard_rows(self, i: int) -> int:
+        """Estimate the number of rows in a shard's table, from its rowids."""
+        rowids = self._shard(i)._rowids()
+        return 0 if rowids is None else rowids[1] - rowids[0] + 1
+
+    def sample(
+        self,
+        n: int | None = None,
+        frac: float | None = None,
+        seed: int | None = None,
+    ) -> pd.DataFrame:
+        """Read rows chosen uniformly at random from all the shards, in parallel.
+
+        A number of rows is divided between the shards at random, in proportion to
+        the number of rows in each of them, and each shard is then sampled without
+        scanning it. See :meth:`SQLiteSource.sample`.
+        """
+        import numpy as np
+        import pandas as pd
+        from dask.base import compute
+        from dask.delayed import delayed
+
+        if (n is None) == (frac is None):
+            raise ValueError("Exactly one of n and frac must be given.")
+        rng = np.random.default_rng(seed)
+        shards = range(len(self._parts))
+        seeds = [int(s) for s in rng.integers(2**32, size=len(shards))]
+        if n is None:
+            counts: list[int | None] = [None] * len(shards)
+        else:
+            rows = compute(  # type: ignore[no-untyped-call]
+                *(delayed(self._shard_rows)(i) for i in shards)
+            )
+            counts = [
+                int(c) for c in rng.multivariate_hypergeometric(rows, min(n, sum(rows)))
+            ]
+        parts = compute(  # type: ignore[no-untyped-call]
+            *(
+                delayed(self._sample_shard)(i, count, frac, shard_seed)
+                for i, count, shard_seed in zip(shards, counts, seeds)
+            )
+        )
+        return pd.concat(parts)
+
+    def _close(self) -> None:
+        self._meta = None
+        self._schema = None
+
+
+class SQLiteSourceSharded(_Instrumented, _Async, _Sharded, _Profiled):
+    """Read the same query from many SQLite databases, one partition per database.
+
+    Datasets published as one database per year or region can be read as a single
+    dataframe. Each shard is fetched and queried by its own partition, so shards are
+    fetched and read in parallel by :meth:`read` and :meth:`to_dask`.
+
+    If ``index_col`` is given in ``sql_kwargs``, the range of the index in each shard
+    is found when the source is discovered, which fetches every shard that isn't
+    skipped. If the ranges don't overlap, the dataframe has known divisions, and each
+    partition is sorted by the index. Ranges given by ``shard_pattern`` or
+    ``shard_metadata`` are used without querying the shard.
+
+    Shards are read without compact dtypes, since the values in each shard might need
+    different ones.
+
+    Args:
+        urlpath: A local path or :mod:`fsspec` readable URL, which may contain glob
+            characters, or a list of them, pointing to SQLite databases. The shards
+            are read in the order given, with the matches of each glob sorted.
+        sql_expr: Query expression, or name of a table, to read from every shard.
+        sql_kwargs: Additional arguments to pass to :func:`pandas.read_sql`.
+        metadata: Arbitrary metadata dictionary associated with the data source.
+        storage_options: Keyword arguments passed to :func:`fsspec.open_local`, and
+            used to expand globs. See :func:`urlpath_to_sqliteurl` for options
+            specific to this package.
+        engine: How to read each shard, as for :class:`SQLiteSource`.
+        columns: Names of the columns to read, as for :class:`SQLiteSource`.
+        filters: Filters selecting the rows to read, as for :class:`SQLiteSource`.
+            Shards that can't contain any matching rows, according to
+            ``shard_pattern`` and ``shard_metadata``, are skipped without being
+            fetched.
+        shard_pattern: A regular expression with named groups, matched against the URL
+            of each shard, which give the single value of a column in that shard,
+            e.g. ``"epacems-(?P<year>[0-9]{4})"``.
+        shard_metadata: Values of columns in each shard, keyed by its URL or file
+            name, either single values or ``[minimum, maximum]`` pairs. See
+            :func:`intake_sqlite.shards.shard_ranges`.
+    """
+
+    name = "sqlite_sharded"
+    version = intake_sqlite.__version__
+    container = "dataframe"
+    partition_access = True
+
+    def __init__(
+        self,
+        urlpath: str | list[str],
+        sql_expr: str,
+        sql_kwargs: dict[str, Any] = {},
+        metadata: dict[str, Any] = {},
+        storage_options: dict[str, Any] = {},
+        engine: str = "pandas",
+        columns: list[str] | None = None,
+        filters: Filters | None = None,
+        shard_pattern: str | None = None,
+        shard_metadata: dict[str, dict[str, Any]] = {},
+    ):
+        """Find the shards, skipping any that can't match the filters."""
+        from intake_sqlite.pushdown import filters_may_match
+        from intake_sqlite.shards import expand_shards, shard_ranges
+
+        if engine not in READ_ENGINES:
+            raise ValueError(f"Expected engine to be one of {READ_ENGINES}: {engine}")
+        normalize_filters(filters)
+        shards = expand_shards(urlpath, storage_options)
+        if not shards:
+            raise ValueError(f"No SQLite databases found matching {urlpath}")
+        ranges = shard_ranges(shards, shard_pattern, shard_metadata)
+        # If no shard can match, one is kept so the result has the right columns.
+        keep = [i for i, r in enumerate(ranges) if filters_may_match(filters, r)] or [0]
+        logger.info(f"Reading {len(keep)} of {len(shards)} shards of {urlpath}")
+        self._shards = [shards[i] for i in keep]
+        self._ranges = [ranges[i] for i in keep]
+        self._parts = list(self._shards)
+        self._sql_expr = sql_expr
+        self._sql_kwargs = sql_kwargs
+        self._options = {
+            "storage_options": storage_options,
+            "engine": engine,
+            "columns": columns,
+            "filters": filters,
+        }
+        self._meta = None
+        self._divisions = None
+        super().__init__(metadata=metadata)
+
+    def _database(self) -> str | None:
+        # Each shard is a separate database, so no single limit applies.
+        return None
+
+
+def _plan_dtypes(
+    uri: str, compact_dtypes: bool | dict[str, Any], sql_kwargs: dict[str, Any]
+) -> bool:
+    """Whether to plan compact dtypes for the columns of a table."""
+    # Planning scans the whole table, which would defeat reading it lazily.
+    return (
+        bool(compact_dtypes)
+        and not sql_kwargs.get("schema")
+        and intake_sqlite.vfs.get_range_file(uri) is None
+    )
+
 
 def urlpath_to_sqliteurl(urlpath: str, storage_options: dict[str, Any] = {}) -> str:
-    """Transform a file path or URL into a local SQLite URL."""
+    """Transform a file path or URL into a local SQLite URL.
+
+    Remote databases are downloaded and cached locally in their entirety by default.
+    If ``storage_options`` contains a ``lazy`` key, the remote database is instead
+    read on demand using HTTP range requests (see :mod:`intake_sqlite.vfs`). Its value
+    may be ``True``, or a dictionary of keyword arguments for
+    :func:`intake_sqlite.vfs.register_remote_db` like ``block_size`` and
+    ``max_blocks``. The returned URL is then only valid within the current process.
+
+    If ``storage_options`` contains a ``cache`` key, the remote database is downloaded
+    into a persistent cache shared by all processes on the host, rather than a
+    temporary per-process cache (see :class:`intake_sqlite.cache.DatabaseCache`). Its
+    value may be ``True``, or a dictionary with any of the keys ``cache_dir``,
+    ``max_bytes`` and ``revalidate``.
+
+    If ``storage_options`` contains a ``parallel`` key, databases that are downloaded
+    are fetched as many byte ranges in parallel, rather than as a single stream (see
+    :func:`intake_sqlite.download.parallel_download`). Its value may be ``True``, or a
+    dictionary with any of the keys ``max_workers``, ``chunk_size`` and ``checksum``.
+
+    Databases are always opened read-only. Copies of remote databases downloaded into
+    a cache are also assumed to be immutable by default, so SQLite skips all locking,
+    while local databases are checked for changes made by other processes. Either
+    default can be overridden with the ``immutable`` key in ``storage_options``. The
+    ``pragmas`` key may contain a dictionary of PRAGMAs that override
+    :data:`intake_sqlite.dialect.DEFAULT_PRAGMAS`, which are applied to every
+    connection. See :func:`intake_sqlite.dialect.sqlite_url`.
+
+    Databases compressed with gzip, bzip2, xz or zstd, with names like
+    ``pudl.sqlite.gz``, or inside a zip archive, are decompressed into the cache as
+    they're downloaded, with the same options. A member of a zip archive holding more
+    than one file may be chosen with a URL like ``zip://pudl.sqlite::<url>``. Only
+    files in the seekable zstd format can be read lazily, a frame at a time. See
+    :mod:`intake_sqlite.archive`.
+
+    SQLite URLs that have already been transformed, e.g. by a catalog, are returned
+    unchanged, and ``storage_options`` is ignored.
+    """
+    with span("resolve", urlpath=urlpath):
+        return _urlpath_to_sqliteurl(urlpath, storage_options)
+
+
+def _check_urlpath(
+    urlpath: str,
+) -> tuple[ParseResult, intake_sqlite.archive.Archive | None]:
+    """Check that a file path or URL looks like a SQLite database.
+
+    Returns:
+        The parsed URL of the file, which is the archive holding the database if it's
+        compressed, and the archive.
+    """
     parsed = urlparse(urlpath)
+    archive = intake_sqlite.archive.parse_archive(urlpath)
+    if archive is not None:
+        parsed = urlparse(archive.urlpath)
     p = Path(parsed.path)
-    if p.suffix not in SQLITE_SUFFIXES:
+    name = p.name if archive is None else archive.name
+    # The name of a database that's the only member of a zip archive isn't known.
+    if name is not None and Path(name).suffix not in SQLITE_SUFFIXES:
         raise ValueError(
-            f"Expected a SQLite file path ending in one of: {SQLITE_SUFFIXES} "
-            f"but got: {p.name}"
+            f"Expected a SQLite file path ending in one of: {SQLITE_SUFFIXES}, "
+            f"which may be followed by a compression suffix, but got: {name}"
         )
     if parsed.scheme != "" and parsed.scheme not in fsspec.available_protocols():
         raise ValueError(f"URL protocol {parsed.scheme} is not supported by fsspec.")
     if parsed.scheme == "" and not p.is_file():
         raise ValueError(f"Local path {p} is not a file!")
+    return parsed, archive
+
+
+def _urlpath_to_sqliteurl(urlpath: str, storage_options: dict[str, Any]) -> str:
+    """Transform a file path or URL into a local SQLite URL."""
+    if urlparse(urlpath).scheme.startswith("sqlite"):
+        return urlpath
+    parsed, archive = _check_urlpath(urlpath)
+    p = Path(parsed.path)
+    storage_options = dict(storage_options)
+    lazy = storage_options.pop("lazy", False)
+    cache = storage_options.pop("cache", False)
+    parallel = storage_options.pop("parallel", None)
+    immutable = storage_options.pop("immutable", None)
+    pragmas = storage_options.pop("pragmas", None)
+    if parallel is not None and not isinstance(parallel, dict):
+        parallel = {} if parallel else None
     # At this point we know that EITHER:
     # * urlpath is a URL supported by fsspec that looks like an SQLite file OR
     # * p is a local file that looks like an SQLite file
-    if parsed.scheme == "":
-        # Absolute path to the local SQLite DB:
+    # either of which may be compressed.
+    if parsed.scheme == "" and archive is None:
+        # Absolute path to the local SQLite DB, which may be changed by others:
         local_db_path = p.resolve()
+        if immutable is None:
+            immutable = False
+    elif lazy:
+        # Pages of the remote SQLite DB will be fetched as they're needed:
+        return intake_sqlite.vfs.register_remote_db(
+            urlpath,
+            storage_options=storage_options,
+            pragmas=pragmas,
+            **(lazy if isinstance(lazy, dict) else {}),
+        )
+    elif cache:
+        # Absolute path to the persistently cached SQLite DB:
+        cache_options = dict(cache) if isinstance(cache, dict) else {}
+        revalidate = cache_options.pop("revalidate", False)
+        local_db_path = intake_sqlite.cache.DatabaseCache(**cache_options).get(
+            urlpath,
+            storage_options=storage_options,
+            revalidate=revalidate,
+            parallel=parallel,
+        )
+    elif archive is not None:
+        # Absolute path to the locally cached SQLite DB, decompressed as it arrives:
+        local_db_path = Path(
+            intake_sqlite.archive.open_local(
+                urlpath, storage_options=storage_options, parallel=parallel
+            )
+        )
+    elif parallel is not None:
+        # Absolute path to the locally cached SQLite DB, downloaded in parallel:
+        local_db_path = Path(
+            intake_sqlite.download.parallel_open_local(
+                urlpath, storage_options=storage_options, **parallel
+            )
+        )
     else:
         # Absolute path to the locally cached SQLite DB:
-        local_db_path = fsspec.open_local("simplecache::" + urlpath, **storage_options)
-    return f"sqlite:///{local_db_path}"
+        with span("download", urlpath=urlpath) as attributes:
+            started = time.time()
+            local_db_path = Path(
+                fsspec.open_local("simplecache::" + urlpath, **storage_options)
+            )
+            # Databases that were already in the cache weren't downloaded again.
+            stat = local_db_path.stat()
+            attributes["bytes"] = stat.st_size if stat.st_mtime >= started else 0
+    # Nothing else writes to the copies this package downloads into a cache:
+    return intake_sqlite.dialect.sqlite_url(
+        local_db_path, immutable=immutable is not False, pragmas=pragmas
+    )
@@ -0,0 +1,412 @@
+"""Profile the columns of a table in SQL, without reading it into a dataframe.
+
+Describing a table with :meth:`pandas.DataFrame.describe` means reading all of it into
+memory first. Instead, the number of values, nulls, the minimum, maximum and mean of
+every column are computed by SQLite in a single aggregate query. The number of
+distinct values is estimated in the same pass with a HyperLogLog sketch, registered
+as an aggregate function on the connection. Its values are hashed in batches with
+NumPy, so its memory use doesn't depend on the number of rows or distinct values.
+
+Sources with several partitions or shards run one such query for each of them, and
+the results are merged: counts are added, extremes compared, means weighted, and the
+distinct value sketches combined, so values found in several partitions are only
+counted once.
+
+Profiles are stored in a directory of JSON files, keyed by fingerprints of the
+databases and the queries profiled, so profiling an unchanged table again doesn't
+query it at all. The row counts recorded in ``sqlite_stat1`` by ``ANALYZE`` can also
+be looked up, which takes a single query however large the tables are.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from pandas.util import hash_array
+
+from intake_sqlite.cache import _write_json_atomic, default_cache_dir
+from intake_sqlite.partition import quote_identifier
+from intake_sqlite.results import fingerprint, normalize_sql
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "PROFILE_STATS",
+    "ColumnProfile",
+    "DistinctSketch",
+    "ProfileCache",
+    "estimated_rows",
+    "merge_profiles",
+    "profile_frame",
+    "profile_query",
+]
+
+PROFILE_STATS = ("count", "nulls", "distinct", "mean", "min", "max")
+"""The statistics computed for each column, in the order they're shown."""
+
+SKETCH_BITS = 12
+"""Bits of each hash used to choose a register, giving 4096 registers and an error
+of about 1.6% in distinct counts."""
+
+_REGISTERS = 1 << SKETCH_BITS
+_SKETCH_FUNCTION = "intake_sqlite_distinct"
+_NUMERIC = "typeof({0}) IN ('integer', 'real')"
+_BATCH = 1 << 16
+"""Number of values a sketch collects before hashing them all at once."""
+
+
+_BLOB_KEY = "intake_sqlite_bl"
+"""Key with which blobs are hashed, so they differ from text with the same bytes."""
+
+_REAL_SALT = np.uint64(0x9E3779B97F4A7C15)
+"""Mixed into the hashes of reals, so they differ from integers with the same bits."""
+
+
+def _hash_values(values: list[Any]) -> npt.NDArray[np.uint64]:
+    """Hash values from a column to 64 bits, the same way in every process.
+
+    Values are hashed according to their SQLite storage class, which they have
+    whatever else is in the batch, so text that looks like a number stays text.
+    Integers and reals with the same value, like 1 and 1.0, are the same value in
+    SQLite, so they get the same hash.
+    """
+    by_type: dict[type, list[Any]] = {int: [], float: [], str: [], bytes: []}
+    for value in values:
+        by_type.get(type(value), by_type[str]).append(value)
+    reals = np.array(by_type[float], dtype=np.float64)
+    whole = (reals == np.floor(reals)) & (np.abs(reals) < 2.0**63)
+    integers = np.concatenate(
+        [np.array(by_type[int], dtype=np.int64), reals[whole].astype(np.int64)]
+    )
+    hashes: npt.NDArray[np.uint64] = np.concatenate(
+        [
+            hash_array(integers, categorize=False),
+            hash_array(reals[~whole], categorize=False) ^ _REAL_SALT,
+            hash_array(np.array(by_type[str], dtype=object), categorize=False),
+            hash_array(
+                np.array(by_type[bytes], dtype=object),
+                hash_key=_BLOB_KEY,
+                categorize=False,
+            ),
+        ]
+    )
+    return hashes
+
+
+class DistinctSketch:
+    """A HyperLogLog sketch of the distinct values of a column.
+
+    Used as a SQLite aggregate function, whose result is the registers of the sketch,
+    so that sketches of several queries can be merged with :meth:`merge`. Values are
+    collected in batches, which are hashed and added to the registers with NumPy,
+    rather than one at a time in Python.
+    """
+
+    def __init__(self, registers: bytes | None = None):
+        """Create an empty sketch, or restore one from its registers."""
+        self.registers = np.zeros(_REGISTERS, dtype=np.uint8)
+        if registers is not None:
+            self.registers[:] = np.frombuffer(registers, dtype=np.uint8)
+        self._values: list[Any] = []
+
+    def step(self, value: Any) -> None:
+        """Add a value to the sketch. Nulls are ignored."""
+        if value is not None:
+            self._values.append(value)
+            if len(self._values) >= _BATCH:
+                self._flush()
+
+    def _flush(self) -> None:
+        """Add the values collected so far to the registers."""
+        if not self._values:
+            return
+        hashes = _hash_values(self._values)
+        self._values = []
+        registers = hashes >> np.uint64(64 - SKETCH_BITS)
+        rest = hashes << np.uint64(SKETCH_BITS)
+        # The position of the first 1 bit in the rest of each hash.
+        _, bits = np.frexp(rest.astype(np.float64))
+        ranks = np.minimum(65 - bits, 64 - SKETCH_BITS + 1).astype(np.uint8)
+        np.maximum.at(self.registers, registers.astype(np.intp), ranks)
+
+    def finalize(self) -> bytes:
+        """The registers of the sketch."""
+        self._flush()
+        return self.registers.tobytes()
+
+    def merge(self, other: DistinctSketch) -> None:
+        """Add the values seen by another sketch to this one."""
+        self._flush()
+        other._flush()
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        """Estimate the number of distinct values added to the sketch."""
+        self._flush()
+        m = _REGISTERS
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.exp2(-self.registers.astype(float))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small numbers of values.
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+
+def _order(value: Any) -> tuple[int, Any]:
+    """Sort values of different types as SQLite does: numbers, then text, then blobs."""
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    return (2, value)
+
+
+class ColumnProfile:
+    """Statistics of the values of one column, which can be merged with others.
+
+    Attributes:
+        count: The number of values that aren't null.
+        nulls: The number of null values.
+        minimum: The smallest value, in SQLite's ordering of values of different types.
+        maximum: The largest value.
+        total: The sum of the numeric values.
+        numbers: The number of numeric values.
+        sketch: The sketch of the distinct values, if they're counted.
+    """
+
+    __slots__ = ("count", "nulls", "minimum", "maximum", "total", "numbers", "sketch")
+
+    def __init__(
+        self,
+        count: int,
+        nulls: int,
+        minimum: Any,
+        maximum: Any,
+        total: float,
+        numbers: int,
+        sketch: DistinctSketch | None,
+    ):
+        """Record the statistics of a column."""
+        self.count = count
+        self.nulls = nulls
+        self.minimum = minimum
+        self.maximum = maximum
+        self.total = total
+        self.numbers = numbers
+        self.sketch = sketch
+
+    def merge(self, other: ColumnProfile) -> None:
+        """Add the statistics of other rows of the same column."""
+        self.count += other.count
+        self.nulls += other.nulls
+        if other.minimum is not None and (
+            self.minimum is None or _order(other.minimum) < _order(self.minimum)
+        ):
+            self.minimum = other.minimum
+        if other.maximum is not None and (
+            self.maximum is None or _order(other.maximum) > _order(self.maximum)
+        ):
+            self.maximum = other.maximum
+        self.total += other.total
+        self.numbers += other.numbers
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+
+    def stats(self) -> dict[str, Any]:
+        """The statistics shown for the column, in :data:`PROFILE_STATS`."""
+        distinct = None
+        if self.sketch is not None:
+            distinct = min(self.sketch.estimate(), self.count)
+        return {
+            "count": self.count,
+            "nulls": self.nulls,
+            "distinct": distinct,
+            "mean": self.total / self.numbers if self.numbers else None,
+            "min": self.minimum,
+            "max": self.maximum,
+        }
+
+
+def profile_query(
+    con: sqlite3.Connection,
+    sql: str,
+    params: Sequence[Any] | dict[str, Any] = (),
+    distinct: bool = True,
+) -> dict[str, ColumnProfile]:
+    """Profile every column of a query's results in a single aggregate query.
+
+    Args:
+        con: Connection to the database.
+        sql: A ``SELECT`` statement.
+        params: Parameters to bind to the statement.
+        distinct: Whether to estimate the number of distinct values in each column,
+            which passes every value through Python, so takes longer.
+
+    Returns:
+        The profile of each column, in the order they're selected.
+    """
+    cursor = con.execute(f"SELECT * FROM ({sql}) LIMIT 0", params)  # nosec: B608
+    names = [d[0] for d in cursor.description]
+    if distinct:
+        con.create_aggregate(_SKETCH_FUNCTION, 1, DistinctSketch)  # type: ignore
+    aggregates = []
+    for name in names:
+        q = quote_identifier(name)
+        numeric = f"CASE WHEN {_NUMERIC.format(q)} THEN {q} END"
+        aggregates += [
+            f"count({q})",
+            f"min({q})",
+            f"max({q})",
+            f"total({numeric})",
+            f"count({numeric})",
+            f"{_SKETCH_FUNCTION}({q})" if distinct else "NULL",
+        ]
+    row = con.execute(
+        f"SELECT count(*), {', '.join(aggregates)} FROM ({sql})",  # nosec: B608
+        params,
+    ).fetchone()
+    nrows, values = row[0], row[1:]
+    profiles = {}
+    for i, name in enumerate(names):
+        count, minimum, maximum, total, numbers, sketch = values[6 * i : 6 * i + 6]
+        profiles[name] = ColumnProfile(
+            count,
+            nrows - count,
+            minimum,
+            maximum,
+            total,
+            numbers,
+            None if sketch is None else DistinctSketch(sketch),
+        )
+    return profiles
+
+
+def merge_profiles(
+    profiles: Sequence[dict[str, ColumnProfile]]
+) -> dict[str, ColumnProfile]:
+    """Merge the profiles of several queries selecting the same columns."""
+    merged: dict[str, ColumnProfile] = {}
+    for profile in profiles:
+        for name, column in profile.items():
+            if name in merged:
+                merged[name].merge(column)
+            else:
+                merged[name] = column
+    return merged
+
+
+def profile_frame(profile: dict[str, ColumnProfile]) -> pd.DataFrame:
+    """Show a profile like :meth:`pandas.DataFrame.describe`, one column per column."""
+    return _frame({name: column.stats() for name, column in profile.items()})
+
+
+def _frame(stats: dict[str, dict[str, Any]]) -> pd.DataFrame:
+    """Keep each statistic as it is, rather than converting columns to floats."""
+    return pd.DataFrame(
+        {
+            name: pd.Series(
+                [column[stat] for stat in PROFILE_STATS], PROFILE_STATS, dtype=object
+            )
+            for name, column in stats.items()
+        }
+    )
+
+
+def estimated_rows(con: sqlite3.Connection) -> dict[str, int]:
+    """The number of rows in each table, as recorded by the last ``ANALYZE``.
+
+    Returns:
+        The estimated number of rows of each table with statistics. Empty if the
+        database has never been analyzed.
+    """
+    try:
+        rows = con.execute("SELECT tbl, stat FROM sqlite_stat1").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    # The first number of each entry is the number of rows in the table or index.
+    return {table: int(str(stat).split()[0]) for table, stat in rows}
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return {"base64": base64.b64encode(value).decode()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return base64.b64decode(value["base64"])
+    return value
+
+
+class ProfileCache:
+    """A directory of JSON files holding the profiles of queries.
+
+    Args:
+        cache_dir: Directory in which to store the profiles. Defaults to a
+            ``profiles`` subdirectory of :func:`intake_sqlite.cache.default_cache_dir`.
+    """
+
+    def __init__(self, cache_dir: str | Path | None = None):
+        """Create the cache directory if it doesn't exist yet."""
+        self.cache_dir = Path(
+            cache_dir or default_cache_dir() / "profiles"
+        ).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, queries: Sequence[tuple[Path, str, Any]], distinct: bool) -> str:
+        """Derive the key under which the profile of some queries is stored.
+
+        Args:
+            queries: The database file each query reads from, the query, and its
+                parameters.
+            distinct: Whether distinct values were counted.
+        """
+        parts = [
+            [fingerprint(db_path), normalize_sql(sql), params]
+            for db_path, sql, params in queries
+        ]
+        key = json.dumps([parts, distinct], sort_keys=True, default=repr)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def load(self, key: str) -> pd.DataFrame | None:
+        """Read a stored profile, if there is one."""
+        try:
+            with self._path(key).open() as f:
+                stats: dict[str, dict[str, Any]] = json.load(f)
+        except (OSError, ValueError):
+            return None
+        logger.debug(f"Using cached profile {key}")
+        return _frame(
+            {
+                name: {stat: _decode_value(value) for stat, value in column.items()}
+                for name, column in stats.items()
+            }
+        )
+
+    def save(self, key: str, profile: pd.DataFrame) -> None:
+        """Store a profile."""
+        stats = {
+            str(name): {
+                str(stat): _encode_value(value) for stat, value in column.items()
+            }
+            for name, column in profile.to_dict().items()
+        }
+        try:
+            _write_json_atomic(self._path(key), stats)
+        except OSError:
+            logger.warning(f"Unable to cache the profile {key}")
@@ -0,0 +1,628 @@
+"""Serve remote SQLite database pages on demand using HTTP range requests.
+
+Rather than downloading an entire remote database before running a query, this
+module registers a read-only SQLite VFS (virtual file system) with the SQLite library
+used by Python's :mod:`sqlite3` module. The VFS translates every page read that SQLite
+makes into a byte-range read on the remote file, via :mod:`fsspec`, and keeps recently
+used blocks in a bounded in-memory cache.
+
+Because the VFS lives inside the same SQLite library that SQLAlchemy, :mod:`pandas`
+and :mod:`dask` use, the SQLite URL returned by :func:`register_remote_db` can be
+used anywhere a local database URL can, as long as it's used within the same
+process that registered it.
+"""
+from __future__ import annotations
+
+import ctypes
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import PurePosixPath
+from typing import Any, Callable, Union
+from urllib.parse import urlparse
+
+import fsspec
+
+import intake_sqlite.archive
+import intake_sqlite.dialect
+from intake_sqlite.instrument import span
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "RangeFile",
+    "SeekableZstdFile",
+    "get_range_file",
+    "register_remote_db",
+]
+
+VFS_NAME = "intake_sqlite_range"
+"""Name under which the range-request VFS is registered with SQLite."""
+
+DEFAULT_BLOCK_SIZE = 2**16
+"""Number of bytes fetched by each range request (64 KiB)."""
+
+DEFAULT_MAX_BLOCKS = 256
+"""Number of blocks kept in memory for each remote database (16 MiB by default)."""
+
+# SQLite result codes and flags used by the VFS. See https://www.sqlite.org/c3ref/
+SQLITE_OK = 0
+SQLITE_IOERR = 10
+SQLITE_NOTFOUND = 12
+SQLITE_CANTOPEN = 14
+SQLITE_IOERR_SHORT_READ = SQLITE_IOERR | (2 << 8)
+SQLITE_OPEN_READONLY = 0x00000001
+SQLITE_OPEN_MAIN_DB = 0x00000100
+SQLITE_IOCAP_IMMUTABLE = 0x00002000
+SQLITE_IOCAP_SAFE_APPEND = 0x00000200
+SQLITE_IOCAP_SEQUENTIAL = 0x00000400
+
+
+class RangeFile:
+    """A read-only, block-cached view of a remote file fetched with range requests.
+
+    Reads are rounded out to whole blocks of ``block_size`` bytes, and contiguous runs
+    of missing blocks are retrieved in a single request. The least recently used
+    blocks are discarded once more than ``max_blocks`` are held in memory.
+
+    Args:
+        urlpath: An :mod:`fsspec` readable URL pointing to the remote file.
+        storage_options: Keyword arguments used to instantiate the filesystem.
+        block_size: Number of bytes fetched in each block.
+        max_blocks: Maximum number of blocks to keep in memory.
+    """
+
+    def __init__(
+        self,
+        urlpath: str,
+        storage_options: dict[str, Any] = {},
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_blocks: int = DEFAULT_MAX_BLOCKS,
+    ):
+        """Look up the size of the remote file, but don't read any of it yet."""
+        if block_size <= 0 or max_blocks <= 0:
+            raise ValueError("block_size and max_blocks must both be positive.")
+        self.urlpath = urlpath
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.fs, self.path = fsspec.core.url_to_fs(urlpath, **storage_options)
+        self.remote_size: int = self.fs.size(self.path)
+        self.size = self.remote_size
+        self.bytes_fetched = 0
+        self.requests = 0
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Read up to ``length`` bytes starting at ``offset``.
+
+        Fewer than ``length`` bytes are returned only when the read extends past the
+        end of the file.
+        """
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return b""
+        first = self._block_of(offset)
+        last = self._block_of(end - 1)
+        with self._lock:
+            self._fetch_missing(first, last)
+            data = b"".join(self._blocks[i] for i in range(first, last + 1))
+            for i in range(first, last + 1):
+                self._blocks.move_to_end(i)
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        start = offset - self._block_start(first)
+        return data[start : start + end - offset]
+
+    def _block_of(self, offset: int) -> int:
+        """The index of the block containing ``offset``."""
+        return offset // self.block_size
+
+    def _block_start(self, i: int) -> int:
+        """The offset at which block ``i`` starts."""
+        return i * self.block_size
+
+    def _fetch_missing(self, first: int, last: int) -> None:
+        """Fetch any blocks in the inclusive range that aren't already cached."""
+        run_start = None
+        for i in range(first, last + 2):
+            missing = i <= last and i not in self._blocks
+            if missing and run_start is None:
+                run_start = i
+            elif not missing and run_start is not None:
+                self._fetch_blocks(run_start, i - 1)
+                run_start = None
+
+    def _fetch_blocks(self, first: int, last: int) -> None:
+        """Fetch a contiguous run of blocks with a single range request."""
+        start = first * self.block_size
+        end = min((last + 1) * self.block_size, self.size)
+        data = self._read_range(start, end)
+        for i in range(first, last + 1):
+            offset = (i - first) * self.block_size
+            self._blocks[i] = data[offset : offset + self.block_size]
+
+    def _read_range(self, start: int, end: int) -> bytes:
+        """Fetch a byte range of the remote file with a single request."""
+        with span("fetch", urlpath=self.urlpath, bytes=end - start):
+            data: bytes = self.fs.cat_file(self.path, start=start, end=end)
+        self.requests += 1
+        self.bytes_fetched += len(data)
+        if len(data) == self.remote_size and end - start != self.remote_size:
+            # The server ignored our Range header and sent the whole file.
+            data = data[start:end]
+        if len(data) != end - start:
+            raise OSError(
+                f"Expected {end - start} bytes from {self.urlpath} at offset {start} "
+                f"but got {len(data)}."
+            )
+        return data
+
+    def stats(self) -> dict[str, int]:
+        """Report how much data has been retrieved from the remote file so far."""
+        return {
+            "size": self.size,
+            "bytes_fetched": self.bytes_fetched,
+            "requests": self.requests,
+            "blocks_cached": len(self._blocks),
+        }
+
+
+class SeekableZstdFile(RangeFile):
+    """A read-only view of the decompressed contents of a remote seekable zstd file.
+
+    Each block is one frame of the file. Runs of missing frames are fetched with a
+    single range request and decompressed, so only the frames holding the pages
+    SQLite reads are ever fetched. See :mod:`intake_sqlite.archive`.
+
+    Args:
+        urlpath: An :mod:`fsspec` readable URL pointing to the compressed file.
+        storage_options: Keyword arguments used to instantiate the filesystem.
+        block_size: Unused, since the frames of the file are its blocks.
+        max_blocks: Maximum number of decompressed frames to keep in memory.
+
+    Raises:
+        ValueError: If the file doesn't end with a seek table.
+    """
+
+    def __init__(
+        self,
+        urlpath: str,
+        storage_options: dict[str, Any] = {},
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_blocks: int = DEFAULT_MAX_BLOCKS,
+    ):
+        """Read the seek table of the remote file, but none of its frames yet."""
+        super().__init__(urlpath, storage_options, block_size, max_blocks)
+        table = intake_sqlite.archive.read_seek_table(
+            self.fs, self.path, self.remote_size
+        )
+        if table is None:
+            raise ValueError(
+                f"{urlpath} isn't in the seekable zstd format, so it can't be read on "
+                "demand. It has to be downloaded instead."
+            )
+        self.table = table
+        self.size = table.size
+
+    def _block_of(self, offset: int) -> int:
+        return self.table.frame_of(offset)
+
+    def _block_start(self, i: int) -> int:
+        return self.table.offsets[i]
+
+    def _fetch_blocks(self, first: int, last: int) -> None:
+        """Fetch a contiguous run of frames with a single range request."""
+        offsets = self.table.compressed_offsets
+        data = self._read_range(offsets[first], offsets[last + 1])
+        for i, frame in enumerate(self.table.decompress(first, last, data), first):
+            self._blocks[i] = frame
+
+
+class _MemoryFile:
+    """In-memory stand-in for the temporary files SQLite creates while querying."""
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def read(self, offset: int, length: int) -> bytes:
+        return bytes(self.data[offset : offset + length])
+
+    def write(self, offset: int, data: bytes) -> None:
+        if offset > len(self.data):
+            self.data.extend(b"\x00" * (offset - len(self.data)))
+        self.data[offset : offset + len(data)] = data
+
+    def truncate(self, size: int) -> None:
+        del self.data[size:]
+
+
+_Handle = Union[RangeFile, _MemoryFile]
+
+# Remote databases registered with the VFS, keyed by their VFS path, and the files
+# SQLite currently has open, keyed by an integer ID stored in each sqlite3_file.
+_remote_dbs: dict[str, RangeFile] = {}
+_open_files: dict[int, _Handle] = {}
+_next_file_id = 0
+_registry_lock = threading.Lock()
+
+
+def _vfs_path(urlpath: str) -> str:
+    """Construct a stable, URI-safe VFS path for a remote database URL."""
+    digest = hashlib.sha256(urlpath.encode()).hexdigest()[:16]
+    name = re.sub(r"[^\w.-]", "_", PurePosixPath(urlparse(urlpath).path).name)
+    return f"/{VFS_NAME}/{digest}/{name}"
+
+
+def register_remote_db(
+    urlpath: str,
+    storage_options: dict[str, Any] = {},
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    max_blocks: int = DEFAULT_MAX_BLOCKS,
+    pragmas: dict[str, Any] | None = None,
+) -> str:
+    """Make a remote database readable on demand, and return its SQLite URL.
+
+    Registering the same ``urlpath`` more than once returns the same URL and shares
+    a single block cache. A database compressed in the seekable zstd format, with a
+    ``.zst`` suffix, is decompressed a frame at a time as its pages are read.
+
+    Args:
+        urlpath: An :mod:`fsspec` readable URL pointing to a SQLite database.
+        storage_options: Keyword arguments used to instantiate the filesystem.
+        block_size: Number of bytes fetched by each range request.
+        max_blocks: Maximum number of blocks to keep in memory.
+        pragmas: PRAGMAs to apply to each connection. See
+            :func:`intake_sqlite.dialect.sqlite_url`.
+
+    Returns:
+        A read-only SQLAlchemy URL for the remote database, which is only valid
+        within the current process.
+    """
+    _ensure_registered()
+    path = _vfs_path(urlpath)
+    with _registry_lock:
+        if path not in _remote_dbs:
+            archive = intake_sqlite.archive.parse_archive(urlpath)
+            if archive is not None and archive.compression != "zstd":
+                raise ValueError(
+                    f"{urlpath} is compressed with {archive.compression}, so it can't "
+                    "be read on demand. Only seekable zstd files can be."
+                )
+            range_file = RangeFile if archive is None else SeekableZstdFile
+            _remote_dbs[path] = range_file(
+                urlpath,
+                storage_options=storage_options,
+                block_size=block_size,
+                max_blocks=max_blocks,
+            )
+    return intake_sqlite.dialect.sqlite_url(
+        f"file:{path}", immutable=True, pragmas=pragmas, vfs=VFS_NAME
+    )
+
+
+def get_range_file(sqlite_url: str) -> RangeFile | None:
+    """Look up the :class:`RangeFile` serving a URL from :func:`register_remote_db`.
+
+    This can be used to see how many bytes have been fetched for a remote database.
+    Returns None if the URL doesn't refer to a registered remote database.
+    """
+    path = sqlite_url.split("file:", 1)[-1].split("?", 1)[0]
+    return _remote_dbs.get(path)
+
+
+###############################################################################
+# ctypes declarations of the SQLite VFS structures.
+# See https://www.sqlite.org/c3ref/vfs.html and https://www.sqlite.org/c3ref/io_methods.html
+###############################################################################
+class _SQLiteFile(ctypes.Structure):
+    pass
+
+
+class _SQLiteIOMethods(ctypes.Structure):
+    pass
+
+
+class _SQLiteVFS(ctypes.Structure):
+    pass
+
+
+_FileP = ctypes.POINTER(_SQLiteFile)
+_VFSP = ctypes.POINTER(_SQLiteVFS)
+_Int64P = ctypes.POINTER(ctypes.c_int64)
+_IntP = ctypes.POINTER(ctypes.c_int)
+
+_SQLiteFile._fields_ = [
+    ("pMethods", ctypes.POINTER(_SQLiteIOMethods)),
+    ("file_id", ctypes.c_int64),
+]
+
+_xClose = ctypes.CFUNCTYPE(ctypes.c_int, _FileP)
+_xRead = ctypes.CFUNCTYPE(
+    ctypes.c_int, _FileP, ctypes.c_void_p, ctypes.c_int, ctypes.c_int64
+)
+_xWrite = ctypes.CFUNCTYPE(
+    ctypes.c_int, _FileP, ctypes.c_void_p, ctypes.c_int, ctypes.c_int64
+)
+_xTruncate = ctypes.CFUNCTYPE(ctypes.c_int, _FileP, ctypes.c_int64)
+_xSync = ctypes.CFUNCTYPE(ctypes.c_int, _FileP, ctypes.c_int)
+_xFileSize = ctypes.CFUNCTYPE(ctypes.c_int, _FileP, _Int64P)
+_xLock = ctypes.CFUNCTYPE(ctypes.c_int, _FileP, ctypes.c_int)
+_xCheckReservedLock = ctypes.CFUNCTYPE(ctypes.c_int, _FileP, _IntP)
+_xFileControl = ctypes.CFUNCTYPE(ctypes.c_int, _FileP, ctypes.c_int, ctypes.c_void_p)
+_xSectorSize = ctypes.CFUNCTYPE(ctypes.c_int, _FileP)
+
+_SQLiteIOMethods._fields_ = [
+    ("iVersion", ctypes.c_int),
+    ("xClose", _xClose),
+    ("xRead", _xRead),
+    ("xWrite", _xWrite),
+    ("xTruncate", _xTruncate),
+    ("xSync", _xSync),
+    ("xFileSize", _xFileSize),
+    ("xLock", _xLock),
+    ("xUnlock", _xLock),
+    ("xCheckReservedLock", _xCheckReservedLock),
+    ("xFileControl", _xFileControl),
+    ("xSectorSize", _xSectorSize),
+    ("xDeviceCharacteristics", _xSectorSize),
+]
+
+_xOpen = ctypes.CFUNCTYPE(
+    ctypes.c_int, _VFSP, ctypes.c_char_p, _FileP, ctypes.c_int, _IntP
+)
+_xDelete = ctypes.CFUNCTYPE(ctypes.c_int, _VFSP, ctypes.c_char_p, ctypes.c_int)
+_xAccess = ctypes.CFUNCTYPE(ctypes.c_int, _VFSP, ctypes.c_char_p, ctypes.c_int, _IntP)
+_xFullPathname = ctypes.CFUNCTYPE(
+    ctypes.c_int, _VFSP, ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p
+)
+_xRandomness = ctypes.CFUNCTYPE(ctypes.c_int, _VFSP, ctypes.c_int, ctypes.c_void_p)
+_xSleep = ctypes.CFUNCTYPE(ctypes.c_int, _VFSP, ctypes.c_int)
+_xCurrentTime = ctypes.CFUNCTYPE(ctypes.c_int, _VFSP, ctypes.POINTER(ctypes.c_double))
+
+_SQLiteVFS._fields_ = [
+    ("iVersion", ctypes.c_int),
+    ("szOsFile", ctypes.c_int),
+    ("mxPathname", ctypes.c_int),
+    ("pNext", _VFSP),
+    ("zName", ctypes.c_char_p),
+    ("pAppData", ctypes.c_void_p),
+    ("xOpen", _xOpen),
+    ("xDelete", _xDelete),
+    ("xAccess", _xAccess),
+    ("xFullPathname", _xFullPathname),
+    # Dynamic extension loading is delegated to the default VFS.
+    ("xDlOpen", ctypes.c_void_p),
+    ("xDlError", ctypes.c_void_p),
+    ("xDlSym", ctypes.c_void_p),
+    ("xDlClose", ctypes.c_void_p),
+    ("xRandomness", _xRandomness),
+    ("xSleep", _xSleep),
+    ("xCurrentTime", _xCurrentTime),
+    ("xGetLastError", _xRandomness),
+]
+
+
+def _guard(default: int) -> Callable[[Callable[..., int]], Callable[..., int]]:
+    """Keep Python exceptions from propagating into SQLite's C code."""
+
+    def decorator(func: Callable[..., int]) -> Callable[..., int]:
+        def wrapper(*args: Any) -> int:
+            try:
+                return func(*args)
+            except Exception:
+                logger.exception(f"Error in SQLite VFS callback {func.__name__}")
+                return default
+
+        wrapper.__name__ = func.__name__
+        return wrapper
+
+    return decorator
+
+
+@_guard(SQLITE_IOERR)
+def _close(pfile: Any) -> int:
+    with _registry_lock:
+        _open_files.pop(pfile.contents.file_id, None)
+    return SQLITE_OK
+
+
+@_guard(SQLITE_IOERR)
+def _read(pfile: Any, buf: int, amount: int, offset: int) -> int:
+    data = _open_files[pfile.contents.file_id].read(offset, amount)
+    ctypes.memmove(buf, data, len(data))
+    if len(data) < amount:
+        ctypes.memset(buf + len(data), 0, amount - len(data))
+        return SQLITE_IOERR_SHORT_READ
+    return SQLITE_OK
+
+
+@_guard(SQLITE_IOERR)
+def _write(pfile: Any, buf: int, amount: int, offset: int) -> int:
+    handle = _open_files[pfile.contents.file_id]
+    if not isinstance(handle, _MemoryFile):
+        return SQLITE_IOERR
+    handle.write(offset, ctypes.string_at(buf, amount))
+    return SQLITE_OK
+
+
+@_guard(SQLITE_IOERR)
+def _truncate(pfile: Any, size: int) -> int:
+    handle = _open_files[pfile.contents.file_id]
+    if not isinstance(handle, _MemoryFile):
+        return SQLITE_IOERR
+    handle.truncate(size)
+    return SQLITE_OK
+
+
+def _sync(pfile: Any, flags: int) -> int:
+    return SQLITE_OK
+
+
+@_guard(SQLITE_IOERR)
+def _file_size(pfile: Any, psize: Any) -> int:
+    psize[0] = _open_files[pfile.contents.file_id].size
+    return SQLITE_OK
+
+
+def _lock(pfile: Any, level: int) -> int:
+    return SQLITE_OK
+
+
+def _check_reserved_lock(pfile: Any, pres: Any) -> int:
+    pres[0] = 0
+    return SQLITE_OK
+
+
+def _file_control(pfile: Any, op: int, parg: int) -> int:
+    return SQLITE_NOTFOUND
+
+
+def _sector_size(pfile: Any) -> int:
+    return 0
+
+
+@_guard(0)
+def _device_characteristics(pfile: Any) -> int:
+    if isinstance(_open_files.get(pfile.contents.file_id), RangeFile):
+        return SQLITE_IOCAP_IMMUTABLE
+    return SQLITE_IOCAP_SAFE_APPEND | SQLITE_IOCAP_SEQUENTIAL
+
+
+@_guard(SQLITE_CANTOPEN)
+def _open(pvfs: Any, zname: bytes | None, pfile: Any, flags: int, pout: Any) -> int:
+    global _next_file_id
+    handle: _Handle
+    if flags & SQLITE_OPEN_MAIN_DB:
+        remote = _remote_dbs.get((zname or b"").decode())
+        if remote is None:
+            return SQLITE_CANTOPEN
+        handle = remote
+    else:
+        # Journals and temporary files. Nothing persistent is ever written.
+        handle = _MemoryFile()
+    with _registry_lock:
+        _next_file_id += 1
+        _open_files[_next_file_id] = handle
+        pfile.contents.file_id = _next_file_id
+    pfile.contents.pMethods = ctypes.pointer(_io_methods)
+    if pout:
+        pout[0] = SQLITE_OPEN_READONLY if flags & SQLITE_OPEN_MAIN_DB else flags
+    return SQLITE_OK
+
+
+def _delete(pvfs: Any, zname: bytes, sync_dir: int) -> int:
+    return SQLITE_OK
+
+
+@_guard(SQLITE_IOERR)
+def _access(pvfs: Any, zname: bytes, flags: int, pres: Any) -> int:
+    pres[0] = int(zname.decode() in _remote_dbs)
+    return SQLITE_OK
+
+
+@_guard(SQLITE_IOERR)
+def _full_pathname(pvfs: Any, zname: bytes, nout: int, zout: int) -> int:
+    name = zname[: nout - 1]
+    ctypes.memmove(zout, name + b"\x00", len(name) + 1)
+    return SQLITE_OK
+
+
+def _randomness(pvfs: Any, nbytes: int, zout: int) -> int:
+    ctypes.memmove(zout, os.urandom(nbytes), nbytes)
+    return nbytes
+
+
+def _sleep(pvfs: Any, microseconds: int) -> int:
+    time.sleep(microseconds / 1e6)
+    return microseconds
+
+
+def _current_time(pvfs: Any, pout: Any) -> int:
+    # Julian day number, as SQLite expects.
+    pout[0] = 2440587.5 + time.time() / 86400.0
+    return SQLITE_OK
+
+
+def _get_last_error(pvfs: Any, nbytes: int, zout: int) -> int:
+    return 0
+
+
+_io_methods = _SQLiteIOMethods(
+    1,
+    _xClose(_close),
+    _xRead(_read),
+    _xWrite(_write),
+    _xTruncate(_truncate),
+    _xSync(_sync),
+    _xFileSize(_file_size),
+    _xLock(_lock),
+    _xLock(_lock),
+    _xCheckReservedLock(_check_reserved_lock),
+    _xFileControl(_file_control),
+    _xSectorSize(_sector_size),
+    _xSectorSize(_device_characteristics),
+)
+_vfs: _SQLiteVFS | None = None
+
+
+def _load_sqlite_library() -> ctypes.CDLL:
+    """Find the SQLite library that the :mod:`sqlite3` module is using."""
+    import _sqlite3
+
+    candidates = [_sqlite3.__file__, "sqlite3", "libsqlite3.so.0", "libsqlite3.dylib"]
+    for candidate in candidates:
+        try:
+            lib = ctypes.CDLL(candidate)
+            lib.sqlite3_vfs_register  # noqa: B018
+            return lib
+        except (OSError, AttributeError):
+            continue
+    raise RuntimeError(
+        "Could not find the SQLite library used by Python's sqlite3 module, so "
+        "remote databases can't be read on demand on this platform."
+    )
+
+
+def _ensure_registered() -> None:
+    """Register the range-request VFS with SQLite, if it hasn't been already."""
+    global _vfs
+    with _registry_lock:
+        if _vfs is not None:
+            return
+        lib = _load_sqlite_library()
+        lib.sqlite3_vfs_find.restype = _VFSP
+        lib.sqlite3_vfs_find.argtypes = [ctypes.c_char_p]
+        lib.sqlite3_vfs_register.argtypes = [_VFSP, ctypes.c_int]
+        default = lib.sqlite3_vfs_find(None).contents
+        vfs = _SQLiteVFS(
+            1,
+            ctypes.sizeof(_SQLiteFile),
+            default.mxPathname,
+            None,
+            VFS_NAME.encode(),
+            None,
+            _xOpen(_open),
+            _xDelete(_delete),
+            _xAccess(_access),
+            _xFullPathname(_full_pathname),
+            default.xDlOpen,
+            default.xDlError,
+            default.xDlSym,
+            default.xDlClose,
+            _xRandomness(_randomness),
+            _xSleep(_sleep),
+            _xCurrentTime(_current_time),
+            _xRandomness(_get_last_error),
+        )
+        if lib.sqlite3_vfs_register(ctypes.byref(vfs), 0) != SQLITE_OK:
+            raise RuntimeError("Failed to register the range-request SQLite VFS.")
+        _vfs = vfs
@@ -2,10 +2,17 @@
 from __future__ import annotations
 
 import logging
+import re
+import shutil
 import tempfile
+import threading
 from collections.abc import Generator
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from typing import Any
 
+import dask
 import numpy as np
 import pandas as pd
 import pytest
@@ -13,6 +20,18 @@ import sqlalchemy as sa
 
 logger = logging.getLogger(__name__)
 
+# With pyarrow installed, dask converts object columns to Arrow strings by default,
+# which would make partitioned reads differ from the dataframes used in the tests.
+dask.config.set({"dataframe.convert-string": False})
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path_factory: pytest.TempPathFactory, monkeypatch: Any) -> Path:
+    """Keep anything the tests cache out of the user's own cache directory."""
+    path = tmp_path_factory.mktemp("cache_home")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(path))
+    return path
+
 
 @pytest.fixture(scope="session")
 def df1() -> pd.DataFrame:
@@ -69,3 +88,67 @@ def temp_db(
     finally:
         if urlpath.is_file():
             urlpath.unlink()
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Serve static files, honoring single byte-range requests like a CDN would."""
+
+    range_remaining: int | None = None
+
+    def send_head(self) -> Any:
+        """Send a partial content response if the client asked for a byte range."""
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match is None:
+            return super().send_head()
+        path = Path(self.translate_path(self.path))
+        if not path.is_file():
+            self.send_error(404, "File not found")
+            return None
+        size = path.stat().st_size
+        start = int(match.group(1))
+        end = min(int(match.group(2) or size - 1), size - 1)
+        f = path.open("rb")
+        f.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.range_remaining = end - start + 1
+        return f
+
+    def copyfile(self, source: Any, outputfile: Any) -> None:
+        """Only copy the requested byte range, when there is one."""
+        remaining = self.range_remaining
+        if remaining is None:
+            return super().copyfile(source, outputfile)
+        outputfile.write(source.read(remaining))
+        self.range_remaining = None
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        """Send request logs to the logger instead of stderr."""
+        logger.debug(format, *args)
+
+
+@pytest.fixture(scope="session")
+def http_root(
+    tmp_path_factory: pytest.TempPathFactory, temp_db: tuple[str, str, str]
+) -> Path:
+    """A directory of SQLite DBs to be served over HTTP, including the temp DB."""
+    root = tmp_path_factory.mktemp("http_root")
+    shutil.copy(temp_db[2], root / "temp.db")
+    return root
+
+
+@pytest.fixture(scope="session")
+def http_server(http_root: Path) -> Generator[str, None, None]:
+    """Serve the contents of ``http_root`` on localhost, returning the base URL."""
+    handler = partial(RangeRequestHandler, directory=str(http_root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
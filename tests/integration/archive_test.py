@@ -0,0 +1,78 @@
+"""Integration tests for reading databases published as compressed archives."""
+from __future__ import annotations
+
+import gzip
+import logging
+import sqlite3
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from intake_sqlite import SQLiteSource, urlpath_to_sqliteurl
+from intake_sqlite.archive import write_seekable_zstd
+from intake_sqlite.vfs import get_range_file
+
+logger = logging.getLogger(__name__)
+
+
+def test_compressed_src(
+    temp_db: tuple[str, str, str],
+    df1: pd.DataFrame,
+    http_root: Path,
+    http_server: str,
+    tmp_path: Path,
+) -> None:
+    """Compressed databases are read just like uncompressed ones."""
+    table, table_nopk, urlpath = temp_db
+    data = Path(urlpath).read_bytes()
+    (http_root / "temp.db.gz").write_bytes(gzip.compress(data))
+    with zipfile.ZipFile(http_root / "temp.zip", "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("README.txt", "The temp database.")
+        zf.writestr("temp.db", data)
+    urls = [
+        f"{http_server}/temp.db.gz",
+        f"zip://temp.db::{http_server}/temp.zip",
+        str(http_root / "temp.db.gz"),
+    ]
+    for url in urls:
+        for storage_options in (
+            {},
+            {"parallel": {"max_workers": 4, "chunk_size": 1024}},
+            {"cache": {"cache_dir": str(tmp_path)}},
+        ):
+            src = SQLiteSource(url, table, dict(index_col="pk"), {}, storage_options)
+            assert_frame_equal(df1, src.read())
+    with pytest.raises(ValueError, match="2 members"):
+        urlpath_to_sqliteurl(f"{http_server}/temp.zip")
+    with pytest.raises(ValueError, match="read on demand"):
+        urlpath_to_sqliteurl(f"{http_server}/temp.db.gz", {"lazy": True})
+
+
+def test_lazy_seekable_zstd(http_root: Path, http_server: str) -> None:
+    """Seekable zstd databases can be queried without decompressing all of them."""
+    pytest.importorskip("zstandard")
+    path = http_root / "lazy.sqlite"
+    with sqlite3.connect(path) as con:
+        con.execute("CREATE TABLE big (id INTEGER PRIMARY KEY, payload TEXT)")
+        con.executemany(
+            "INSERT INTO big VALUES (?, ?)",
+            ((i, f"{i:08d}" * 25) for i in range(20_000)),
+        )
+    con.close()
+    write_seekable_zstd(path, http_root / "lazy.sqlite.zst", frame_size=2**14)
+    src = SQLiteSource(
+        f"{http_server}/lazy.sqlite.zst",
+        "SELECT * FROM big WHERE id = 12345",
+        storage_options={"lazy": True},
+    )
+    df = src.read()
+    assert df.payload.tolist() == ["00012345" * 25]  # nosec: B101
+    range_file = get_range_file(src._uri)
+    assert range_file is not None  # nosec: B101
+    stats = range_file.stats()
+    logger.info(f"Lazy seekable zstd lookup stats: {stats}")
+    assert stats["size"] == path.stat().st_size  # nosec: B101
+    assert stats["bytes_fetched"] < range_file.remote_size / 10  # nosec: B101
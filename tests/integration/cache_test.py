@@ -0,0 +1,97 @@
+"""Integration tests for the persistent database cache."""
+from __future__ import annotations
+
+import logging
+import shutil
+import sqlite3
+from pathlib import Path
+
+import fsspec
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from intake_sqlite import SQLiteSource, urlpath_to_sqliteurl
+from intake_sqlite.cache import DatabaseCache
+
+logger = logging.getLogger(__name__)
+
+
+def test_cached_src(
+    temp_db: tuple[str, str, str],
+    df1: pd.DataFrame,
+    http_server: str,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A second read of a cached database shouldn't touch the network."""
+    table, table_nopk, urlpath = temp_db
+    storage_options = {"cache": {"cache_dir": str(tmp_path)}}
+    url = f"{http_server}/temp.db"
+    first = SQLiteSource(url, table, dict(index_col="pk"), {}, storage_options)
+    assert_frame_equal(df1, first.read())
+
+    def offline(*args: object, **kwargs: object) -> None:
+        raise AssertionError("Cache hit should not touch the network.")
+
+    monkeypatch.setattr(fsspec.core, "url_to_fs", offline)
+    second = SQLiteSource(url, table, dict(index_col="pk"), {}, storage_options)
+    assert second._uri == first._uri  # nosec: B101
+    assert_frame_equal(df1, second.read())
+
+
+def test_cache_revalidation(
+    http_root: Path, http_server: str, temp_db: tuple[str, str, str], tmp_path: Path
+) -> None:
+    """Revalidating a cached database notices when the remote file changes."""
+    shutil.copy(temp_db[2], http_root / "changing.db")
+    url = f"{http_server}/changing.db"
+    storage_options = {"cache": {"cache_dir": str(tmp_path), "revalidate": True}}
+    first = urlpath_to_sqliteurl(url, storage_options)
+    assert urlpath_to_sqliteurl(url, storage_options) == first  # nosec: B101
+    with sqlite3.connect(http_root / "changing.db") as con:
+        con.execute("CREATE TABLE extra AS SELECT * FROM temp")
+    con.close()
+    second = urlpath_to_sqliteurl(url, storage_options)
+    assert second != first  # nosec: B101
+
+
+def test_cache_eviction(
+    http_root: Path, http_server: str, temp_db: tuple[str, str, str], tmp_path: Path
+) -> None:
+    """The least recently used database is evicted when the cache is full."""
+    for name in ("one.db", "two.db", "three.db"):
+        shutil.copy(temp_db[2], http_root / name)
+    size = (http_root / "one.db").stat().st_size
+    cache = DatabaseCache(cache_dir=tmp_path, max_bytes=2 * size)
+    one = cache.get(f"{http_server}/one.db")
+    two = cache.get(f"{http_server}/two.db")
+    # Use the first database again, so the second is the least recently used:
+    assert cache.get(f"{http_server}/one.db") == one  # nosec: B101
+    three = cache.get(f"{http_server}/three.db")
+    assert one.is_file() and three.is_file()  # nosec: B101
+    assert not two.exists()  # nosec: B101
+    assert cache.size() <= 2 * size  # nosec: B101
+    # The evicted database's index entry went with it.
+    assert len(list((tmp_path / "index").glob("*.json"))) == 2  # nosec: B101
+    cache.clear()
+    assert cache.size() == 0  # nosec: B101
+    assert not list((tmp_path / "index").glob("*.json"))  # nosec: B101
+
+
+def test_parallel_download(
+    temp_db: tuple[str, str, str],
+    df1: pd.DataFrame,
+    http_server: str,
+    tmp_path: Path,
+) -> None:
+    """Databases can be downloaded in parallel, with or without the cache."""
+    table, table_nopk, urlpath = temp_db
+    url = f"{http_server}/temp.db"
+    parallel = {"max_workers": 4, "chunk_size": 1024}
+    for storage_options in (
+        {"parallel": parallel},
+        {"parallel": parallel, "cache": {"cache_dir": str(tmp_path)}},
+    ):
+        src = SQLiteSource(url, table, dict(index_col="pk"), {}, storage_options)
+        assert_frame_equal(df1, src.read())
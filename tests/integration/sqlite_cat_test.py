@@ -1,11 +1,17 @@
 """SQLite Catalog integration tests."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import sqlite3
+from pathlib import Path
+from typing import Any
 
 import pandas as pd
+import pytest
 from pandas.testing import assert_frame_equal
 
+import intake_sqlite.sqlite_cat
 from intake_sqlite import SQLiteCatalog
 
 logger = logging.getLogger(__name__)
@@ -33,3 +39,167 @@ def test_remote_sqlite_catalog() -> None:
         urlpath="https://global-power-plants.datasettes.com/global-power-plants.db",
     )
     assert "global-power-plants" in gpp_cat  # nosec: B101
+
+
+@pytest.fixture()
+def many_tables(tmp_path: Path) -> str:
+    """A database with tables with and without primary keys, and a view."""
+    path = tmp_path / "many.sqlite"
+    with sqlite3.connect(path) as con:
+        for i in range(20):
+            con.execute(f"CREATE TABLE pk{i} (id INTEGER PRIMARY KEY, x REAL)")
+            con.execute(f"INSERT INTO pk{i} VALUES (1, 0.5), (2, 1.5)")
+        con.execute("CREATE TABLE nopk (x REAL)")
+        con.execute("INSERT INTO nopk VALUES (0.5), (1.5)")
+        con.execute("CREATE VIEW v AS SELECT x FROM nopk")
+    con.close()
+    return str(path)
+
+
+def test_lazy_discovery(many_tables: str, tmp_path: Path) -> None:
+    """Columns are only looked up for the entries that are used."""
+    cat = SQLiteCatalog(many_tables, schema_cache=str(tmp_path / "schema"))
+    assert list(cat) == [f"pk{i}" for i in range(20)] + ["nopk"]  # nosec: B101
+    assert cat._schema["primary_keys"] == {}  # nosec: B101
+    assert cat.pk3.describe()["driver"] == ["sqlite_auto"]  # nosec: B101
+    assert cat.nopk.describe()["driver"] == ["sqlite"]  # nosec: B101
+    assert cat._schema["primary_keys"] == {"pk3": "id", "nopk": None}  # nosec: B101
+    assert list(cat.pk3.read()["x"]) == [0.5, 1.5]  # nosec: B101
+    assert list(cat.nopk.read()["x"]) == [0.5, 1.5]  # nosec: B101
+    assert "v" in SQLiteCatalog(many_tables, views=True)  # nosec: B101
+
+
+def test_schema_cache(many_tables: str, tmp_path: Path, monkeypatch: Any) -> None:
+    """Reopening a catalog of an unchanged database doesn't query it."""
+    cache_dir = str(tmp_path / "schema")
+    SQLiteCatalog(many_tables, schema_cache=cache_dir).pk3.describe()
+
+    def fail(*args: Any, **kwargs: Any) -> Any:
+        raise AssertionError("The database should not have been queried.")
+
+    monkeypatch.setattr(intake_sqlite.sqlite_cat, "list_relations", fail)
+    monkeypatch.setattr(intake_sqlite.sqlite_cat, "primary_key", fail)
+    cat = SQLiteCatalog(many_tables, schema_cache=cache_dir)
+    assert len(list(cat)) == 21  # nosec: B101
+    assert cat.pk3.describe()["args"]["index"] == "id"  # nosec: B101
+
+    with sqlite3.connect(many_tables) as con:
+        con.execute("CREATE TABLE extra (x REAL)")
+    con.close()
+    with pytest.raises(AssertionError):
+        SQLiteCatalog(many_tables, schema_cache=cache_dir)
+    monkeypatch.undo()
+    cat = SQLiteCatalog(many_tables, schema_cache=cache_dir)
+    assert "extra" in cat  # nosec: B101
+
+
+def test_entry_pushdown(many_tables: str) -> None:
+    """Catalog entries pass columns and filters through to their sources."""
+    cat = SQLiteCatalog(many_tables, schema_cache=False)
+    df = cat.pk3(columns=["x"], filters=[("id", ">", 1)]).read()
+    assert list(df["x"]) == [1.5]  # nosec: B101
+    df = cat.nopk(filters=[("x", "<", 1)]).read()
+    assert list(df["x"]) == [0.5]  # nosec: B101
+
+
+def test_entry_compact_dtypes(temp_db: tuple[str, str, str], df1: pd.DataFrame) -> None:
+    """Entries read tables with compact dtypes if they're turned on."""
+    table, table_nopk, urlpath = temp_db
+    cat = SQLiteCatalog(urlpath, compact_dtypes=True)
+    actual = getattr(cat, table).read()
+    assert isinstance(actual.dtypes["c"], pd.CategoricalDtype)  # nosec: B101
+    assert actual.dtypes["b"] == "int8"  # nosec: B101
+    assert_frame_equal(df1, getattr(cat, table)(compact_dtypes=False).read())
+    assert_frame_equal(df1, SQLiteCatalog(urlpath)[table].read())
+
+
+def test_read_many_async(
+    temp_db: tuple[str, str, str], df1: pd.DataFrame, df2: pd.DataFrame
+) -> None:
+    """Many catalog entries can be read concurrently."""
+    table, table_nopk, urlpath = temp_db
+    cat = SQLiteCatalog(urlpath)
+    dfs = asyncio.run(cat.read_many_async())
+    assert set(dfs) == set(cat)  # nosec: B101
+    assert_frame_equal(df1, dfs[table])
+    assert_frame_equal(df2, dfs[table_nopk])
+    dfs = asyncio.run(cat.read_many_async([table], columns=["a"]))
+    assert list(dfs[table].columns) == ["a"]  # nosec: B101
+
+
+def test_export_parquet(
+    temp_db: tuple[str, str, str], df1: pd.DataFrame, df2: pd.DataFrame, tmp_path: Path
+) -> None:
+    """Tables are exported to Parquet files of bounded size, listed in a manifest."""
+    import intake
+    import pyarrow.parquet as pq
+
+    from intake_sqlite.export import MANIFEST_NAME, main
+
+    table, table_nopk, urlpath = temp_db
+    out_dir = tmp_path / "parquet"
+    manifest = SQLiteCatalog(urlpath).export_parquet(
+        str(out_dir), row_group_rows=30, rows_per_file=70, max_workers=2
+    )
+    metadata = manifest["sources"][table]["metadata"]
+    assert metadata["rows"] == 100  # nosec: B101
+    files = ["part-00000.parquet", "part-00001.parquet"]
+    assert metadata["files"] == files  # nosec: B101
+    row_groups = pq.ParquetFile(out_dir / table / "part-00000.parquet").metadata
+    assert row_groups.num_row_groups == 3  # nosec: B101
+    assert row_groups.row_group(2).num_rows == 10  # nosec: B101
+    actual = pd.read_parquet(out_dir / table).set_index("pk")
+    assert actual["b"].dtype == "int8"  # nosec: B101
+    assert actual["c"].dtype == "category"  # nosec: B101
+    assert_frame_equal(
+        df1,
+        actual.astype({"c": object}),
+        check_dtype=False,
+        check_index_type=False,
+    )
+
+    # Exporting one table again leaves the other in the manifest.
+    assert main([urlpath, str(out_dir), "--tables", table_nopk, "--workers", "1"]) == 0
+    cat = intake.open_catalog(str(out_dir / MANIFEST_NAME))
+    assert sorted(cat) == [table, table_nopk]  # nosec: B101
+    actual = pd.read_parquet(out_dir / table_nopk).astype({"f": object})
+    assert_frame_equal(df2, actual, check_dtype=False)
+
+
+def test_export_dates(tmp_path: Path) -> None:
+    """Exported dates are only stored as timestamps if none of them would be lost."""
+    import pyarrow as pa
+
+    from intake_sqlite.export import _conform, export_table
+
+    urlpath = str(tmp_path / "dates.db")
+    with sqlite3.connect(urlpath) as con:
+        con.execute("CREATE TABLE t (good DATE, bad DATE)")
+        con.executemany(
+            "INSERT INTO t VALUES (?, ?)",
+            [("2020-01-01", "2020-01-01"), ("2020-01-02", "9999-12-31")],
+        )
+    con.close()
+    export_table(urlpath, "t", tmp_path / "parquet")
+    actual = pd.read_parquet(tmp_path / "parquet" / "t")
+    assert actual["good"].dtype == "datetime64[ns]"  # nosec: B101
+    assert actual["bad"].tolist() == ["2020-01-01", "9999-12-31"]  # nosec: B101
+    schema = pa.schema([pa.field("bad", pa.timestamp("ns"))])
+    batch = pa.record_batch([pa.array(["2020-01-01", "someday"])], names=["bad"])
+    with pytest.raises(TypeError, match="bad of t"):
+        _conform(batch, schema, "t")
+
+
+def test_profile(many_tables: str, tmp_path: Path) -> None:
+    """Entries are profiled in SQL, and show the row counts recorded by ANALYZE."""
+    cat = SQLiteCatalog(many_tables, schema_cache=str(tmp_path / "schema"))
+    assert cat.nopk.describe()["metadata"] == {}  # nosec: B101
+    profiles = cat.profile(["pk3", "nopk"])
+    assert list(profiles["pk3"].columns) == ["id", "x"]  # nosec: B101
+    assert profiles["nopk"].loc["mean", "x"] == 1.0  # nosec: B101
+    with sqlite3.connect(many_tables) as con:
+        con.execute("ANALYZE")
+    con.close()
+    cat = SQLiteCatalog(many_tables, schema_cache=str(tmp_path / "schema"))
+    assert cat.nopk.describe()["metadata"] == {"estimated_rows": 2}  # nosec: B101
+    assert cat.pk3().metadata["estimated_rows"] == 2  # nosec: B101
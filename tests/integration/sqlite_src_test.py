@@ -1,16 +1,31 @@
 """SQLite Intake Source integration tests."""
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import sqlite3
+import subprocess  # nosec: B404
+import sys
+from pathlib import Path
+from typing import Any
 
 import pandas as pd
+import pytest
 from pandas.testing import assert_frame_equal
 
+import intake_sqlite.plans
+import intake_sqlite.sqlite_src
+import intake_sqlite.stats
 from intake_sqlite import (
     SQLiteSource,
     SQLiteSourceAutoPartition,
     SQLiteSourceManualPartition,
+    SQLiteSourceSharded,
 )
+from intake_sqlite.aio import read_many_async
+from intake_sqlite.instrument import record
+from intake_sqlite.results import ResultCache
 
 logger = logging.getLogger(__name__)
 
@@ -65,3 +80,714 @@ def test_remote_sqlite_source() -> None:
     )
     df = gpp_src.read()
     assert df.shape == (34936, 36)  # nosec: B101
+
+
+def test_arrow_src(temp_db: tuple[str, str, str], df1: pd.DataFrame) -> None:
+    """The arrow engine gives the same results as the pandas engine."""
+    table, table_nopk, urlpath = temp_db
+    for sql_expr in (table, f"SELECT * FROM {table}"):  # nosec: B608
+        src = SQLiteSource(
+            urlpath, sql_expr, sql_kwargs=dict(index_col="pk"), engine="arrow"
+        )
+        assert_frame_equal(df1, src.read())
+    src = SQLiteSource(
+        urlpath,
+        f"SELECT * FROM {table} WHERE pk < ?",  # nosec: B608
+        sql_kwargs=dict(index_col="pk", params=(50,), dtype_backend="pyarrow"),
+        engine="arrow",
+    )
+    actual = src.read()
+    assert isinstance(actual.dtypes["c"], pd.ArrowDtype)  # nosec: B101
+    assert_frame_equal(
+        df1[df1.index < 50], actual, check_dtype=False, check_index_type=False
+    )
+
+
+def test_arrow_mixed_types(tmp_path: Path) -> None:
+    """Tables with awkward names and columns of mixed types are read safely."""
+    path = tmp_path / "mixed.sqlite"
+    with sqlite3.connect(path) as con:
+        con.execute('CREATE TABLE "my ""odd"" table" (x INTEGER, y)')
+        con.executemany(
+            'INSERT INTO "my ""odd"" table" VALUES (?, ?)', [(1, 1), (2, "two")]
+        )
+    con.close()
+    src = SQLiteSource(f"file://{path}", 'my "odd" table', engine="arrow")
+    with pytest.raises(TypeError, match="engine='pandas'"):
+        src.read()
+    src = SQLiteSource(
+        f"file://{path}", 'SELECT x FROM "my ""odd"" table"', engine="arrow"
+    )
+    assert src.read().x.tolist() == [1, 2]  # nosec: B101
+
+
+def test_read_chunked(temp_db: tuple[str, str, str], df1: pd.DataFrame) -> None:
+    """Streaming a query in chunks gives the same results as reading it all at once."""
+    table, table_nopk, urlpath = temp_db
+    for engine in ("pandas", "arrow"):
+        src = SQLiteSource(urlpath, table, dict(index_col="pk"), engine=engine)
+        chunks = list(src.read_chunked(chunk_rows=30))
+        assert [len(c) for c in chunks] == [30, 30, 30, 10]  # nosec: B101
+        assert_frame_equal(df1, pd.concat(chunks))
+        assert src._dataframe is None  # nosec: B101
+    batches = list(src.iter_batches(batch_rows=64))
+    assert [b.num_rows for b in batches] == [64, 36]  # nosec: B101
+    assert batches[0].schema.names == ["pk", "a", "b", "c"]  # nosec: B101
+
+
+def test_balanced_partition(tmp_path: Path) -> None:
+    """Balanced partitions have similar sizes even when the index is skewed."""
+    urlpath = tmp_path / "skewed.db"
+    ids = list(range(1000)) + [10**6 * i for i in range(1, 11)]
+    expected = pd.DataFrame({"x": [i / 2 for i in ids]}, index=pd.Index(ids, name="id"))
+    expected.to_sql("skewed", f"sqlite:///{urlpath}")
+    uniform = SQLiteSourceAutoPartition(
+        str(urlpath), "skewed", index="id", sql_kwargs=dict(npartitions=4)
+    ).to_dask()
+    assert max(uniform.map_partitions(len).compute()) > 1000  # nosec: B101
+    for kwargs in (
+        dict(sql_kwargs=dict(npartitions=4)),
+        dict(rows_per_partition=253),
+    ):
+        s = SQLiteSourceAutoPartition(
+            str(urlpath), "skewed", index="id", partitioning="balanced", **kwargs
+        )
+        ddf = s.to_dask()
+        assert ddf.npartitions == 4  # nosec: B101
+        assert max(ddf.map_partitions(len).compute()) < 300  # nosec: B101
+        assert_frame_equal(expected, s.read())
+
+
+def test_auto_src_partition_rowid(
+    temp_db: tuple[str, str, str], df2: pd.DataFrame
+) -> None:
+    """Tables without an index column are partitioned on their rowid."""
+    table, table_nopk, urlpath = temp_db
+    s = SQLiteSourceAutoPartition(
+        urlpath, table_nopk, index=None, rows_per_partition=30
+    )
+    assert s.to_dask().npartitions == 4  # nosec: B101
+    actual = s.read()
+    assert list(actual.index) == list(range(1, 101))  # nosec: B101
+    assert_frame_equal(df2, actual.reset_index(drop=True))
+
+
+def test_pushdown(temp_db: tuple[str, str, str], df1: pd.DataFrame) -> None:
+    """Only the selected columns and rows are read, with every engine and query."""
+    table, table_nopk, urlpath = temp_db
+    filters = [[("b", "<", 50), ("c", "in", ["a", "b"])], [("pk", "==", 99)]]
+    expected = df1.loc[
+        ((df1.b < 50) & df1.c.isin(["a", "b"])) | (df1.index == 99), ["c", "a"]
+    ]
+    for engine in ("pandas", "arrow"):
+        for sql_expr in (table, f"SELECT * FROM {table}"):  # nosec: B608
+            src = SQLiteSource(
+                urlpath,
+                sql_expr,
+                sql_kwargs=dict(index_col="pk"),
+                engine=engine,
+                columns=["c", "a"],
+                filters=filters,
+            )
+            assert_frame_equal(expected, src.read())
+            assert_frame_equal(expected, pd.concat(src.read_chunked(chunk_rows=7)))
+    src = SQLiteSource(
+        urlpath,
+        f"SELECT * FROM {table} WHERE a < ?",  # nosec: B608
+        sql_kwargs=dict(index_col="pk", params=[0.5]),
+        filters=[("b", ">=", 50)],
+    )
+    assert_frame_equal(df1[(df1.a < 0.5) & (df1.b >= 50)], src.read())
+
+
+def test_partition_pruning(tmp_path: Path) -> None:
+    """Partitions that can't match filters on the index aren't read."""
+    urlpath = tmp_path / "pruned.db"
+    expected = pd.DataFrame(
+        {"x": [i / 2 for i in range(1000)], "y": range(1000)},
+        index=pd.Index(range(1000), name="id"),
+    )
+    expected.to_sql("t", f"sqlite:///{urlpath}")
+    s = SQLiteSourceAutoPartition(
+        str(urlpath),
+        "t",
+        index="id",
+        partitioning="balanced",
+        rows_per_partition=100,
+        columns=["x"],
+        filters=[("id", ">=", 250), ("id", "<", 420), ("y", "!=", 300)],
+    )
+    ddf = s.to_dask()
+    assert ddf.npartitions == 3  # nosec: B101
+    assert list(ddf.columns) == ["x"]  # nosec: B101
+    matches = expected[(expected.index >= 250) & (expected.index < 420)]
+    assert_frame_equal(matches.loc[matches.y != 300, ["x"]], s.read())
+    s = SQLiteSourceAutoPartition(
+        str(urlpath),
+        "t",
+        index="id",
+        sql_kwargs=dict(npartitions=4),
+        filters=[("id", ">", 900)],
+    )
+    assert_frame_equal(expected[expected.index > 900], s.read())
+
+
+def test_result_cache(
+    temp_db: tuple[str, str, str], df1: pd.DataFrame, tmp_path: Path
+) -> None:
+    """Repeated reads of the same query are loaded from the result cache."""
+    table, table_nopk, urlpath = temp_db
+    options: dict[str, Any] = {"cache_dir": str(tmp_path / "results")}
+    cache = ResultCache(**options)
+    for engine in ("pandas", "arrow"):
+        for _ in range(2):
+            src = SQLiteSource(
+                urlpath,
+                f"SELECT *  FROM {table}",  # nosec: B608
+                sql_kwargs=dict(index_col="pk"),
+                engine=engine,
+                result_cache=options,
+            )
+            assert_frame_equal(df1, src.read())
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (
+        2,
+        2,
+        2,
+    )  # nosec: B101
+
+
+def test_instrumentation(temp_db: tuple[str, str, str], df1: pd.DataFrame) -> None:
+    """Every read is broken down into phases, and full table scans are reported."""
+    table, table_nopk, urlpath = temp_db
+    with record() as recorder:
+        for engine in ("pandas", "arrow"):
+            src = SQLiteSource(
+                urlpath, table, sql_kwargs=dict(index_col="pk"), engine=engine
+            )
+            assert_frame_equal(df1, src.read())
+    phases = recorder.phases()
+    for phase in ("resolve", "execute", "fetch_rows", "convert", "read"):
+        assert phase in phases  # nosec: B101
+    totals = recorder.totals()
+    assert (totals["rows"], totals["partitions"]) == (200, 2)  # nosec: B101
+    assert totals["queries"] >= 2  # nosec: B101
+
+    s = SQLiteSourceManualPartition(
+        urlpath,
+        "SELECT * FROM " + table,  # nosec: B608
+        where_values=["WHERE b < 50", "WHERE b >= 50"],
+        sql_kwargs=dict(index_col="pk"),
+    )
+    with record(explain=True) as recorder:
+        assert len(s.read_partition(0)) == (df1.b < 50).sum()  # nosec: B101
+        assert len(s.to_dask().compute()) == len(df1)  # nosec: B101
+    phases = recorder.phases()
+    assert {"read_partition", "to_dask", "partition"} <= set(phases)  # nosec: B101
+    assert recorder.totals()["rows"] == len(df1) + (df1.b < 50).sum()  # nosec: B101
+    assert set(recorder.full_scans) == {table}  # nosec: B101
+
+    # Queries made directly on pooled connections are recorded too.
+    s = SQLiteSource(urlpath, table, compact_dtypes=True)
+    with record(explain=True) as recorder:
+        s.profile(cache=False)
+        s.sample(5, seed=0)
+        s.read()
+    statements = [
+        span.attributes["statement"]
+        for span in recorder.spans
+        if span.name == "execute"
+    ]
+    explained = [statement for statement, _ in recorder.plans]
+    for query in ("intake_sqlite_distinct", "count(DISTINCT", "max(rowid)"):
+        assert any(query in statement for statement in statements)  # nosec: B101
+        assert any(query in statement for statement in explained)  # nosec: B101
+
+
+def test_compact_dtypes(tmp_path: Path) -> None:
+    """Every reader applies the same compact dtypes, without changing any values."""
+    urlpath = str(tmp_path / "compact.db")
+    with sqlite3.connect(urlpath) as con:
+        con.execute(
+            "CREATE TABLE t (id INTEGER PRIMARY KEY, small INTEGER, "
+            "missing INTEGER, state TEXT, day DATE, x REAL)"
+        )
+        con.executemany(
+            "INSERT INTO t VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    i,
+                    i % 100,
+                    None if i % 3 else i,
+                    ["CO", "NM", None][i % 3],
+                    f"2020-01-{1 + i % 28:02d}",
+                    i / 2,
+                )
+                for i in range(1000)
+            ],
+        )
+    con.close()
+    expected = SQLiteSource(urlpath, "t", sql_kwargs=dict(index_col="id")).read()
+    dtypes = {
+        "small": "int8",
+        "missing": "Int16",
+        "state": pd.CategoricalDtype(["CO", "NM"]),
+        "day": "datetime64[ns]",
+    }
+    expected = expected.astype(dtypes)
+    expected.index = expected.index.astype("int16")
+    for engine in ("pandas", "arrow"):
+        src = SQLiteSource(
+            urlpath,
+            "t",
+            sql_kwargs=dict(index_col="id"),
+            engine=engine,
+            compact_dtypes=True,
+        )
+        assert_frame_equal(expected, src.read())
+        assert_frame_equal(expected, pd.concat(src.read_chunked(chunk_rows=300)))
+        src = SQLiteSource(
+            urlpath,
+            "t",
+            sql_kwargs=dict(index_col="id"),
+            engine=engine,
+            columns=["state", "x"],
+            filters=[("id", "<", 10)],
+            compact_dtypes=True,
+        )
+        assert_frame_equal(expected.loc[:9, ["state", "x"]], src.read())
+    s = SQLiteSourceAutoPartition(
+        urlpath, "t", index="id", rows_per_partition=300, compact_dtypes=True
+    )
+    ddf = s.to_dask()
+    assert ddf.dtypes.to_dict() == expected.dtypes.to_dict()  # nosec: B101
+    assert_frame_equal(expected, s.read(), check_index_type=False)
+
+
+def test_read_async(temp_db: tuple[str, str, str], df1: pd.DataFrame) -> None:
+    """Sources can be read concurrently from asyncio code."""
+    table, table_nopk, urlpath = temp_db
+    sources: list[Any] = [
+        SQLiteSource(urlpath, table, sql_kwargs=dict(index_col="pk")),
+        SQLiteSourceAutoPartition(
+            urlpath, table, index="pk", sql_kwargs=dict(npartitions=2)
+        ),
+    ]
+
+    async def main() -> tuple[list[dict[str, Any]], list[pd.DataFrame]]:
+        schemas = await asyncio.gather(*(s.discover_async() for s in sources))
+        return list(schemas), await read_many_async(sources)
+
+    schemas, dfs = asyncio.run(main())
+    assert [s["npartitions"] for s in schemas] == [1, 2]  # nosec: B101
+    for df in dfs:
+        assert_frame_equal(df1, df)
+
+
+def test_partition_plan(tmp_path: Path, monkeypatch: Any) -> None:
+    """Sources opened with a cached or embedded partition plan don't query the DB."""
+    urlpath = str(tmp_path / "planned.db")
+    with sqlite3.connect(urlpath) as con:
+        con.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, state TEXT, x REAL)")
+        con.executemany(
+            "INSERT INTO t VALUES (?, ?, ?)",
+            [(i, ["CO", "NM", "UT"][i % 3], i / 2) for i in range(1000)],
+        )
+    con.close()
+
+    def fail(*args: Any, **kwargs: Any) -> None:
+        raise AssertionError("The database was queried.")
+
+    # Partitions are only counted for plans that are cached, or asked for.
+    s = SQLiteSourceAutoPartition(urlpath, "t", index="id", rows_per_partition=300)
+    with monkeypatch.context() as m:
+        m.setattr(intake_sqlite.plans, "count_partition_rows", fail)
+        assert s.discover()["npartitions"] == 4  # nosec: B101
+    s = SQLiteSourceAutoPartition(
+        urlpath, "t", index="id", rows_per_partition=300, plan_cache=True
+    )
+    plan = json.loads(json.dumps(s.partition_plan()))
+    assert s.discover()["shape"] == (1000, 2)  # nosec: B101
+    assert sum(plan["rows"]) == 1000 and len(plan["rows"]) == 4  # nosec: B101
+    expected = s.read()
+
+    monkeypatch.setattr(pd, "read_sql", fail)
+    monkeypatch.setattr(intake_sqlite.sqlite_src, "pooled_connection", fail)
+    monkeypatch.setattr(intake_sqlite.sqlite_src, "get_engine", fail)
+    cached = SQLiteSourceAutoPartition(
+        urlpath, "t", index="id", rows_per_partition=300, plan_cache=True
+    )
+    embedded = SQLiteSourceAutoPartition(
+        urlpath,
+        "t",
+        index="id",
+        rows_per_partition=300,
+        metadata={"partition_plan": plan},
+        plan_cache=False,
+    )
+    for src in (cached, embedded):
+        assert src.discover()["npartitions"] == 4  # nosec: B101
+        dtypes = src.to_dask().dtypes.to_dict()
+        assert dtypes == expected.dtypes.to_dict()  # nosec: B101
+    monkeypatch.undo()
+    assert_frame_equal(expected, cached.read())
+    assert_frame_equal(expected, embedded.read())
+    # Plans made with other settings are ignored.
+    s = SQLiteSourceAutoPartition(
+        urlpath,
+        "t",
+        index="id",
+        rows_per_partition=500,
+        metadata={"partition_plan": plan},
+    )
+    assert s.discover()["npartitions"] == 2  # nosec: B101
+
+
+def test_sharded_source(tmp_path: Path) -> None:
+    """Shards are read as partitions of one dataframe, skipping those filtered out."""
+    frames = []
+    for n, year in enumerate((2019, 2020, 2021)):
+        df = pd.DataFrame(
+            {"year": year, "x": [float(i) for i in range(10)]},
+            index=pd.Index(range(10 * n, 10 * n + 10), name="id"),
+        )
+        df.to_sql("t", f"sqlite:///{tmp_path / f'epacems-{year}.sqlite'}")
+        frames.append(df)
+    expected = pd.concat(frames)
+    urlpath = str(tmp_path / "epacems-*.sqlite")
+    s = SQLiteSourceSharded(urlpath, "t", sql_kwargs=dict(index_col="id"))
+    ddf = s.to_dask()
+    assert ddf.npartitions == 3  # nosec: B101
+    assert ddf.divisions == (0, 10, 20, 29)  # nosec: B101
+    assert_frame_equal(expected, ddf.compute())
+    assert_frame_equal(expected, s.read())
+    assert_frame_equal(frames[1], s.read_partition(1))
+    # Shards given out of order have unknown divisions.
+    s = SQLiteSourceSharded(
+        [str(tmp_path / "epacems-2021.sqlite"), str(tmp_path / "epacems-2019.sqlite")],
+        "SELECT * FROM t",
+        sql_kwargs=dict(index_col="id"),
+    )
+    assert not s.to_dask().known_divisions  # nosec: B101
+    # A shard that can't match the filters is never opened.
+    (tmp_path / "epacems-2018.sqlite").write_bytes(b"not a database")
+    s = SQLiteSourceSharded(
+        urlpath,
+        "t",
+        sql_kwargs=dict(index_col="id"),
+        columns=["x"],
+        filters=[("year", ">=", 2020), ("x", "<", 5)],
+        shard_pattern="epacems-(?P<year>[0-9]{4})",
+    )
+    assert s.discover()["npartitions"] == 2  # nosec: B101
+    matches = expected[(expected.year >= 2020) & (expected.x < 5)]
+    assert_frame_equal(matches[["x"]], s.read())
+    # Shards whose index range can't match are skipped, however often it's found.
+    (tmp_path / "epacems-2018.sqlite").unlink()
+    s = SQLiteSourceSharded(
+        urlpath, "t", sql_kwargs=dict(index_col="id"), filters=[("id", ">=", 20)]
+    )
+    for _ in range(2):
+        assert s.discover()["npartitions"] == 1  # nosec: B101
+        s._schema = None
+    assert_frame_equal(frames[2], s.read())
+    s.close()
+    assert_frame_equal(frames[2], s.read())
+    # Samples are drawn from every shard.
+    shards = [str(tmp_path / f"epacems-{year}.sqlite") for year in (2019, 2020, 2021)]
+    s = SQLiteSourceSharded(shards, "t", sql_kwargs=dict(index_col="id"))
+    sample = s.sample(25, seed=0)
+    assert len(sample) == 25 and sample.index.is_unique  # nosec: B101
+    assert_frame_equal(expected.loc[sample.index], sample)
+    assert_frame_equal(expected.head(15), s.head(15))
+
+
+def test_watermark(tmp_path: Path, caplog: Any) -> None:
+    """Only rows appended since the last read are read, even by new sources."""
+    urlpath = str(tmp_path / "log.db")
+
+    def append(start: int, stop: int) -> None:
+        with sqlite3.connect(urlpath) as con:
+            con.execute("CREATE TABLE IF NOT EXISTS log (id INTEGER PRIMARY KEY, x)")
+            con.executemany(
+                "INSERT INTO log VALUES (?, ?)",
+                [(i, i / 2) for i in range(start, stop)],
+            )
+        con.close()
+
+    def source(**kwargs: Any) -> SQLiteSource:
+        return SQLiteSource(
+            urlpath,
+            "log",
+            sql_kwargs=dict(index_col="id"),
+            watermark="rowid",
+            **kwargs,
+        )
+
+    def expected(start: int, stop: int) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"x": [i / 2 for i in range(start, stop)]},
+            index=pd.Index(range(start, stop), name="id"),
+        )
+
+    append(0, 5)
+    # Discovering a source doesn't skip over the rows it would read.
+    assert source().discover()["shape"] == (5, 1)  # nosec: B101
+    assert_frame_equal(expected(0, 5), source().read())
+    assert len(source().read()) == 0  # nosec: B101
+    assert_frame_equal(expected(0, 5), source(merge=True).read())
+    append(5, 8)
+    s = source()
+    assert_frame_equal(expected(5, 8), s.read())
+    assert len(s.refresh()) == 0  # nosec: B101
+    merged = source(merge=True)
+    assert_frame_equal(expected(0, 8), merged.read())
+    append(8, 10)
+    assert_frame_equal(expected(0, 10), merged.refresh())
+    assert_frame_equal(expected(8, 10), s.refresh())
+    # A table that has been rewritten is read again from the start.
+    with sqlite3.connect(urlpath) as con:
+        con.execute("DELETE FROM log WHERE id > 2")
+    con.close()
+    assert_frame_equal(expected(0, 3), s.refresh())
+    assert "rewritten" in caplog.text  # nosec: B101
+    s.reset_watermark()
+    assert_frame_equal(expected(0, 3), s.refresh())
+    # Asking for an immutable database doesn't stop appended rows from being seen.
+    s = source(storage_options={"immutable": True})
+    assert "immutable" not in s._uri  # nosec: B101
+    append(10, 2000)
+    assert_frame_equal(expected(10, 2000), s.refresh())
+    with pytest.raises(ValueError, match="lazily"):
+        source(storage_options={"lazy": True})
+
+
+def test_watermark_republished(http_root: Path, http_server: str) -> None:
+    """Remote databases are downloaded again when they're republished with new rows."""
+    path = http_root / "events.db"
+    for start, stop in ((0, 5), (5, 1000)):
+        with sqlite3.connect(path) as con:
+            con.execute("CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY)")
+            con.executemany(
+                "INSERT INTO events VALUES (?)", [(i,) for i in range(start, stop)]
+            )
+        con.close()
+        if start == 0:
+            s = SQLiteSource(
+                f"{http_server}/events.db", "events", watermark="rowid", merge=True
+            )
+            assert s.read()["id"].tolist() == list(range(5))  # nosec: B101
+    assert s.refresh()["id"].tolist() == list(range(1000))  # nosec: B101
+
+
+def test_head_and_sample(tmp_path: Path) -> None:
+    """Previews read the first rows, or rows chosen at random, of every source."""
+    urlpath = str(tmp_path / "t.db")
+    df = pd.DataFrame(
+        {"x": [float(i) for i in range(1000)], "even": [i % 2 for i in range(1000)]},
+        index=pd.Index(range(1000), name="id"),
+    )
+    df.to_sql("t", f"sqlite:///{urlpath}")
+    with sqlite3.connect(urlpath) as con:
+        # Leave gaps in the rowids, which sampling has to skip.
+        con.execute("DELETE FROM t WHERE id BETWEEN 100 AND 399")
+    con.close()
+    df = df.drop(range(100, 400))
+    kwargs: dict[str, Any] = dict(sql_kwargs=dict(index_col="id"))
+    s = SQLiteSource(urlpath, "t", **kwargs)
+    assert_frame_equal(df.head(7), s.head(7))
+    sample = s.sample(50, seed=1)
+    assert len(sample) == 50 and sample.index.is_unique  # nosec: B101
+    assert_frame_equal(df.loc[sample.index], sample)
+    assert_frame_equal(sample, s.sample(50, seed=1))
+    assert len(s.sample(frac=0.1, seed=1)) <= 100  # nosec: B101
+    assert len(s.sample(5000)) == 700  # nosec: B101
+    # Filters apply to previews.
+    s = SQLiteSource(urlpath, "t", filters=[("even", "==", 1)], **kwargs)
+    assert_frame_equal(df[df.even == 1].head(3), s.head(3))
+    sample = s.sample(20, seed=2)
+    assert len(sample) == 20 and (sample.even == 1).all()  # nosec: B101
+    # Queries have no rowids to sample.
+    s = SQLiteSource(urlpath, "SELECT * FROM t WHERE x > 900", **kwargs)
+    assert len(s.head(3)) == 3  # nosec: B101
+    with pytest.raises(ValueError):
+        s.sample(3)
+    auto = SQLiteSourceAutoPartition(
+        urlpath, "t", index="id", sql_kwargs=dict(npartitions=2)
+    )
+    assert_frame_equal(df.head(4), auto.head(4))
+    sample = auto.sample(10, seed=3)
+    assert_frame_equal(df.loc[sample.index], sample)
+    manual = SQLiteSourceManualPartition(
+        urlpath,
+        "SELECT * FROM t",
+        where_values=["WHERE id < 50", "WHERE id >= 50"],
+        sql_kwargs=dict(index_col="id"),
+    )
+    assert_frame_equal(df.head(60), manual.head(60))
+
+
+def test_manual_partition_from_column(tmp_path: Path, caplog: Any) -> None:
+    """Partitions planned from a column's values read every row exactly once."""
+    urlpath = str(tmp_path / "plants.db")
+    df = pd.DataFrame(
+        {
+            "report_year": [2001 + (i * i) % 23 for i in range(2000)],
+            "capacity_mw": [i / 4 for i in range(2000)],
+        },
+        index=pd.Index(range(2000), name="id"),
+    )
+    df.to_sql("plants", f"sqlite:///{urlpath}")
+    with pytest.raises(ValueError, match="CREATE INDEX"):
+        SQLiteSourceManualPartition.from_column(
+            urlpath, "plants", "report_year", npartitions=4, require_index=True
+        )
+    s = SQLiteSourceManualPartition.from_column(
+        urlpath,
+        "plants",
+        "report_year",
+        npartitions=4,
+        sql_kwargs=dict(index_col="id"),
+    )
+    assert "scans the whole table" in caplog.text  # nosec: B101
+    assert s.where_plan is not None  # nosec: B101
+    assert s.scanning_partitions() == s.where_plan.where_values  # nosec: B101
+    assert s.discover()["npartitions"] == 4  # nosec: B101
+    assert_frame_equal(df, s.read().sort_index())
+    with sqlite3.connect(urlpath) as con:
+        con.execute("CREATE INDEX plants_year ON plants (report_year)")
+    con.close()
+    s = SQLiteSourceManualPartition(
+        urlpath,
+        "SELECT * FROM plants",
+        where_values=["WHERE report_year < 2010", "WHERE capacity_mw >= 100"],
+    )
+    assert s.scanning_partitions() == ["WHERE capacity_mw >= 100"]  # nosec: B101
+
+
+def test_read_processes(tmp_path: Path) -> None:
+    """Partitions read in worker processes are the same as those read with dask."""
+    from intake_sqlite.processes import read_partitions, shutdown
+
+    urlpath = str(tmp_path / "plants.db")
+    df = pd.DataFrame(
+        {
+            "report_year": [2001 + i % 23 for i in range(3000)],
+            "state": [["CO", "NM", "UT", None][i % 4] for i in range(3000)],
+            "capacity_mw": [None if i % 7 == 0 else i / 4 for i in range(3000)],
+        },
+        index=pd.Index(range(3000), name="id"),
+    )
+    df.to_sql("plants", f"sqlite:///{urlpath}")
+    try:
+        for kwargs in (
+            dict(index="id"),
+            dict(index=None),
+            dict(index="id", columns=["state"], filters=[("report_year", ">", 2010)]),
+        ):
+            expected = SQLiteSourceAutoPartition(
+                urlpath, "plants", sql_kwargs=dict(npartitions=3), **kwargs
+            ).read()
+            s = SQLiteSourceAutoPartition(
+                urlpath, "plants", sql_kwargs=dict(npartitions=3), processes=2, **kwargs
+            )
+            assert_frame_equal(expected, s.read())
+        where = [f"WHERE report_year % 3 = {i}" for i in range(3)]
+        expected = SQLiteSourceManualPartition(
+            urlpath, "SELECT * FROM plants", where, sql_kwargs=dict(index_col="id")
+        ).read()
+        s = SQLiteSourceManualPartition(
+            urlpath,
+            "SELECT * FROM plants",
+            where,
+            sql_kwargs=dict(index_col="id"),
+            processes=2,
+        )
+        assert_frame_equal(expected, s.read())
+    finally:
+        shutdown()
+    with pytest.raises(ValueError):
+        read_partitions("sqlite:///nonexistent.db", [("SELECT 1", ())])
+
+
+@pytest.mark.skipif(sys.platform in ("darwin", "win32"), reason="workers aren't forked")
+def test_read_processes_unguarded(tmp_path: Path) -> None:
+    """Scripts without a main guard can read in worker processes."""
+    urlpath = tmp_path / "t.db"
+    pd.DataFrame({"x": range(100)}).to_sql("t", f"sqlite:///{urlpath}")
+    script = tmp_path / "script.py"
+    script.write_text(
+        "from intake_sqlite import SQLiteSourceAutoPartition\n"
+        f"src = SQLiteSourceAutoPartition({str(urlpath)!r}, 't', index='index', "
+        "sql_kwargs={'npartitions': 2}, processes=2)\n"
+        "print(len(src.read()))\n"
+    )
+    result = subprocess.run(  # nosec: B603
+        [sys.executable, str(script)], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr  # nosec: B101
+    assert result.stdout.strip() == "100"  # nosec: B101
+
+
+def test_profile(tmp_path: Path, monkeypatch: Any) -> None:
+    """Sources are profiled in SQL, with the same results however they're divided."""
+    urlpath = str(tmp_path / "plants.db")
+    df = pd.DataFrame(
+        {
+            "report_year": [2001 + i % 23 for i in range(3000)],
+            "state": [["CO", "NM", "UT", None][i % 4] for i in range(3000)],
+            "capacity_mw": [None if i % 7 == 0 else i / 4 for i in range(3000)],
+        },
+        index=pd.Index(range(3000), name="id"),
+    )
+    df.to_sql("plants", f"sqlite:///{urlpath}")
+    profile = SQLiteSource(urlpath, "plants").profile()
+    assert list(profile.columns) == ["id", *df.columns]  # nosec: B101
+    assert profile.loc["count"].tolist() == [3000, 3000, 2250, 2571]  # nosec: B101
+    assert profile.loc["nulls", "state"] == 750  # nosec: B101
+    assert profile.loc["distinct", "state"] == 3  # nosec: B101
+    assert profile.loc["min", "report_year"] == 2001  # nosec: B101
+    assert profile.loc["max", "state"] == "UT"  # nosec: B101
+    mean = profile.loc["mean", "capacity_mw"]
+    assert abs(mean - df.capacity_mw.mean()) < 1e-9  # nosec: B101
+    # Partitions and shards are profiled separately, and their profiles merged.
+    where = ["WHERE id < 1000", "WHERE id >= 1000"]
+    for s in (
+        SQLiteSourceAutoPartition(urlpath, "plants", index="id"),
+        SQLiteSourceManualPartition(urlpath, "SELECT * FROM plants", where),
+        SQLiteSourceSharded([urlpath, urlpath], "plants"),
+    ):
+        parts = s.profile(cache=False)
+        if isinstance(s, SQLiteSourceSharded):
+            # Every row was counted twice, but distinct values only once.
+            assert parts.loc["count", "state"] == 4500  # nosec: B101
+            assert parts.loc["distinct", "state"] == 3  # nosec: B101
+            parts = parts.drop(["count", "nulls", "distinct"])
+            expected = profile.drop(["count", "nulls", "distinct"])
+        else:
+            expected = profile
+        assert_frame_equal(expected, parts, check_exact=False)
+    s = SQLiteSourceAutoPartition(
+        urlpath,
+        "plants",
+        index=None,
+        columns=["state"],
+        filters=[("report_year", "==", 2001)],
+    )
+    # The rowid the table is partitioned on isn't profiled.
+    filtered = s.profile().loc["count"]
+    count = df[df.report_year == 2001].state.count()
+    assert filtered.to_dict() == {"state": count}  # nosec: B101
+    # Profiling an unchanged database again doesn't query it.
+    monkeypatch.setattr(intake_sqlite.stats, "profile_query", pytest.fail)
+    assert_frame_equal(profile, SQLiteSource(urlpath, "plants").profile())
+    # Rows aren't counted for partitions with dates as boundaries, but ANALYZE has
+    # estimated how many there are.
+    days = pd.DataFrame({"day": pd.date_range("2020-01-01", periods=100), "x": 1.0})
+    days.to_sql("days", f"sqlite:///{urlpath}", index=False)
+    with sqlite3.connect(urlpath) as con:
+        con.execute("ANALYZE")
+    con.close()
+    discovered = SQLiteSourceAutoPartition(urlpath, "days", index="day").discover()
+    assert discovered["shape"] == (None, 1)  # nosec: B101
+    assert discovered["metadata"]["estimated_rows"] == 100  # nosec: B101
@@ -0,0 +1,98 @@
+"""Integration tests for reading remote SQLite databases on demand."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+import subprocess  # nosec: B404
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from intake_sqlite import SQLiteCatalog, SQLiteSource, SQLiteSourceAutoPartition
+from intake_sqlite.vfs import get_range_file
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture(scope="module")
+def big_db_url(http_root: Path, http_server: str) -> str:
+    """A ~5 MB database with an integer primary key, served over HTTP."""
+    path = http_root / "big.sqlite"
+    with sqlite3.connect(path) as con:
+        con.execute("CREATE TABLE big (id INTEGER PRIMARY KEY, payload TEXT)")
+        con.executemany(
+            "INSERT INTO big VALUES (?, ?)",
+            ((i, f"{i:08d}" * 25) for i in range(20_000)),
+        )
+    con.close()
+    return f"{http_server}/big.sqlite"
+
+
+def test_lazy_indexed_lookup(big_db_url: str) -> None:
+    """An indexed lookup should only fetch a small fraction of the database."""
+    src = SQLiteSource(
+        big_db_url,
+        "SELECT * FROM big WHERE id = 12345",
+        storage_options={"lazy": {"block_size": 4096}},
+    )
+    df = src.read()
+    assert df.payload.tolist() == ["00012345" * 25]  # nosec: B101
+    range_file = get_range_file(src._uri)
+    assert range_file is not None  # nosec: B101
+    stats = range_file.stats()
+    logger.info(f"Lazy indexed lookup stats: {stats}")
+    assert stats["bytes_fetched"] < stats["size"] / 50  # nosec: B101
+
+
+def test_lazy_src(
+    temp_db: tuple[str, str, str], df1: pd.DataFrame, http_server: str
+) -> None:
+    """Reading a whole table lazily gives the same results as a local read."""
+    table, table_nopk, urlpath = temp_db
+    src = SQLiteSource(
+        f"{http_server}/temp.db",
+        table,
+        sql_kwargs=dict(index_col="pk"),
+        storage_options={"lazy": True},
+    )
+    assert_frame_equal(df1, src.read())
+
+
+def test_lazy_exit(temp_db: tuple[str, str, str]) -> None:
+    """The interpreter exits cleanly after reading a database lazily."""
+    table, table_nopk, urlpath = temp_db
+    code = (
+        "from intake_sqlite import SQLiteSource; "
+        f"SQLiteSource({Path(urlpath).as_uri()!r}, {table!r}, "
+        "storage_options={'lazy': True}).read()"
+    )
+    result = subprocess.run(  # nosec: B603
+        [sys.executable, "-c", code], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr  # nosec: B101
+
+
+def test_lazy_auto_partition(
+    temp_db: tuple[str, str, str], df1: pd.DataFrame, http_server: str
+) -> None:
+    """Partitioned reads share the lazily read remote database."""
+    table, table_nopk, urlpath = temp_db
+    src = SQLiteSourceAutoPartition(
+        f"{http_server}/temp.db",
+        table,
+        index="pk",
+        sql_kwargs=dict(npartitions=2),
+        storage_options={"lazy": True},
+    )
+    assert_frame_equal(df1, src.read())
+
+
+def test_lazy_catalog(temp_db: tuple[str, str, str], http_server: str) -> None:
+    """Catalog tables can be discovered without downloading the database."""
+    table, table_nopk, urlpath = temp_db
+    cat = SQLiteCatalog(f"{http_server}/temp.db", storage_options={"lazy": True})
+    assert table in cat  # nosec: B101
+    assert table_nopk in cat  # nosec: B101
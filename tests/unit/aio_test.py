@@ -0,0 +1,73 @@
+"""Unit tests for reading sources concurrently."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from intake_sqlite import urlpath_to_sqliteurl
+from intake_sqlite.aio import (
+    resolve_many_async,
+    run_async,
+    set_max_per_database,
+    set_max_workers,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def test_database_limit(tmp_path: Path) -> None:
+    """No more than the limit of functions run at once for each database."""
+    urls = []
+    for name in ("a", "b"):
+        path = tmp_path / f"{name}.sqlite"
+        sqlite3.connect(path).close()
+        urls.append(urlpath_to_sqliteurl(str(path)))
+    running = {url: 0 for url in urls}
+    most = {url: 0 for url in urls}
+    lock = threading.Lock()
+
+    def work(url: str) -> str:
+        with lock:
+            running[url] += 1
+            most[url] = max(most[url], running[url])
+        time.sleep(0.01)
+        with lock:
+            running[url] -= 1
+        return url
+
+    async def main() -> list[str]:
+        return list(
+            await asyncio.gather(*(run_async(url, work, url) for url in urls * 10))
+        )
+
+    previous = set_max_per_database(2)
+    try:
+        assert asyncio.run(main()) == urls * 10  # nosec: B101
+    finally:
+        set_max_per_database(previous)
+    assert most == {url: 2 for url in urls}  # nosec: B101
+
+
+def test_max_workers() -> None:
+    """The thread pool can be resized."""
+    previous = set_max_workers(1)
+    try:
+        threads = asyncio.run(run_async(None, lambda: threading.current_thread().name))
+        assert threads.startswith("intake_sqlite")  # nosec: B101
+    finally:
+        assert set_max_workers(previous) == 1  # nosec: B101
+
+
+def test_resolve_many(tmp_path: Path) -> None:
+    """Paths are resolved in the order they're given."""
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.sqlite"
+        sqlite3.connect(path).close()
+        paths.append(str(path))
+    urls = asyncio.run(resolve_many_async(paths))
+    assert urls == [urlpath_to_sqliteurl(p) for p in paths]  # nosec: B101
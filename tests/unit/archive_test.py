@@ -0,0 +1,165 @@
+"""Unit tests for decompressing databases published as compressed archives."""
+from __future__ import annotations
+
+import bz2
+import gzip
+import hashlib
+import logging
+import lzma
+import struct
+import zipfile
+from pathlib import Path
+
+import fsspec
+import pytest
+
+from intake_sqlite.archive import (
+    decompress,
+    parse_archive,
+    read_seek_table,
+    write_seekable_zstd,
+)
+from intake_sqlite.vfs import SeekableZstdFile
+
+logger = logging.getLogger(__name__)
+
+DATA = b"".join(f"{i:08d}".encode() * 16 for i in range(20_000))
+"""2.5 MB of compressible bytes, standing in for a database."""
+
+
+@pytest.fixture()
+def local_fs() -> fsspec.AbstractFileSystem:
+    """The local filesystem, as fsspec sees it."""
+    return fsspec.filesystem("file")
+
+
+def test_parse_archive() -> None:
+    """Compressed files are recognized by their suffixes, and zip members by URL."""
+    assert parse_archive("https://example.com/pudl.sqlite") is None  # nosec: B101
+    gz = parse_archive("https://example.com/pudl.sqlite.gz?version=2")
+    assert gz is not None and gz.compression == "gzip"  # nosec: B101
+    assert gz.name == "pudl.sqlite"  # nosec: B101
+    zst = parse_archive("/data/pudl.db.ZST")
+    assert zst is not None and zst.compression == "zstd"  # nosec: B101
+    zipped = parse_archive("s3://bucket/pudl.zip")
+    assert zipped is not None and zipped.name is None  # nosec: B101
+    member = parse_archive("zip://data/pudl.sqlite::https://example.com/pudl.zip")
+    assert member is not None  # nosec: B101
+    assert member.urlpath == "https://example.com/pudl.zip"  # nosec: B101
+    assert member.member == "data/pudl.sqlite"  # nosec: B101
+    assert member.name == "pudl.sqlite"  # nosec: B101
+
+
+@pytest.mark.parametrize("parallel", [None, {"max_workers": 3, "chunk_size": 4096}])
+def test_decompress_streams(
+    tmp_path: Path,
+    local_fs: fsspec.AbstractFileSystem,
+    parallel: dict[str, int] | None,
+) -> None:
+    """Streams are decompressed whole, including concatenated ones."""
+    half = len(DATA) // 2
+    archives = {
+        "gzip": gzip.compress(DATA[:half]) + gzip.compress(DATA[half:]),
+        "bz2": bz2.compress(DATA),
+        "xz": lzma.compress(DATA),
+    }
+    out = tmp_path / "out.sqlite"
+    for compression, compressed in archives.items():
+        path = tmp_path / f"in.sqlite.{compression}"
+        path.write_bytes(compressed)
+        read = decompress(local_fs, str(path), out, compression, parallel=parallel)
+        assert read == len(compressed)  # nosec: B101
+        assert out.read_bytes() == DATA  # nosec: B101
+    # A truncated archive isn't mistaken for a whole one.
+    path = tmp_path / "truncated.sqlite.gz"
+    path.write_bytes(archives["gzip"][:-100])
+    with pytest.raises(OSError, match="part way through"):
+        decompress(local_fs, str(path), out, "gzip", parallel=parallel)
+
+
+def test_decompress_checksum(
+    tmp_path: Path, local_fs: fsspec.AbstractFileSystem
+) -> None:
+    """A checksum given with the parallel options is of the compressed file."""
+    path = tmp_path / "in.sqlite.gz"
+    path.write_bytes(gzip.compress(DATA))
+    checksum = f"sha256:{hashlib.sha256(path.read_bytes()).hexdigest()}"
+    out = tmp_path / "out.sqlite"
+    decompress(local_fs, str(path), out, "gzip", parallel={"checksum": checksum})
+    assert out.read_bytes() == DATA  # nosec: B101
+    with pytest.raises(OSError, match="checksum"):
+        decompress(local_fs, str(path), out, "gzip", parallel={"checksum": "md5:0"})
+
+
+def test_decompress_zip(tmp_path: Path, local_fs: fsspec.AbstractFileSystem) -> None:
+    """Members of zip archives are found, and only their bytes are decompressed."""
+    out = tmp_path / "out.sqlite"
+    for method in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2):
+        path = tmp_path / f"{method}.zip"
+        with zipfile.ZipFile(path, "w", method) as zf:
+            zf.writestr("README.txt", b"Not a database")
+            zf.writestr("data/pudl.sqlite", DATA)
+        decompress(local_fs, str(path), out, "zip", member="data/pudl.sqlite")
+        assert out.read_bytes() == DATA  # nosec: B101
+        with pytest.raises(ValueError, match="2 members"):
+            decompress(local_fs, str(path), out, "zip")
+        with pytest.raises(ValueError, match="no member"):
+            decompress(local_fs, str(path), out, "zip", member="pudl.db")
+    path = tmp_path / "single.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("pudl.sqlite", DATA)
+    parallel = {"max_workers": 2, "chunk_size": 1000}
+    decompress(local_fs, str(path), out, "zip", parallel=parallel)
+    assert out.read_bytes() == DATA  # nosec: B101
+
+
+def test_read_seek_table(tmp_path: Path, local_fs: fsspec.AbstractFileSystem) -> None:
+    """The frames of a seekable zstd file are found from the table at its end."""
+    frames = [(b"a" * 10, 100), (b"b" * 20, 200), (b"c" * 5, 50)]
+    entries = b"".join(struct.pack("<II", len(f), size) for f, size in frames)
+    table = entries + struct.pack("<IBI", len(frames), 0, 0x8F92EAB1)
+    path = tmp_path / "test.sqlite.zst"
+    path.write_bytes(
+        b"".join(f for f, _ in frames)
+        + struct.pack("<II", 0x184D2A5E, len(table))
+        + table
+    )
+    seek_table = read_seek_table(local_fs, str(path))
+    assert seek_table is not None  # nosec: B101
+    assert len(seek_table) == 3  # nosec: B101
+    assert seek_table.compressed_offsets == [0, 10, 30, 35]  # nosec: B101
+    assert seek_table.offsets == [0, 100, 300, 350]  # nosec: B101
+    frames_of = [seek_table.frame_of(i) for i in (0, 99, 100, 349)]
+    assert frames_of == [0, 0, 1, 2]  # nosec: B101
+    # An ordinary zstd file has no seek table.
+    path.write_bytes(b"\x28\xb5\x2f\xfd" + b"\x00" * 100)
+    assert read_seek_table(local_fs, str(path)) is None  # nosec: B101
+
+
+def test_seekable_zstd(tmp_path: Path, local_fs: fsspec.AbstractFileSystem) -> None:
+    """Seekable zstd files are decompressed in parallel, or a frame at a time."""
+    zstandard = pytest.importorskip("zstandard")
+    src = tmp_path / "pudl.sqlite"
+    src.write_bytes(DATA)
+    dst = tmp_path / "pudl.sqlite.zst"
+    write_seekable_zstd(src, dst, frame_size=2**16)
+    out = tmp_path / "out.sqlite"
+    decompress(local_fs, str(dst), out, "zstd", parallel={"chunk_size": 2**14})
+    assert out.read_bytes() == DATA  # nosec: B101
+    range_file = SeekableZstdFile(str(dst), max_blocks=2)
+    assert range_file.size == len(DATA)  # nosec: B101
+    assert range_file.read(100_000, 200_000) == DATA[100_000:300_000]  # nosec: B101
+    assert range_file.read(len(DATA) - 10, 100) == DATA[-10:]  # nosec: B101
+    assert range_file.stats()["blocks_cached"] == 2  # nosec: B101
+    # Only the frames holding the bytes read were fetched.
+    assert range_file.bytes_fetched < dst.stat().st_size / 2  # nosec: B101
+    # Ordinary zstd files are decompressed as a stream, but can't be read on demand.
+    plain = tmp_path / "plain.sqlite.zst"
+    compressor = zstandard.ZstdCompressor()
+    plain.write_bytes(
+        compressor.compress(DATA[:1000]) + compressor.compress(DATA[1000:])
+    )
+    decompress(local_fs, str(plain), out, "zstd")
+    assert out.read_bytes() == DATA  # nosec: B101
+    with pytest.raises(ValueError, match="seekable"):
+        SeekableZstdFile(str(plain))
@@ -0,0 +1,72 @@
+"""Unit tests for the read-only SQLite dialect."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+
+from intake_sqlite.connection import connect
+from intake_sqlite.dialect import DEFAULT_PRAGMAS, sqlite_url
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture()
+def db_path(tmp_path: Path) -> Path:
+    """A small database in a directory whose name needs escaping in a URI."""
+    path = tmp_path / "a dir?#" / "test.sqlite"
+    path.parent.mkdir()
+    with sqlite3.connect(path) as con:
+        con.execute("CREATE TABLE t (x INTEGER)")
+        con.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(10)])
+    con.close()
+    return path
+
+
+def _pragmas(con: sqlite3.Connection) -> dict[str, int]:
+    return {
+        name: con.execute(f"PRAGMA {name}").fetchone()[0] for name in DEFAULT_PRAGMAS
+    }
+
+
+def test_pragmas_applied(db_path: Path) -> None:
+    """The PRAGMAs in a URL are applied by both SQLAlchemy and connect()."""
+    url = sqlite_url(db_path, pragmas={"mmap_size": 4096, "cache_size": None})
+    expected = {
+        "cache_size": -2000,
+        "mmap_size": 4096,
+        "query_only": 1,
+        "temp_store": 2,
+    }
+    engine = sa.create_engine(url)
+    with engine.connect() as con:
+        count = con.execute(sa.text("SELECT COUNT(*) FROM t")).scalar()
+        assert count == 10  # nosec: B101
+        assert _pragmas(con.connection.connection) == expected  # nosec: B101
+    with connect(url) as con:
+        assert _pragmas(con) == expected  # nosec: B101
+    con.close()
+
+
+@pytest.mark.parametrize("immutable", [True, False])
+def test_read_only(db_path: Path, immutable: bool) -> None:
+    """Databases can't be written to, whether or not they're immutable."""
+    url = sqlite_url(db_path, immutable=immutable, pragmas={"query_only": 0})
+    assert ("immutable=1" in url) == immutable  # nosec: B101
+    con = connect(url)
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        con.execute("INSERT INTO t VALUES (10)")
+    con.close()
+
+
+@pytest.mark.parametrize(
+    "pragmas",
+    [{"journal_mode": "wal"}, {"mmap_size": "1; DROP TABLE t"}, {"cache_size": 1.5}],
+)
+def test_bad_pragmas(db_path: Path, pragmas: dict[str, object]) -> None:
+    """Only known PRAGMAs with simple values are allowed."""
+    with pytest.raises(ValueError):
+        sqlite_url(db_path, pragmas=pragmas)
@@ -0,0 +1,79 @@
+"""Unit tests for parallel downloads of remote databases."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import subprocess  # nosec: B404
+import sys
+from pathlib import Path
+
+import fsspec
+import pytest
+
+from intake_sqlite.download import parallel_download, temporary_copy
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture()
+def source_file(tmp_path: Path) -> Path:
+    """A file whose size isn't a multiple of the chunk sizes used below."""
+    path = tmp_path / "source.db"
+    path.write_bytes(bytes(range(256)) * 1001)
+    return path
+
+
+@pytest.mark.parametrize("chunk_size,max_workers", [(1000, 4), (10**6, 2), (7, 16)])
+def test_parallel_download(
+    source_file: Path, tmp_path: Path, chunk_size: int, max_workers: int
+) -> None:
+    """The downloaded file is identical to the original, however it's chunked."""
+    fs = fsspec.filesystem("file")
+    dest = tmp_path / "dest.db"
+    checksum = "sha256:" + hashlib.sha256(source_file.read_bytes()).hexdigest()
+    n = parallel_download(
+        fs,
+        str(source_file),
+        dest,
+        max_workers=max_workers,
+        chunk_size=chunk_size,
+        checksum=checksum,
+    )
+    assert n == source_file.stat().st_size  # nosec: B101
+    assert dest.read_bytes() == source_file.read_bytes()  # nosec: B101
+
+
+def test_bad_checksum(source_file: Path, tmp_path: Path) -> None:
+    """A download that doesn't match the expected checksum is an error."""
+    fs = fsspec.filesystem("file")
+    with pytest.raises(OSError):
+        parallel_download(fs, str(source_file), tmp_path / "d.db", checksum="md5:00")
+
+
+def test_failed_temporary_copy(source_file: Path) -> None:
+    """A copy that fails part way through leaves no partial file behind."""
+    parts = []
+
+    def fetch(local_path: Path) -> int:
+        local_path.write_bytes(b"partial")
+        parts.append(local_path)
+        raise OSError("Connection reset")
+
+    with pytest.raises(OSError, match="Connection reset"):
+        temporary_copy(str(source_file), ".db", fetch)
+    assert parts and not parts[0].exists()  # nosec: B101
+
+
+def test_temporary_copies_removed(source_file: Path) -> None:
+    """Temporary copies are deleted when the interpreter exits."""
+    code = (
+        "from intake_sqlite.download import parallel_open_local; "
+        f"print(parallel_open_local({source_file.as_uri()!r}, chunk_size=1000))"
+    )
+    result = subprocess.run(  # nosec: B603
+        [sys.executable, "-c", code], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr  # nosec: B101
+    copy = Path(result.stdout.strip())
+    assert copy.name.endswith(".db")  # nosec: B101
+    assert not copy.parent.exists()  # nosec: B101
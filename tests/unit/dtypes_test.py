@@ -0,0 +1,113 @@
+"""Unit tests for choosing compact dtypes."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from intake_sqlite.dtypes import integer_dtype, plan_dtypes, with_plan
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture()
+def con(tmp_path: Path) -> Iterator[sqlite3.Connection]:
+    """A connection to a database with a table of columns of many types."""
+    con = sqlite3.connect(tmp_path / "test.db")
+    con.execute(
+        "CREATE TABLE t (id INTEGER PRIMARY KEY, small INT, big BIGINT, "
+        "missing INTEGER, mixed INTEGER, flag BOOLEAN, state VARCHAR(2), "
+        "name TEXT, day DATE, x REAL, empty INTEGER)"
+    )
+    con.executemany(
+        "INSERT INTO t VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)",
+        [
+            (
+                i,
+                i % 100,
+                i * 10**6,
+                None if i % 3 else i,
+                "a" if i == 7 else i,
+                i % 2,
+                ["CO", "NM", "UT"][i % 3],
+                f"plant {i}",
+                f"2020-01-{1 + i % 28:02d}",
+                i / 2,
+            )
+            for i in range(1000)
+        ],
+    )
+    yield con
+    con.close()
+
+
+def test_integer_dtype() -> None:
+    """The narrowest integer dtype that holds the range of values is chosen."""
+    assert integer_dtype(-128, 127) == "int8"  # nosec: B101
+    assert integer_dtype(0, 128) == "int16"  # nosec: B101
+    assert integer_dtype(-(2**31), 0, nullable=True) == "Int32"  # nosec: B101
+    assert integer_dtype(0, 2**40) == "int64"  # nosec: B101
+
+
+def test_plan_dtypes(con: sqlite3.Connection) -> None:
+    """Dtypes are chosen from declared types and the values actually stored."""
+    plan = plan_dtypes(con, "t")
+    assert plan == {  # nosec: B101
+        "id": "int16",
+        "small": "int8",
+        "big": "int32",
+        "missing": "Int16",
+        "flag": "bool",
+        "state": pd.CategoricalDtype(["CO", "NM", "UT"]),
+        "day": "datetime64[ns]",
+    }
+    assert plan_dtypes(con, "t", columns=["small", "x"]) == {  # nosec: B101
+        "small": "int8"
+    }
+    assert "state" not in plan_dtypes(con, "t", max_categories=2)  # nosec: B101
+    filtered = plan_dtypes(con, "t", filters=[("id", "<", 100), ("state", "!=", "UT")])
+    assert filtered["id"] == "int8"  # nosec: B101
+    assert filtered["missing"] == "Int8"  # nosec: B101
+    assert filtered["state"] == pd.CategoricalDtype(["CO", "NM"])  # nosec: B101
+
+
+def test_plan_datetimes(tmp_path: Path) -> None:
+    """Dates and times are only parsed if none of them would be lost."""
+    columns = {
+        "day": ["2020-01-01", "2020-12-31", None],
+        "stamp": ["2020-01-01 10:00:00", "2020-01-02 11:30:00", None],
+        "fraction": ["2020-01-01 10:00:00.500", "2020-01-02 11:30:00.000", None],
+        "mixed": ["2020-01-01", "2020-01-02 11:30:00", None],
+        "offset": ["2020-01-01 10:00:00+05:00", "2020-01-02 11:30:00", None],
+        "far": ["2020-01-01", "9999-12-31", None],
+        "junk": ["2020-01-01", "someday", None],
+        "julian": ["2459000.5", "2459001.5", None],
+    }
+    con = sqlite3.connect(tmp_path / "dates.db")
+    con.execute(f"CREATE TABLE t ({', '.join(f'{c} DATETIME' for c in columns)})")
+    con.executemany(
+        f"INSERT INTO t VALUES ({', '.join('?' * len(columns))})",
+        zip(*columns.values()),
+    )
+    plan = plan_dtypes(con, "t")
+    assert plan == dict.fromkeys(  # nosec: B101
+        ["day", "stamp", "fraction"], "datetime64[ns]"
+    )
+    df = pd.read_sql("SELECT * FROM t", con, **with_plan({}, plan))
+    assert df[list(plan)].notna().sum().tolist() == [2, 2, 2]  # nosec: B101
+    con.close()
+
+
+def test_with_plan() -> None:
+    """Dtypes and dates given explicitly take precedence over the plan."""
+    plan = {"a": "int8", "b": "category", "c": "datetime64[ns]", "d": "datetime64[ns]"}
+    kwargs = with_plan({"dtype": {"a": "int64"}, "parse_dates": ["d"]}, plan)
+    assert kwargs == {  # nosec: B101
+        "dtype": {"a": "int64", "b": "category"},
+        "parse_dates": ["d", "c"],
+    }
+    assert with_plan({"index_col": "a"}, {}) == {"index_col": "a"}  # nosec: B101
@@ -0,0 +1,55 @@
+"""Unit tests for tracking high-water marks and storing rows read incrementally."""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from intake_sqlite.incremental import WatermarkStore, concat_frames, new_rows_filters
+
+logger = logging.getLogger(__name__)
+
+
+def test_new_rows_filters() -> None:
+    """The range of new values is added to every conjunction of the filters."""
+    assert new_rows_filters(None, "rowid", None, None) == [[]]  # nosec: B101
+    assert new_rows_filters(None, "rowid", 5, 9) == [  # nosec: B101
+        [("rowid", ">", 5), ("rowid", "<=", 9)]
+    ]
+    assert new_rows_filters(  # nosec: B101
+        [[("a", "==", 1)], [("b", "==", 2)]], "id", None, 9
+    ) == [[("a", "==", 1), ("id", "<=", 9)], [("b", "==", 2), ("id", "<=", 9)]]
+
+
+def test_concat_frames() -> None:
+    """Categorical columns stay categorical when their categories differ."""
+    df = concat_frames(
+        [
+            pd.DataFrame({"s": pd.Categorical(["a", "b"])}),
+            pd.DataFrame({"s": pd.Categorical(["c"])}),
+        ]
+    )
+    assert df.s.dtype == pd.CategoricalDtype(["a", "b", "c"])  # nosec: B101
+    assert list(df.s) == ["a", "b", "c"]  # nosec: B101
+
+
+def test_watermark_store(tmp_path: Path) -> None:
+    """Marks and batches of rows are stored, read back and cleared."""
+    store = WatermarkStore(tmp_path)
+    key = store.key("s3://bucket/log.sqlite", "log", watermark="rowid")
+    assert store.load(key) is None and store.rows(key) is None  # nosec: B101
+    first = pd.DataFrame({"x": [1.0, 2.0]}, index=pd.Index([1, 2], name="id"))
+    second = pd.DataFrame({"x": [3.0]}, index=pd.Index([3], name="id"))
+    store.advance(key, "rowid", 2, rows=first)
+    store.advance(key, "rowid", 2, rows=first.iloc[:0])
+    store.advance(key, "rowid", 3, rows=second)
+    assert store.load(key) == {  # nosec: B101
+        "column": "rowid",
+        "watermark": 3,
+        "batches": 2,
+    }
+    assert_frame_equal(pd.concat([first, second]), store.rows(key))
+    store.clear(key)
+    assert store.load(key) is None and store.rows(key) is None  # nosec: B101
@@ -0,0 +1,83 @@
+"""Unit tests for recording the phases of reads."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from intake_sqlite.instrument import (
+    Span,
+    add_listener,
+    explain,
+    is_active,
+    record,
+    remove_listener,
+    span,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def test_span() -> None:
+    """Spans are only recorded while something is recording or listening."""
+    with span("fetch", bytes=10):
+        pass
+    assert not is_active()  # nosec: B101
+    heard: list[Span] = []
+    add_listener(heard.append)
+    try:
+        with record() as recorder:
+            with span("fetch", bytes=10) as attributes:
+                attributes["bytes"] += 5
+            with span("read", rows=3, partitions=1):
+                pass
+            with span("execute"):
+                pass
+    finally:
+        remove_listener(heard.append)
+    assert not is_active()  # nosec: B101
+    assert [s.name for s in heard] == ["fetch", "read", "execute"]  # nosec: B101
+    assert set(recorder.phases()) == {"fetch", "read", "execute"}  # nosec: B101
+    assert recorder.totals() == {  # nosec: B101
+        "bytes_fetched": 15,
+        "rows": 3,
+        "partitions": 1,
+        "queries": 1,
+        "connections": 0,
+    }
+    assert "bytes_fetched" in recorder.summary()  # nosec: B101
+
+
+def test_failing_listener(caplog: pytest.LogCaptureFixture) -> None:
+    """A listener that raises an exception doesn't break reads."""
+
+    def fail(span: Span) -> None:
+        raise RuntimeError("Oops")
+
+    add_listener(fail)
+    try:
+        with span("connect"):
+            pass
+    finally:
+        remove_listener(fail)
+    assert "listener" in caplog.text  # nosec: B101
+
+
+def test_explain(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    """Queries that filter rows by scanning a whole table are reported."""
+    con = sqlite3.connect(tmp_path / "test.db")
+    con.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, x INTEGER)")
+    with record(explain=True) as recorder:
+        explain(con, "SELECT * FROM t")
+        explain(con, "SELECT * FROM t WHERE id > ?", (5,))
+        explain(con, "PRAGMA table_info(t)")
+    assert not recorder.full_scans  # nosec: B101
+    assert len(recorder.plans) == 2  # nosec: B101
+
+    with record(explain=True) as recorder:
+        explain(con, "SELECT * FROM t WHERE x > ?", (5,))
+    con.close()
+    assert recorder.full_scans == ["t"]  # nosec: B101
+    assert "scans all of t" in caplog.text  # nosec: B101
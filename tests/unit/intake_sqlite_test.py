@@ -2,10 +2,13 @@
 from __future__ import annotations
 
 import logging
+import subprocess  # nosec: B404
+import sys
 from pathlib import Path
 
 import pytest
 
+import intake_sqlite
 from intake_sqlite import urlpath_to_sqliteurl
 
 logger = logging.getLogger(__name__)
@@ -28,6 +31,23 @@ BAD_URLS: list[tuple[str, type[Exception]]] = [
 ]
 
 
+def test_lazy_import() -> None:
+    """Importing the package imports none of its dependencies until they're used."""
+    code = "import sys, intake_sqlite; print(' '.join(sys.modules))"
+    result = subprocess.run(  # nosec: B603
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    heavy = {"dask", "intake", "pandas", "pkg_resources", "sqlalchemy"}
+    assert not heavy & set(result.stdout.split())  # nosec: B101
+    assert isinstance(intake_sqlite.__version__, str)  # nosec: B101
+    assert "SQLiteSource" in dir(intake_sqlite)  # nosec: B101
+    from intake_sqlite.sqlite_src import SQLiteSource
+
+    assert intake_sqlite.SQLiteSource is SQLiteSource  # nosec: B101
+    with pytest.raises(AttributeError):
+        intake_sqlite.SQLiteSauce
+
+
 @pytest.mark.parametrize("filename,exc", BAD_FILES)
 def test_bad_filenames(filename: str, exc: type[Exception], tmp_path: Path) -> None:
     """Test for failure on bad or non-existent files."""
@@ -54,7 +74,11 @@ def test_bad_urls(url: str, exc: type[Exception]) -> None:
 
 def test_local_path_to_sqliteurl() -> None:
     """Test our transformation of paths/URLs into SQL Alchemy URLs."""
-    expected_local_url = f"sqlite:///{DATA_DIR / 'test.db'}"
+    expected_local_url = (
+        f"sqlite+intake:///{(DATA_DIR / 'test.db').resolve().as_uri()}?mode=ro&"
+        "uri=true&cache_size=-65536&mmap_size=268435456&query_only=1&"
+        "temp_store=memory"
+    )
     test_db_path = DATA_DIR / "test.db"
     actual_local_url = urlpath_to_sqliteurl(str(test_db_path))
     assert actual_local_url == expected_local_url  # nosec: B101
@@ -0,0 +1,82 @@
+"""Unit tests for planning the partitions of manually partitioned sources."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+
+import pytest
+
+from intake_sqlite.manual import (
+    group_values,
+    plan_where_values,
+    scanning_clauses,
+    sql_literal,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def test_sql_literal() -> None:
+    """Values are written as literals that SQLite reads back unchanged."""
+    con = sqlite3.connect(":memory:")
+    for value in (None, 1, -(2**62), 0.1, float("inf"), "it's", b"\x00\xff"):
+        row = con.execute(f"SELECT {sql_literal(value)}").fetchone()
+        assert row == (value,)  # nosec: B101
+
+
+def test_group_values() -> None:
+    """Small values are grouped together, and large ones are kept apart."""
+    counts = [(2019, 10), (2020, 10), (2021, 10), (2022, 10)]
+    assert group_values(counts, 40, 2) == [  # nosec: B101
+        (2019, 2020, 20),
+        (2021, 2022, 20),
+    ]
+    counts = [(1, 1), (2, 1), (3, 50), (4, 1), (5, 1), (6, 1)]
+    assert group_values(counts, 55, 3) == [  # nosec: B101
+        (1, 2, 2),
+        (3, 3, 50),
+        (4, 6, 3),
+    ]
+    assert group_values([(1, 5)], 5, 10) == [(1, 1, 5)]  # nosec: B101
+    assert group_values([], 0, 3) == []  # nosec: B101
+
+
+def test_plan_where_values() -> None:
+    """Partitions cover every row once, and missing indexes are pointed out."""
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, year INTEGER, x REAL)")
+    con.executemany(
+        "INSERT INTO t VALUES (?, ?, ?)",
+        [(i, None if i < 5 else 2000 + i % 10, i / 2) for i in range(1000)],
+    )
+    plan = plan_where_values(con, "t", "year", npartitions=4)
+    assert len(plan.where_values) == 5  # nosec: B101
+    assert plan.where_values[-1] == 'WHERE "year" IS NULL'  # nosec: B101
+    assert plan.rows[-1] == 5 and sum(plan.rows) == 1000  # nosec: B101
+    counted = [
+        con.execute(f"SELECT COUNT(*) FROM t {clause}").fetchone()[0]  # nosec: B608
+        for clause in plan.where_values
+    ]
+    assert counted == plan.rows  # nosec: B101
+    assert not plan.uses_index  # nosec: B101
+    assert plan.suggested_index == (  # nosec: B101
+        'CREATE INDEX "t_year_idx" ON "t" ("year")'
+    )
+    assert scanning_clauses(con, plan.sql_expr, plan.where_values)  # nosec: B101
+    con.execute(plan.suggested_index)
+    plan = plan_where_values(con, "t", "year", npartitions=4)
+    assert plan.uses_index and plan.suggested_index is None  # nosec: B101
+    assert not scanning_clauses(con, plan.sql_expr, plan.where_values)  # nosec: B101
+    plan = plan_where_values(con, "t", "year", npartitions=4, columns=["year", "x"])
+    assert plan.sql_expr == 'SELECT "year", "x" FROM "t"'  # nosec: B101
+    assert plan.suggested_index == (  # nosec: B101
+        'CREATE INDEX "t_year_x_idx" ON "t" ("year", "x")'
+    )
+    plan = plan_where_values(con, "t", "id", rows_per_partition=300)
+    assert plan.rows == [250, 250, 250, 250]  # nosec: B101
+    assert plan.uses_index and plan.suggested_index is None  # nosec: B101
+    with pytest.raises(ValueError):
+        plan_where_values(con, "t", "year")
+    con.execute("CREATE TABLE empty (x)")
+    with pytest.raises(ValueError):
+        plan_where_values(con, "empty", "x", npartitions=2)
@@ -0,0 +1,89 @@
+"""Unit tests for choosing balanced partition boundaries."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+
+from intake_sqlite.partition import (
+    balanced_divisions,
+    count_rows,
+    decode_first_value,
+    quote_identifier,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture()
+def skewed() -> Iterator[sqlite3.Connection]:
+    """A table whose IDs are dense at the start and sparse at the end."""
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, x REAL)")
+    ids = list(range(1, 10_001)) + [10**6 * i for i in range(1, 11)]
+    con.executemany("INSERT INTO t VALUES (?, ?)", [(i, i / 2) for i in ids])
+    yield con
+    con.close()
+
+
+@pytest.mark.parametrize(
+    "record,expected",
+    [
+        (bytes([2, 0]), None),
+        (bytes([2, 1, 0x85]), -123),
+        (bytes([2, 4, 0, 1, 0, 0]), 65536),
+        (bytes([2, 7, 0x3F, 0xF8]) + bytes(6), 1.5),
+        (bytes([2, 9]), 1),
+        (bytes([2, 19]) + b"abc", "abc"),
+        (bytes([2, 18]) + b"abc", b"abc"),
+    ],
+)
+def test_decode_first_value(record: bytes, expected: object) -> None:
+    """Values of each serial type are decoded from SQLite records."""
+    assert decode_first_value(record) == expected  # nosec: B101
+
+
+def test_quote_identifier() -> None:
+    """Embedded quotes are escaped."""
+    assert quote_identifier('my "table"') == '"my ""table"""'  # nosec: B101
+
+
+def test_balanced_divisions(skewed: sqlite3.Connection) -> None:
+    """Partitions have similar numbers of rows even though the IDs are skewed."""
+    divisions = balanced_divisions(skewed, "t", "id", npartitions=4)
+    assert divisions[0] == 1  # nosec: B101
+    assert divisions[-1] == 10**7  # nosec: B101
+    assert len(divisions) == 5  # nosec: B101
+    sizes = [
+        skewed.execute(
+            "SELECT COUNT(*) FROM t WHERE id >= ? AND id < ?", (lo, hi)
+        ).fetchone()[0]
+        for lo, hi in zip(divisions[:-1], divisions[1:])
+    ]
+    assert max(sizes) - min(sizes) <= 20  # nosec: B101
+
+
+def test_rows_per_partition(skewed: sqlite3.Connection) -> None:
+    """The number of partitions is chosen from the target partition size."""
+    divisions = balanced_divisions(skewed, "t", rows_per_partition=1000)
+    assert len(divisions) == 12  # nosec: B101
+
+
+def test_count_rows_estimate(skewed: sqlite3.Connection) -> None:
+    """Row counts recorded by ANALYZE are used when an estimate is acceptable."""
+    assert count_rows(skewed, "t", estimate=True) == 10_010  # nosec: B101
+    skewed.execute("CREATE INDEX t_x ON t (x)")
+    skewed.execute("ANALYZE")
+    skewed.execute("DELETE FROM t WHERE id < 11")
+    assert count_rows(skewed, "t", estimate=True) == 10_010  # nosec: B101
+    assert count_rows(skewed, "t") == 10_000  # nosec: B101
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"npartitions": 2, "rows_per_partition": 1000}])
+def test_bad_arguments(skewed: sqlite3.Connection, kwargs: dict[str, Any]) -> None:
+    """Exactly one of npartitions and rows_per_partition is required."""
+    with pytest.raises(ValueError):
+        balanced_divisions(skewed, "t", "id", **kwargs)
@@ -0,0 +1,67 @@
+"""Unit tests for persisted partition plans."""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from pathlib import Path
+
+import dask.dataframe as dd
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from intake_sqlite.plans import (
+    PlanCache,
+    count_partition_rows,
+    database_id,
+    decode_dtypes,
+    encode_dtypes,
+    make_plan,
+    plan_divisions,
+    plan_meta,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def test_count_partition_rows() -> None:
+    """Rows are counted with the same boundaries dask uses to read partitions."""
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+    con.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(100)])
+    assert count_partition_rows(con, "t", "id", [0, 10, 50, 99]) == [  # nosec: B101
+        10,
+        40,
+        50,
+    ]
+    assert count_partition_rows(con, "t", "id", [0, 99]) == [100]  # nosec: B101
+    assert count_partition_rows(con, "t", "id", ["a", "b"]) is None  # nosec: B101
+    con.close()
+
+
+def test_encode_dtypes() -> None:
+    """Dtypes, including categories, survive a round trip through JSON."""
+    dtypes = {"a": "int8", "b": pd.CategoricalDtype(["x", "y"]), "c": "Int16"}
+    encoded = json.loads(json.dumps(encode_dtypes(dtypes)))
+    assert decode_dtypes(encoded) == dtypes  # nosec: B101
+
+
+def test_plan_round_trip(tmp_path: Path) -> None:
+    """A plan recreates the meta and divisions of the dataframe it was made from."""
+    df = pd.DataFrame(
+        {"x": [1.5, 2.5, 3.5, 4.5], "s": pd.Categorical(["a", "b", "a", "b"])},
+        index=pd.date_range("2020-01-01", periods=4, name="day"),
+    )
+    ddf = dd.from_pandas(df, npartitions=2)  # type: ignore[attr-defined]
+    db_path = tmp_path / "test.db"
+    sqlite3.connect(db_path).close()
+    plan = json.loads(
+        json.dumps(make_plan(ddf, {"table": "t"}, database=database_id(db_path)))
+    )
+    assert_frame_equal(ddf._meta, plan_meta(plan), check_freq=False)
+    assert plan_divisions(plan) == list(ddf.divisions)  # nosec: B101
+    cache = PlanCache(tmp_path / "plans")
+    assert cache.load(db_path, {"table": "t"}) is None  # nosec: B101
+    cache.save(db_path, plan)
+    assert cache.load(db_path, {"table": "t"}) == plan  # nosec: B101
+    assert cache.load(db_path, {"table": "u"}) is None  # nosec: B101
@@ -0,0 +1,145 @@
+"""Unit tests for sharing connections between engines."""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import sqlite3
+import sys
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from intake_sqlite import SQLiteSource, urlpath_to_sqliteurl
+from intake_sqlite.pool import (
+    dispose,
+    get_engine,
+    pool_stats,
+    pooled_connection,
+    set_max_idle,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture()
+def db_url(tmp_path: Path) -> Iterator[str]:
+    """URL of a small database, whose connections are disposed of afterwards."""
+    path = tmp_path / "test.sqlite"
+    with sqlite3.connect(path) as con:
+        con.execute("CREATE TABLE t (x INTEGER)")
+        con.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(10)])
+    con.close()
+    url = urlpath_to_sqliteurl(str(path))
+    yield url
+    dispose(url)
+
+
+def test_engines_share_connections(db_url: str) -> None:
+    """Separately created engines reuse each other's idle connections."""
+    for _ in range(5):
+        engine = sa.create_engine(db_url)
+        assert len(pd.read_sql("t", engine)) == 10  # nosec: B101
+        engine.dispose()
+    assert pool_stats(db_url) == {  # nosec: B101
+        "hits": 4,
+        "misses": 1,
+        "idle": 1,
+        "closed": 0,
+        "stale": 0,
+    }
+    assert get_engine(db_url) is get_engine(db_url)  # nosec: B101
+
+
+def test_repeated_reads(db_url: str, tmp_path: Path) -> None:
+    """Repeated reads from sources reuse a warm connection."""
+    path = str(tmp_path / "test.sqlite")
+    for engine in ("pandas", "arrow"):
+        for _ in range(3):
+            df = SQLiteSource(path, "t", engine=engine).read()
+            assert len(df) == 10  # nosec: B101
+    stats = pool_stats(db_url)
+    assert stats["misses"] == 1  # nosec: B101
+    assert stats["hits"] == 5  # nosec: B101
+
+
+def test_changed_file(tmp_path: Path) -> None:
+    """Idle connections aren't reused once their database file has changed."""
+    path = tmp_path / "test.sqlite"
+    with sqlite3.connect(path) as con:
+        con.execute("CREATE TABLE t (x INTEGER)")
+    con.close()
+    # Immutable connections can't see changes, so they mustn't outlive them.
+    url = urlpath_to_sqliteurl(str(path), {"immutable": True})
+    total = 0
+    try:
+        for rows in (10, 5000, 20000):
+            with sqlite3.connect(path) as con:
+                con.executemany("INSERT INTO t VALUES (?)", [(0,)] * rows)
+            con.close()
+            total += rows
+            for _ in range(2):
+                with pooled_connection(url) as con:
+                    count = con.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+                assert count == total  # nosec: B101
+        stats = pool_stats(url)
+        assert stats["stale"] == 2  # nosec: B101
+        assert stats["hits"] == 3  # nosec: B101
+    finally:
+        dispose(url)
+
+
+def test_threads(db_url: str) -> None:
+    """Connections can be used by many threads, one at a time."""
+
+    def count(_: int) -> int:
+        with pooled_connection(db_url) as con:
+            return int(con.execute("SELECT COUNT(*) FROM t").fetchone()[0])
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert set(executor.map(count, range(100))) == {10}  # nosec: B101
+    stats = pool_stats(db_url)
+    assert stats["hits"] + stats["misses"] == 100  # nosec: B101
+    assert stats["misses"] <= 4  # nosec: B101
+
+
+def test_max_idle_and_dispose(db_url: str) -> None:
+    """Connections beyond the idle limit are closed, and dispose closes the rest."""
+    previous = set_max_idle(1)
+    try:
+        with pooled_connection(db_url) as first, pooled_connection(db_url) as second:
+            assert first is not second  # nosec: B101
+    finally:
+        set_max_idle(previous)
+    assert pool_stats(db_url)["closed"] == 1  # nosec: B101
+    assert pool_stats(db_url)["idle"] == 1  # nosec: B101
+    dispose(db_url)
+    assert pool_stats(db_url)["idle"] == 0  # nosec: B101
+
+
+def _count_in_child(db_url: str, queue: multiprocessing.Queue[object]) -> None:
+    stats = pool_stats(db_url)
+    with pooled_connection(db_url) as con:
+        queue.put((stats, con.execute("SELECT COUNT(*) FROM t").fetchone()[0]))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fork is not available")
+def test_fork(db_url: str) -> None:
+    """Child processes don't use connections inherited from their parent."""
+    with pooled_connection(db_url):
+        pass
+    assert pool_stats(db_url)["idle"] == 1  # nosec: B101
+    ctx = multiprocessing.get_context("fork")
+    queue: multiprocessing.Queue[object] = ctx.Queue()
+    proc = ctx.Process(target=_count_in_child, args=(db_url, queue))
+    proc.start()
+    stats: dict[str, int]
+    count: int
+    stats, count = queue.get(timeout=30)  # type: ignore[misc]
+    proc.join()
+    assert stats["idle"] == 0  # nosec: B101
+    assert count == 10  # nosec: B101
+    assert pool_stats(db_url)["idle"] == 1  # nosec: B101
@@ -0,0 +1,113 @@
+"""Unit tests for pushing column selections and filters down into SQL."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from typing import Any
+
+import pytest
+
+from intake_sqlite.pushdown import (
+    filters_may_match,
+    index_bounds,
+    normalize_filters,
+    prune_divisions,
+    select_sql,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def test_normalize_filters() -> None:
+    """Flat lists and lists from YAML are converted to lists of tuples."""
+    assert normalize_filters(None) == []  # nosec: B101
+    assert normalize_filters([("a", "==", 1)]) == [[("a", "==", 1)]]  # nosec: B101
+    assert normalize_filters(  # nosec: B101
+        [[["a", "in", [1, 2]]], [["b", ">", 3]]]
+    ) == [[("a", "in", [1, 2])], [("b", ">", 3)]]
+    for bad in ([("a", "~", 1)], [("a", "in", "xy")], [[("a", "==")]]):
+        with pytest.raises(ValueError):
+            normalize_filters(bad)
+
+
+@pytest.mark.parametrize(
+    "filters,expected",
+    [
+        ([("b", "==", None)], [3]),
+        ([("b", "!=", None), ("a", ">=", 2)], [2]),
+        ([("a", "not in", [1, 2])], [3]),
+        ([[("a", "<", 2)], [("b", "==", "it's")]], [1, 2]),
+        ([("b", "==", "x'; DROP TABLE t; --")], []),
+    ],
+)
+def test_select_sql(filters: Any, expected: list[int]) -> None:
+    """Filters compile to parameterized SQL that selects the expected rows."""
+    con = sqlite3.connect(":memory:")
+    con.execute('CREATE TABLE "my t" (a INTEGER, b TEXT)')
+    con.execute("""INSERT INTO "my t" VALUES (1, 'x'), (2, 'it''s'), (3, NULL)""")
+    sql, params = select_sql("my t", True, columns=["a"], filters=filters)
+    assert [a for a, in con.execute(sql, params)] == expected  # nosec: B101
+    con.close()
+
+
+def test_select_sql_query_params() -> None:
+    """Filter parameters are combined with those of the query being filtered."""
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE t (a INTEGER)")
+    con.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(10)])
+    filters = [("a", "<", 8)]
+    for query, params in (
+        ("SELECT * FROM t WHERE a > ?", [3]),
+        ("SELECT * FROM t WHERE a > :low", {"low": 3}),
+    ):
+        sql, all_params = select_sql(query, False, filters=filters, params=params)
+        rows = con.execute(sql, all_params).fetchall()
+        assert rows == [(4,), (5,), (6,), (7,)]  # nosec: B101
+    assert select_sql("t", True) == ('SELECT * FROM "t"', ())  # nosec: B101
+    con.close()
+
+
+def test_index_bounds() -> None:
+    """Bounds cover every conjunction, ignoring filters on other columns."""
+    assert index_bounds([], "id") == (None, None)  # nosec: B101
+    assert index_bounds([("x", ">", 5)], "id") == (None, None)  # nosec: B101
+    assert index_bounds(  # nosec: B101
+        [("id", ">", 5), ("id", "<=", 10), ("id", "<", 8)], "id"
+    ) == (5, 8)
+    assert index_bounds(  # nosec: B101
+        [[("id", "in", [20, 3])], [("id", "==", 50)]], "id"
+    ) == (3, 50)
+    assert index_bounds([[("id", ">", 5)], [("id", "<", 2)]], "id") == (  # nosec: B101
+        None,
+        None,
+    )
+    assert index_bounds([("id", ">", 5), ("id", "<", 2)], "id") is None  # nosec: B101
+    assert index_bounds([("id", "in", [])], "id") is None  # nosec: B101
+
+
+def test_filters_may_match() -> None:
+    """Filters that can't match any values in the ranges are detected."""
+    year = {"year": (2020, 2020)}
+    assert filters_may_match(None, year)  # nosec: B101
+    assert filters_may_match([("year", ">=", 2019)], year)  # nosec: B101
+    assert filters_may_match([("x", "==", 1)], year)  # nosec: B101
+    assert not filters_may_match(
+        [("year", "<", 2020), ("x", "==", 1)], {"year": (2021, 2023)}
+    )  # nosec: B101
+    assert not filters_may_match([("year", "!=", 2020)], year)  # nosec: B101
+    assert not filters_may_match([("year", "in", [2018, 2019])], year)  # nosec: B101
+    assert filters_may_match(  # nosec: B101
+        [[("year", "==", 2019)], [("year", "==", 2020)]], year
+    )
+    assert filters_may_match([("year", "==", "2019")], year)  # nosec: B101
+
+
+def test_prune_divisions() -> None:
+    """Only partitions overlapping the bounds are kept."""
+    divisions = [0, 10, 20, 30, 40]
+    assert prune_divisions(divisions, (None, None)) == divisions  # nosec: B101
+    assert prune_divisions(divisions, (10, 25)) == [10, 20, 30]  # nosec: B101
+    assert prune_divisions(divisions, (None, 9)) == [0, 10]  # nosec: B101
+    assert prune_divisions(divisions, (40, None)) == [30, 40]  # nosec: B101
+    assert prune_divisions(divisions, (41, None)) == [0, 10]  # nosec: B101
+    assert prune_divisions(divisions, None) == [0, 10]  # nosec: B101
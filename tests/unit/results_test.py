@@ -0,0 +1,66 @@
+"""Unit tests for the on-disk query result cache."""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from intake_sqlite.results import ResultCache, fingerprint, normalize_sql
+
+logger = logging.getLogger(__name__)
+
+
+def test_normalize_sql() -> None:
+    """Whitespace is collapsed, except within quotes."""
+    assert (  # nosec: B101
+        normalize_sql("  SELECT *\n  FROM  t\tWHERE x = 'a  b'  ;\n")
+        == "SELECT * FROM t WHERE x = 'a  b'"
+    )
+    sql = 'SELECT  "my  col" FROM t'
+    assert normalize_sql(sql) == 'SELECT "my  col" FROM t'  # nosec: B101
+
+
+def test_fingerprint(tmp_path: Path) -> None:
+    """The fingerprint changes when the database is modified."""
+    path = tmp_path / "test.db"
+    with sqlite3.connect(path) as con:
+        con.execute("CREATE TABLE t (x INTEGER)")
+    before = fingerprint(path)
+    assert fingerprint(path) == before  # nosec: B101
+    with sqlite3.connect(path) as con:
+        con.execute("INSERT INTO t VALUES (1)")
+    con.close()
+    assert fingerprint(path) != before  # nosec: B101
+
+
+@pytest.mark.parametrize("format", ["feather", "parquet"])
+def test_result_cache(tmp_path: Path, format: str) -> None:  # noqa: A002
+    """Results are stored and loaded, and the least recently used are evicted."""
+    db_path = tmp_path / "test.db"
+    db_path.write_bytes(b"SQLite format 3\x00")
+    df = pd.DataFrame(
+        {"x": range(1000), "y": [str(i) for i in range(1000)]},
+        index=pd.Index(range(1000), name="id"),
+    )
+    cache = ResultCache(tmp_path / "results", format=format)
+    keys = [cache.key(db_path, "SELECT * FROM t", params=[i]) for i in range(3)]
+    assert len(set(keys)) == 3  # nosec: B101
+    assert keys[0] == cache.key(db_path, "SELECT *\nFROM t;", params=[0])  # nosec: B101
+    assert cache.get(keys[0]) is None  # nosec: B101
+    for i, key in enumerate(keys):
+        os.utime(cache.put(key, df), (i, i))  # type: ignore[arg-type]
+    assert_frame_equal(df, cache.get(keys[0]))
+    stats = cache.stats()
+    assert [stats[k] for k in ("hits", "misses", "entries")] == [1, 1, 3]  # nosec: B101
+
+    cache.max_bytes = stats["bytes"] * 2 // 3
+    assert cache.evict() == [cache._path(keys[1])]  # nosec: B101
+    assert cache.get(keys[1]) is None  # nosec: B101
+    assert cache.stats()["evictions"] == 1  # nosec: B101
+    cache.clear()
+    assert cache.size() == 0  # nosec: B101
@@ -0,0 +1,52 @@
+"""Unit tests for drawing random rowids to sample tables."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+
+import numpy as np
+import pytest
+
+from intake_sqlite.sample import limit_sql, random_rowids, rowid_range, sample_size
+
+logger = logging.getLogger(__name__)
+
+
+def test_rowid_range() -> None:
+    """The range of rowids is found for tables, but not for views."""
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE t (x)")
+    assert rowid_range(con, "t") is None  # nosec: B101
+    con.executemany("INSERT INTO t (rowid, x) VALUES (?, ?)", [(3, 1), (9, 2)])
+    assert rowid_range(con, "t") == (3, 9)  # nosec: B101
+    first = con.execute(limit_sql("SELECT x FROM t", 1)).fetchall()
+    assert first == [(1,)]  # nosec: B101
+    con.execute("CREATE VIEW v AS SELECT x FROM t")
+    con.execute("CREATE TABLE w (k PRIMARY KEY) WITHOUT ROWID")
+    for name in ("v", "w"):
+        with pytest.raises(ValueError):
+            rowid_range(con, name)
+
+
+def test_sample_size() -> None:
+    """Either a number or a fraction of the rows is sampled."""
+    assert sample_size(5, None, (1, 100)) == (5, True)  # nosec: B101
+    assert sample_size(500, None, (1, 100)) == (100, True)  # nosec: B101
+    assert sample_size(None, 0.25, (1, 100)) == (25, False)  # nosec: B101
+    for n, frac in ((None, None), (1, 0.5), (-1, None), (None, 1.5)):
+        with pytest.raises(ValueError):
+            sample_size(n, frac, (1, 100))
+
+
+def test_random_rowids() -> None:
+    """Rowids are distinct, sorted, within range and never drawn twice."""
+    rng = np.random.default_rng(0)
+    first = random_rowids((10, 59), 30, rng)
+    assert len(first) == 30 and len(set(first)) == 30  # nosec: B101
+    assert (np.diff(first) > 0).all()  # nosec: B101
+    assert first.min() >= 10 and first.max() <= 59  # nosec: B101
+    rest = random_rowids((10, 59), 30, rng, first)
+    assert len(rest) == 20  # nosec: B101
+    assert sorted(np.union1d(first, rest)) == list(range(10, 60))  # nosec: B101
+    again = random_rowids((10, 59), 30, np.random.default_rng(0))
+    assert (first == again).all()  # nosec: B101
@@ -0,0 +1,53 @@
+"""Unit tests for finding the shards of a dataset and the values they hold."""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+from intake_sqlite.shards import expand_shards, ordered_divisions, shard_ranges
+
+logger = logging.getLogger(__name__)
+
+
+def test_expand_shards(tmp_path: Path) -> None:
+    """Globs are expanded in sorted order, and explicit paths are kept in order."""
+    for name in ("b.sqlite", "a.sqlite", "c.db"):
+        (tmp_path / name).touch()
+    assert expand_shards(str(tmp_path / "*.sqlite")) == [  # nosec: B101
+        str(tmp_path / "a.sqlite"),
+        str(tmp_path / "b.sqlite"),
+    ]
+    assert expand_shards(  # nosec: B101
+        [str(tmp_path / "c.db"), str(tmp_path / "[ab].sqlite")]
+    ) == [str(tmp_path / name) for name in ("c.db", "a.sqlite", "b.sqlite")]
+    assert expand_shards(  # nosec: B101
+        f"file://{tmp_path}/*.db", storage_options={"lazy": True}
+    ) == [f"file://{tmp_path}/c.db"]
+
+
+def test_shard_ranges() -> None:
+    """Values are found in URLs, and given explicitly by URL or file name."""
+    shards = ["s3://bucket/cems-2019-co.sqlite", "s3://bucket/cems-2020-nm.sqlite"]
+    ranges = shard_ranges(
+        shards,
+        pattern=r"cems-(?P<year>\d+)-(?P<state>\w+)",
+        metadata={"cems-2020-nm.sqlite": {"id": [100, 200], "year": 2021}},
+    )
+    assert ranges == [  # nosec: B101
+        {"year": (2019, 2019), "state": ("co", "co")},
+        {"year": (2021, 2021), "state": ("nm", "nm"), "id": (100, 200)},
+    ]
+
+
+def test_ordered_divisions() -> None:
+    """Divisions are only known when the ranges are in order and don't overlap."""
+    assert ordered_divisions([(0, 9), (10, 19), (25, 30)]) == [  # nosec: B101
+        0,
+        10,
+        25,
+        30,
+    ]
+    assert ordered_divisions([(0, 10), (10, 19)]) is None  # nosec: B101
+    assert ordered_divisions([(10, 19), (0, 9)]) is None  # nosec: B101
+    assert ordered_divisions([(0, 9), None]) is None  # nosec: B101
+    assert ordered_divisions([]) is None  # nosec: B101
@@ -0,0 +1,165 @@
+"""Unit tests for profiling columns in SQL."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from intake_sqlite.stats import (
+    PROFILE_STATS,
+    DistinctSketch,
+    ProfileCache,
+    estimated_rows,
+    merge_profiles,
+    profile_frame,
+    profile_query,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def test_distinct_sketch() -> None:
+    """Distinct values are estimated closely, and merging sketches counts each once."""
+    sketch = DistinctSketch()
+    for value in [*range(50_000), *range(50_000)]:
+        sketch.step(value)
+    assert abs(sketch.estimate() - 50_000) < 0.05 * 50_000  # nosec: B101
+    numbers = DistinctSketch()
+    for value in [1, 1.0, 2, 2.5, None]:
+        numbers.step(value)
+    # 1 and 1.0 are the same value in SQLite, and nulls aren't counted.
+    assert numbers.estimate() == 3  # nosec: B101
+    texts = DistinctSketch()
+    for value in ["a", "b", "a"]:
+        texts.step(value)
+    assert texts.estimate() == 2  # nosec: B101
+    other = DistinctSketch()
+    for value in range(25_000, 75_000):
+        other.step(value)
+    sketch.merge(DistinctSketch(other.finalize()))
+    assert abs(sketch.estimate() - 75_000) < 0.05 * 75_000  # nosec: B101
+
+
+def test_distinct_storage_classes() -> None:
+    """Values are distinct if SQLite considers them distinct, whatever the batch."""
+    texts = DistinctSketch()
+    for text in ["01234", "1234", "1234.0", "1e3", "1000"]:
+        texts.step(text)
+    assert texts.estimate() == 5  # nosec: B101
+    mixed = DistinctSketch()
+    values: list[Any] = ["1", 1, 1.0, b"1", 2.5]
+    for value in values:
+        mixed.step(value)
+    assert mixed.estimate() == 4  # nosec: B101
+    big = DistinctSketch()
+    for number in [2**53, 2**53 + 1, 2**62 + 1, 2**62 + 2]:
+        big.step(number)
+    assert big.estimate() == 4  # nosec: B101
+    # The same values are hashed the same way in batches of different types.
+    alone = DistinctSketch()
+    alone.step(1234)
+    together = DistinctSketch()
+    for value in [1234, "x"]:
+        together.step(value)
+    alone.merge(together)
+    assert alone.estimate() == 2  # nosec: B101
+
+
+def test_profile_query() -> None:
+    """Statistics computed in SQL match those computed by pandas."""
+    con = sqlite3.connect(":memory:")
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "n": rng.integers(0, 100, 1000),
+            "x": rng.random(1000),
+            "s": rng.choice(["a", "b", "c"], 1000),
+        }
+    )
+    df.loc[::10, "x"] = None
+    df.to_sql("t", con, index=False)
+    profile = profile_query(con, "SELECT * FROM t")
+    stats = profile_frame(profile)
+    assert list(stats.index) == list(PROFILE_STATS)  # nosec: B101
+    assert list(stats.columns) == ["n", "x", "s"]  # nosec: B101
+    assert stats.loc["count"].tolist() == [1000, 900, 1000]  # nosec: B101
+    assert stats.loc["nulls"].tolist() == [0, 100, 0]  # nosec: B101
+    assert np.allclose(  # nosec: B101
+        stats.loc["distinct"].tolist(), df.nunique().tolist(), rtol=0.05
+    )
+    assert np.isclose(stats.loc["mean", "x"], df.x.mean())  # nosec: B101
+    assert stats.loc["mean", "s"] is None  # nosec: B101
+    assert stats.loc["min", "s"] == "a"  # nosec: B101
+    assert stats.loc["max", "n"] == df.n.max()  # nosec: B101
+    # Profiles of parts of the table merge into the profile of the whole of it.
+    parts = [
+        profile_query(con, "SELECT * FROM t WHERE rowid <= ?", [500]),
+        profile_query(con, "SELECT * FROM t WHERE rowid > ?", [500]),
+    ]
+    merged = profile_frame(merge_profiles(parts))
+    assert_frame_equal(
+        stats.drop(["mean", "distinct"]), merged.drop(["mean", "distinct"])
+    )
+    assert np.isclose(merged.loc["mean", "x"], df.x.mean())  # nosec: B101
+    assert merged.loc["distinct"].equals(stats.loc["distinct"])  # nosec: B101
+    # Without distinct counts, no Python function is called for each value.
+    plain = profile_frame(profile_query(con, "SELECT s FROM t", distinct=False))
+    assert plain.loc["distinct", "s"] is None  # nosec: B101
+    con.close()
+
+
+def test_mixed_types() -> None:
+    """Values of different types are ordered as SQLite orders them when merged."""
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE t (v)")
+    con.executemany("INSERT INTO t VALUES (?)", [(2,), ("x",), (b"\x00",), (0.5,)])
+    parts = [
+        profile_query(con, "SELECT v FROM t WHERE rowid = ?", [i]) for i in range(1, 5)
+    ]
+    merged = profile_frame(merge_profiles(parts))
+    whole = profile_frame(profile_query(con, "SELECT v FROM t"))
+    assert_frame_equal(whole, merged)
+    assert whole.loc["min", "v"] == 0.5  # nosec: B101
+    assert whole.loc["max", "v"] == b"\x00"  # nosec: B101
+    assert whole.loc["mean", "v"] == 1.25  # nosec: B101
+    con.close()
+
+
+def test_estimated_rows() -> None:
+    """Row counts are only known for tables that have been analyzed."""
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, x)")
+    con.executemany("INSERT INTO t (x) VALUES (?)", [(i,) for i in range(30)])
+    con.execute("CREATE INDEX t_x ON t (x)")
+    assert estimated_rows(con) == {}  # nosec: B101
+    con.execute("ANALYZE")
+    assert estimated_rows(con) == {"t": 30}  # nosec: B101
+    con.close()
+
+
+def test_profile_cache(tmp_path: Path) -> None:
+    """Profiles survive a round trip, and are keyed by the database's contents."""
+    db_path = tmp_path / "test.db"
+    con = sqlite3.connect(db_path)
+    con.execute("CREATE TABLE t (b BLOB, s TEXT)")
+    con.execute("INSERT INTO t VALUES (?, ?)", (b"\xff", None))
+    con.commit()
+    profile = profile_frame(profile_query(con, "SELECT * FROM t"))
+    cache = ProfileCache(tmp_path / "profiles")
+    key = cache.key([(db_path, "SELECT * FROM t", ())], distinct=True)
+    assert cache.load(key) is None  # nosec: B101
+    cache.save(key, profile)
+    assert_frame_equal(profile, cache.load(key))
+    # The same query, written differently.
+    same = cache.key([(db_path, "SELECT  *  FROM t", ())], distinct=True)
+    assert same == key  # nosec: B101
+    assert cache.key([(db_path, "SELECT * FROM t", ())], False) != key  # nosec: B101
+    con.execute("INSERT INTO t VALUES (NULL, 'x')")
+    con.commit()
+    con.close()
+    assert cache.key([(db_path, "SELECT * FROM t", ())], True) != key  # nosec: B101